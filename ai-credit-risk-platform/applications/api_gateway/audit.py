@@ -0,0 +1,365 @@
+"""
+Audit logging for the API Gateway
+
+Every request that goes through authentication is recorded once its response
+has been sent. Recording only appends to an in-memory buffer. A background
+thread writes the buffer to the sink in bulk, as soon as AUDIT_LOG_BATCH_SIZE
+entries are waiting or every AUDIT_LOG_FLUSH_INTERVAL_SECONDS. Entries the sink
+cannot take go to a local spill file, which is fsynced. That happens when the
+sink fails, or falls so far behind that the buffer fills up. Spilled entries
+are replayed once the sink recovers, and on the next start after a crash, so
+a crash can only lose what was still buffered. A replayed batch that the sink
+refuses AUDIT_LOG_QUARANTINE_AFTER times, each time right after accepting
+another write, is moved to a quarantine file next to the spill file rather
+than blocking the replay (and every recovery) for good.
+
+Entries for assessment requests also carry the decisions made, with their
+inputs (request.state.assessments). The database sink stores them in the
+assessments table, in the same transaction as the audit rows, so the
+stored book gets the same batching and durability as the audit log.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Protocol
+
+import orjson
+from prometheus_client import Counter, Gauge, Histogram
+import structlog
+from starlette.types import Scope
+
+from .config import settings
+
+logger = structlog.get_logger()
+
+# Widths of the audit_logs columns (database.py); longer values are cut so
+# that one request cannot fail a whole batch on databases that enforce them
+ACTION_MAX_LENGTH = 16
+RESOURCE_MAX_LENGTH = 512
+USER_AGENT_MAX_LENGTH = 512
+
+# Prometheus metrics
+AUDIT_RECORDS_BUFFERED = Gauge(
+    'audit_records_buffered',
+    'Audit entries waiting to be written',
+    multiprocess_mode='livesum'
+)
+
+AUDIT_RECORDS_WRITTEN = Counter(
+    'audit_records_written_total',
+    'Audit entries written to the audit sink'
+)
+
+AUDIT_RECORDS_SPILLED = Counter(
+    'audit_records_spilled_total',
+    'Audit entries written to the local spill file',
+    ['reason']
+)
+
+AUDIT_RECORDS_QUARANTINED = Counter(
+    'audit_records_quarantined_total',
+    'Spilled audit entries set aside because the sink kept refusing them'
+)
+
+AUDIT_SINK_ERRORS = Counter(
+    'audit_sink_errors_total',
+    'Failed bulk writes to the audit sink'
+)
+
+AUDIT_FLUSH_DURATION = Histogram(
+    'audit_flush_duration_seconds',
+    'Duration of bulk writes to the audit sink',
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+
+
+class AuditSink(Protocol):
+    """Destination for batches of audit entries"""
+
+    def write(self, entries: List[Dict[str, Any]]) -> None:
+        ...
+
+
+class DatabaseAuditSink:
+    """
+    Writes each batch to the audit_logs table with one multi-row INSERT, and
+    the assessments the entries carry to the assessments table
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+
+    def write(self, entries: List[Dict[str, Any]]) -> None:
+        from .database import audit_logs, get_engine, upsert_assessments
+
+        stored = [
+            {**assessment, "assessed_at": entry["timestamp"]}
+            for entry in entries
+            for assessment in entry.get("assessments") or ()
+        ]
+        if stored:
+            entries = [{k: v for k, v in entry.items() if k != "assessments"} for entry in entries]
+        with get_engine(self.url).begin() as connection:
+            connection.execute(audit_logs.insert(), entries)
+            if stored:
+                upsert_assessments(connection, stored)
+
+
+def build_entry(scope: Scope, status_code: int, user: Optional[Any]) -> Dict[str, Any]:
+    """Describe a finished request as an audit_logs row, plus any assessments it made"""
+    headers = dict(scope.get("headers") or ())
+    user_agent = headers.get(b"user-agent")
+    client = scope.get("client")
+    entry = {
+        "user_id": getattr(user, "id", None),
+        "action": scope["method"][:ACTION_MAX_LENGTH],
+        "resource": scope["path"][:RESOURCE_MAX_LENGTH],
+        "ip_address": client[0] if client else "unknown",
+        "user_agent": user_agent[:USER_AGENT_MAX_LENGTH].decode("latin-1") if user_agent is not None else None,
+        "timestamp": datetime.now(timezone.utc),
+        "details": {
+            "username": getattr(user, "username", None),
+            "endpoint": getattr(scope.get("route"), "path", None),
+            "status_code": status_code,
+        },
+    }
+    assessments = (scope.get("state") or {}).get("assessments")
+    if assessments and status_code == 200:
+        entry["assessments"] = assessments
+    return entry
+
+
+def _encode(entries: List[Dict[str, Any]]) -> bytes:
+    return b"".join(orjson.dumps(entry, option=orjson.OPT_APPEND_NEWLINE) for entry in entries)
+
+
+def _decode(line: bytes) -> Dict[str, Any]:
+    entry = orjson.loads(line)
+    entry["timestamp"] = datetime.fromisoformat(entry["timestamp"])
+    return entry
+
+
+class AuditWriter:
+    """Buffers audit entries and writes them to a sink in bulk from a background thread"""
+
+    def __init__(
+        self,
+        sink: AuditSink,
+        spill_path: str,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        max_buffer: int = 10000,
+        retry_interval: float = 5.0,
+        quarantine_after: int = 3
+    ):
+        self.sink = sink
+        self.spill_path = Path(spill_path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.retry_interval = retry_interval
+        self.quarantine_after = quarantine_after
+        self._entries: Deque[Dict[str, Any]] = deque()
+        self._in_flight = 0
+        self._flush_requested = False
+        self._stopping = False
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._idle = threading.Condition(self._lock)
+        self._spill_lock = threading.Lock()
+        self._sink_down_until = 0.0
+        self._last_write_ok = False
+        self._replay_failures = 0
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def _replay_path(self) -> Path:
+        return self.spill_path.with_name(self.spill_path.name + ".replay")
+
+    @property
+    def quarantine_path(self) -> Path:
+        return self.spill_path.with_name(self.spill_path.name + ".quarantine")
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        """Start the writer thread; spilled entries from earlier runs are replayed first"""
+        if self._thread is None:
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        """Queue an entry; never blocks, spilling to disk if the buffer is full"""
+        if self._thread is None:
+            return
+        with self._lock:
+            if len(self._entries) < self.max_buffer:
+                self._entries.append(entry)
+                AUDIT_RECORDS_BUFFERED.inc()
+                if len(self._entries) >= self.batch_size:
+                    self._wakeup.notify()
+                return
+        self._spill([entry], "buffer_full")
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Write out everything buffered so far, returning False on timeout"""
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            self._flush_requested = True
+            self._wakeup.notify()
+            while self._entries or self._in_flight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._thread is None:
+                    return False
+                self._idle.wait(remaining)
+            return True
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Flush and stop the writer thread; anything left over is spilled"""
+        self.flush(timeout)
+        with self._lock:
+            thread, self._thread = self._thread, None
+            self._stopping = True
+            self._wakeup.notify()
+        if thread is not None:
+            thread.join(timeout)
+        with self._lock:
+            leftover = list(self._entries)
+            self._entries.clear()
+            AUDIT_RECORDS_BUFFERED.dec(len(leftover))
+        if leftover:
+            self._spill(leftover, "shutdown")
+        logger.info("Audit writer stopped")
+
+    def _run(self) -> None:
+        self._replay()
+        while True:
+            with self._lock:
+                if not self._stopping:
+                    self._wakeup.wait_for(
+                        lambda: len(self._entries) >= self.batch_size or self._flush_requested or self._stopping,
+                        timeout=self.flush_interval
+                    )
+                count = min(len(self._entries), self.batch_size)
+                batch = [self._entries.popleft() for _ in range(count)]
+                self._in_flight = count
+                if not self._entries:
+                    self._flush_requested = False
+                stopping = self._stopping and not self._entries
+            if batch:
+                AUDIT_RECORDS_BUFFERED.dec(count)
+                self._deliver(batch)
+            elif self.spill_path.exists() or self._replay_path.exists():
+                self._replay()
+            with self._lock:
+                self._in_flight = 0
+                self._idle.notify_all()
+            if stopping:
+                return
+
+    def _sink_available(self) -> bool:
+        return time.monotonic() >= self._sink_down_until
+
+    def _write_to_sink(self, batch: List[Dict[str, Any]]) -> bool:
+        if not self._sink_available():
+            return False
+        start = time.perf_counter()
+        try:
+            self.sink.write(batch)
+        except Exception as e:
+            self._last_write_ok = False
+            AUDIT_SINK_ERRORS.inc()
+            self._sink_down_until = time.monotonic() + self.retry_interval
+            logger.warning(
+                "Audit sink write failed, spilling to disk", entries=len(batch), error=str(e), audit=True
+            )
+            return False
+        self._last_write_ok = True
+        AUDIT_FLUSH_DURATION.observe(time.perf_counter() - start)
+        AUDIT_RECORDS_WRITTEN.inc(len(batch))
+        return True
+
+    def _deliver(self, batch: List[Dict[str, Any]]) -> None:
+        if not self._write_to_sink(batch):
+            self._spill(batch, "sink_error")
+        elif self.spill_path.exists() or self._replay_path.exists():
+            # The sink is taking writes again, catch up on what was spilled
+            self._replay()
+
+    def _append(self, path: Path, entries: List[Dict[str, Any]]) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "ab") as f:
+            f.write(_encode(entries))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _spill(self, entries: List[Dict[str, Any]], reason: str) -> None:
+        with self._spill_lock:
+            self._append(self.spill_path, entries)
+        AUDIT_RECORDS_SPILLED.labels(reason=reason).inc(len(entries))
+
+    def _quarantine(self, entries: List[Dict[str, Any]]) -> None:
+        """Set aside a batch the sink keeps refusing although it takes other writes"""
+        self._append(self.quarantine_path, entries)
+        AUDIT_RECORDS_QUARANTINED.inc(len(entries))
+        logger.error(
+            "Audit sink keeps refusing spilled entries, quarantined",
+            entries=len(entries), path=str(self.quarantine_path), audit=True
+        )
+        # The refusal was about these entries, not the sink
+        self._replay_failures = 0
+        self._sink_down_until = 0.0
+
+    def _replay(self) -> None:
+        """Move spilled entries back into the sink, keeping whatever it still refuses"""
+        if not self._sink_available():
+            return
+        with self._spill_lock:
+            if not self._replay_path.exists():
+                if not self.spill_path.exists():
+                    return
+                os.replace(self.spill_path, self._replay_path)
+            lines = self._replay_path.read_bytes().splitlines()
+
+        entries = [_decode(line) for line in lines if line.strip()]
+        written = 0
+        for offset in range(0, len(entries), self.batch_size):
+            batch = entries[offset:offset + self.batch_size]
+            # Only a refusal right after an accepted write points at the entries themselves
+            sink_was_up = self._last_write_ok
+            if self._write_to_sink(batch):
+                self._replay_failures = 0
+                written += len(batch)
+                continue
+            if sink_was_up:
+                self._replay_failures += 1
+                if self._replay_failures >= self.quarantine_after:
+                    self._quarantine(batch)
+                    continue
+            # Keep only what has not been written yet, so nothing is written twice
+            remaining = _encode(entries[offset:])
+            tmp_path = self._replay_path.with_name(self._replay_path.name + ".tmp")
+            tmp_path.write_bytes(remaining)
+            os.replace(tmp_path, self._replay_path)
+            return
+        self._replay_path.unlink()
+        if written:
+            logger.info("Replayed spilled audit entries", entries=written, audit=True)
+
+
+audit_writer = AuditWriter(
+    DatabaseAuditSink(settings.DATABASE_URL),
+    spill_path=settings.AUDIT_LOG_SPILL_PATH,
+    batch_size=settings.AUDIT_LOG_BATCH_SIZE,
+    flush_interval=settings.AUDIT_LOG_FLUSH_INTERVAL_SECONDS,
+    max_buffer=settings.AUDIT_LOG_MAX_BUFFER,
+    retry_interval=settings.AUDIT_LOG_RETRY_SECONDS,
+    quarantine_after=settings.AUDIT_LOG_QUARANTINE_AFTER
+)
@@ -2,38 +2,81 @@
 Authentication module for the API Gateway
 """
 
+import time
+import uuid
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import NamedTuple, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from starlette.requests import Request
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 import structlog
 
+from .cache import TTLCache
 from .config import settings
-from .models import TokenData, User
+from .lazy import lazy_import
+from .models import TokenData, User, UserInDB
+from .password_hashing import PasswordHashPoolFull, password_hash_pool, pwd_context
+from .sessions import session_store
+from .timing import stage
 
 logger = structlog.get_logger()
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # Security
 security = HTTPBearer()
 
-# Mock user database (replace with real database in later phases)
-fake_users_db = {
-    "testuser": {
-        "id": 1,
-        "username": "testuser",
-        "email": "test@example.com",
-        "full_name": "Test User",
-        "hashed_password": pwd_context.hash("testpassword"),
-        "is_active": True,
-        "created_at": datetime.now(timezone.utc),
-        "updated_at": None
-    }
-}
+# Checked for unknown usernames, so they take as long to reject as a wrong
+# password; same scheme and cost as pwd_context hashes
+DUMMY_PASSWORD_HASH = "$2b$12$WsytZeqMdxfdAO7ZpDEU6.yZWVjWUhA5Q7wH/C69I3Styy/MKJt8u"
+
+
+class AccessToken(NamedTuple):
+    """Claims of a verified access token"""
+    username: str
+    token_id: Optional[str]  # jti; tokens issued before revocation existed have none
+    expires_at: Optional[datetime]
+
+
+# Decoded tokens (token -> AccessToken) and resolved users (username -> User)
+token_cache = TTLCache(
+    "auth_token",
+    maxsize=settings.AUTH_TOKEN_CACHE_SIZE,
+    default_ttl=settings.AUTH_TOKEN_CACHE_MAX_TTL_SECONDS
+)
+user_cache = TTLCache(
+    "auth_user",
+    maxsize=settings.AUTH_USER_CACHE_SIZE,
+    default_ttl=settings.AUTH_USER_CACHE_TTL_SECONDS
+)
+
+# User storage (bound lazily so SQLAlchemy stays out of start-up)
+database = lazy_import(f"{__package__}.database")
+_users_seeded = False
+
+
+async def seed_users() -> None:
+    """
+    Create the development test user if it does not exist yet
+    Hashing the seed password is deliberately slow, so it happens on first use
+    (or in the background during application startup) rather than at import
+    """
+    global _users_seeded
+    if _users_seeded or settings.ENVIRONMENT == "production":
+        return
+    if await database.fetch_user("testuser") is None:
+        try:
+            await database.insert_user({
+                "username": "testuser",
+                "email": "test@example.com",
+                "full_name": "Test User",
+                "hashed_password": await get_password_hash_async("testpassword"),
+                "is_active": True,
+                "created_at": datetime.now(timezone.utc),
+                "updated_at": None
+            })
+        except database.IntegrityError:
+            pass  # seeded concurrently by another request or worker
+    _users_seeded = True
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -46,58 +89,143 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
-def get_user(username: str) -> Optional[User]:
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash without blocking the event loop"""
+    return await password_hash_pool.verify(plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password without blocking the event loop"""
+    return await password_hash_pool.hash(password)
+
+
+async def get_user(username: str) -> Optional[User]:
     """Get user from database"""
-    if username in fake_users_db:
-        user_dict = fake_users_db[username]
-        return User(**user_dict)
-    return None
+    user = await get_user_in_db(username)
+    if user is None:
+        return None
+    return User.model_validate(user.model_dump(exclude={"hashed_password"}))
 
 
-def authenticate_user(username: str, password: str) -> Optional[User]:
-    """Authenticate a user"""
-    user = get_user(username)
-    if not user:
+async def get_user_in_db(username: str) -> Optional[UserInDB]:
+    """Get user from database, including the password hash"""
+    await seed_users()
+    row = await database.fetch_user(username)
+    if row is None:
         return None
-    if not verify_password(password, user.hashed_password):
+    return UserInDB(**row)
+
+
+async def authenticate_user_async(username: str, password: str) -> Optional[User]:
+    """Authenticate a user, verifying the password off the event loop"""
+    user = await get_user_in_db(username)
+    try:
+        verified = await verify_password_async(password, user.hashed_password if user else DUMMY_PASSWORD_HASH)
+    except PasswordHashPoolFull:
+        logger.warning("Password verification rejected, hash pool saturated", username=username)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication temporarily unavailable",
+            headers={"Retry-After": "1"},
+        )
+    if not user or not verified:
         return None
-    return user
+    return User.model_validate(user.model_dump(exclude={"hashed_password"}))
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
-    """Create a JWT access token"""
+    """Create a JWT access token with a unique ID (jti) so it can be revoked"""
     to_encode = data.copy()
+    issued_at = datetime.now(timezone.utc)
     if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
+        expire = issued_at + expires_delta
     else:
-        expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        expire = issued_at + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    to_encode.setdefault("jti", uuid.uuid4().hex)
+    to_encode.update({"iat": issued_at, "exp": expire})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
+async def create_session_token(username: str) -> str:
+    """Issue an access token and record its session"""
+    issued_at = datetime.now(timezone.utc)
+    expires_at = issued_at + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    token_id = uuid.uuid4().hex
+    token = create_access_token(data={"sub": username, "jti": token_id})
+    await session_store.open_session(username, token_id, issued_at, expires_at)
+    return token
+
+
+def _token_cache_ttl(payload: dict) -> float:
+    """Seconds a decoded token may be cached: until its exp claim, capped by settings"""
+    ttl = float(settings.AUTH_TOKEN_CACHE_MAX_TTL_SECONDS)
+    exp = payload.get("exp")
+    if exp is not None:
+        ttl = min(ttl, float(exp) - time.time())
+    return ttl
+
+
+def invalidate_user(username: str) -> None:
+    """Drop a cached user so the next request reloads it from the database"""
+    user_cache.invalidate(username)
+
+
+async def verify_access_token(token: str) -> Optional[AccessToken]:
+    """Claims of a valid access token that has not been revoked, or None"""
+    access_token = token_cache.get(token)
+    if access_token is None:
+        try:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except JWTError:
+            return None
+        username = payload.get("sub")
+        if username is None:
+            return None
+        token_data = TokenData(username=username)
+        exp = payload.get("exp")
+        access_token = AccessToken(
+            username=token_data.username,
+            token_id=payload.get("jti"),
+            expires_at=None if exp is None else datetime.fromtimestamp(exp, timezone.utc)
+        )
+        token_cache.set(token, access_token, ttl=_token_cache_ttl(payload))
+
+    # Answered by the in-process revocation filter unless it reports a possible hit
+    if access_token.token_id is not None and await session_store.is_revoked(access_token.token_id):
+        return None
+    return access_token
+
+
+async def get_current_user(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> User:
     """Get current authenticated user"""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+    # Protected call: AuditMiddleware records it whether or not authentication succeeds
+    request.state.audited = True
+    with stage("auth"):
+        credentials_exception = HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     
-    try:
-        payload = jwt.decode(credentials.credentials, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
+        access_token = await verify_access_token(credentials.credentials)
+        if access_token is None:
             raise credentials_exception
-        token_data = TokenData(username=username)
-    except JWTError:
-        raise credentials_exception
+        username = access_token.username
+        request.state.access_token = access_token
     
-    user = get_user(username=token_data.username)
-    if user is None:
-        raise credentials_exception
+        user = user_cache.get(username)
+        if user is None:
+            user = await get_user(username=username)
+            if user is None:
+                raise credentials_exception
+            user_cache.set(username, user)
     
+    request.state.user = user
     logger.info("User authenticated", username=user.username, user_id=user.id)
     return user
 
@@ -109,28 +237,26 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
     return current_user
 
 
-def create_user(username: str, email: str, password: str, full_name: Optional[str] = None) -> User:
+async def create_user(username: str, email: str, password: str, full_name: Optional[str] = None) -> User:
     """Create a new user (for development/testing)"""
-    if username in fake_users_db:
+    try:
+        row = await database.insert_user({
+            "username": username,
+            "email": email,
+            "full_name": full_name,
+            "hashed_password": await get_password_hash_async(password),
+            "is_active": True,
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": None
+        })
+    except database.IntegrityError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already registered"
         )
     
-    hashed_password = get_password_hash(password)
-    user_dict = {
-        "id": len(fake_users_db) + 1,
-        "username": username,
-        "email": email,
-        "full_name": full_name,
-        "hashed_password": hashed_password,
-        "is_active": True,
-        "created_at": datetime.now(timezone.utc),
-        "updated_at": None
-    }
-    
-    fake_users_db[username] = user_dict
-    return User(**user_dict)
+    invalidate_user(username)
+    return User.model_validate({k: v for k, v in row.items() if k != "hashed_password"})
 
 
 def generate_test_token(username: str = "testuser") -> str:
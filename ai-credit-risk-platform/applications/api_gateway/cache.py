@@ -0,0 +1,120 @@
+"""
+In-process caching for the API Gateway
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from prometheus_client import Counter, Gauge
+
+# Prometheus metrics shared by all named caches
+CACHE_HITS = Counter(
+    'cache_hits_total',
+    'In-process cache hits',
+    ['cache']
+)
+
+CACHE_MISSES = Counter(
+    'cache_misses_total',
+    'In-process cache misses',
+    ['cache']
+)
+
+CACHE_EVICTIONS = Counter(
+    'cache_evictions_total',
+    'In-process cache evictions',
+    ['cache', 'reason']
+)
+
+CACHE_SIZE = Gauge(
+    'cache_entries',
+    'In-process cache entry count',
+    ['cache'],
+    multiprocess_mode='livesum'
+)
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries expire after a per-entry TTL
+    When full, the least recently used entry is evicted. Expired entries are
+    dropped lazily when they are looked up or reach the LRU end.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        maxsize: int,
+        default_ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.name = name
+        self.maxsize = maxsize
+        self.default_ttl = default_ttl
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._hits = CACHE_HITS.labels(cache=name)
+        self._misses = CACHE_MISSES.labels(cache=name)
+        self._size = CACHE_SIZE.labels(cache=name)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key, or default if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires_at = entry
+                if expires_at is None or expires_at > self._clock():
+                    self._entries.move_to_end(key)
+                    self._hits.inc()
+                    return value
+                del self._entries[key]
+                self._evicted("expired")
+            self._misses.inc()
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store value under key for ttl seconds (default_ttl if omitted)"""
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl is not None and ttl <= 0:
+            return
+        expires_at = None if ttl is None else self._clock() + ttl
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                _, (_, oldest_expiry) = self._entries.popitem(last=False)
+                expired = oldest_expiry is not None and oldest_expiry <= self._clock()
+                self._evicted("expired" if expired else "capacity")
+            self._size.set(len(self._entries))
+
+    def invalidate(self, key: Hashable) -> bool:
+        """Remove key from the cache, returning whether it was present"""
+        with self._lock:
+            if self._entries.pop(key, _MISSING) is _MISSING:
+                return False
+            self._evicted("invalidated")
+            return True
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            if count:
+                CACHE_EVICTIONS.labels(cache=self.name, reason="invalidated").inc(count)
+            self._size.set(0)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evicted(self, reason: str) -> None:
+        CACHE_EVICTIONS.labels(cache=self.name, reason=reason).inc()
+        self._size.set(len(self._entries))
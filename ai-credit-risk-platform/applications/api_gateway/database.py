@@ -0,0 +1,282 @@
+"""
+Database access for the API Gateway
+
+Request handlers use an async engine with a bounded connection pool per
+worker, opened and closed by the application lifespan. The audit writer
+thread uses a separate sync engine on the same database. SQLAlchemy is
+comparatively slow to import, so other modules bind this one with
+lazy_import and it is only loaded when the database is first used.
+"""
+
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    create_engine,
+    event,
+    insert,
+    select,
+)
+from sqlalchemy.engine import URL, Connection, Engine, make_url
+from sqlalchemy.exc import IntegrityError  # noqa: F401 (raised by insert_user)
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+import structlog
+
+from .audit import ACTION_MAX_LENGTH, RESOURCE_MAX_LENGTH, USER_AGENT_MAX_LENGTH
+from .config import settings
+
+logger = structlog.get_logger()
+
+# Prometheus metrics
+DB_POOL_CONNECTIONS_IN_USE = Gauge(
+    'db_pool_connections_in_use',
+    'Database connections checked out of the pool',
+    multiprocess_mode='livesum'
+)
+
+DB_POOL_CAPACITY = Gauge(
+    'db_pool_capacity',
+    'Maximum database connections (pool size plus overflow)',
+    multiprocess_mode='livesum'
+)
+
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    'db_pool_checkout_wait_seconds',
+    'Time spent waiting for a pooled database connection',
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+
+DB_POOL_TIMEOUTS = Counter(
+    'db_pool_timeouts_total',
+    'Database connection checkouts that gave up waiting for the pool'
+)
+
+DB_QUERY_DURATION = Histogram(
+    'db_query_duration_seconds',
+    'Database statement latency',
+    ['operation'],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+
+metadata = MetaData()
+
+users = Table(
+    "users",
+    metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("username", String(50), nullable=False, unique=True),
+    Column("email", String(255), nullable=False),
+    Column("full_name", String(100), nullable=True),
+    Column("hashed_password", String(255), nullable=False),
+    Column("is_active", Boolean, nullable=False, default=True),
+    Column("created_at", DateTime(timezone=True), nullable=False),
+    Column("updated_at", DateTime(timezone=True), nullable=True),
+)
+
+audit_logs = Table(
+    "audit_logs",
+    metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("user_id", Integer, nullable=True, index=True),
+    Column("action", String(ACTION_MAX_LENGTH), nullable=False),
+    Column("resource", String(RESOURCE_MAX_LENGTH), nullable=False),
+    Column("ip_address", String(64), nullable=False),
+    Column("user_agent", String(USER_AGENT_MAX_LENGTH), nullable=True),
+    Column("timestamp", DateTime(timezone=True), nullable=False, index=True),
+    Column("details", JSON, nullable=True),
+)
+
+# Latest assessment of each applicant, with every feature indexed so rule
+# changes can find the applicants they affect (see rescoring.py)
+assessments = Table(
+    "assessments",
+    metadata,
+    Column("applicant_id", String(64), primary_key=True),
+    Column("income", Float, nullable=False, index=True),
+    Column("credit_score", Float, nullable=False, index=True),
+    Column("debt_ratio", Float, nullable=False, index=True),
+    Column("employment_years", Float, nullable=False, index=True),
+    Column("loan_amount", Float, nullable=False, index=True),
+    Column("risk_score", Integer, nullable=False, index=True),
+    Column("risk_level", String(16), nullable=False),
+    Column("recommendation", String(16), nullable=False),
+    Column("assessed_at", DateTime(timezone=True), nullable=False),
+)
+
+# DATABASE_URL may name either flavour of driver; each engine picks its own
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+SYNC_DRIVERS = {
+    "postgresql+asyncpg": "postgresql+psycopg2",
+    "sqlite+aiosqlite": "sqlite",
+}
+
+
+def async_url(url: str) -> URL:
+    """Return url with an asyncio driver"""
+    parsed = make_url(url)
+    return parsed.set(drivername=ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername))
+
+
+def sync_url(url: str) -> URL:
+    """Return url with a blocking driver"""
+    parsed = make_url(url)
+    return parsed.set(drivername=SYNC_DRIVERS.get(parsed.drivername, parsed.drivername))
+
+
+_engines: Dict[str, Engine] = {}
+
+
+def get_engine(url: str) -> Engine:
+    """Return a pooled sync engine for url, creating it on first use"""
+    engine = _engines.get(url)
+    if engine is None:
+        engine = _engines[url] = create_engine(sync_url(url), pool_pre_ping=True)
+    return engine
+
+
+def _instrument(engine: AsyncEngine) -> None:
+    """Export pool usage and statement latency for an engine"""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        DB_POOL_CONNECTIONS_IN_USE.inc()
+
+    @event.listens_for(sync_engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        DB_POOL_CONNECTIONS_IN_USE.dec()
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_start = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+        DB_QUERY_DURATION.labels(operation=operation).observe(time.perf_counter() - context._query_start)
+
+
+def build_async_engine(url: str) -> AsyncEngine:
+    """Create an instrumented async engine with the pool configured in Settings"""
+    engine = create_async_engine(
+        async_url(url),
+        # Explicit so that SQLite (NullPool by default) exercises the same pool as Postgres
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=settings.DATABASE_POOL_SIZE,
+        max_overflow=settings.DATABASE_MAX_OVERFLOW,
+        pool_timeout=settings.DATABASE_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DATABASE_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=True,
+    )
+    _instrument(engine)
+    return engine
+
+
+_async_engine: Optional[AsyncEngine] = None
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+
+def get_async_engine() -> AsyncEngine:
+    """Return the application's async engine, creating it on first use"""
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = build_async_engine(settings.DATABASE_URL)
+        DB_POOL_CAPACITY.set(settings.DATABASE_POOL_SIZE + settings.DATABASE_MAX_OVERFLOW)
+    return _async_engine
+
+
+def create_tables() -> None:
+    """Create missing tables (blocking; serialised so concurrent callers don't race)"""
+    global _schema_ready
+    with _schema_lock:
+        if not _schema_ready:
+            metadata.create_all(get_engine(settings.DATABASE_URL))
+            _schema_ready = True
+
+
+def upsert_assessments(connection: Connection, rows: List[Dict[str, Any]]) -> None:
+    """Store each applicant's assessment, replacing an earlier one (the last row per applicant wins)"""
+    if connection.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    latest = list({row["applicant_id"]: row for row in rows}.values())
+    statement = dialect_insert(assessments)
+    statement = statement.on_conflict_do_update(
+        index_elements=[assessments.c.applicant_id],
+        set_={column.name: statement.excluded[column.name] for column in assessments.c if not column.primary_key}
+    )
+    connection.execute(statement, latest)
+
+
+async def init_database() -> None:
+    """Open the connection pool, creating tables if DATABASE_CREATE_TABLES is set"""
+    engine = get_async_engine()
+    if settings.DATABASE_CREATE_TABLES and not _schema_ready:
+        await asyncio.to_thread(create_tables)
+    logger.info("Database ready", url=engine.url.render_as_string(hide_password=True))
+
+
+async def close_database() -> None:
+    """Close every pooled connection"""
+    global _async_engine
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        DB_POOL_CAPACITY.set(0)
+
+
+@asynccontextmanager
+async def connect() -> AsyncIterator[AsyncConnection]:
+    """Check a connection out of the pool, recording how long that took"""
+    if settings.DATABASE_CREATE_TABLES and not _schema_ready:
+        await init_database()
+    start = time.perf_counter()
+    try:
+        connection = await get_async_engine().connect()
+    except PoolTimeoutError:
+        DB_POOL_TIMEOUTS.inc()
+        raise
+    DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+    try:
+        yield connection
+    finally:
+        await connection.close()
+
+
+async def fetch_user(username: str) -> Optional[Dict[str, Any]]:
+    """Return the users row for username, or None"""
+    async with connect() as connection:
+        result = await connection.execute(select(users).where(users.c.username == username))
+        row = result.mappings().first()
+    return dict(row) if row is not None else None
+
+
+async def insert_user(values: Dict[str, Any]) -> Dict[str, Any]:
+    """Insert a users row, returning it with its generated id"""
+    async with connect() as connection:
+        async with connection.begin():
+            result = await connection.execute(insert(users).values(**values).returning(*users.c))
+            row = result.mappings().one()
+    return dict(row)
@@ -0,0 +1,328 @@
+"""
+Applicant feature store for the API Gateway
+
+Historical applicant features (past assessments, repayment aggregates) are
+computed in batch and written under FEATURE_STORE_PATH as segments, one
+directory per segment:
+
+    <segment>/applicant_ids.npy   applicant ids (fixed-width UTF-8)
+    <segment>/hashes.npy          64-bit FNV-1a hash of each id
+    <segment>/buckets.npy         hash index: row range of each hash bucket
+    <segment>/columns/<name>.npy  one float64 array per feature
+
+Rows are stored in bucket order, so a lookup hashes the applicant id, reads
+two bucket offsets and compares the (about one) row in that bucket: O(1) with
+no index to build at load time. Every array is memory-mapped, so opening a
+store with millions of applicants is instant, only the pages that lookups
+touch are read, and all workers on a host share them through the page cache.
+
+A MANIFEST file lists the base segment followed by delta segments, oldest
+first. Incremental refreshes write a delta holding only the applicants that
+changed; lookups check the newest segment first. Once there are more than
+FEATURE_STORE_MAX_DELTAS deltas they are compacted into a new base. Workers
+poll MANIFEST and swap in the new segment list with a single reference
+assignment, as the model registry does for models.
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from prometheus_client import Counter, Gauge, Histogram
+import structlog
+
+from .config import settings
+from .lazy import lazy_import
+
+np = lazy_import("numpy")
+
+logger = structlog.get_logger()
+
+MANIFEST_NAME = "MANIFEST"
+
+FNV_OFFSET = 0xCBF29CE484222325
+FNV_PRIME = 0x100000001B3
+HASH_MASK = 0xFFFFFFFFFFFFFFFF
+
+# Prometheus metrics
+FEATURE_STORE_LOOKUPS = Counter(
+    'feature_store_lookups_total',
+    'Applicant feature lookups',
+    ['result']
+)
+
+FEATURE_STORE_LOOKUP_DURATION = Histogram(
+    'feature_store_lookup_duration_seconds',
+    'Applicant feature lookup latency',
+    buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.005, 0.025)
+)
+
+_LOOKUP_HITS = FEATURE_STORE_LOOKUPS.labels(result="hit")
+_LOOKUP_MISSES = FEATURE_STORE_LOOKUPS.labels(result="miss")
+
+FEATURE_STORE_REFRESH_ERRORS = Counter(
+    'feature_store_refresh_errors_total',
+    'Feature store manifests that failed to load'
+)
+
+FEATURE_STORE_APPLICANTS = Gauge(
+    'feature_store_applicants',
+    'Rows across the segments served by each worker (applicants in several segments count more than once)',
+    multiprocess_mode='liveall'
+)
+
+
+def applicant_hash(applicant_id: str) -> int:
+    """64-bit FNV-1a hash of an applicant id (NUL bytes are skipped, as padding is on disk)"""
+    h = FNV_OFFSET
+    for byte in applicant_id.encode("utf-8"):
+        if byte:
+            h = ((h ^ byte) * FNV_PRIME) & HASH_MASK
+    return h
+
+
+def _hash_ids(ids: "np.ndarray") -> "np.ndarray":
+    """applicant_hash for a fixed-width bytes array, one byte position at a time"""
+    raw = ids.view(np.uint8).reshape(len(ids), ids.dtype.itemsize)
+    hashes = np.full(len(ids), FNV_OFFSET, dtype=np.uint64)
+    prime = np.uint64(FNV_PRIME)
+    with np.errstate(over="ignore"):
+        for position in range(raw.shape[1]):
+            byte = raw[:, position].astype(np.uint64)
+            hashes = np.where(byte != 0, (hashes ^ byte) * prime, hashes)
+    return hashes
+
+
+class Segment:
+    """One memory-mapped segment of the feature store"""
+
+    def __init__(self, path: Path, features: Sequence[str]):
+        self.path = path
+        self.applicant_ids = self._map(path / "applicant_ids.npy")
+        self.hashes = self._map(path / "hashes.npy")
+        self.buckets = self._map(path / "buckets.npy")
+        self.columns = {name: self._map(path / "columns" / f"{name}.npy") for name in features}
+        self.mask = len(self.buckets) - 2
+
+    @staticmethod
+    def _map(path: Path) -> "np.ndarray":
+        # A plain ndarray view of the mapping: element access on np.memmap itself is several times slower
+        return np.load(path, mmap_mode="r").view(np.ndarray)
+
+    def __len__(self) -> int:
+        return len(self.applicant_ids)
+
+    def find(self, applicant_id: bytes, h: int) -> int:
+        """Row holding applicant_id, or -1"""
+        bucket = h & self.mask
+        for row in range(self.buckets.item(bucket), self.buckets.item(bucket + 1)):
+            if self.hashes.item(row) == h and self.applicant_ids.item(row) == applicant_id:
+                return row
+        return -1
+
+    def row(self, row: int) -> Dict[str, Optional[float]]:
+        values = {name: column.item(row) for name, column in self.columns.items()}
+        # NaN marks a feature with no history for this applicant
+        return {name: None if value != value else value for name, value in values.items()}
+
+
+def _write_segment(root: Path, kind: str, applicant_ids: Any, columns: Mapping[str, Any], features: Sequence[str]) -> str:
+    """Write a segment directory and return its name"""
+    ids = np.char.encode(np.asarray(applicant_ids, dtype=str), "utf-8")
+    if len(ids) == 0:
+        raise ValueError("A feature store segment needs at least one applicant")
+    if sorted(columns) != sorted(features):
+        raise ValueError(f"Columns must be exactly: {', '.join(features)}")
+    if len(np.unique(ids)) != len(ids):
+        raise ValueError("Applicant ids must be unique within a segment")
+    values = {name: np.asarray(columns[name], dtype=np.float64) for name in features}
+    if any(value.shape != (len(ids),) for value in values.values()):
+        raise ValueError("Every column needs one value per applicant")
+
+    # Power of two buckets, at least one per applicant, so most buckets hold zero or one row
+    n_buckets = 1 << max(len(ids) - 1, 1).bit_length()
+    hashes = _hash_ids(ids)
+    bucket_of_row = (hashes & np.uint64(n_buckets - 1)).astype(np.int64)
+    order = np.argsort(bucket_of_row, kind="stable")
+    buckets = np.zeros(n_buckets + 1, dtype=np.int64)
+    np.cumsum(np.bincount(bucket_of_row, minlength=n_buckets), out=buckets[1:])
+
+    name = f"{kind}-{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    tmp_path = root / f".{name}.tmp"
+    (tmp_path / "columns").mkdir(parents=True)
+    np.save(tmp_path / "applicant_ids.npy", ids[order])
+    np.save(tmp_path / "hashes.npy", hashes[order])
+    np.save(tmp_path / "buckets.npy", buckets)
+    for feature, value in values.items():
+        np.save(tmp_path / "columns" / f"{feature}.npy", value[order])
+    os.replace(tmp_path, root / name)
+    return name
+
+
+def read_manifest(root: Path) -> Optional[Dict[str, Any]]:
+    """The store's manifest, or None if nothing has been built"""
+    try:
+        return json.loads((root / MANIFEST_NAME).read_text())
+    except FileNotFoundError:
+        return None
+
+
+def _write_manifest(root: Path, features: Sequence[str], segments: List[str]) -> None:
+    previous = read_manifest(root)
+    manifest = {
+        "generation": (previous["generation"] + 1) if previous else 1,
+        "features": list(features),
+        "segments": segments,
+    }
+    tmp_manifest = root / (MANIFEST_NAME + ".tmp")
+    tmp_manifest.write_text(json.dumps(manifest) + "\n")
+    os.replace(tmp_manifest, root / MANIFEST_NAME)
+    logger.info("Feature store manifest written", generation=manifest["generation"], segments=len(segments))
+
+
+def _remove_unlisted_segments(root: Path, keep: Sequence[str]) -> None:
+    # Workers that still map removed segments keep reading them until they next refresh
+    for path in root.iterdir():
+        if path.is_dir() and path.name not in keep and not path.name.startswith("."):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def build_feature_store(root: str, applicant_ids: Any, columns: Mapping[str, Any]) -> str:
+    """
+    Replace the store with a full build: one base segment, no deltas
+    columns maps each feature name to one value per applicant (NaN if unknown)
+    """
+    root_path = Path(root)
+    root_path.mkdir(parents=True, exist_ok=True)
+    features = list(columns)
+    name = _write_segment(root_path, "base", applicant_ids, columns, features)
+    _write_manifest(root_path, features, [name])
+    _remove_unlisted_segments(root_path, [name])
+    return name
+
+
+def append_feature_delta(
+    root: str,
+    applicant_ids: Any,
+    columns: Mapping[str, Any],
+    max_deltas: Optional[int] = None
+) -> str:
+    """
+    Add or replace the features of some applicants without a full rebuild
+    Compacts the store once it has more than max_deltas deltas
+    """
+    root_path = Path(root)
+    manifest = read_manifest(root_path)
+    if manifest is None:
+        raise ValueError(f"No feature store at {root}, build one first")
+    name = _write_segment(root_path, "delta", applicant_ids, columns, manifest["features"])
+    segments = manifest["segments"] + [name]
+    _write_manifest(root_path, manifest["features"], segments)
+
+    max_deltas = settings.FEATURE_STORE_MAX_DELTAS if max_deltas is None else max_deltas
+    if len(segments) - 1 > max_deltas:
+        compact_feature_store(root)
+    return name
+
+
+def compact_feature_store(root: str) -> str:
+    """Merge the base segment and its deltas into a new base, newest values winning"""
+    root_path = Path(root)
+    manifest = read_manifest(root_path)
+    if manifest is None:
+        raise ValueError(f"No feature store at {root}, build one first")
+    features = manifest["features"]
+    segments = [Segment(root_path / name, features) for name in reversed(manifest["segments"])]
+    ids = np.concatenate([np.asarray(segment.applicant_ids) for segment in segments])
+    # np.unique returns the first occurrence, i.e. the row from the newest segment
+    unique_ids, first = np.unique(ids, return_index=True)
+    columns = {
+        feature: np.concatenate([np.asarray(segment.columns[feature]) for segment in segments])[first]
+        for feature in features
+    }
+    name = _write_segment(root_path, "base", np.char.decode(unique_ids, "utf-8"), columns, features)
+    _write_manifest(root_path, features, [name])
+    _remove_unlisted_segments(root_path, [name])
+    return name
+
+
+class FeatureStore:
+    """Serves applicant features from the segments named by the store's MANIFEST"""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self._generation: Optional[int] = None
+        # Newest segment first; replaced as a whole so lookups never see a half-built list
+        self._segments: Tuple[Segment, ...] = ()
+        self._load_lock = threading.Lock()
+
+    @property
+    def generation(self) -> Optional[int]:
+        return self._generation
+
+    def lookup(self, applicant_id: str) -> Optional[Dict[str, Optional[float]]]:
+        """Features of one applicant, or None if the store does not know them"""
+        start = time.perf_counter()
+        segments = self._segments
+        key = applicant_id.encode("utf-8")
+        h = applicant_hash(applicant_id)
+        for segment in segments:
+            row = segment.find(key, h)
+            if row >= 0:
+                features = segment.row(row)
+                break
+        else:
+            features = None
+        (_LOOKUP_HITS if features is not None else _LOOKUP_MISSES).inc()
+        FEATURE_STORE_LOOKUP_DURATION.observe(time.perf_counter() - start)
+        return features
+
+    def refresh(self) -> bool:
+        """Open the segments named by MANIFEST if it changed, returning True on a swap"""
+        with self._load_lock:
+            try:
+                manifest = read_manifest(self.root)
+                opened = {segment.path.name: segment for segment in self._segments}
+                if manifest is None or list(reversed(manifest["segments"])) == list(opened):
+                    return False
+                segments = tuple(
+                    opened.get(name) or Segment(self.root / name, manifest["features"])
+                    for name in reversed(manifest["segments"])
+                )
+            except Exception as e:
+                FEATURE_STORE_REFRESH_ERRORS.inc()
+                logger.error(
+                    "Feature store refresh failed, keeping the current segments",
+                    generation=self._generation,
+                    error=str(e)
+                )
+                return False
+
+            self._segments = segments
+            self._generation = manifest["generation"]
+            FEATURE_STORE_APPLICANTS.set(sum(len(segment) for segment in segments))
+            logger.info(
+                "Feature store loaded",
+                generation=self._generation,
+                segments=len(segments),
+                pid=os.getpid()
+            )
+            return True
+
+    async def watch(self, interval: float) -> None:
+        """Poll MANIFEST forever, picking up rebuilds and deltas"""
+        while True:
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                logger.error("Feature store poll failed", error=str(e))
+            await asyncio.sleep(interval)
+
+
+feature_store = FeatureStore(settings.FEATURE_STORE_PATH)
@@ -0,0 +1,526 @@
+"""
+Asynchronous assessment jobs for the API Gateway
+
+Heavy assessments (model scoring plus Open Banking enrichment) can be
+submitted as jobs rather than held open in a request:
+POST /api/v1/jobs/credit-risk/assess queues one and returns its ID at once,
+and GET /api/v1/jobs/{job_id} returns its status, optionally waiting
+(long-polling) up to JOB_MAX_WAIT_SECONDS for the result.
+
+Jobs live in Redis, so any gateway process or dedicated worker can run them:
+- each job is a JSON record under its ID, kept for JOB_RESULT_TTL_SECONDS;
+- queued job IDs wait in a sorted set ordered by priority, then by the time
+  they were queued;
+- a worker claims the head of the queue by moving it, in one WATCH/MULTI
+  transaction, to a sorted set of leases scored by their deadline, so a job
+  runs on one worker at a time;
+- a failed attempt is retried after JOB_RETRY_BACKOFF_SECONDS (doubled for
+  each further attempt), up to JOB_MAX_ATTEMPTS;
+- an attempt is cancelled shortly before JOB_VISIBILITY_TIMEOUT_SECONDS, and
+  an expired lease (its worker died) puts the job back in the queue. A worker
+  that lost its lease can no longer change the job's record.
+
+While Redis is unreachable, workers back off exponentially, up to 30
+seconds, and log the outage once rather than on every poll.
+
+Each gateway process runs up to JOB_WORKERS jobs at a time. To keep heavy
+jobs off the gateways, set JOB_WORKERS=0 there and run dedicated workers:
+
+    python -m applications.api_gateway.jobs --workers 8    # make run-job-workers
+"""
+
+import argparse
+import asyncio
+import signal
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import orjson
+from prometheus_client import Counter, Gauge, Histogram
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError, WatchError
+import structlog
+
+from .config import settings
+from .feature_store import feature_store
+from .logging_config import configure_logging, shutdown_logging
+from .model_registry import model_registry, predict_confidence
+from .models import AssessmentJobRequest, AssessmentJobResult, CreditRiskResponse
+from .open_banking import open_banking_client
+from .result_cache import result_cache
+from .scoring_engine import load_scoring_engine
+
+logger = structlog.get_logger()
+
+KEY_PREFIX = "credit-risk:jobs"
+QUEUE_KEY = f"{KEY_PREFIX}:queue"
+LEASES_KEY = f"{KEY_PREFIX}:leases"
+PRIORITIES = ("high", "normal", "low")
+# Queue scores are the priority's rank times this, plus the time queued in ms
+PRIORITY_SPAN = 10 ** 13
+
+ASSESSMENT_JOB = "credit_risk_assessment"
+FINISHED = ("succeeded", "failed")
+
+# (payload, owner) -> JSON-serialisable result
+JobHandler = Callable[[Dict[str, Any], str], Awaitable[Any]]
+
+# Prometheus metrics
+JOB_QUEUE_DEPTH = Gauge(
+    'job_queue_depth',
+    'Jobs waiting in the queue',
+    ['priority'],
+    multiprocess_mode='livemax'
+)
+
+JOB_WAIT_SECONDS = Histogram(
+    'job_wait_seconds',
+    'Time jobs wait in the queue before an attempt starts',
+    ['priority'],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+)
+
+JOB_RUN_SECONDS = Histogram(
+    'job_run_seconds',
+    'Job attempt runtime',
+    ['kind', 'outcome'],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+)
+
+JOBS = Counter(
+    'jobs_total',
+    'Job lifecycle events',
+    ['event']  # submitted, succeeded, retried, failed, expired
+)
+
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while JOB_MAX_QUEUE_DEPTH jobs are queued"""
+
+
+class JobQueueUnavailable(Exception):
+    """Raised when Redis cannot be reached to submit or look up a job"""
+
+
+def job_key(job_id: str) -> str:
+    return f"{KEY_PREFIX}:job:{job_id}"
+
+
+def queue_score(priority: str, queued_at: float) -> float:
+    return PRIORITIES.index(priority) * PRIORITY_SPAN + int(queued_at * 1000)
+
+
+class JobQueue:
+    """Redis-backed priority queue of jobs with leases, retries and results"""
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        redis: Optional[aioredis.Redis] = None,
+        max_depth: int = 10000,
+        visibility_timeout: float = 60.0,
+        max_attempts: int = 3,
+        retry_backoff: float = 2.0,
+        result_ttl: int = 86400,
+        redis_timeout: float = 1.0
+    ):
+        self.redis_url = redis_url
+        self.redis = redis
+        self.max_depth = max_depth
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.result_ttl = result_ttl
+        self.redis_timeout = redis_timeout
+
+    def _client(self) -> aioredis.Redis:
+        if self.redis is None:
+            if not self.redis_url:
+                raise JobQueueUnavailable("No Redis configured for jobs")
+            self.redis = aioredis.Redis.from_url(
+                self.redis_url,
+                socket_timeout=self.redis_timeout,
+                socket_connect_timeout=self.redis_timeout
+            )
+        return self.redis
+
+    def _encode(self, record: Dict[str, Any]) -> bytes:
+        return orjson.dumps(record)
+
+    async def submit(self, kind: str, payload: Dict[str, Any], owner: str, priority: str = "normal") -> Dict[str, Any]:
+        """
+        Queue a job and return its record
+        Raises JobQueueFull or JobQueueUnavailable
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"priority must be one of {', '.join(PRIORITIES)}")
+        client = self._client()
+        now = time.time()
+        record = {
+            "job_id": uuid.uuid4().hex,
+            "kind": kind,
+            "owner": owner,
+            "priority": priority,
+            "status": "queued",
+            "attempts": 0,
+            "payload": payload,
+            "submitted_at": datetime.fromtimestamp(now, timezone.utc),
+            "queued_at": now,
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+            "lease": None,
+        }
+        try:
+            if await client.zcard(QUEUE_KEY) >= self.max_depth:
+                raise JobQueueFull("Job queue full")
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.set(job_key(record["job_id"]), self._encode(record), ex=self.result_ttl)
+                pipe.zadd(QUEUE_KEY, {record["job_id"]: queue_score(priority, now)})
+                await pipe.execute()
+        except (RedisError, OSError) as e:
+            raise JobQueueUnavailable("Job queue unavailable") from e
+        JOBS.labels(event="submitted").inc()
+        logger.info("Job submitted", job_id=record["job_id"], kind=kind, owner=owner, priority=priority)
+        return orjson.loads(self._encode(record))
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a job's record, or None if there is no such job (or it has expired)"""
+        try:
+            raw = await self._client().get(job_key(job_id))
+        except (RedisError, OSError) as e:
+            raise JobQueueUnavailable("Job queue unavailable") from e
+        return None if raw is None else orjson.loads(raw)
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """Return a job's record once it has finished, or as it is after timeout seconds"""
+        deadline = time.monotonic() + timeout
+        interval = 0.05
+        while True:
+            record = await self.get(job_id)
+            remaining = deadline - time.monotonic()
+            if record is None or record["status"] in FINISHED or remaining <= 0:
+                return record
+            await asyncio.sleep(min(interval, remaining))
+            interval = min(interval * 2, 0.5)
+
+    async def claim(self) -> Optional[Dict[str, Any]]:
+        """Lease the next job for one attempt, or return None if the queue is empty"""
+        client = self._client()
+        while True:
+            async with client.pipeline(transaction=True) as pipe:
+                try:
+                    await pipe.watch(QUEUE_KEY)
+                    head = await pipe.zrange(QUEUE_KEY, 0, 0)
+                    if not head:
+                        return None
+                    job_id = head[0].decode()
+                    pipe.multi()
+                    pipe.zrem(QUEUE_KEY, job_id)
+                    pipe.zadd(LEASES_KEY, {job_id: time.time() + self.visibility_timeout})
+                    await pipe.execute()
+                except WatchError:
+                    continue  # another worker changed the queue first
+
+            raw = await client.get(job_key(job_id))
+            if raw is None:
+                await client.zrem(LEASES_KEY, job_id)  # record expired while queued
+                continue
+            record = orjson.loads(raw)
+            record.update(
+                status="running",
+                attempts=record["attempts"] + 1,
+                started_at=datetime.now(timezone.utc),
+                lease=uuid.uuid4().hex
+            )
+            await client.set(job_key(job_id), self._encode(record), ex=self.result_ttl)
+            return orjson.loads(self._encode(record))
+
+    async def finish(self, job: Dict[str, Any], result: Any = None, error: Optional[str] = None) -> bool:
+        """
+        Record the outcome of a leased attempt: a result, or an error that is
+        retried after a backoff until max_attempts is reached
+        Returns False if the lease was lost, in which case nothing changes
+        """
+        client = self._client()
+        key = job_key(job["job_id"])
+        while True:
+            async with client.pipeline(transaction=True) as pipe:
+                try:
+                    await pipe.watch(key)
+                    current = await pipe.get(key)
+                    if current is None or orjson.loads(current).get("lease") != job["lease"]:
+                        logger.warning("Job lease lost, attempt discarded", job_id=job["job_id"])
+                        return False
+                    record = {**job, "lease": None}
+                    pipe.multi()
+                    if error is None:
+                        event = "succeeded"
+                        record.update(status="succeeded", result=result, error=None,
+                                      finished_at=datetime.now(timezone.utc))
+                        pipe.zrem(LEASES_KEY, job["job_id"])
+                    elif job["attempts"] < self.max_attempts:
+                        # Stays leased until the backoff is over, then the reaper queues it again
+                        event = "retried"
+                        record.update(status="queued", error=error)
+                        backoff = self.retry_backoff * 2 ** (job["attempts"] - 1)
+                        pipe.zadd(LEASES_KEY, {job["job_id"]: time.time() + backoff})
+                    else:
+                        event = "failed"
+                        record.update(status="failed", error=error, finished_at=datetime.now(timezone.utc))
+                        pipe.zrem(LEASES_KEY, job["job_id"])
+                    pipe.set(key, self._encode(record), ex=self.result_ttl)
+                    await pipe.execute()
+                except WatchError:
+                    continue
+            JOBS.labels(event=event).inc()
+            logger.info("Job attempt finished", job_id=job["job_id"], outcome=event,
+                        attempts=job["attempts"], error=error)
+            return True
+
+    async def requeue_expired(self, limit: int = 100) -> int:
+        """
+        Queue jobs whose lease has run out again: retries whose backoff is
+        over, and attempts whose worker died or overran (these count as
+        failed attempts)
+        """
+        client = self._client()
+        now = time.time()
+        requeued = 0
+        for member in await client.zrangebyscore(LEASES_KEY, "-inf", now, start=0, num=limit):
+            job_id = member.decode()
+            key = job_key(job_id)
+            async with client.pipeline(transaction=True) as pipe:
+                try:
+                    await pipe.watch(key)
+                    deadline = await pipe.zscore(LEASES_KEY, job_id)
+                    if deadline is None or deadline > now:
+                        continue  # finished or claimed again in the meantime
+                    raw = await pipe.get(key)
+                    pipe.multi()
+                    pipe.zrem(LEASES_KEY, job_id)
+                    if raw is not None:
+                        record = orjson.loads(raw)
+                        if record["status"] == "running":
+                            JOBS.labels(event="expired").inc()
+                            record["error"] = "Attempt did not finish within the visibility timeout"
+                        if record["status"] == "running" and record["attempts"] >= self.max_attempts:
+                            record.update(status="failed", lease=None, finished_at=datetime.now(timezone.utc))
+                        else:
+                            record.update(status="queued", lease=None, queued_at=now)
+                            pipe.zadd(QUEUE_KEY, {job_id: queue_score(record["priority"], now)})
+                            requeued += 1
+                        pipe.set(key, self._encode(record), ex=self.result_ttl)
+                    await pipe.execute()
+                except WatchError:
+                    pass  # the job changed; the next pass looks at it again
+        return requeued
+
+    async def depth(self) -> Dict[str, int]:
+        """Queued jobs per priority"""
+        async with self._client().pipeline(transaction=False) as pipe:
+            for rank in range(len(PRIORITIES)):
+                pipe.zcount(QUEUE_KEY, rank * PRIORITY_SPAN, f"({(rank + 1) * PRIORITY_SPAN}")
+            counts = await pipe.execute()
+        return dict(zip(PRIORITIES, counts))
+
+    async def close(self) -> None:
+        """Close the Redis connection pool"""
+        if self.redis is not None:
+            await self.redis.aclose()
+            self.redis = None
+
+
+class JobWorkers:
+    """Runs queued jobs on the event loop, up to concurrency at a time"""
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        handlers: Dict[str, JobHandler],
+        concurrency: int,
+        poll_interval: float = 0.1,
+        monitor_interval: float = 1.0,
+        max_backoff: float = 30.0
+    ):
+        self.queue = queue
+        self.handlers = handlers
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.monitor_interval = monitor_interval
+        self.max_backoff = max_backoff
+        self._tasks: List[asyncio.Task] = []
+        self._failing = False
+
+    async def run_one(self) -> bool:
+        """Claim and run one job; return False if the queue was empty"""
+        job = await self.queue.claim()
+        if job is None:
+            return False
+        JOB_WAIT_SECONDS.labels(priority=job["priority"]).observe(max(0.0, time.time() - job["queued_at"]))
+        handler = self.handlers.get(job["kind"])
+        start = time.perf_counter()
+        try:
+            if handler is None:
+                raise LookupError(f"No handler for {job['kind']} jobs")
+            # Give up before the lease runs out, so the attempt is not run twice at once
+            result = await asyncio.wait_for(handler(job["payload"], job["owner"]), 0.9 * self.queue.visibility_timeout)
+        except asyncio.TimeoutError:
+            outcome, result, error = "timeout", None, "Attempt did not finish within the visibility timeout"
+        except Exception as e:
+            # The record is returned to the client: keep details such as hosts or SQL in the log
+            logger.error("Job attempt raised", job_id=job["job_id"], kind=job["kind"], error=str(e), exc_info=True)
+            outcome, result, error = "error", None, f"Attempt failed: {type(e).__name__}"
+        else:
+            outcome, error = "success", None
+        JOB_RUN_SECONDS.labels(kind=job["kind"], outcome=outcome).observe(time.perf_counter() - start)
+        await self.queue.finish(job, result=result, error=error)
+        return True
+
+    def _failed(self, event: str, error: Exception, failures: int) -> float:
+        """Log the first failure of an outage; return how long to back off"""
+        if not self._failing:
+            self._failing = True
+            logger.error(event, error=str(error))
+        return min(self.monitor_interval * 2 ** failures, self.max_backoff)
+
+    def _recovered(self) -> None:
+        if self._failing:
+            self._failing = False
+            logger.info("Job queue reachable again")
+
+    async def _work(self) -> None:
+        failures = 0
+        while True:
+            try:
+                ran = await self.run_one()
+            except Exception as e:
+                # e.g. Redis is down; back off rather than spin
+                await asyncio.sleep(self._failed("Job worker failed", e, failures))
+                failures += 1
+                continue
+            failures = 0
+            self._recovered()
+            if not ran:
+                await asyncio.sleep(self.poll_interval)
+
+    async def _monitor(self) -> None:
+        """Requeue expired leases and export the queue depth"""
+        failures = 0
+        while True:
+            try:
+                await self.queue.requeue_expired()
+                for priority, count in (await self.queue.depth()).items():
+                    JOB_QUEUE_DEPTH.labels(priority=priority).set(count)
+            except Exception as e:
+                delay = self._failed("Job queue maintenance failed", e, failures)
+                failures += 1
+            else:
+                failures = 0
+                self._recovered()
+                delay = self.monitor_interval
+            await asyncio.sleep(delay)
+
+    def start(self) -> None:
+        """Start the workers (call from a running event loop); a no-op for concurrency 0"""
+        if self.concurrency > 0 and not self._tasks:
+            self._tasks = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+            self._tasks.append(asyncio.create_task(self._monitor()))
+
+    async def close(self) -> None:
+        """Stop the workers; interrupted attempts are retried once their lease expires"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+async def run_assessment_job(payload: Dict[str, Any], owner: str) -> Dict[str, Any]:
+    """Assess an application with model confidence and, if asked, Open Banking balances"""
+    job = AssessmentJobRequest.model_validate(payload)
+    application = job.application
+    assessment = await result_cache.assess(application)
+    model = model_registry.active
+    confidence_score = await predict_confidence(model, application, assessment.risk_level) if model else None
+    balances = await open_banking_client.get_balances(job.account_id) if job.account_id else None
+    return AssessmentJobResult(
+        assessment=CreditRiskResponse(
+            applicant_id=application.applicant_id,
+            risk_score=assessment.risk_score,
+            risk_level=assessment.risk_level,
+            recommendation=assessment.recommendation,
+            factors=assessment.factors,
+            confidence_score=confidence_score,
+            model_version=model.version if model else None,
+            applicant_features=feature_store.lookup(application.applicant_id),
+            assessment_date=datetime.now(timezone.utc),
+            assessor=owner
+        ),
+        account_balances=balances
+    ).model_dump(mode="json")
+
+
+JOB_HANDLERS: Dict[str, JobHandler] = {ASSESSMENT_JOB: run_assessment_job}
+
+job_queue = JobQueue(
+    redis_url=settings.REDIS_URL,
+    max_depth=settings.JOB_MAX_QUEUE_DEPTH,
+    visibility_timeout=settings.JOB_VISIBILITY_TIMEOUT_SECONDS,
+    max_attempts=settings.JOB_MAX_ATTEMPTS,
+    retry_backoff=settings.JOB_RETRY_BACKOFF_SECONDS,
+    result_ttl=settings.JOB_RESULT_TTL_SECONDS,
+    redis_timeout=settings.JOB_REDIS_TIMEOUT_SECONDS
+)
+
+job_workers = JobWorkers(
+    job_queue,
+    JOB_HANDLERS,
+    concurrency=settings.JOB_WORKERS,
+    poll_interval=settings.JOB_POLL_INTERVAL_SECONDS
+)
+
+
+async def serve(concurrency: int) -> None:
+    """Run jobs until SIGINT or SIGTERM, outside the gateway"""
+    configure_logging()
+    load_scoring_engine(settings.SCORING_RULES_PATH)
+    await asyncio.to_thread(model_registry.refresh)
+    await asyncio.to_thread(feature_store.refresh)
+    watchers = [
+        asyncio.create_task(model_registry.watch(settings.MODEL_REGISTRY_POLL_SECONDS)),
+        asyncio.create_task(feature_store.watch(settings.FEATURE_STORE_POLL_SECONDS)),
+    ]
+    open_banking_client.start()
+    workers = JobWorkers(job_queue, JOB_HANDLERS, concurrency, poll_interval=settings.JOB_POLL_INTERVAL_SECONDS)
+    workers.start()
+    logger.info("Job workers started", concurrency=concurrency)
+
+    stop = asyncio.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        asyncio.get_running_loop().add_signal_handler(signum, stop.set)
+    try:
+        await stop.wait()
+    finally:
+        logger.info("Stopping job workers")
+        await workers.close()
+        for task in watchers:
+            task.cancel()
+        await open_banking_client.close()
+        await result_cache.close()
+        await job_queue.close()
+        shutdown_logging()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run queued assessment jobs outside the gateway")
+    parser.add_argument("--workers", type=int, default=max(settings.JOB_WORKERS, 1), help="jobs run at a time")
+    args = parser.parse_args(argv)
+    asyncio.run(serve(args.workers))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
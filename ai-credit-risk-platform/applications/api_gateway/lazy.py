@@ -0,0 +1,27 @@
+"""
+Lazy module imports for the API Gateway
+
+Heavy libraries (numpy today; pandas, scikit-learn and joblib in later phases)
+add hundreds of milliseconds to process start-up. Modules that need them at
+request time should bind them with lazy_import so that the real import happens
+on first attribute access instead of when the gateway is imported.
+"""
+
+import importlib.util
+import sys
+from types import ModuleType
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Return a module that is only executed when one of its attributes is used"""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
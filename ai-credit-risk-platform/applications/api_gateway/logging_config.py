@@ -0,0 +1,240 @@
+"""
+Logging configuration for the API Gateway
+
+In the default "sync" mode, structlog renders JSON through the stdlib logger
+on the calling thread. In "async" mode, log calls only filter by level, stamp
+the event and put it on a bounded queue. A background thread serializes queued
+events with orjson and writes everything that has accumulated to stdout in one
+write per batch.
+"""
+
+import logging
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, BinaryIO, Deque, Dict, List, Optional
+
+import orjson
+from prometheus_client import Counter
+import structlog
+
+from .config import settings
+
+OVERFLOW_POLICIES = ("drop_new", "drop_oldest", "block")
+
+# Prometheus metrics
+LOG_RECORDS_QUEUED = Counter(
+    'log_records_queued_total',
+    'Log records accepted onto the async log queue'
+)
+
+LOG_RECORDS_DROPPED = Counter(
+    'log_records_dropped_total',
+    'Log records dropped because the async log queue was full',
+    ['policy']
+)
+
+_configured = False
+_writer: Optional["AsyncLogWriter"] = None
+
+
+def _must_keep(event_dict: Dict[str, Any]) -> bool:
+    """
+    Audit events (logged with audit=True: logins, logouts, token revocations,
+    profiling windows, audit log spills) and warnings or worse are never
+    dropped on overflow
+    """
+    if event_dict.get("audit") is True:
+        return True
+    return event_dict.get("level") in ("warning", "error", "critical", "exception")
+
+
+def _serialize(event_dict: Dict[str, Any]) -> bytes:
+    return orjson.dumps(event_dict, default=str, option=orjson.OPT_APPEND_NEWLINE)
+
+
+class AsyncLogWriter:
+    """
+    Bounded log queue drained by a background thread in batches
+    When the queue is full, overflow_policy decides what happens to a new record:
+    "drop_new" discards it, "drop_oldest" discards the oldest queued record, and
+    "block" waits for space. Records that must be kept always wait.
+    """
+
+    def __init__(
+        self,
+        stream: BinaryIO,
+        max_queue: int = 10000,
+        batch_size: int = 256,
+        overflow_policy: str = "drop_new"
+    ):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow_policy must be one of {', '.join(OVERFLOW_POLICIES)}")
+        self.stream = stream
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.overflow_policy = overflow_policy
+        self._records: Deque[Dict[str, Any]] = deque()
+        self._submitted = 0
+        self._completed = 0  # written or dropped from the queue
+        self._stopping = False
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._progress = threading.Condition(self._lock)
+        self._thread: Optional[threading.Thread] = None
+        self._dropped = LOG_RECORDS_DROPPED.labels(policy=overflow_policy)
+
+    def start(self) -> None:
+        """Start the writer thread"""
+        if self._thread is None:
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+            self._thread.start()
+
+    def submit(self, event_dict: Dict[str, Any]) -> None:
+        """Queue an event for writing, applying the overflow policy if full"""
+        if self._stopping:
+            # Late records after shutdown are written inline rather than lost
+            self._write([event_dict])
+            return
+        with self._lock:
+            if len(self._records) >= self.max_queue:
+                if self.overflow_policy == "block" or _must_keep(event_dict):
+                    while len(self._records) >= self.max_queue and self._thread is not None:
+                        self._not_full.wait()
+                elif self.overflow_policy == "drop_oldest" and not _must_keep(self._records[0]):
+                    self._records.popleft()
+                    self._completed += 1
+                    self._dropped.inc()
+                else:
+                    self._dropped.inc()
+                    return
+            self._records.append(event_dict)
+            self._submitted += 1
+            self._not_empty.notify()
+        LOG_RECORDS_QUEUED.inc()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until everything queued so far has been written"""
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            target = self._submitted
+            while self._completed < target:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._thread is None:
+                    return False
+                self._progress.wait(remaining)
+            return True
+
+    def close(self, timeout: float = 5.0) -> bool:
+        """Flush pending records and stop the writer thread"""
+        flushed = self.flush(timeout)
+        with self._lock:
+            thread, self._thread = self._thread, None
+            self._stopping = True
+            self._not_empty.notify()
+            self._not_full.notify_all()
+        if thread is not None:
+            thread.join(timeout)
+        return flushed
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                while not self._records and not self._stopping:
+                    self._not_empty.wait()
+                if not self._records:
+                    return
+                count = min(len(self._records), self.batch_size)
+                batch = [self._records.popleft() for _ in range(count)]
+                self._not_full.notify_all()
+            self._write(batch)
+            with self._lock:
+                self._completed += count
+                self._progress.notify_all()
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        try:
+            self.stream.write(b"".join(_serialize(event_dict) for event_dict in batch))
+            self.stream.flush()
+        except Exception:
+            # Logging must never take the writer thread down
+            self._dropped.inc(len(batch))
+
+
+class QueueLogger:
+    """structlog logger that hands event dicts to an AsyncLogWriter"""
+
+    def __init__(self, writer: AsyncLogWriter):
+        self._writer = writer
+
+    def msg(self, event_dict: Dict[str, Any]) -> None:
+        self._writer.submit(event_dict)
+
+    debug = info = warning = warn = error = critical = exception = fatal = log = msg
+
+
+def _enqueue(logger: Any, method_name: str, event_dict: Dict[str, Any]) -> Any:
+    """Final processor: pass the event dict itself on instead of rendering it"""
+    return (event_dict,), {}
+
+
+def configure_logging() -> None:
+    """Configure structured JSON logging (idempotent)"""
+    global _configured, _writer
+    if _configured:
+        return
+
+    if settings.LOG_MODE == "async":
+        _writer = AsyncLogWriter(
+            sys.stdout.buffer,
+            max_queue=settings.LOG_QUEUE_SIZE,
+            batch_size=settings.LOG_BATCH_SIZE,
+            overflow_policy=settings.LOG_OVERFLOW_POLICY
+        )
+        _writer.start()
+        structlog.configure(
+            processors=[
+                structlog.processors.add_log_level,
+                structlog.stdlib.PositionalArgumentsFormatter(),
+                structlog.processors.TimeStamper(fmt="iso"),
+                structlog.processors.StackInfoRenderer(),
+                structlog.processors.format_exc_info,
+                _enqueue
+            ],
+            context_class=dict,
+            logger_factory=lambda *args: QueueLogger(_writer),
+            wrapper_class=structlog.make_filtering_bound_logger(
+                logging.getLevelName(settings.LOG_LEVEL.upper())
+            ),
+            cache_logger_on_first_use=True,
+        )
+        _configured = True
+        return
+
+    structlog.configure(
+        processors=[
+            structlog.stdlib.filter_by_level,
+            structlog.stdlib.add_logger_name,
+            structlog.stdlib.add_log_level,
+            structlog.stdlib.PositionalArgumentsFormatter(),
+            structlog.processors.TimeStamper(fmt="iso"),
+            structlog.processors.StackInfoRenderer(),
+            structlog.processors.format_exc_info,
+            structlog.processors.UnicodeDecoder(),
+            structlog.processors.JSONRenderer()
+        ],
+        context_class=dict,
+        logger_factory=structlog.stdlib.LoggerFactory(),
+        wrapper_class=structlog.stdlib.BoundLogger,
+        cache_logger_on_first_use=True,
+    )
+    _configured = True
+
+
+def shutdown_logging(timeout: float = 5.0) -> None:
+    """Write out any queued log records (no-op in sync mode)"""
+    if _writer is not None:
+        _writer.close(timeout)
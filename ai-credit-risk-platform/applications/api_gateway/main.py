@@ -3,76 +3,159 @@ AI-Powered Credit Risk Assessment Platform - API Gateway
 Main FastAPI application entry point
 """
 
+import asyncio
 import os
-import time
 from contextlib import asynccontextmanager
-from typing import Dict, Any
 from datetime import datetime, timezone
+from typing import List
 
 from fastapi import FastAPI, HTTPException, Depends, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.security import HTTPBearer
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
-from starlette.middleware.base import BaseHTTPMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST
 from starlette.requests import Request
 from starlette.responses import Response, JSONResponse
 import structlog
 
 from .config import settings
-from .auth import get_current_user
-from .models import HealthCheck, User
-
-# Configure structured logging
-structlog.configure(
-    processors=[
-        structlog.stdlib.filter_by_level,
-        structlog.stdlib.add_logger_name,
-        structlog.stdlib.add_log_level,
-        structlog.stdlib.PositionalArgumentsFormatter(),
-        structlog.processors.TimeStamper(fmt="iso"),
-        structlog.processors.StackInfoRenderer(),
-        structlog.processors.format_exc_info,
-        structlog.processors.UnicodeDecoder(),
-        structlog.processors.JSONRenderer()
-    ],
-    context_class=dict,
-    logger_factory=structlog.stdlib.LoggerFactory(),
-    wrapper_class=structlog.stdlib.BoundLogger,
-    cache_logger_on_first_use=True,
+from .lazy import lazy_import
+from .logging_config import configure_logging, shutdown_logging
+from .metrics import render_latest
+from .audit import audit_writer
+from .feature_store import feature_store
+from .middleware import (
+    AdmissionControlMiddleware,
+    AuditMiddleware,
+    GradientLimit,
+    MetricsMiddleware,
+    ProfilingMiddleware,
+    ServerTimingMiddleware,
 )
-
-logger = structlog.get_logger()
-
-# Prometheus metrics
-REQUEST_COUNT = Counter(
-    'http_requests_total',
-    'Total HTTP requests',
-    ['method', 'endpoint', 'status']
+from .model_registry import model_registry, predict_confidence
+from .open_banking import open_banking_client
+from .auth import (
+    authenticate_user_async,
+    create_session_token,
+    get_current_user,
+    seed_users,
+    verify_access_token,
 )
-
-REQUEST_LATENCY = Histogram(
-    'http_request_duration_seconds',
-    'HTTP request latency',
-    ['method', 'endpoint']
+from .jobs import ASSESSMENT_JOB, JobQueueFull, JobQueueUnavailable, job_queue, job_workers
+from .models import (
+    AssessmentJobRequest,
+    CreditRiskBatchRequest,
+    CreditRiskBatchResponse,
+    CreditRiskRequest,
+    CreditRiskResponse,
+    HealthCheck,
+    JobStatus,
+    LoginRequest,
+    PortfolioRiskRequest,
+    PortfolioRiskResponse,
+    SessionInfo,
+    Token,
+    User,
+)
+from .password_hashing import password_hash_pool
+from .portfolio import build_portfolio, simulate_portfolio
+from .profiler import ProfilerBusy, is_profiler_admin, sampling_profiler
+from .result_cache import result_cache
+from .scoring import object_records, prewarm, stored_assessment, stored_batch
+from .scoring_engine import get_scoring_engine, load_scoring_engine
+from .scoring_pool import ScoringPoolFull, scoring_pool
+from .serialization import ModelResponse, body_parser, request_body_schema
+from .sessions import SessionStoreUnavailable, session_store
+from .streaming import (
+    CSV_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+    RequestStreamingResponse,
+    iter_assessments,
+    iter_csv_records,
+    iter_lines,
 )
+from .timing import stage
+
+logger = structlog.get_logger()
 
 # Security
 security = HTTPBearer()
 
+# Database (bound lazily so SQLAlchemy stays out of start-up)
+database = lazy_import(f"{__package__}.database")
+
+async def start_database() -> None:
+    """Open the connection pool and make sure the seed users exist"""
+    try:
+        await database.init_database()
+        await seed_users()
+    except Exception as e:
+        logger.error("Database initialisation failed", error=str(e))
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
     # Startup
+    configure_logging()
     logger.info("Starting AI Credit Risk Assessment Platform API Gateway")
     
+    # Compile scoring rules once, before the first request
+    load_scoring_engine(settings.SCORING_RULES_PATH)
+    
+    # Load the published model, then keep polling the registry for new versions
+    await asyncio.to_thread(model_registry.refresh)
+    model_task = asyncio.create_task(model_registry.watch(settings.MODEL_REGISTRY_POLL_SECONDS))
+    
+    # Map the applicant feature store, then pick up rebuilds and deltas as they are written
+    await asyncio.to_thread(feature_store.refresh)
+    feature_store_task = asyncio.create_task(feature_store.watch(settings.FEATURE_STORE_POLL_SECONDS))
+    
+    # Shared, keep-alive connection pool for the Open Banking API
+    open_banking_client.start()
+    
+    # Load revoked token IDs, then follow revocations published by other workers
+    session_store.start()
+    
+    # Spawn the batch scoring processes; they warm up while start-up continues
+    scoring_pool.start()
+    
+    # Open the database and seed users in the background so /health is served immediately
+    database_task = asyncio.create_task(start_database())
+    
+    # Warm the scoring paths before this worker starts accepting requests
+    if settings.PREWARM_ON_STARTUP:
+        await asyncio.get_running_loop().run_in_executor(None, prewarm)
+        logger.info("Worker prewarmed", pid=os.getpid())
+    
+    # Start the audit writer (replays entries spilled by a previous run)
+    if settings.AUDIT_LOG_ENABLED:
+        audit_writer.start()
+    
+    # Run queued assessment jobs on this worker (JOB_WORKERS=0 leaves them to dedicated workers)
+    job_workers.start()
+    
     # Add startup tasks here (database connections, etc.)
     
     yield
     
     # Shutdown
     logger.info("Shutting down AI Credit Risk Assessment Platform API Gateway")
+    await database_task
+    model_task.cancel()
+    feature_store_task.cancel()
+    scoring_pool.shutdown()
+    password_hash_pool.shutdown()
+    await job_workers.close()
+    await job_queue.close()
+    await open_banking_client.close()
+    await result_cache.close()
+    await session_store.close()
+    audit_writer.close()
+    await database.close_database()
     # Add cleanup tasks here
+    
+    # Write out queued log lines last so shutdown records are not lost
+    shutdown_logging()
 
 # Create FastAPI app
 app = FastAPI(
@@ -98,29 +181,28 @@ app.add_middleware(
     allowed_hosts=settings.ALLOWED_HOSTS
 )
 
-class MetricsMiddleware(BaseHTTPMiddleware):
-    """Middleware to collect Prometheus metrics"""
-    
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
-        
-        response = await call_next(request)
-        
-        duration = time.time() - start_time
-        REQUEST_COUNT.labels(
-            method=request.method,
-            endpoint=request.url.path,
-            status=response.status_code
-        ).inc()
-        
-        REQUEST_LATENCY.labels(
-            method=request.method,
-            endpoint=request.url.path
-        ).observe(duration)
-        
-        return response
-
+app.add_middleware(AuditMiddleware, writer=audit_writer)
+# Inside MetricsMiddleware, so shed requests still show up as 503s in the request metrics
+app.add_middleware(
+    AdmissionControlMiddleware,
+    limiter=GradientLimit(
+        initial_limit=settings.ADMISSION_INITIAL_LIMIT,
+        min_limit=settings.ADMISSION_MIN_LIMIT,
+        max_limit=settings.ADMISSION_MAX_LIMIT
+    ),
+    retry_after=settings.ADMISSION_RETRY_AFTER_SECONDS,
+    enabled=settings.ADMISSION_CONTROL_ENABLED,
+    verify_token=verify_access_token
+)
 app.add_middleware(MetricsMiddleware)
+app.add_middleware(ServerTimingMiddleware, enabled=settings.SERVER_TIMING_ENABLED)
+app.add_middleware(
+    ProfilingMiddleware,
+    profiler=sampling_profiler,
+    admins=settings.PROFILER_ADMINS,
+    enabled=settings.PROFILER_ENABLED,
+    verify_token=verify_access_token
+)
 
 # Health check endpoint
 @app.get("/health", response_model=HealthCheck, tags=["Health"])
@@ -135,8 +217,8 @@ async def health_check() -> HealthCheck:
 # Metrics endpoint for Prometheus
 @app.get("/metrics", tags=["Monitoring"])
 async def metrics():
-    """Prometheus metrics endpoint"""
-    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+    """Prometheus metrics endpoint, aggregated across workers"""
+    return Response(render_latest(), media_type=CONTENT_TYPE_LATEST)
 
 # Root endpoint
 @app.get("/", tags=["Root"])
@@ -149,6 +231,81 @@ async def root():
         "health": "/health"
     }
 
+# Login endpoint
+@app.post("/api/v1/auth/login", response_model=Token, tags=["Authentication"])
+async def login(credentials: LoginRequest) -> Token:
+    """Exchange a username and password for a JWT access token"""
+    user = await authenticate_user_async(credentials.username, credentials.password)
+    if user is None or not user.is_active:
+        logger.warning("Login failed", username=credentials.username, audit=True)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect username or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    logger.info("User logged in", username=user.username, user_id=user.id, audit=True)
+    return Token(access_token=await create_session_token(user.username))
+
+async def revoke_session_token(session_id: str, username: str, expires_at: datetime) -> None:
+    """Revoke a session's token, as a 503 if the session store is unreachable"""
+    try:
+        await session_store.revoke(session_id, username, expires_at)
+    except SessionStoreUnavailable:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Session store temporarily unavailable",
+            headers={"Retry-After": "1"}
+        )
+
+# Logout endpoint
+@app.post("/api/v1/auth/logout", status_code=status.HTTP_204_NO_CONTENT, tags=["Authentication"])
+async def logout(
+    request: Request,
+    current_user: User = Depends(get_current_user)
+) -> Response:
+    """Revoke the access token used for this request"""
+    access_token = request.state.access_token
+    if access_token.token_id is None or access_token.expires_at is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Token cannot be revoked")
+    await revoke_session_token(access_token.token_id, current_user.username, access_token.expires_at)
+    logger.info("User logged out", username=current_user.username, user_id=current_user.id, audit=True)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+async def user_sessions(username: str) -> List[SessionInfo]:
+    """A user's active sessions, as a 503 if the session store is unreachable"""
+    try:
+        return await session_store.list_sessions(username)
+    except SessionStoreUnavailable:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Session store temporarily unavailable",
+            headers={"Retry-After": "1"}
+        )
+
+# Session endpoints
+@app.get("/api/v1/auth/sessions", response_model=List[SessionInfo], tags=["Authentication"])
+async def list_sessions(
+    request: Request,
+    current_user: User = Depends(get_current_user)
+) -> List[SessionInfo]:
+    """List the current user's active sessions"""
+    sessions = await user_sessions(current_user.username)
+    current_id = request.state.access_token.token_id
+    return [session.model_copy(update={"current": session.session_id == current_id}) for session in sessions]
+
+@app.delete("/api/v1/auth/sessions/{session_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["Authentication"])
+async def revoke_session(
+    session_id: str,
+    current_user: User = Depends(get_current_user)
+) -> Response:
+    """End one of the current user's sessions, e.g. on a lost device"""
+    for session in await user_sessions(current_user.username):
+        if session.session_id == session_id:
+            await revoke_session_token(session_id, current_user.username, session.expires_at)
+            return Response(status_code=status.HTTP_204_NO_CONTENT)
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+
 # Protected endpoint example
 @app.get("/api/v1/me", response_model=User, tags=["User"])
 async def get_current_user_info(
@@ -158,49 +315,62 @@ async def get_current_user_info(
     return current_user
 
 # Credit risk assessment endpoint (placeholder for Phase 1)
-@app.post("/api/v1/credit-risk/assess", tags=["Credit Risk"])
+@app.post(
+    "/api/v1/credit-risk/assess",
+    response_model=CreditRiskResponse,
+    response_class=ModelResponse,
+    openapi_extra=request_body_schema(CreditRiskRequest),
+    tags=["Credit Risk"]
+)
 async def assess_credit_risk(
     request: Request,
-    current_user: User = Depends(get_current_user)
-) -> Dict[str, Any]:
+    current_user: User = Depends(get_current_user),
+    application: CreditRiskRequest = Depends(body_parser(CreditRiskRequest))
+) -> ModelResponse:
     """
     Assess credit risk for a given application
     This is a placeholder implementation for Phase 1 MVP
     """
     try:
-        # Placeholder implementation - will be enhanced in later phases
-        data = await request.json()
-        
-        # Simple rule-based risk assessment for MVP
-        income = data.get("income", 0)
-        credit_score = data.get("credit_score", 0)
-        debt_ratio = data.get("debt_ratio", 0)
-        
-        # Basic risk calculation
-        risk_score = 0
-        if income < 30000:
-            risk_score += 30
-        if credit_score < 650:
-            risk_score += 25
-        if debt_ratio > 0.4:
-            risk_score += 20
-            
-        risk_level = "LOW" if risk_score < 30 else "MEDIUM" if risk_score < 60 else "HIGH"
+        # Rule-based risk assessment, reusing cached results for repeated applications
+        with stage("score"):
+            assessment = await result_cache.assess(application)
+        model = model_registry.active
+        with stage("model"):
+            confidence_score = (
+                await predict_confidence(model, application, assessment.risk_level) if model else None
+            )
+        with stage("features"):
+            applicant_features = feature_store.lookup(application.applicant_id)
+        if settings.ASSESSMENT_STORE_ENABLED:
+            # Stored with the audit entry once the response is sent
+            request.state.assessments = [stored_assessment(
+                application.applicant_id,
+                application.model_dump(),
+                assessment.risk_score,
+                assessment.risk_level,
+                assessment.recommendation
+            )]
         
         logger.info(
             "Credit risk assessment completed",
             user_id=current_user.id,
-            risk_score=risk_score,
-            risk_level=risk_level
+            risk_score=assessment.risk_score,
+            risk_level=assessment.risk_level
         )
         
-        return {
-            "risk_score": risk_score,
-            "risk_level": risk_level,
-            "recommendation": "APPROVE" if risk_level == "LOW" else "REVIEW" if risk_level == "MEDIUM" else "DECLINE",
-            "assessment_date": datetime.now(timezone.utc).isoformat(),
-            "assessor": current_user.username
-        }
+        return ModelResponse(CreditRiskResponse(
+            applicant_id=application.applicant_id,
+            risk_score=assessment.risk_score,
+            risk_level=assessment.risk_level,
+            recommendation=assessment.recommendation,
+            factors=assessment.factors,
+            confidence_score=confidence_score,
+            model_version=model.version if model else None,
+            applicant_features=applicant_features,
+            assessment_date=datetime.now(timezone.utc),
+            assessor=current_user.username
+        ))
         
     except Exception as e:
         logger.error("Credit risk assessment failed", error=str(e))
@@ -209,47 +379,223 @@ async def assess_credit_risk(
             detail="Failed to assess credit risk"
         )
 
+# Batch credit risk assessment endpoint
+@app.post(
+    "/api/v1/credit-risk/assess/batch",
+    response_model=CreditRiskBatchResponse,
+    response_class=ModelResponse,
+    openapi_extra=request_body_schema(CreditRiskBatchRequest),
+    tags=["Credit Risk"]
+)
+async def assess_credit_risk_batch(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    batch: CreditRiskBatchRequest = Depends(body_parser(CreditRiskBatchRequest))
+) -> ModelResponse:
+    """
+    Assess credit risk for many applications in a single request
+    Each application is validated individually; invalid ones are reported
+    inline and the remaining ones are scored together with NumPy
+    """
+    if len(batch.applications) > settings.CREDIT_RISK_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch size exceeds limit of {settings.CREDIT_RISK_BATCH_MAX_SIZE} applications"
+        )
+
+    try:
+        with stage("score"):
+            items = await scoring_pool.assess_records(
+                object_records(batch.applications), assessor=current_user.username
+            )
+    except ScoringPoolFull:
+        logger.warning("Batch credit risk assessment rejected, scoring pool saturated", user_id=current_user.id)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Scoring temporarily unavailable",
+            headers={"Retry-After": "1"}
+        )
+    except Exception as e:
+        logger.error("Batch credit risk assessment failed", error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to assess credit risk"
+        )
+
+    failed = sum(1 for item in items if item.errors is not None)
+    if settings.ASSESSMENT_STORE_ENABLED:
+        request.state.assessments = stored_batch(batch.applications, items)
+    logger.info(
+        "Batch credit risk assessment completed",
+        user_id=current_user.id,
+        total=len(items),
+        succeeded=len(items) - failed,
+        failed=failed
+    )
+
+    return ModelResponse(CreditRiskBatchResponse(
+        total=len(items),
+        succeeded=len(items) - failed,
+        failed=failed,
+        results=items
+    ))
+
+# Streaming credit risk assessment endpoint
+@app.post("/api/v1/credit-risk/assess/stream", tags=["Credit Risk"])
+async def assess_credit_risk_stream(
+    request: Request,
+    current_user: User = Depends(get_current_user)
+) -> RequestStreamingResponse:
+    """
+    Assess credit risk for an NDJSON or CSV body of arbitrary size
+    Records are scored in fixed-size chunks as they arrive and results are
+    streamed back as NDJSON in input order, so memory use stays flat.
+    Streamed assessments are not kept in the assessment store
+    """
+    records = iter_lines(request.stream(), settings.CREDIT_RISK_STREAM_MAX_LINE_BYTES)
+    if request.headers.get("content-type", "").startswith(CSV_MEDIA_TYPE):
+        records = iter_csv_records(records)
+
+    logger.info("Streaming credit risk assessment started", user_id=current_user.id)
+    return RequestStreamingResponse(
+        iter_assessments(
+            records,
+            assessor=current_user.username,
+            chunk_size=settings.CREDIT_RISK_STREAM_CHUNK_SIZE
+        ),
+        media_type=NDJSON_MEDIA_TYPE
+    )
+
+# Portfolio credit risk endpoint
+@app.post(
+    "/api/v1/portfolio/risk",
+    response_model=PortfolioRiskResponse,
+    response_class=ModelResponse,
+    openapi_extra=request_body_schema(PortfolioRiskRequest),
+    tags=["Portfolio"]
+)
+async def assess_portfolio_risk(
+    current_user: User = Depends(get_current_user),
+    portfolio_request: PortfolioRiskRequest = Depends(body_parser(PortfolioRiskRequest))
+) -> ModelResponse:
+    """
+    Simulate the loss distribution of a loan portfolio
+    Probabilities of default come from the rules engine, exposures from
+    loan_amount; correlated defaults are simulated by Monte Carlo and
+    summarized as expected loss, VaR and expected shortfall
+    """
+    loans = len(portfolio_request.loans)
+    scenarios = portfolio_request.scenarios
+    if loans > settings.PORTFOLIO_MAX_LOANS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Portfolio size exceeds limit of {settings.PORTFOLIO_MAX_LOANS} loans"
+        )
+    if scenarios > settings.PORTFOLIO_MAX_SCENARIOS or loans * scenarios > settings.PORTFOLIO_MAX_SIMULATION_ELEMENTS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=(
+                f"Simulation exceeds limit of {settings.PORTFOLIO_MAX_SCENARIOS} scenarios "
+                f"or {settings.PORTFOLIO_MAX_SIMULATION_ELEMENTS} loan scenarios"
+            )
+        )
+
+    engine = get_scoring_engine()
+    try:
+        with stage("score"):
+            portfolio = build_portfolio(portfolio_request.loans, engine)
+        with stage("simulate"):
+            risk = await simulate_portfolio(
+                portfolio,
+                scenarios=scenarios,
+                correlation=portfolio_request.correlation,
+                confidence_levels=portfolio_request.confidence_levels,
+                seed=portfolio_request.seed
+            )
+    except ScoringPoolFull:
+        logger.warning("Portfolio risk simulation rejected, scoring pool saturated", user_id=current_user.id)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Scoring temporarily unavailable",
+            headers={"Retry-After": "1"}
+        )
+    except ValueError as e:
+        # The active rules do not calibrate a probability of default for every band
+        logger.error("Portfolio risk simulation failed", error=str(e))
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except Exception as e:
+        logger.error("Portfolio risk simulation failed", error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to simulate portfolio risk"
+        )
+
+    logger.info(
+        "Portfolio risk simulation completed",
+        user_id=current_user.id,
+        loans=loans,
+        scenarios=scenarios,
+        expected_loss=risk.expected_loss
+    )
+
+    return ModelResponse(PortfolioRiskResponse(
+        loans=loans,
+        scenarios=risk.scenarios,
+        seed=portfolio_request.seed,
+        correlation=portfolio_request.correlation,
+        total_exposure=risk.total_exposure,
+        expected_loss=risk.expected_loss,
+        simulated_expected_loss=risk.simulated_expected_loss,
+        loss_std=risk.loss_std,
+        tail_risk=[tail._asdict() for tail in risk.tail_risk],
+        rules_version=engine.version
+    ))
+
 # Test endpoint without authentication
-@app.post("/api/v1/credit-risk/test", tags=["Credit Risk"])
+@app.post(
+    "/api/v1/credit-risk/test",
+    response_model=CreditRiskResponse,
+    response_class=ModelResponse,
+    openapi_extra=request_body_schema(CreditRiskRequest),
+    tags=["Credit Risk"]
+)
 async def test_credit_risk_assessment(
-    request: Request
-) -> Dict[str, Any]:
+    application: CreditRiskRequest = Depends(body_parser(CreditRiskRequest))
+) -> ModelResponse:
     """
     Test credit risk assessment endpoint (no authentication required)
     This is for testing purposes only
     """
     try:
-        data = await request.json()
-        
-        # Simple rule-based risk assessment for MVP
-        income = data.get("income", 0)
-        credit_score = data.get("credit_score", 0)
-        debt_ratio = data.get("debt_ratio", 0)
-        
-        # Basic risk calculation
-        risk_score = 0
-        if income < 30000:
-            risk_score += 30
-        if credit_score < 650:
-            risk_score += 25
-        if debt_ratio > 0.4:
-            risk_score += 20
-            
-        risk_level = "LOW" if risk_score < 30 else "MEDIUM" if risk_score < 60 else "HIGH"
+        # Rule-based risk assessment using the compiled scoring engine
+        with stage("score"):
+            assessment = get_scoring_engine().score(application.model_dump())
+        model = model_registry.active
+        with stage("model"):
+            confidence_score = (
+                await predict_confidence(model, application, assessment.risk_level) if model else None
+            )
+        with stage("features"):
+            applicant_features = feature_store.lookup(application.applicant_id)
         
         logger.info(
             "Test credit risk assessment completed",
-            risk_score=risk_score,
-            risk_level=risk_level
+            risk_score=assessment.risk_score,
+            risk_level=assessment.risk_level
         )
         
-        return {
-            "risk_score": risk_score,
-            "risk_level": risk_level,
-            "recommendation": "APPROVE" if risk_level == "LOW" else "REVIEW" if risk_level == "MEDIUM" else "DECLINE",
-            "assessment_date": datetime.now(timezone.utc).isoformat(),
-            "assessor": "test-system"
-        }
+        return ModelResponse(CreditRiskResponse(
+            applicant_id=application.applicant_id,
+            risk_score=assessment.risk_score,
+            risk_level=assessment.risk_level,
+            recommendation=assessment.recommendation,
+            factors=assessment.factors,
+            confidence_score=confidence_score,
+            model_version=model.version if model else None,
+            applicant_features=applicant_features,
+            assessment_date=datetime.now(timezone.utc),
+            assessor="test-system"
+        ))
         
     except Exception as e:
         logger.error("Test credit risk assessment failed", error=str(e))
@@ -258,6 +604,89 @@ async def test_credit_risk_assessment(
             detail="Failed to assess credit risk"
         )
 
+# Assessment job endpoints
+@app.post(
+    "/api/v1/jobs/credit-risk/assess",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=JobStatus,
+    openapi_extra=request_body_schema(AssessmentJobRequest),
+    tags=["Jobs"]
+)
+async def submit_assessment_job(
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    job: AssessmentJobRequest = Depends(body_parser(AssessmentJobRequest))
+) -> JobStatus:
+    """
+    Queue a credit risk assessment, enriched with Open Banking balances if an
+    account is given, and return at once; poll the Location for the result
+    """
+    try:
+        record = await job_queue.submit(
+            ASSESSMENT_JOB, job.model_dump(mode="json"), current_user.username, job.priority
+        )
+    except (JobQueueFull, JobQueueUnavailable) as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"}
+        )
+    response.headers["Location"] = f"/api/v1/jobs/{record['job_id']}"
+    return JobStatus.model_validate(record)
+
+@app.get("/api/v1/jobs/{job_id}", response_model=JobStatus, tags=["Jobs"])
+async def get_job(
+    job_id: str,
+    wait: float = 0.0,
+    current_user: User = Depends(get_current_user)
+) -> JobStatus:
+    """
+    Get one of the current user's jobs
+    With wait, hold the request until the job finishes or wait seconds pass
+    (at most JOB_MAX_WAIT_SECONDS)
+    """
+    if wait < 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="wait must not be negative")
+    try:
+        record = await job_queue.get(job_id)
+        if record is None or record["owner"] != current_user.username:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+        if wait > 0:
+            record = await job_queue.wait(job_id, min(wait, settings.JOB_MAX_WAIT_SECONDS)) or record
+    except JobQueueUnavailable as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"}
+        )
+    return JobStatus.model_validate(record)
+
+# Profiling endpoint for admins
+@app.post("/api/v1/admin/profile", status_code=status.HTTP_202_ACCEPTED, tags=["Admin"])
+async def start_profile(
+    seconds: float = 10.0,
+    current_user: User = Depends(get_current_user)
+) -> dict:
+    """
+    Sample this worker's stacks for a time window (at most PROFILER_MAX_SECONDS)
+    The profile is written in folded format once the window ends; the
+    response names the file
+    """
+    if not is_profiler_admin(current_user.username):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Profiling is not allowed")
+    if seconds <= 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="seconds must be positive")
+    try:
+        path = sampling_profiler.start_window(seconds)
+    except ProfilerBusy:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A profile is already being recorded")
+
+    seconds = min(seconds, settings.PROFILER_MAX_SECONDS)
+    logger.info(
+        "Profiling window started", user_id=current_user.id, seconds=seconds, path=str(path), audit=True
+    )
+    return {"profile": str(path), "seconds": seconds, "pid": os.getpid()}
+
 # Error handlers
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
@@ -270,7 +699,8 @@ async def http_exception_handler(request: Request, exc: HTTPException):
     )
     return JSONResponse(
         status_code=exc.status_code,
-        content={"error": exc.detail}
+        content={"error": exc.detail},
+        headers=getattr(exc, "headers", None)
     )
 
 @app.exception_handler(Exception)
@@ -288,10 +718,19 @@ async def general_exception_handler(request: Request, exc: Exception):
     )
 
 if __name__ == "__main__":
+    # Production deployments use gunicorn with gunicorn.conf.py; this runs uvicorn directly
+    import tempfile
     import uvicorn
+    from .metrics import prepare_multiprocess_dir
+    
+    if settings.WORKERS > 1:
+        prepare_multiprocess_dir(
+            settings.PROMETHEUS_MULTIPROC_DIR or tempfile.mkdtemp(prefix="prometheus-multiproc-")
+        )
     uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True if settings.ENVIRONMENT == "development" else False
-    ) 
\ No newline at end of file
+        "applications.api_gateway.main:app",
+        host=settings.HOST,
+        port=settings.PORT,
+        workers=settings.WORKERS,
+        reload=True if settings.ENVIRONMENT == "development" and settings.WORKERS == 1 else False
+    )
@@ -0,0 +1,52 @@
+"""
+Prometheus exposition for the API Gateway
+
+With a single process the default registry is exported as-is. When the
+gateway runs under several workers, PROMETHEUS_MULTIPROC_DIR must be set
+before prometheus_client is first imported (in the parent process, for
+forked workers); every worker then writes its samples to that directory and
+/metrics aggregates all of them, whichever worker answers.
+"""
+
+import os
+import shutil
+from pathlib import Path
+
+from prometheus_client import REGISTRY, CollectorRegistry, generate_latest
+from prometheus_client import multiprocess
+
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+
+def multiprocess_enabled() -> bool:
+    """Return whether metrics are being shared between worker processes"""
+    return bool(os.environ.get(MULTIPROC_DIR_ENV))
+
+
+def prepare_multiprocess_dir(path: str) -> None:
+    """
+    Create an empty metrics directory and point prometheus_client at it
+    Processes that imported prometheus_client before this call keep
+    in-process values, so call it first or export the variable earlier
+    """
+    directory = Path(path)
+    if directory.exists():
+        # Files left by a previous run would be aggregated with the new ones
+        shutil.rmtree(directory)
+    directory.mkdir(parents=True)
+    os.environ[MULTIPROC_DIR_ENV] = str(directory)
+
+
+def mark_worker_dead(pid: int) -> None:
+    """Drop the live gauges of a worker that has exited"""
+    if multiprocess_enabled():
+        multiprocess.mark_process_dead(pid)
+
+
+def render_latest() -> bytes:
+    """Render the current metrics in the Prometheus text format"""
+    if not multiprocess_enabled():
+        return generate_latest(REGISTRY)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
@@ -0,0 +1,126 @@
+"""
+Micro-batching for the API Gateway
+
+A MicroBatcher collects items submitted by concurrent requests and processes
+them with one call, then hands each waiting request its own result. Batches
+are processed once max_batch_size items are waiting, or max_wait seconds after
+the first item of a batch arrived, whichever comes first. Raising max_wait
+gives larger batches (throughput) at the cost of up to max_wait added latency
+per request.
+"""
+
+import asyncio
+import time
+from typing import Callable, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+from prometheus_client import Histogram
+import structlog
+
+logger = structlog.get_logger()
+
+ItemT = TypeVar("ItemT")
+ResultT = TypeVar("ResultT")
+
+# Prometheus metrics
+MICRO_BATCH_SIZE = Histogram(
+    'micro_batch_size',
+    'Items processed per micro-batch',
+    ['batcher'],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+)
+
+MICRO_BATCH_QUEUE_WAIT = Histogram(
+    'micro_batch_queue_wait_seconds',
+    'Time items wait for their micro-batch to start',
+    ['batcher'],
+    buckets=(0.0001, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+)
+
+MICRO_BATCH_DURATION = Histogram(
+    'micro_batch_duration_seconds',
+    'Time to process one micro-batch',
+    ['batcher'],
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+)
+
+
+class MicroBatcher(Generic[ItemT, ResultT]):
+    """
+    Coalesces concurrent submit() calls into batched process() calls
+    process receives a list of items and must return one result per item, in
+    order. It runs on the event loop, so it should be quick. If it raises,
+    every item in that batch gets the exception.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        process: Callable[[List[ItemT]], Sequence[ResultT]],
+        max_batch_size: int = 64,
+        max_wait: float = 0.002
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.name = name
+        self.process = process
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._pending: List[Tuple[ItemT, "asyncio.Future[ResultT]", float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._size = MICRO_BATCH_SIZE.labels(batcher=name)
+        self._queue_wait = MICRO_BATCH_QUEUE_WAIT.labels(batcher=name)
+        self._duration = MICRO_BATCH_DURATION.labels(batcher=name)
+
+    async def submit(self, item: ItemT) -> ResultT:
+        """Add an item to the next batch and wait for its result"""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Pending futures belong to one event loop; a new loop starts afresh
+            self._pending = []
+            self._timer = None
+            self._loop = loop
+
+        future: "asyncio.Future[ResultT]" = loop.create_future()
+        self._pending.append((item, future, time.perf_counter()))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending:
+            batch = self._pending[:self.max_batch_size]
+            del self._pending[:self.max_batch_size]
+            self._run(batch)
+
+    def _run(self, batch: List[Tuple[ItemT, "asyncio.Future[ResultT]", float]]) -> None:
+        # Requests that went away (client disconnects) are dropped from the batch
+        batch = [entry for entry in batch if not entry[1].done()]
+        if not batch:
+            return
+        start = time.perf_counter()
+        for _, _, enqueued in batch:
+            self._queue_wait.observe(start - enqueued)
+        self._size.observe(len(batch))
+
+        try:
+            results = self.process([item for item, _, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"{self.name} batch returned {len(results)} results for {len(batch)} items")
+        except Exception as e:
+            logger.error("Micro-batch failed", batcher=self.name, size=len(batch), error=str(e))
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._duration.observe(time.perf_counter() - start)
+
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,438 @@
+"""
+ASGI middleware for the API Gateway
+"""
+
+import asyncio
+import math
+import time
+from typing import Any, Awaitable, Callable, Collection, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .audit import AuditWriter, build_entry
+from .profiler import ProfilerBusy, SamplingProfiler
+from .timing import collect_stages, server_timing
+
+# Prometheus metrics
+REQUEST_COUNT = Counter(
+    'http_requests_total',
+    'Total HTTP requests',
+    ['method', 'endpoint', 'status']
+)
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds',
+    'HTTP request latency',
+    ['method', 'endpoint']
+)
+
+RESPONSE_SIZE = Histogram(
+    'http_response_size_bytes',
+    'HTTP response body size',
+    ['method', 'endpoint'],
+    buckets=(100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000)
+)
+
+REQUESTS_IN_PROGRESS = Gauge(
+    'http_requests_in_progress',
+    'HTTP requests currently being processed',
+    ['method'],
+    multiprocess_mode='livesum'
+)
+
+ADMISSION_IN_FLIGHT = Gauge(
+    'admission_requests_in_flight',
+    'Requests admitted by admission control and not yet finished',
+    multiprocess_mode='livesum'
+)
+
+ADMISSION_LIMIT = Gauge(
+    'admission_concurrency_limit',
+    'Adaptive concurrency limit (summed over workers)',
+    multiprocess_mode='livesum'
+)
+
+ADMISSION_SHED = Counter(
+    'admission_requests_shed_total',
+    'Requests rejected with 503 by admission control',
+    ['priority']
+)
+
+# Endpoint label for requests that never reached a route (404s, rejected hosts)
+UNMATCHED_ENDPOINT = "<unmatched>"
+
+# Admission priorities, and the share of the concurrency limit each may fill.
+# Lower priorities are shed first, leaving headroom for authenticated scoring
+PRIORITY_CRITICAL = "critical"
+PRIORITY_NORMAL = "normal"
+PRIORITY_LOW = "low"
+PRIORITY_SHARES = {PRIORITY_CRITICAL: 1.0, PRIORITY_NORMAL: 0.8, PRIORITY_LOW: 0.5}
+
+CREDIT_RISK_PREFIX = "/api/v1/credit-risk/"
+LOW_PRIORITY_PREFIXES = ("/api/v1/credit-risk/test", "/docs", "/redoc", "/openapi.json")
+# Probes and scrapes must keep working under overload
+EXEMPT_PATHS = ("/health", "/metrics")
+# Long-lived responses whose duration says nothing about queueing
+UNSAMPLED_PATHS = ("/api/v1/credit-risk/assess/stream",)
+# Job polls may wait on Redis for JOB_MAX_WAIT_SECONDS: shed like any other
+# request, but idle, so they neither hold a slot nor give a sample
+LONG_POLL_PREFIX = "/api/v1/jobs/"
+
+# Returns the claims of a valid bearer token, or None
+TokenVerifier = Callable[[str], Awaitable[Optional[Any]]]
+
+
+def route_template(scope: Scope) -> str:
+    """Return the matched route's path template, e.g. /api/v1/items/{item_id}"""
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return path if path is not None else UNMATCHED_ENDPOINT
+
+
+async def request_priority(scope: Scope, verify_token: Optional[TokenVerifier] = None) -> Optional[str]:
+    """Admission priority of a request, or None if it is never shed"""
+    path = scope["path"]
+    if path in EXEMPT_PATHS:
+        return None
+    if path == "/" or path.startswith(LOW_PRIORITY_PREFIXES):
+        return PRIORITY_LOW
+    if path.startswith(CREDIT_RISK_PREFIX) and await has_valid_token(scope, verify_token):
+        return PRIORITY_CRITICAL
+    return PRIORITY_NORMAL
+
+
+async def has_valid_token(scope: Scope, verify_token: Optional[TokenVerifier]) -> bool:
+    """Whether the request's bearer token is accepted by verify_token"""
+    token = bearer_token(scope)
+    if token is None or verify_token is None:
+        return False
+    try:
+        return await verify_token(token) is not None
+    except Exception:
+        # e.g. the revocation store is unreachable; rank as unauthenticated
+        return False
+
+
+def is_long_poll(scope: Scope) -> bool:
+    """Whether the request is a job status poll, which may wait for the job"""
+    return scope["method"] == "GET" and scope["path"].startswith(LONG_POLL_PREFIX)
+
+
+def profile_requested(scope: Scope) -> bool:
+    """Whether the request asks to be profiled (X-Profile: true)"""
+    for name, value in scope["headers"]:
+        if name == b"x-profile":
+            return value.lower() in (b"1", b"true")
+    return False
+
+
+def bearer_token(scope: Scope) -> Optional[str]:
+    """The request's bearer token, unverified"""
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer":
+                return None
+            return token.strip() or None
+    return None
+
+
+class GradientLimit:
+    """
+    Gradient-style adaptive concurrency limit (after Netflix's Gradient2)
+    Request latencies are averaged over short windows and compared with a
+    long-term average across long_window windows. While they agree, the limit
+    grows by about sqrt(limit) per window. When latency rises (requests
+    queueing downstream), the limit shrinks in proportion, by at most half.
+    The limit is left alone while less than half of it is in use.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 50,
+        min_limit: int = 10,
+        max_limit: int = 500,
+        tolerance: float = 1.5,
+        smoothing: float = 0.2,
+        window_seconds: float = 0.1,
+        min_window_samples: int = 10,
+        long_window: int = 600,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("Limits must satisfy 1 <= min_limit <= initial_limit <= max_limit")
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.window_seconds = window_seconds
+        self.min_window_samples = min_window_samples
+        self.long_window = long_window
+        self._clock = clock
+        self._long_rtt: Optional[float] = None
+        self._window_start = clock()
+        self._window_samples = 0
+        self._window_rtt = 0.0
+        self._window_in_flight = 0
+
+    def update(self, rtt: float, in_flight: int) -> float:
+        """Record a request's latency and the concurrency it ran at, returning the limit"""
+        self._window_samples += 1
+        self._window_rtt += rtt
+        self._window_in_flight = max(self._window_in_flight, in_flight)
+        now = self._clock()
+        if self._window_samples < self.min_window_samples or now - self._window_start < self.window_seconds:
+            return self.limit
+
+        short_rtt = self._window_rtt / self._window_samples
+        in_flight = self._window_in_flight
+        self._window_start = now
+        self._window_samples = 0
+        self._window_rtt = 0.0
+        self._window_in_flight = 0
+
+        if self._long_rtt is None:
+            self._long_rtt = short_rtt
+            return self.limit
+        self._long_rtt += (short_rtt - self._long_rtt) / self.long_window
+        # After a long overload, pull the baseline down rather than wait for it to decay
+        if self._long_rtt > 2 * short_rtt:
+            self._long_rtt *= 0.95
+        if in_flight < self.limit / 2:
+            return self.limit
+
+        gradient = max(0.5, min(1.0, self.tolerance * self._long_rtt / short_rtt))
+        new_limit = self.limit * gradient + math.sqrt(self.limit)
+        new_limit = self.limit * (1 - self.smoothing) + new_limit * self.smoothing
+        self.limit = max(float(self.min_limit), min(float(self.max_limit), new_limit))
+        return self.limit
+
+
+class MetricsMiddleware:
+    """
+    Middleware to collect Prometheus metrics
+    Implemented as plain ASGI so that request and response bodies are passed
+    through untouched, which full-duplex streaming endpoints rely on. Requests
+    are labelled by route template rather than raw path to bound cardinality.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        in_progress = REQUESTS_IN_PROGRESS.labels(method=method)
+        in_progress.inc()
+        start_time = time.perf_counter()
+        status_code = 500
+        response_size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start_time
+            in_progress.dec()
+            endpoint = route_template(scope)
+
+            REQUEST_COUNT.labels(method=method, endpoint=endpoint, status=status_code).inc()
+            REQUEST_LATENCY.labels(method=method, endpoint=endpoint).observe(duration)
+            RESPONSE_SIZE.labels(method=method, endpoint=endpoint).observe(response_size)
+
+
+class AuditMiddleware:
+    """
+    Middleware to record an audit entry for every authenticated request
+    get_current_user marks the request as audited (and stores the user once
+    resolved); the entry is built after the response has been sent, so failed
+    authentication attempts are recorded too
+    """
+
+    def __init__(self, app: ASGIApp, writer: AuditWriter) -> None:
+        self.app = app
+        self.writer = writer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.writer.running:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            state = scope.get("state") or {}
+            if state.get("audited"):
+                self.writer.record(build_entry(scope, status_code, state.get("user")))
+
+
+class AdmissionControlMiddleware:
+    """
+    Middleware to shed load beyond an adaptive concurrency limit
+    Requests over their priority's share of the limit are rejected at once
+    with 503 and Retry-After instead of queueing behind slow scoring, which
+    keeps latency flat for the requests that are admitted. Credit risk calls
+    rank highest only with a bearer token that verify_token accepts
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limiter: Optional[GradientLimit] = None,
+        retry_after: int = 1,
+        enabled: bool = True,
+        verify_token: Optional[TokenVerifier] = None
+    ) -> None:
+        self.app = app
+        self.limiter = limiter or GradientLimit()
+        self.retry_after = retry_after
+        self.enabled = enabled
+        self.verify_token = verify_token
+        self.in_flight = 0
+        ADMISSION_LIMIT.set(self.limiter.limit)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        priority = await request_priority(scope, self.verify_token) if scope["type"] == "http" and self.enabled else None
+        if priority is None:
+            await self.app(scope, receive, send)
+            return
+
+        if self.in_flight >= self.limiter.limit * PRIORITY_SHARES[priority]:
+            ADMISSION_SHED.labels(priority=priority).inc()
+            response = JSONResponse(
+                {"error": "Service overloaded, retry later"},
+                status_code=503,
+                headers={"Retry-After": str(self.retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+        if is_long_poll(scope):
+            await self.app(scope, receive, send)
+            return
+
+        self.in_flight += 1
+        in_flight = self.in_flight
+        ADMISSION_IN_FLIGHT.inc()
+        start_time = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+            ADMISSION_IN_FLIGHT.dec()
+            if scope["path"] not in UNSAMPLED_PATHS:
+                ADMISSION_LIMIT.set(self.limiter.update(time.perf_counter() - start_time, in_flight))
+
+
+class ServerTimingMiddleware:
+    """
+    Middleware to report where a request's time went
+    Stages timed with timing.stage() while the request runs (auth, parse,
+    score, serialize, ...) are listed in a Server-Timing response header,
+    followed by the total time until the response started
+    """
+
+    def __init__(self, app: ASGIApp, enabled: bool = True) -> None:
+        self.app = app
+        self.enabled = enabled
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+
+        with collect_stages() as stages:
+            async def send_wrapper(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    value = server_timing(stages, time.perf_counter() - start_time)
+                    message = {**message, "headers": [*message.get("headers", []), (b"server-timing", value.encode())]}
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+
+
+class ProfilingMiddleware:
+    """
+    Middleware to profile single requests on demand
+    A request sent with `X-Profile: true` is sampled while it runs, if the
+    profiler is idle and the request carries a bearer token that
+    verify_token accepts for one of admins. Anyone else's X-Profile header
+    is ignored, so it cannot add sampling overhead or hold the profiler.
+    The profile is kept only if the request also authenticated as an admin;
+    the X-Profile response header then names the file
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        profiler: SamplingProfiler,
+        admins: Collection[str] = (),
+        enabled: bool = False,
+        verify_token: Optional[TokenVerifier] = None
+    ) -> None:
+        self.app = app
+        self.profiler = profiler
+        self.admins = admins
+        self.enabled = enabled
+        self.verify_token = verify_token
+
+    async def _is_admin(self, scope: Scope) -> bool:
+        token = bearer_token(scope)
+        if token is None or self.verify_token is None:
+            return False
+        claims = await self.verify_token(token)
+        return claims is not None and claims.username in self.admins
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not self.enabled
+            or self.profiler.running
+            or not profile_requested(scope)
+            or not await self._is_admin(scope)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            session = self.profiler.start()
+        except ProfilerBusy:
+            await self.app(scope, receive, send)
+            return
+        path = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal path
+            if message["type"] == "http.response.start":
+                user = (scope.get("state") or {}).get("user")
+                if user is not None and user.username in self.admins:
+                    path = self.profiler.profile_path("request")
+                    message = {**message, "headers": [*message.get("headers", []), (b"x-profile", path.name.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            await asyncio.to_thread(self.profiler.stop, session, path)
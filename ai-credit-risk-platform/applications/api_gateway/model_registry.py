@@ -0,0 +1,271 @@
+"""
+Model registry for the API Gateway
+
+Models are versioned joblib artifacts stored under MODEL_REGISTRY_PATH, one
+directory per version (<root>/<version>/model.joblib). A CURRENT file names the
+version to serve. Artifacts are written uncompressed and loaded with
+memory-mapping, so the estimator's NumPy arrays are backed by the page cache
+and shared by every worker on the host instead of being copied into each one.
+
+Each worker polls CURRENT. When it changes, the new version is loaded and test
+predicted off the request path, then made active with a single reference swap.
+Requests already in flight finish on the model they started with. If a version
+fails to load, the previous model stays active.
+
+Models are classifiers trained on risk levels. The confidence score they add to
+an assessment is the probability the model gives to the risk level assigned
+by the scoring rules. Single assessments from concurrent requests are
+micro-batched into one predict_proba call (MODEL_BATCH_* settings).
+"""
+
+import asyncio
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from prometheus_client import Counter, Gauge, Histogram
+import structlog
+
+from .config import settings
+from .lazy import lazy_import
+from .micro_batching import MicroBatcher
+from .scoring_engine import SUPPORTED_FEATURES
+
+joblib = lazy_import("joblib")
+np = lazy_import("numpy")
+
+logger = structlog.get_logger()
+
+ARTIFACT_NAME = "model.joblib"
+CURRENT_NAME = "CURRENT"
+
+# Prometheus metrics
+MODEL_LOAD_DURATION = Histogram(
+    'model_load_duration_seconds',
+    'Time to load and test predict a model artifact',
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+
+MODEL_LOAD_ERRORS = Counter(
+    'model_load_errors_total',
+    'Model artifacts that failed to load'
+)
+
+MODEL_SWAPS = Counter(
+    'model_swaps_total',
+    'Changes of the active model'
+)
+
+MODEL_PREDICTION_DURATION = Histogram(
+    'model_prediction_duration_seconds',
+    'Model prediction latency per call',
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+)
+
+MODEL_ACTIVE = Gauge(
+    'model_active',
+    'Model version served by each worker (1 while active)',
+    ['version'],
+    multiprocess_mode='liveall'
+)
+
+
+def _check_version(version: str) -> None:
+    if not version or version in (".", "..") or "/" in version or os.sep in version:
+        raise ValueError(f"Invalid model version '{version}'")
+
+
+class LoadedModel:
+    """A model artifact loaded into this worker"""
+
+    def __init__(self, version: str, features: Sequence[str], estimator: Any, path: Path):
+        unsupported = [feature for feature in features if feature not in SUPPORTED_FEATURES]
+        if unsupported:
+            raise ValueError(f"Unsupported model features: {', '.join(unsupported)}")
+        self.version = version
+        self.features: Tuple[str, ...] = tuple(features)
+        self.estimator = estimator
+        self.path = path
+        # predict_proba column for each risk level the model was trained on
+        self.class_index: Dict[str, int] = {str(label): i for i, label in enumerate(estimator.classes_)}
+
+    def confidence_scores(self, columns: Mapping[str, "np.ndarray"], risk_levels: "np.ndarray") -> "np.ndarray":
+        """
+        Probability the model gives each applicant's risk level, given one
+        array per feature; NaN where the model does not know the risk level
+        """
+        start = time.perf_counter()
+        features = np.column_stack([np.asarray(columns[feature], dtype=np.float64) for feature in self.features])
+        probabilities = self.estimator.predict_proba(features)
+        MODEL_PREDICTION_DURATION.observe(time.perf_counter() - start)
+
+        columns_for_levels = np.array([self.class_index.get(str(level), -1) for level in risk_levels], dtype=np.int64)
+        known = columns_for_levels >= 0
+        scores = np.full(len(columns_for_levels), np.nan)
+        scores[known] = probabilities[np.flatnonzero(known), columns_for_levels[known]]
+        return scores
+
+    def confidence_score(self, record: Any, risk_level: str) -> Optional[float]:
+        """Probability the model gives one applicant's risk level, or None if unknown to it"""
+        columns = {feature: np.array([getattr(record, feature)]) for feature in self.features}
+        score = float(self.confidence_scores(columns, [risk_level])[0])
+        return None if score != score else score
+
+
+def load_model(path: Path, mmap_mode: Optional[str] = "r") -> LoadedModel:
+    """Load an artifact and make sure it can predict before it is used"""
+    start = time.perf_counter()
+    payload = joblib.load(path, mmap_mode=mmap_mode)
+    model = LoadedModel(payload["version"], payload["features"], payload["estimator"], path)
+    model.estimator.predict_proba(np.zeros((1, len(model.features))))
+    MODEL_LOAD_DURATION.observe(time.perf_counter() - start)
+    return model
+
+
+def publish_model(root: str, version: str, estimator: Any, features: Sequence[str]) -> Path:
+    """
+    Write an estimator as a new artifact version and make it the one to serve
+    Workers pick it up on their next poll of CURRENT
+    """
+    _check_version(version)
+    version_dir = Path(root) / version
+    version_dir.mkdir(parents=True, exist_ok=True)
+    path = version_dir / ARTIFACT_NAME
+    tmp_path = path.with_name(path.name + ".tmp")
+    # Uncompressed, so that the arrays can be memory-mapped on load
+    joblib.dump({"version": version, "features": list(features), "estimator": estimator}, tmp_path)
+    os.replace(tmp_path, path)
+
+    current = Path(root) / CURRENT_NAME
+    tmp_current = current.with_name(current.name + ".tmp")
+    tmp_current.write_text(version + "\n")
+    os.replace(tmp_current, current)
+    logger.info("Model published", model_version=version, path=str(path))
+    return path
+
+
+class ModelRegistry:
+    """Serves the model version named by the registry's CURRENT file"""
+
+    def __init__(self, root: str, mmap_mode: Optional[str] = "r"):
+        self.root = Path(root)
+        self.mmap_mode = mmap_mode
+        self._active: Optional[LoadedModel] = None
+        self._failed: Optional[Tuple[str, float]] = None  # (version, artifact mtime) that failed to load
+        self._load_lock = threading.Lock()
+
+    @property
+    def active(self) -> Optional[LoadedModel]:
+        """The model to use for a request (hold on to it for the whole request)"""
+        return self._active
+
+    def current_version(self) -> Optional[str]:
+        """Version named by CURRENT, or None if nothing has been published"""
+        try:
+            version = (self.root / CURRENT_NAME).read_text().strip()
+        except FileNotFoundError:
+            return None
+        return version or None
+
+    def activate(self, model: Optional[LoadedModel]) -> None:
+        """Make model the active one"""
+        previous, self._active = self._active, model
+        if previous is not None:
+            MODEL_ACTIVE.labels(version=previous.version).set(0)
+        if model is not None:
+            MODEL_ACTIVE.labels(version=model.version).set(1)
+        MODEL_SWAPS.inc()
+        logger.info(
+            "Model activated",
+            model_version=getattr(model, "version", None),
+            previous_version=getattr(previous, "version", None),
+            pid=os.getpid()
+        )
+
+    def refresh(self) -> bool:
+        """Load and activate the version named by CURRENT if it changed, returning True on a swap"""
+        with self._load_lock:
+            version = self.current_version()
+            active = self._active
+            if version is None or (active is not None and active.version == version):
+                return False
+            _check_version(version)
+
+            path = self.root / version / ARTIFACT_NAME
+            try:
+                marker = (version, path.stat().st_mtime)
+            except FileNotFoundError:
+                marker = (version, 0.0)
+            if marker == self._failed:
+                return False
+
+            try:
+                model = load_model(path, self.mmap_mode)
+                if model.version != version:
+                    raise ValueError(f"Artifact is labelled version '{model.version}'")
+            except Exception as e:
+                MODEL_LOAD_ERRORS.inc()
+                self._failed = marker
+                logger.error(
+                    "Model load failed, keeping the active model",
+                    model_version=version,
+                    active_version=getattr(active, "version", None),
+                    error=str(e)
+                )
+                return False
+
+            self._failed = None
+            self.activate(model)
+            return True
+
+    async def watch(self, interval: float) -> None:
+        """Poll CURRENT forever, swapping models as new versions are published"""
+        while True:
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                logger.error("Model registry poll failed", error=str(e))
+            await asyncio.sleep(interval)
+
+
+def score_confidence_batch(items: List[Tuple[LoadedModel, Any, str]]) -> List[Optional[float]]:
+    """Score (model, application, risk level) items with one prediction per model"""
+    results: List[Optional[float]] = [None] * len(items)
+    positions_by_model: Dict[int, List[int]] = {}
+    for position, (model, _, _) in enumerate(items):
+        # A swap can land mid-batch; each item is scored by the model its request picked up
+        positions_by_model.setdefault(id(model), []).append(position)
+
+    for positions in positions_by_model.values():
+        model = items[positions[0]][0]
+        columns = {
+            feature: np.fromiter((getattr(items[i][1], feature) for i in positions), dtype=np.float64, count=len(positions))
+            for feature in model.features
+        }
+        scores = model.confidence_scores(columns, [items[i][2] for i in positions])
+        for position, score in zip(positions, scores.tolist()):
+            results[position] = None if score != score else score
+    return results
+
+
+confidence_batcher = MicroBatcher(
+    "model_confidence",
+    score_confidence_batch,
+    max_batch_size=settings.MODEL_BATCH_MAX_SIZE,
+    max_wait=settings.MODEL_BATCH_MAX_WAIT_SECONDS
+)
+
+
+async def predict_confidence(model: LoadedModel, record: Any, risk_level: str) -> Optional[float]:
+    """Confidence for one applicant, batched with concurrent requests if MODEL_BATCHING_ENABLED"""
+    if not settings.MODEL_BATCHING_ENABLED:
+        return model.confidence_score(record, risk_level)
+    return await confidence_batcher.submit((model, record, risk_level))
+
+
+model_registry = ModelRegistry(
+    settings.MODEL_REGISTRY_PATH,
+    mmap_mode="r" if settings.MODEL_MMAP else None
+)
@@ -3,8 +3,8 @@ Pydantic models for the API Gateway
 """
 
 from datetime import datetime, timezone
-from typing import Optional, List
-from pydantic import BaseModel, Field, EmailStr
+from typing import Any, Dict, List, Literal, Optional
+from pydantic import BaseModel, Field, EmailStr, field_validator
 
 
 class HealthCheck(BaseModel):
@@ -38,6 +38,17 @@ class User(UserBase):
         from_attributes = True
 
 
+class UserInDB(User):
+    """User model including the stored password hash (never returned by the API)"""
+    hashed_password: str = Field(..., description="bcrypt password hash")
+
+
+class LoginRequest(BaseModel):
+    """Login request model"""
+    username: str = Field(..., min_length=3, max_length=50, description="Username")
+    password: str = Field(..., min_length=1, max_length=128, description="User password")
+
+
 class Token(BaseModel):
     """Authentication token model"""
     access_token: str = Field(..., description="JWT access token")
@@ -49,9 +60,17 @@ class TokenData(BaseModel):
     username: Optional[str] = None
 
 
+class SessionInfo(BaseModel):
+    """Login session, identified by its access token's ID"""
+    session_id: str = Field(..., description="Access token ID (jti claim)")
+    issued_at: datetime = Field(..., description="Login time")
+    expires_at: datetime = Field(..., description="Access token expiry")
+    current: bool = Field(default=False, description="Whether this request was made with the session's token")
+
+
 class CreditRiskRequest(BaseModel):
     """Credit risk assessment request model"""
-    applicant_id: str = Field(..., description="Unique applicant identifier")
+    applicant_id: str = Field(..., max_length=64, description="Unique applicant identifier")
     income: float = Field(..., gt=0, description="Annual income")
     credit_score: int = Field(..., ge=300, le=850, description="Credit score")
     debt_ratio: float = Field(..., ge=0, le=1, description="Debt-to-income ratio")
@@ -82,9 +101,14 @@ class CreditRiskResponse(BaseModel):
     assessment_date: datetime = Field(..., description="Assessment timestamp")
     assessor: str = Field(..., description="Assessor username")
     confidence_score: Optional[float] = Field(None, ge=0, le=1, description="Model confidence")
+    model_version: Optional[str] = Field(None, description="Version of the model that produced confidence_score")
     factors: Optional[List[str]] = Field(None, description="Key risk factors")
+    applicant_features: Optional[Dict[str, Optional[float]]] = Field(
+        None, description="Historical features of the applicant from the feature store, if known"
+    )
     
     class Config:
+        protected_namespaces = ()  # allow the model_version field
         schema_extra = {
             "example": {
                 "applicant_id": "APP123456",
@@ -94,11 +118,112 @@ class CreditRiskResponse(BaseModel):
                 "assessment_date": "2024-01-15T10:30:00Z",
                 "assessor": "system",
                 "confidence_score": 0.85,
-                "factors": ["Good credit score", "Stable income"]
+                "model_version": "2024-01-01",
+                "factors": ["Good credit score", "Stable income"],
+                "applicant_features": {"previous_assessments": 3, "missed_payments_12m": 0}
             }
         }
 
 
+class CreditRiskBatchRequest(BaseModel):
+    """Batch credit risk assessment request model"""
+    applications: List[Any] = Field(
+        ...,
+        min_length=1,
+        description="Applications to assess, validated individually against CreditRiskRequest"
+    )
+
+
+class CreditRiskBatchItem(BaseModel):
+    """Single result within a batch credit risk assessment"""
+    index: int = Field(..., ge=0, description="Position of the application in the request")
+    applicant_id: Optional[str] = Field(None, description="Applicant identifier, if supplied")
+    result: Optional[CreditRiskResponse] = Field(None, description="Assessment result for valid applications")
+    errors: Optional[List[Dict[str, Any]]] = Field(None, description="Validation errors for invalid applications")
+
+
+class CreditRiskBatchResponse(BaseModel):
+    """Batch credit risk assessment response model"""
+    total: int = Field(..., ge=0, description="Number of applications received")
+    succeeded: int = Field(..., ge=0, description="Number of applications assessed")
+    failed: int = Field(..., ge=0, description="Number of applications rejected by validation")
+    results: List[CreditRiskBatchItem] = Field(..., description="Results in request order")
+
+
+class PortfolioLoan(CreditRiskRequest):
+    """Outstanding loan in a portfolio; loan_amount is its exposure at default"""
+    loss_given_default: Optional[float] = Field(
+        None, ge=0, le=1, description="Share of the exposure lost on default (defaults to PORTFOLIO_DEFAULT_LGD)"
+    )
+
+
+class PortfolioRiskRequest(BaseModel):
+    """Portfolio credit risk simulation request model"""
+    loans: List[PortfolioLoan] = Field(..., min_length=1, description="Outstanding loans")
+    scenarios: int = Field(100_000, ge=1000, description="Number of Monte Carlo scenarios")
+    correlation: float = Field(0.15, ge=0, lt=1, description="Asset correlation with the systematic factor")
+    confidence_levels: List[float] = Field(
+        [0.95, 0.99, 0.999], min_length=1, max_length=10, description="Confidence levels for VaR and expected shortfall"
+    )
+    seed: int = Field(0, ge=0, description="Random seed; the same loans, parameters and seed give the same result")
+
+    @field_validator("confidence_levels")
+    @classmethod
+    def validate_confidence_levels(cls, v):
+        if not all(0 < level < 1 for level in v):
+            raise ValueError("Confidence levels must be between 0 and 1")
+        return v
+
+
+class PortfolioTailRisk(BaseModel):
+    """Tail risk at one confidence level"""
+    confidence_level: float = Field(..., description="Confidence level")
+    value_at_risk: float = Field(..., description="Loss not exceeded with this confidence")
+    expected_shortfall: float = Field(..., description="Mean loss in scenarios at or beyond the VaR")
+
+
+class PortfolioRiskResponse(BaseModel):
+    """Portfolio credit risk simulation response model"""
+    loans: int = Field(..., ge=1, description="Number of loans")
+    scenarios: int = Field(..., ge=1, description="Number of simulated scenarios")
+    seed: int = Field(..., description="Random seed used")
+    correlation: float = Field(..., description="Asset correlation used")
+    total_exposure: float = Field(..., description="Sum of exposures at default")
+    expected_loss: float = Field(..., description="Analytic expected loss, sum of PD x EAD x LGD")
+    simulated_expected_loss: float = Field(..., description="Mean simulated loss")
+    loss_std: float = Field(..., description="Standard deviation of simulated losses")
+    tail_risk: List[PortfolioTailRisk] = Field(..., description="VaR and expected shortfall per confidence level")
+    rules_version: str = Field(..., description="Version of the rules that assigned probabilities of default")
+
+
+class AssessmentJobRequest(BaseModel):
+    """Asynchronous credit risk assessment job request model"""
+    application: CreditRiskRequest = Field(..., description="Application to assess")
+    account_id: Optional[str] = Field(
+        None, max_length=128, description="Open Banking account whose balances are added to the result"
+    )
+    priority: Literal["high", "normal", "low"] = Field(default="normal", description="Queue priority")
+
+
+class AssessmentJobResult(BaseModel):
+    """Result of an assessment job"""
+    assessment: CreditRiskResponse = Field(..., description="Credit risk assessment")
+    account_balances: Optional[Any] = Field(None, description="Open Banking balances of account_id, if given")
+
+
+class JobStatus(BaseModel):
+    """Asynchronous job status model"""
+    job_id: str = Field(..., description="Job identifier")
+    status: Literal["queued", "running", "succeeded", "failed"] = Field(..., description="Job state")
+    priority: str = Field(..., description="Queue priority")
+    attempts: int = Field(..., ge=0, description="Times a worker has started the job")
+    submitted_at: datetime = Field(..., description="Submission time")
+    started_at: Optional[datetime] = Field(None, description="Start of the latest attempt")
+    finished_at: Optional[datetime] = Field(None, description="Completion time")
+    result: Optional[AssessmentJobResult] = Field(None, description="Result, once succeeded")
+    error: Optional[str] = Field(None, description="Error of the latest failed attempt")
+
+
 class ErrorResponse(BaseModel):
     """Error response model"""
     error: str = Field(..., description="Error message")
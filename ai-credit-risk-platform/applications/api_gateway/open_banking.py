@@ -0,0 +1,334 @@
+"""
+Open Banking API client for the API Gateway
+
+Each worker owns one client for OPEN_BANKING_API_URL, opened and closed by
+the application lifespan. Connections are kept alive and reused, so TLS is
+negotiated once per connection rather than once per call, and at most
+OPEN_BANKING_MAX_CONCURRENCY_PER_HOST requests run against a host at once.
+
+Every read is:
+- bounded end to end by OPEN_BANKING_TIMEOUT_SECONDS;
+- hedged: if the first attempt has not answered after
+  OPEN_BANKING_HEDGE_AFTER_SECONDS, a second one is sent and the first good
+  answer wins, which cuts the latency tail from slow upstream instances;
+- guarded by a circuit breaker: after OPEN_BANKING_CIRCUIT_FAILURES
+  consecutive failures, calls fail fast for
+  OPEN_BANKING_CIRCUIT_RESET_SECONDS, and then a single trial call decides
+  whether to close the circuit again.
+
+Account details change rarely and are cached in process for
+OPEN_BANKING_CACHE_TTL_SECONDS. Balances and transactions are always fetched.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, Mapping, Optional
+from urllib.parse import quote
+
+from prometheus_client import Counter, Gauge, Histogram
+import structlog
+
+from .cache import TTLCache
+from .config import settings
+from .lazy import lazy_import
+
+httpx = lazy_import("httpx")
+
+logger = structlog.get_logger()
+
+# Prometheus metrics
+OPEN_BANKING_REQUESTS = Counter(
+    'open_banking_requests_total',
+    'Open Banking API calls by outcome',
+    ['outcome']
+)
+
+OPEN_BANKING_REQUEST_DURATION = Histogram(
+    'open_banking_request_duration_seconds',
+    'Open Banking API call latency, including hedged attempts',
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+
+OPEN_BANKING_HEDGES = Counter(
+    'open_banking_hedged_requests_total',
+    'Open Banking API calls that sent a second, hedged attempt'
+)
+
+OPEN_BANKING_CIRCUIT_STATE = Gauge(
+    'open_banking_circuit_state',
+    'Open Banking circuit breaker state per worker (0 closed, 1 half-open, 2 open)',
+    multiprocess_mode='liveall'
+)
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class OpenBankingError(Exception):
+    """Raised when the Open Banking API rejects a request"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class OpenBankingUnavailable(OpenBankingError):
+    """Raised when the Open Banking API fails, times out, or the circuit is open"""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker: closed -> open -> half-open -> closed"""
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock=time.monotonic
+    ):
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be at least 1")
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = CLOSED
+        self._failures = 0
+        self._changed_at = clock()
+        OPEN_BANKING_CIRCUIT_STATE.set(0)
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead now"""
+        if self._state == CLOSED:
+            return True
+        # Open: wait out reset_timeout. Half-open: one trial at a time, unless it never reported back
+        if self._clock() - self._changed_at < self.reset_timeout:
+            return False
+        self._set_state(HALF_OPEN)
+        return True
+
+    def record_success(self) -> None:
+        self._failures = 0
+        if self._state != CLOSED:
+            self._set_state(CLOSED)
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+            self._set_state(OPEN)
+
+    def _set_state(self, state: str) -> None:
+        if state != self._state:
+            logger.warning("Open Banking circuit state changed", previous=self._state, state=state)
+        self._state = state
+        self._changed_at = self._clock()
+        OPEN_BANKING_CIRCUIT_STATE.set(_STATE_VALUES[state])
+
+
+def _retryable(response: "httpx.Response") -> bool:
+    return response.status_code >= 500 or response.status_code == 429
+
+
+class OpenBankingClient:
+    """Pooled async client for the Open Banking API"""
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str = "",
+        timeout: float = 2.0,
+        connect_timeout: float = 1.0,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        max_concurrency_per_host: int = 20,
+        hedge_after: float = 0.3,
+        circuit_failures: int = 5,
+        circuit_reset: float = 30.0,
+        cache_ttl: float = 300.0,
+        cache_size: int = 10000,
+        transport: Optional["httpx.AsyncBaseTransport"] = None
+    ):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.max_concurrency_per_host = max_concurrency_per_host
+        self.hedge_after = hedge_after
+        self.breaker = CircuitBreaker(circuit_failures, circuit_reset)
+        self.cache = TTLCache("open_banking", maxsize=cache_size, default_ttl=cache_ttl)
+        self._transport = transport
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    def start(self) -> None:
+        """Create the connection pool (connections are opened on first use)"""
+        if self._client is not None:
+            return
+        headers = {"Accept": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=headers,
+            timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry
+            ),
+            transport=self._transport
+        )
+        self._host_limits = {}
+
+    async def close(self) -> None:
+        """Close pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self) -> "OpenBankingClient":
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def get_json(self, path: str, params: Optional[Mapping[str, Any]] = None, cache: bool = False) -> Any:
+        """
+        GET a JSON document from the API
+        Raises OpenBankingUnavailable on timeouts, transport errors, 5xx/429
+        answers and while the circuit is open, and OpenBankingError on other
+        error answers and on bodies that are not valid JSON
+        """
+        if self._client is None:
+            raise RuntimeError("Open Banking client is not started")
+        key = (path, tuple(sorted((params or {}).items())))
+        if cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        if not self.breaker.allow():
+            OPEN_BANKING_REQUESTS.labels(outcome="circuit_open").inc()
+            raise OpenBankingUnavailable("Open Banking API circuit is open")
+
+        start = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(self._hedged_get(path, params), self.timeout)
+        except (asyncio.TimeoutError, httpx.HTTPError) as e:
+            self._failed(path, "unavailable", repr(e))
+            raise OpenBankingUnavailable(f"Open Banking API unavailable: {e!r}") from e
+        finally:
+            OPEN_BANKING_REQUEST_DURATION.observe(time.perf_counter() - start)
+
+        if _retryable(response):
+            self._failed(path, "unavailable", f"HTTP {response.status_code}")
+            raise OpenBankingUnavailable(
+                f"Open Banking API answered {response.status_code}", status_code=response.status_code
+            )
+        if response.status_code >= 400:
+            self.breaker.record_success()
+            OPEN_BANKING_REQUESTS.labels(outcome="error").inc()
+            raise OpenBankingError(
+                f"Open Banking API answered {response.status_code}", status_code=response.status_code
+            )
+
+        try:
+            data = response.json()
+        except ValueError as e:
+            # A garbled or truncated body counts against the upstream like a failed call
+            self._failed(path, "error", f"Invalid JSON: {e}")
+            raise OpenBankingError(
+                "Open Banking API answered with invalid JSON", status_code=response.status_code
+            ) from e
+        self.breaker.record_success()
+        OPEN_BANKING_REQUESTS.labels(outcome="success").inc()
+        if cache:
+            self.cache.set(key, data)
+        return data
+
+    def _failed(self, path: str, outcome: str, error: str) -> None:
+        self.breaker.record_failure()
+        OPEN_BANKING_REQUESTS.labels(outcome=outcome).inc()
+        logger.warning("Open Banking API call failed", path=path, error=error, circuit=self.breaker.state)
+
+    async def _hedged_get(self, path: str, params: Optional[Mapping[str, Any]]) -> "httpx.Response":
+        """Send an attempt, and a second one if the first is slow; return the first good answer"""
+        attempts = [asyncio.create_task(self._attempt(path, params))]
+        try:
+            if self.hedge_after > 0:
+                done, _ = await asyncio.wait(attempts, timeout=self.hedge_after)
+                if not done:
+                    OPEN_BANKING_HEDGES.inc()
+                    attempts.append(asyncio.create_task(self._attempt(path, params)))
+
+            pending = set(attempts)
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for attempt in done:
+                    if attempt.exception() is None and not _retryable(attempt.result()):
+                        return attempt.result()
+                if not pending:
+                    # Every attempt failed: report the last one
+                    return attempt.result()
+        finally:
+            for attempt in attempts:
+                attempt.cancel()
+
+    async def _attempt(self, path: str, params: Optional[Mapping[str, Any]]) -> "httpx.Response":
+        host = httpx.URL(path).host or self._client.base_url.host
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = self._host_limits[host] = asyncio.Semaphore(self.max_concurrency_per_host)
+        async with limit:
+            return await self._client.get(path, params=params)
+
+    async def get_accounts(self) -> Any:
+        """Accounts the API key has been granted access to (cached)"""
+        return await self.get_json("/accounts", cache=True)
+
+    async def get_account(self, account_id: str) -> Any:
+        """Details of one account (cached)"""
+        return await self.get_json(f"/accounts/{quote(account_id, safe='')}", cache=True)
+
+    async def get_balances(self, account_id: str) -> Any:
+        """Current balances of one account"""
+        return await self.get_json(f"/accounts/{quote(account_id, safe='')}/balances")
+
+    async def get_transactions(
+        self,
+        account_id: str,
+        from_booking_date: Optional[str] = None,
+        to_booking_date: Optional[str] = None
+    ) -> Any:
+        """Transactions of one account, optionally within booking dates (ISO 8601)"""
+        params = {}
+        if from_booking_date:
+            params["fromBookingDateTime"] = from_booking_date
+        if to_booking_date:
+            params["toBookingDateTime"] = to_booking_date
+        return await self.get_json(f"/accounts/{quote(account_id, safe='')}/transactions", params=params)
+
+
+open_banking_client = OpenBankingClient(
+    base_url=settings.OPEN_BANKING_API_URL,
+    api_key=settings.OPEN_BANKING_API_KEY,
+    timeout=settings.OPEN_BANKING_TIMEOUT_SECONDS,
+    connect_timeout=settings.OPEN_BANKING_CONNECT_TIMEOUT_SECONDS,
+    max_connections=settings.OPEN_BANKING_MAX_CONNECTIONS,
+    max_keepalive_connections=settings.OPEN_BANKING_MAX_KEEPALIVE_CONNECTIONS,
+    max_concurrency_per_host=settings.OPEN_BANKING_MAX_CONCURRENCY_PER_HOST,
+    hedge_after=settings.OPEN_BANKING_HEDGE_AFTER_SECONDS,
+    circuit_failures=settings.OPEN_BANKING_CIRCUIT_FAILURES,
+    circuit_reset=settings.OPEN_BANKING_CIRCUIT_RESET_SECONDS,
+    cache_ttl=settings.OPEN_BANKING_CACHE_TTL_SECONDS,
+    cache_size=settings.OPEN_BANKING_CACHE_SIZE
+)
@@ -0,0 +1,147 @@
+"""
+Password hashing for the API Gateway
+
+bcrypt is deliberately slow, so async callers go through a bounded executor
+instead of hashing on the event loop. Concurrency is capped by the pool size
+and waiting work by a queue limit; beyond that, callers are rejected quickly
+rather than queueing without bound during a login storm.
+"""
+
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from passlib.context import CryptContext
+from prometheus_client import Counter, Gauge, Histogram
+import structlog
+
+from .config import settings
+
+logger = structlog.get_logger()
+
+# Password hashing
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# Prometheus metrics
+PASSWORD_HASH_QUEUE_DEPTH = Gauge(
+    'password_hash_queue_depth',
+    'Password hash operations waiting for a worker',
+    multiprocess_mode='livesum'
+)
+
+PASSWORD_HASH_IN_FLIGHT = Gauge(
+    'password_hash_in_flight',
+    'Password hash operations currently running',
+    multiprocess_mode='livesum'
+)
+
+PASSWORD_HASH_QUEUE_WAIT = Histogram(
+    'password_hash_queue_wait_seconds',
+    'Time password hash operations wait for a worker',
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+
+PASSWORD_HASH_DURATION = Histogram(
+    'password_hash_duration_seconds',
+    'Password hash operation latency including queueing',
+    ['operation'],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+
+PASSWORD_HASH_REJECTED = Counter(
+    'password_hash_rejected_total',
+    'Password hash operations rejected because the queue was full'
+)
+
+
+class PasswordHashPoolFull(Exception):
+    """Raised when the password hash queue is at capacity"""
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _timed(func: Callable[..., Any], submitted_at: float, *args: Any) -> Any:
+    """Run func in a worker, moving it from the queued to the in-flight gauge"""
+    PASSWORD_HASH_QUEUE_DEPTH.dec()
+    PASSWORD_HASH_IN_FLIGHT.inc()
+    PASSWORD_HASH_QUEUE_WAIT.observe(time.monotonic() - submitted_at)
+    try:
+        return func(*args)
+    finally:
+        PASSWORD_HASH_IN_FLIGHT.dec()
+
+
+class PasswordHashPool:
+    """Bounded executor for bcrypt hashing and verification"""
+
+    def __init__(self, kind: str = "thread", max_workers: int = 4, max_queue: int = 64):
+        if kind not in ("thread", "process"):
+            raise ValueError("kind must be 'thread' or 'process'")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._pending = 0
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="password-hash"
+                )
+        return self._executor
+
+    async def _run(self, operation: str, func: Callable[..., Any], *args: Any) -> Any:
+        if self._pending >= self.max_workers + self.max_queue:
+            PASSWORD_HASH_REJECTED.inc()
+            raise PasswordHashPoolFull("Password hash queue is full")
+
+        self._pending += 1
+        submitted_at = time.monotonic()
+        if self.kind == "process":
+            # Gauges live in this process, so account for the whole call here
+            PASSWORD_HASH_IN_FLIGHT.inc()
+            call = (func, *args)
+        else:
+            PASSWORD_HASH_QUEUE_DEPTH.inc()
+            call = (_timed, func, submitted_at, *args)
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), *call)
+        finally:
+            self._pending -= 1
+            if self.kind == "process":
+                PASSWORD_HASH_IN_FLIGHT.dec()
+            PASSWORD_HASH_DURATION.labels(operation=operation).observe(time.monotonic() - submitted_at)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password against its hash off the event loop"""
+        return await self._run("verify", _verify, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        """Hash a password off the event loop"""
+        return await self._run("hash", _hash, password)
+
+    def shutdown(self) -> None:
+        """Stop the worker pool, waiting for running operations"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+            logger.info("Password hash pool stopped", kind=self.kind)
+
+
+password_hash_pool = PasswordHashPool(
+    kind=settings.PASSWORD_HASH_POOL_KIND,
+    max_workers=settings.PASSWORD_HASH_MAX_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE
+)
@@ -0,0 +1,217 @@
+"""
+Portfolio credit risk simulation for the API Gateway
+
+Estimates the loss distribution of a loan portfolio by Monte Carlo with a
+one-factor Gaussian copula (the Vasicek model behind the Basel IRB formula).
+In each scenario, loan i defaults when
+
+    sqrt(rho) * Z + sqrt(1 - rho) * e_i < Phi^-1(PD_i)
+
+where Z is the economy-wide factor shared by every loan and e_i is the
+loan's own shock, so defaults cluster in bad scenarios as rho grows. Given
+Z, loans default independently with probability
+
+    Phi((Phi^-1(PD_i) - sqrt(rho) * Z) / sqrt(1 - rho))
+
+which is computed once per scenario and PD, so each loan only needs a
+uniform draw (several times cheaper than a normal one). PDs
+come from the scoring engine's risk level bands, exposure at default is the
+loan_amount, and loss given default is given per loan or defaults to
+PORTFOLIO_DEFAULT_LGD.
+
+Scenarios are simulated in chunks of about PORTFOLIO_CHUNK_ELEMENTS
+scenario x loan draws (float32, updated in place), so memory stays bounded
+however many scenarios are requested; only one loss per scenario is kept,
+for the quantiles. Every chunk draws from its own child of
+SeedSequence(seed), so results depend on the inputs and the seed only, not
+on how chunks are spread over processes. Simulations of more than
+PORTFOLIO_PARALLEL_MIN_ELEMENTS draws are split across the scoring pool's
+workers; smaller ones run in a single worker (or a thread, without a pool).
+"""
+
+import asyncio
+import math
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+import structlog
+
+from .config import settings
+from .lazy import lazy_import
+from .models import PortfolioLoan
+from .scoring import pack_features
+from .scoring_engine import SUPPORTED_FEATURES, CompiledRuleSet
+from .scoring_pool import ScoringPool, scoring_pool
+
+np = lazy_import("numpy")
+scipy = lazy_import("scipy")
+
+logger = structlog.get_logger()
+
+# (scenarios, seed) of one chunk
+Chunk = Tuple[int, "np.random.SeedSequence"]
+
+
+class Portfolio(NamedTuple):
+    """Per-loan simulation inputs"""
+    probabilities_of_default: "np.ndarray"
+    exposures: "np.ndarray"  # exposure at default
+    loss_given_default: "np.ndarray"
+
+    @property
+    def expected_loss(self) -> float:
+        """Analytic expected loss, sum of PD x EAD x LGD"""
+        return float(np.sum(self.probabilities_of_default * self.exposures * self.loss_given_default))
+
+
+class TailRisk(NamedTuple):
+    """Loss quantile (VaR) and mean loss beyond it (expected shortfall) at one confidence level"""
+    confidence_level: float
+    value_at_risk: float
+    expected_shortfall: float
+
+
+class PortfolioRisk(NamedTuple):
+    """Summary of a simulated loss distribution"""
+    scenarios: int
+    total_exposure: float
+    expected_loss: float
+    simulated_expected_loss: float
+    loss_std: float
+    tail_risk: List[TailRisk]
+
+
+def build_portfolio(loans: Sequence[PortfolioLoan], engine: CompiledRuleSet) -> Portfolio:
+    """Score loans with the rules engine and collect their PD, EAD and LGD"""
+    matrix = pack_features(loans)
+    assessment = engine.score_arrays(dict(zip(SUPPORTED_FEATURES, matrix)))
+    loss_given_default = np.fromiter(
+        (settings.PORTFOLIO_DEFAULT_LGD if loan.loss_given_default is None else loan.loss_given_default
+         for loan in loans),
+        dtype=np.float64,
+        count=len(loans)
+    )
+    return Portfolio(
+        probabilities_of_default=engine.probabilities_of_default(assessment.risk_scores),
+        exposures=matrix[SUPPORTED_FEATURES.index("loan_amount")],
+        loss_given_default=loss_given_default
+    )
+
+
+def plan_chunks(scenarios: int, loans: int, seed: int, chunk_elements: Optional[int] = None) -> List[Chunk]:
+    """Split scenarios into chunks of about chunk_elements draws, each with its own seed"""
+    chunk_elements = chunk_elements or settings.PORTFOLIO_CHUNK_ELEMENTS
+    size = max(1, chunk_elements // max(loans, 1))
+    counts = [min(size, scenarios - start) for start in range(0, scenarios, size)]
+    return list(zip(counts, np.random.SeedSequence(seed).spawn(len(counts))))
+
+
+class LossModel(NamedTuple):
+    """
+    Simulation inputs with loans grouped by PD, so every group compares its
+    draws with one conditional PD per scenario
+    """
+    thresholds: "np.ndarray"  # Phi^-1(PD) per group
+    bounds: "np.ndarray"  # loans of group g are bounds[g]:bounds[g + 1]
+    shares: "np.ndarray"  # EAD x LGD of each loan as a share of the total (float32)
+    correlation: float
+
+
+def loss_model(portfolio: Portfolio, correlation: float) -> LossModel:
+    """Group a portfolio's loans by PD (there are only as many PDs as risk level bands)"""
+    distinct, group = np.unique(portfolio.probabilities_of_default, return_inverse=True)
+    order = np.argsort(group, kind="stable")
+    weights = (portfolio.exposures * portfolio.loss_given_default)[order]
+    total = weights.sum()
+    return LossModel(
+        thresholds=scipy.special.ndtri(distinct),
+        bounds=np.concatenate(([0], np.cumsum(np.bincount(group, minlength=len(distinct))))),
+        shares=(weights / total if total > 0 else weights).astype(np.float32),
+        correlation=correlation
+    )
+
+
+def simulate_losses(model: LossModel, chunks: Sequence[Chunk]) -> "np.ndarray":
+    """
+    Portfolio loss per scenario, as a share of the loss if every loan
+    defaulted, for chunks run one after the other
+    """
+    losses = np.empty(sum(count for count, _ in chunks), dtype=np.float64)
+    position = 0
+    for count, seed in chunks:
+        rng = np.random.default_rng(seed)
+        factor = rng.standard_normal(count)
+        # Given the factor, loans default independently with these probabilities
+        conditional = scipy.special.ndtr(
+            (model.thresholds - math.sqrt(model.correlation) * factor[:, None]) / math.sqrt(1 - model.correlation)
+        ).astype(np.float32)
+        draws = rng.random((count, len(model.shares)), dtype=np.float32)
+        for group, (start, stop) in enumerate(zip(model.bounds[:-1], model.bounds[1:])):
+            # 1.0 where the loan defaults, in place of its draw
+            np.less(draws[:, start:stop], conditional[:, group:group + 1], out=draws[:, start:stop])
+        losses[position:position + count] = draws @ model.shares
+        position += count
+    return losses
+
+
+def summarize_losses(
+    portfolio: Portfolio,
+    losses: "np.ndarray",
+    confidence_levels: Sequence[float]
+) -> PortfolioRisk:
+    """VaR, expected shortfall and moments of simulated losses (in currency)"""
+    losses = losses * float(np.sum(portfolio.exposures * portfolio.loss_given_default))
+    quantiles = np.quantile(losses, confidence_levels, method="inverted_cdf")
+    return PortfolioRisk(
+        scenarios=len(losses),
+        total_exposure=float(portfolio.exposures.sum()),
+        expected_loss=portfolio.expected_loss,
+        simulated_expected_loss=float(losses.mean()),
+        loss_std=float(losses.std()),
+        tail_risk=[
+            TailRisk(float(level), float(var), float(losses[losses >= var].mean()))
+            for level, var in zip(confidence_levels, quantiles)
+        ]
+    )
+
+
+def portfolio_losses(
+    portfolio: Portfolio,
+    scenarios: int,
+    correlation: float,
+    seed: int,
+    chunk_elements: Optional[int] = None
+) -> "np.ndarray":
+    """Simulate losses in this thread (as shares of the loss if every loan defaulted)"""
+    chunks = plan_chunks(scenarios, len(portfolio.exposures), seed, chunk_elements)
+    return simulate_losses(loss_model(portfolio, correlation), chunks)
+
+
+async def simulate_portfolio(
+    portfolio: Portfolio,
+    scenarios: int,
+    correlation: float,
+    confidence_levels: Sequence[float],
+    seed: int,
+    pool: Optional[ScoringPool] = None
+) -> PortfolioRisk:
+    """
+    Simulate the portfolio's loss distribution off the event loop
+    Raises ScoringPoolFull when the pool queue is full
+    """
+    pool = pool or scoring_pool
+    loans = len(portfolio.exposures)
+    model = loss_model(portfolio, correlation)
+    chunks = plan_chunks(scenarios, loans, seed)
+
+    parts = 1
+    if pool.running and scenarios * loans >= settings.PORTFOLIO_PARALLEL_MIN_ELEMENTS:
+        parts = min(pool.max_workers, len(chunks))
+    size = -(-len(chunks) // parts)
+    # One admission check for the whole simulation, so it never runs in part
+    pool.check_capacity()
+    losses = await asyncio.gather(*(
+        pool.run(simulate_losses, model, chunks[start:start + size], wait=True)
+        for start in range(0, len(chunks), size)
+    ))
+    logger.debug("Portfolio simulated", loans=loans, scenarios=scenarios, chunks=len(chunks), parts=len(losses))
+    return await asyncio.to_thread(summarize_losses, portfolio, np.concatenate(losses), confidence_levels)
@@ -0,0 +1,171 @@
+"""
+Sampling profiler for the API Gateway
+
+An opt-in (PROFILER_ENABLED), wall-clock sampling profiler that runs inside
+a live worker, so a slow path can be profiled in production without a
+restart. While a session runs, a background thread reads every thread's
+Python stack each PROFILER_INTERVAL_SECONDS. When the session ends, it
+writes the stack counts to PROFILER_OUTPUT_DIR in the folded format read by
+flamegraph.pl, speedscope and inferno:
+
+    MainThread;run (uvicorn/server.py:61);assess_credit_risk (api_gateway/main.py:224) 12
+
+Users named in PROFILER_ADMINS start sessions in two ways:
+- per request, by sending `X-Profile: true` (see ProfilingMiddleware); the
+  response's X-Profile header names the file;
+- for a time window, through POST /api/v1/admin/profile.
+
+Only one session runs per worker at a time. Samples cover the whole worker,
+so a per-request profile also shows whatever else the worker was doing.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter as StackCounter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional, Set
+
+from prometheus_client import Counter
+import structlog
+
+from .config import settings
+
+logger = structlog.get_logger()
+
+# Prometheus metrics
+PROFILES_WRITTEN = Counter(
+    'profiler_profiles_written_total',
+    'Sampling profiles written to disk',
+    ['trigger']
+)
+
+
+class ProfilerBusy(Exception):
+    """Raised when a profiling session is already running in this worker"""
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    path = Path(code.co_filename)
+    return f"{code.co_name} ({path.parent.name}/{path.name}:{code.co_firstlineno})"
+
+
+class ProfileSession:
+    """One sampling session: a thread that counts folded stacks until stopped or max_seconds"""
+
+    def __init__(self, interval: float, max_seconds: float):
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.samples = 0
+        self.stacks: StackCounter = StackCounter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        deadline = time.monotonic() + self.max_seconds
+        while not self._stopped.wait(self.interval) and time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(names.get(thread_id, f"thread-{thread_id}"))
+                self.stacks[";".join(reversed(labels))] += 1
+            self.samples += 1
+
+    def folded(self) -> str:
+        """Stacks in folded format, one 'frame;frame;... count' line each"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class SamplingProfiler:
+    """Starts profiling sessions, one at a time, and writes them to output_dir"""
+
+    def __init__(self, output_dir: str, interval: float = 0.005, max_seconds: float = 60.0):
+        self.output_dir = Path(output_dir)
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self._lock = threading.Lock()
+        self._session: Optional[ProfileSession] = None
+        self._windows: Set[asyncio.Task] = set()
+
+    @property
+    def running(self) -> bool:
+        return self._session is not None
+
+    def start(self) -> ProfileSession:
+        """Start a session; raises ProfilerBusy if one is already running"""
+        with self._lock:
+            if self._session is not None:
+                raise ProfilerBusy("A profiling session is already running")
+            self._session = ProfileSession(self.interval, self.max_seconds)
+        self._session.start()
+        return self._session
+
+    def stop(self, session: ProfileSession, path: Optional[Path] = None, trigger: str = "request") -> Optional[Path]:
+        """Stop a session and write its stacks to path, or discard them if path is None"""
+        session.stop()
+        with self._lock:
+            self._session = None
+        if path is None:
+            return None
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(session.folded())
+        os.replace(tmp_path, path)
+        PROFILES_WRITTEN.labels(trigger=trigger).inc()
+        logger.info("Profile written", path=str(path), samples=session.samples, trigger=trigger)
+        return path
+
+    def profile_path(self, label: str) -> Path:
+        """A new, unique file name for a profile"""
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        return self.output_dir / f"{stamp}-{os.getpid()}-{label}.folded"
+
+    def start_window(self, seconds: float) -> Path:
+        """
+        Sample for seconds (capped at max_seconds) in the background and return
+        the file the profile will be written to; raises ProfilerBusy if a
+        session is already running
+        """
+        session = self.start()
+        path = self.profile_path("window")
+        task = asyncio.get_running_loop().create_task(
+            self._finish_window(session, path, min(seconds, self.max_seconds))
+        )
+        self._windows.add(task)
+        task.add_done_callback(self._windows.discard)
+        return path
+
+    async def _finish_window(self, session: ProfileSession, path: Path, seconds: float) -> None:
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            await asyncio.to_thread(self.stop, session, path, "window")
+
+
+def is_profiler_admin(username: Optional[str]) -> bool:
+    """Whether username may trigger profiles"""
+    return settings.PROFILER_ENABLED and username is not None and username in settings.PROFILER_ADMINS
+
+
+sampling_profiler = SamplingProfiler(
+    output_dir=settings.PROFILER_OUTPUT_DIR,
+    interval=settings.PROFILER_INTERVAL_SECONDS,
+    max_seconds=settings.PROFILER_MAX_SECONDS
+)
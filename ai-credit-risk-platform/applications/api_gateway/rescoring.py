@@ -0,0 +1,252 @@
+"""
+Incremental rescoring of stored assessments for the API Gateway
+
+The assessments table holds each applicant's latest assessment: its input
+features and its outcome under the rules in force. Every feature column (and
+the risk score) has its own index, so when a rule set changes, the
+applicants whose outcome could change are found with index range scans
+instead of a pass over the whole book:
+
+- a rule whose threshold moved, from 650 to 640 say, can only flip
+  applicants with 640 <= credit_score < 650;
+- a rule whose weight or operator changed affects the applicants it matches
+  before or after the change;
+- a risk level band that moved or was renamed affects the stored risk
+  scores whose band or recommendation differs between the two rule sets.
+
+Only those applicants are read and rescored with the new rules, in chunks of
+RESCORE_CHUNK_SIZE, so the work is proportional to the affected slice. If the
+rules changed structurally (rules added, removed or reordered, or a new
+max_score), every stored assessment is rescored instead. The result is the
+diff of changed risk levels and recommendations; with apply, changed
+outcomes are written back, each chunk in its own transaction, so the book
+matches the new rules:
+
+    python -m applications.api_gateway.rescoring new_rules.json > diff.ndjson
+    python -m applications.api_gateway.rescoring new_rules.json --apply > diff.ndjson
+
+or make rescore RULES=new_rules.json [APPLY=1], which writes rescore-diff.ndjson.
+
+The old rules default to SCORING_RULES_PATH, i.e. the rules currently
+deployed. Run with --apply as part of rolling out the new rules.
+"""
+
+import argparse
+import sys
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import orjson
+from sqlalchemy import and_, bindparam, false, or_, select, update
+from sqlalchemy.sql.elements import ColumnElement
+import structlog
+
+from .config import settings
+from .database import assessments, get_engine
+from .lazy import lazy_import
+from .scoring_engine import OPERATORS, SUPPORTED_FEATURES, CompiledRuleSet, RuleSet, ScoringRule, load_ruleset
+
+np = lazy_import("numpy")
+
+logger = structlog.get_logger()
+
+
+class AssessmentChange(NamedTuple):
+    """A stored assessment whose risk level or recommendation differs under the new rules"""
+    applicant_id: str
+    risk_score_before: int
+    risk_score: int
+    risk_level_before: str
+    risk_level: str
+    recommendation_before: str
+    recommendation: str
+
+
+class RescoreResult(NamedTuple):
+    """Outcome of rescoring the stored assessments affected by a rule change"""
+    full: bool  # every stored assessment was examined
+    examined: int
+    updated: int  # assessments whose stored outcome changed (written back with apply)
+    changes: List[AssessmentChange]
+
+
+def _threshold_window(rule: ScoringRule, threshold: float) -> ColumnElement:
+    """Values on which rule and the same rule with another threshold disagree"""
+    column = assessments.c[rule.feature]
+    low, high = sorted((rule.threshold, threshold))
+    if rule.operator in ("<", ">="):
+        return and_(column >= low, column < high)
+    if rule.operator in ("<=", ">"):
+        return and_(column > low, column <= high)
+    return column.in_([low, high])
+
+
+def _band_outcomes(ruleset: RuleSet) -> List[Tuple[str, str]]:
+    """(risk level, recommendation) for every risk score from 0 to max_score"""
+    outcomes = []
+    for score in range(ruleset.max_score + 1):
+        for level in ruleset.levels:
+            if level.max_score is None or score < level.max_score:
+                outcomes.append((level.name, level.recommendation))
+                break
+    return outcomes
+
+
+def affected_condition(old: RuleSet, new: RuleSet) -> Optional[ColumnElement]:
+    """
+    Condition selecting every stored assessment whose outcome may differ
+    between old and new rules, or None if the rules changed so much that all
+    of them must be rescored
+    """
+    structural = (
+        len(old.rules) != len(new.rules)
+        or old.max_score != new.max_score
+        or any(before.feature != after.feature for before, after in zip(old.rules, new.rules))
+    )
+    if structural:
+        return None
+
+    conditions = []
+    for before, after in zip(old.rules, new.rules):
+        if (before.operator, before.weight) == (after.operator, after.weight):
+            if before.threshold != after.threshold:
+                conditions.append(_threshold_window(before, after.threshold))
+        else:
+            column = assessments.c[before.feature]
+            conditions.append(or_(
+                OPERATORS[before.operator](column, before.threshold),
+                OPERATORS[after.operator](column, after.threshold)
+            ))
+
+    # Runs of risk scores whose band outcome differs
+    risk_score = assessments.c.risk_score
+    start = None
+    outcomes = zip(_band_outcomes(old), _band_outcomes(new))
+    for score, (before, after) in enumerate([*outcomes, (None, None)]):
+        if before != after and start is None:
+            start = score
+        elif before == after and start is not None:
+            conditions.append(and_(risk_score >= start, risk_score < score))
+            start = None
+
+    return or_(*conditions) if conditions else false()
+
+
+def rescore(
+    old: RuleSet,
+    new: RuleSet,
+    apply: bool = False,
+    url: Optional[str] = None,
+    chunk_size: Optional[int] = None
+) -> RescoreResult:
+    """
+    Rescore the stored assessments a change from old to new rules may affect
+    and return the changed outcomes; with apply, write them back chunk by chunk
+    """
+    engine = CompiledRuleSet(new)
+    condition = affected_condition(old, new)
+    chunk_size = chunk_size or settings.RESCORE_CHUNK_SIZE
+    query = select(
+        assessments.c.applicant_id,
+        *(assessments.c[feature] for feature in SUPPORTED_FEATURES),
+        assessments.c.risk_score,
+        assessments.c.risk_level,
+        assessments.c.recommendation
+    ).order_by(assessments.c.applicant_id).limit(chunk_size)
+    if condition is not None:
+        query = query.where(condition)
+    statement = (
+        update(assessments)
+        .where(assessments.c.applicant_id == bindparam("key"))
+        .values(
+            risk_score=bindparam("new_risk_score"),
+            risk_level=bindparam("new_risk_level"),
+            recommendation=bindparam("new_recommendation")
+        )
+    )
+
+    examined = 0
+    updated = 0
+    changes: List[AssessmentChange] = []
+    database = get_engine(url or settings.DATABASE_URL)
+    last_applicant_id = None
+    while True:
+        # One transaction per chunk, read and written together; paging by
+        # applicant ID means rows already written are never read again
+        with database.begin() as connection:
+            page = query if last_applicant_id is None else query.where(assessments.c.applicant_id > last_applicant_id)
+            rows = connection.execute(page).all()
+            if not rows:
+                break
+            examined += len(rows)
+            last_applicant_id = rows[-1].applicant_id
+            applicant_ids, *features, scores, levels, recommendations = zip(*rows)
+            assessment = engine.score_arrays({
+                feature: np.array(values, dtype=np.float64) for feature, values in zip(SUPPORTED_FEATURES, features)
+            })
+            changed = np.flatnonzero(
+                (assessment.risk_scores != np.array(scores))
+                | (assessment.risk_levels != np.array(levels))
+                | (assessment.recommendations != np.array(recommendations))
+            )
+            updates: List[Dict[str, object]] = []
+            for i in changed.tolist():
+                change = AssessmentChange(
+                    applicant_id=applicant_ids[i],
+                    risk_score_before=scores[i],
+                    risk_score=int(assessment.risk_scores[i]),
+                    risk_level_before=levels[i],
+                    risk_level=str(assessment.risk_levels[i]),
+                    recommendation_before=recommendations[i],
+                    recommendation=str(assessment.recommendations[i])
+                )
+                updates.append({
+                    "key": change.applicant_id,
+                    "new_risk_score": change.risk_score,
+                    "new_risk_level": change.risk_level,
+                    "new_recommendation": change.recommendation,
+                })
+                if (change.risk_level, change.recommendation) != (levels[i], recommendations[i]):
+                    changes.append(change)
+            updated += len(updates)
+            if apply and updates:
+                connection.execute(statement, updates)
+        if len(rows) < chunk_size:
+            break
+
+    logger.info(
+        "Stored assessments rescored",
+        rules_version_from=old.version,
+        rules_version_to=new.version,
+        full=condition is None,
+        examined=examined,
+        updated=updated,
+        changed=len(changes),
+        applied=apply
+    )
+    return RescoreResult(full=condition is None, examined=examined, updated=updated, changes=changes)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("rules", help="new rule set (JSON)")
+    parser.add_argument("--from", dest="old_rules", default=settings.SCORING_RULES_PATH,
+                        help="rule set the stored assessments were scored with (default: SCORING_RULES_PATH)")
+    parser.add_argument("--apply", action="store_true", help="write the new outcomes to the assessments table")
+    args = parser.parse_args(argv)
+
+    result = rescore(load_ruleset(args.old_rules), load_ruleset(args.rules), apply=args.apply)
+    for change in result.changes:
+        sys.stdout.buffer.write(orjson.dumps(change._asdict(), option=orjson.OPT_APPEND_NEWLINE))
+    print(
+        f"{'full' if result.full else 'incremental'} rescore: examined {result.examined}, "
+        f"{len(result.changes)} risk level or recommendation changes"
+        f"{', applied' if args.apply else ' (dry run, use --apply to store them)'}",
+        file=sys.stderr
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    # stdout carries the diff
+    structlog.configure(logger_factory=structlog.PrintLoggerFactory(sys.stderr))
+    sys.exit(main())
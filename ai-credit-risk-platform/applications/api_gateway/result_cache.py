@@ -0,0 +1,157 @@
+"""
+Assessment result cache for the API Gateway
+
+Results are cached in two tiers: a small in-process TTLCache (L1) and Redis
+(L2), which is shared by all workers and instances. Keys combine the active
+scoring rule version with a SHA-256 of the validated request in canonical
+form, so equivalent payloads share an entry and a rule change makes every
+older entry unreachable until its TTL expires. Redis is best-effort: errors
+are counted and Redis is skipped for a short while before being retried.
+"""
+
+import hashlib
+import time
+from typing import Optional
+
+import orjson
+from prometheus_client import Counter
+from redis import asyncio as aioredis
+import structlog
+
+from .cache import CACHE_HITS, CACHE_MISSES, TTLCache
+from .config import settings
+from .models import CreditRiskRequest
+from .scoring_engine import Assessment, get_scoring_engine
+
+logger = structlog.get_logger()
+
+KEY_PREFIX = "credit-risk:assessment"
+
+# Prometheus metrics
+RESULT_CACHE_ERRORS = Counter(
+    'result_cache_errors_total',
+    'Assessment result cache backend errors',
+    ['operation']
+)
+
+
+def cache_key(request: CreditRiskRequest, rules_version: str) -> str:
+    """Return the cache key for a validated request under a rule version"""
+    canonical = orjson.dumps(request.model_dump(mode="json"), option=orjson.OPT_SORT_KEYS)
+    return f"{KEY_PREFIX}:{rules_version}:{hashlib.sha256(canonical).hexdigest()}"
+
+
+class AssessmentCache:
+    """Two-tier (in-process + Redis) cache of scoring results"""
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        redis: Optional[aioredis.Redis] = None,
+        enabled: bool = True,
+        ttl: int = 3600,
+        l1_size: int = 10000,
+        l1_ttl: float = 60,
+        redis_timeout: float = 0.1,
+        redis_retry_after: float = 5.0
+    ):
+        self.redis_url = redis_url
+        self.redis = redis
+        self.enabled = enabled
+        self.ttl = ttl
+        self.redis_timeout = redis_timeout
+        self.redis_retry_after = redis_retry_after
+        self.l1 = TTLCache("assessment", maxsize=l1_size, default_ttl=l1_ttl)
+        self._rules_version: Optional[str] = None
+        self._redis_down_until = 0.0
+        self._l2_hits = CACHE_HITS.labels(cache="assessment_redis")
+        self._l2_misses = CACHE_MISSES.labels(cache="assessment_redis")
+
+    def _client(self) -> Optional[aioredis.Redis]:
+        if self.redis is None and self.redis_url:
+            self.redis = aioredis.Redis.from_url(
+                self.redis_url,
+                socket_timeout=self.redis_timeout,
+                socket_connect_timeout=self.redis_timeout
+            )
+        if self.redis is None or time.monotonic() < self._redis_down_until:
+            return None
+        return self.redis
+
+    def _redis_failed(self, operation: str, error: Exception) -> None:
+        RESULT_CACHE_ERRORS.labels(operation=operation).inc()
+        self._redis_down_until = time.monotonic() + self.redis_retry_after
+        logger.warning("Assessment cache unavailable", operation=operation, error=str(error))
+
+    def _check_rules_version(self, version: str) -> None:
+        """Drop L1 entries scored under a previous rule version"""
+        if version != self._rules_version:
+            if self._rules_version is not None:
+                logger.info("Scoring rules changed, clearing assessment cache",
+                            previous=self._rules_version, current=version)
+            self.l1.clear()
+            self._rules_version = version
+
+    async def get(self, key: str) -> Optional[Assessment]:
+        """Look a result up in L1, then Redis (promoting Redis hits to L1)"""
+        assessment = self.l1.get(key)
+        if assessment is not None:
+            return assessment
+
+        client = self._client()
+        if client is None:
+            return None
+        try:
+            raw = await client.get(key)
+        except Exception as e:  # the cache must never fail an assessment
+            self._redis_failed("get", e)
+            return None
+        if raw is None:
+            self._l2_misses.inc()
+            return None
+        self._l2_hits.inc()
+        assessment = Assessment(**orjson.loads(raw))
+        self.l1.set(key, assessment)
+        return assessment
+
+    async def set(self, key: str, assessment: Assessment) -> None:
+        """Store a result in both tiers"""
+        self.l1.set(key, assessment)
+        client = self._client()
+        if client is None:
+            return
+        try:
+            await client.set(key, orjson.dumps(assessment._asdict()), ex=self.ttl)
+        except Exception as e:
+            self._redis_failed("set", e)
+
+    async def assess(self, request: CreditRiskRequest) -> Assessment:
+        """Score a validated application, reusing a cached result when possible"""
+        engine = get_scoring_engine()
+        if not self.enabled:
+            return engine.score(request.model_dump())
+
+        self._check_rules_version(engine.version)
+        key = cache_key(request, engine.version)
+        assessment = await self.get(key)
+        if assessment is None:
+            assessment = engine.score(request.model_dump())
+            await self.set(key, assessment)
+        return assessment
+
+    async def close(self) -> None:
+        """Close the Redis connection pool"""
+        if self.redis is not None:
+            await self.redis.aclose()
+            self.redis = None
+
+
+result_cache = AssessmentCache(
+    redis_url=settings.REDIS_URL,
+    enabled=settings.RESULT_CACHE_ENABLED,
+    ttl=settings.RESULT_CACHE_TTL_SECONDS,
+    l1_size=settings.RESULT_CACHE_L1_SIZE,
+    l1_ttl=settings.RESULT_CACHE_L1_TTL_SECONDS,
+    redis_timeout=settings.RESULT_CACHE_REDIS_TIMEOUT_SECONDS,
+    redis_retry_after=settings.RESULT_CACHE_REDIS_RETRY_SECONDS
+)
@@ -0,0 +1,222 @@
+"""
+Credit risk assessment helpers for the API Gateway
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+from pydantic import ValidationError
+
+from .lazy import lazy_import
+from .model_registry import model_registry
+from .models import CreditRiskBatchItem, CreditRiskRequest, CreditRiskResponse
+from .scoring_engine import SUPPORTED_FEATURES, get_scoring_engine, matched_factors
+
+np = lazy_import("numpy")
+
+
+class InvalidRecord(NamedTuple):
+    """Record rejected before model validation (e.g. by a stream parser)"""
+    errors: List[Dict[str, Any]]
+
+
+class ScoredBatch(NamedTuple):
+    """
+    Scores for a packed feature matrix; self-contained (plain values and
+    NumPy arrays) so that it can be returned from a scoring worker process
+    """
+    rules_version: str
+    factors: Tuple[str, ...]
+    risk_scores: "np.ndarray"
+    risk_levels: "np.ndarray"
+    recommendations: "np.ndarray"
+    matched: "np.ndarray"
+    model_version: Optional[str]
+    confidence_scores: Optional["np.ndarray"]
+
+
+def object_records(records: Sequence[Any]) -> List[Any]:
+    """
+    Mark decoded JSON values that are not objects (null, strings, numbers,
+    lists) as invalid, so that they are reported per record rather than
+    parsed as JSON text or rejected with the whole batch
+    """
+    return [
+        record if isinstance(record, dict) else InvalidRecord(errors=[{
+            "type": "model_type",
+            "loc": [],
+            "msg": "Input should be an object",
+            "input": record
+        }])
+        for record in records
+    ]
+
+
+def validate_records(
+    records: Sequence[Any],
+    start_index: int = 0
+) -> Tuple[List[Optional[CreditRiskBatchItem]], List[int], List[CreditRiskRequest]]:
+    """
+    Validate raw records, returning one item slot per record (filled in for
+    invalid records, None for valid ones), plus the valid records' positions
+    and requests
+    """
+    items: List[Optional[CreditRiskBatchItem]] = []
+    valid_positions = []
+    valid_requests = []
+    for position, record in enumerate(records):
+        index = start_index + position
+        if isinstance(record, InvalidRecord):
+            items.append(CreditRiskBatchItem(index=index, errors=record.errors))
+            continue
+        try:
+            if isinstance(record, (bytes, str)):
+                request = CreditRiskRequest.model_validate_json(record)
+            else:
+                request = CreditRiskRequest.model_validate(record)
+        except ValidationError as e:
+            applicant_id = record.get("applicant_id") if isinstance(record, dict) else None
+            items.append(CreditRiskBatchItem(
+                index=index,
+                applicant_id=applicant_id if isinstance(applicant_id, str) else None,
+                errors=e.errors(include_url=False, include_context=False)
+            ))
+            continue
+        valid_positions.append(position)
+        valid_requests.append(request)
+        items.append(None)
+    return items, valid_positions, valid_requests
+
+
+def pack_features(requests: Sequence[CreditRiskRequest]) -> "np.ndarray":
+    """Pack requests into a float64 matrix with one row per SUPPORTED_FEATURES entry"""
+    count = len(requests)
+    matrix = np.empty((len(SUPPORTED_FEATURES), count), dtype=np.float64)
+    for row, feature in enumerate(SUPPORTED_FEATURES):
+        matrix[row] = np.fromiter((getattr(r, feature) for r in requests), dtype=np.float64, count=count)
+    return matrix
+
+
+def score_features(matrix: "np.ndarray") -> ScoredBatch:
+    """Score a packed feature matrix with the active rules and model"""
+    engine = get_scoring_engine()
+    model = model_registry.active
+    columns = dict(zip(SUPPORTED_FEATURES, matrix))
+    assessment = engine.score_arrays(columns)
+    confidence_scores = None
+    if model is not None and matrix.shape[1]:
+        confidence_scores = model.confidence_scores(columns, assessment.risk_levels)
+    return ScoredBatch(
+        rules_version=engine.version,
+        factors=engine.factors,
+        risk_scores=assessment.risk_scores,
+        risk_levels=assessment.risk_levels,
+        recommendations=assessment.recommendations,
+        matched=assessment.matched,
+        model_version=model.version if model is not None else None,
+        confidence_scores=confidence_scores
+    )
+
+
+def build_items(
+    items: List[Optional[CreditRiskBatchItem]],
+    valid_positions: List[int],
+    valid_requests: List[CreditRiskRequest],
+    scored: ScoredBatch,
+    assessor: str,
+    start_index: int = 0
+) -> List[CreditRiskBatchItem]:
+    """Fill the valid records' item slots with their scores"""
+    assessment_date = datetime.now(timezone.utc)
+    confidence_scores = scored.confidence_scores
+    for i, position in enumerate(valid_positions):
+        applicant_id = valid_requests[i].applicant_id
+        items[position] = CreditRiskBatchItem(
+            index=start_index + position,
+            applicant_id=applicant_id,
+            result=CreditRiskResponse(
+                applicant_id=applicant_id,
+                risk_score=int(scored.risk_scores[i]),
+                risk_level=str(scored.risk_levels[i]),
+                recommendation=str(scored.recommendations[i]),
+                assessment_date=assessment_date,
+                assessor=assessor,
+                confidence_score=(
+                    None if confidence_scores is None or np.isnan(confidence_scores[i])
+                    else float(confidence_scores[i])
+                ),
+                model_version=scored.model_version,
+                factors=matched_factors(scored.factors, scored.matched[:, i])
+            )
+        )
+    return items
+
+
+def assess_records(
+    records: Sequence[Any],
+    assessor: str,
+    start_index: int = 0
+) -> List[CreditRiskBatchItem]:
+    """
+    Validate and score a sequence of raw records, returning one item per record
+    Records may be mappings, raw JSON documents (bytes/str) or InvalidRecord
+    markers; validation failures are reported on the item instead of raising
+    Scoring runs on the calling thread; see scoring_pool for the process pool
+    """
+    items, valid_positions, valid_requests = validate_records(records, start_index)
+    scored = score_features(pack_features(valid_requests))
+    return build_items(items, valid_positions, valid_requests, scored, assessor, start_index)
+
+
+def stored_assessment(
+    applicant_id: str,
+    features: Mapping[str, Any],
+    risk_score: int,
+    risk_level: str,
+    recommendation: str
+) -> Dict[str, Any]:
+    """Row of the assessments table for a validated application and its outcome"""
+    row: Dict[str, Any] = {"applicant_id": applicant_id}
+    for feature in SUPPORTED_FEATURES:
+        row[feature] = float(features[feature])
+    row["risk_score"] = int(risk_score)
+    row["risk_level"] = risk_level
+    row["recommendation"] = recommendation
+    return row
+
+
+def stored_batch(records: Sequence[Any], items: List[CreditRiskBatchItem]) -> List[Dict[str, Any]]:
+    """Rows of the assessments table for the valid records of a batch (records as mappings)"""
+    return [
+        stored_assessment(
+            item.result.applicant_id,
+            records[item.index],
+            item.result.risk_score,
+            item.result.risk_level,
+            item.result.recommendation
+        )
+        for item in items
+        if item.result is not None
+    ]
+
+
+# Representative application used to exercise the scoring paths at start-up
+PREWARM_RECORD = {
+    "applicant_id": "PREWARM",
+    "income": 50000.0,
+    "credit_score": 700,
+    "debt_ratio": 0.3,
+    "employment_years": 3,
+    "loan_amount": 100000.0,
+    "loan_purpose": "PERSONAL",
+}
+
+
+def prewarm() -> None:
+    """
+    Run the scalar and batch scoring paths once
+    Imports NumPy, builds the engine's vector tables and warms pydantic's
+    validators so the first real requests don't pay those costs
+    """
+    get_scoring_engine().score(PREWARM_RECORD)
+    assess_records([PREWARM_RECORD], assessor="prewarm")
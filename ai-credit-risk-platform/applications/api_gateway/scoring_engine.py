@@ -0,0 +1,209 @@
+"""
+Rule-based scoring engine for the API Gateway
+
+Rule sets are declared as data (JSON files validated by the models below) and
+compiled once into an evaluator with a scalar path for single applicants and
+a vectorized NumPy path for batches. Both paths share the same compiled rules,
+so they always agree.
+"""
+
+import json
+import operator
+from functools import cached_property
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Literal, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+from pydantic import BaseModel, Field, field_validator, model_validator
+import structlog
+
+from .config import settings
+from .lazy import lazy_import
+
+np = lazy_import("numpy")
+
+logger = structlog.get_logger()
+
+DEFAULT_RULES_PATH = Path(__file__).parent / "scoring_rules" / "default.json"
+
+# Numeric CreditRiskRequest fields that rules may reference
+SUPPORTED_FEATURES = ("income", "credit_score", "debt_ratio", "employment_years", "loan_amount")
+
+OPERATORS: Dict[str, Callable[[Any, Any], Any]] = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+
+class ScoringRule(BaseModel):
+    """A single threshold rule adding weight to the risk score when it matches"""
+    feature: str = Field(..., description="Applicant feature the rule applies to")
+    operator: Literal["<", "<=", ">", ">=", "==", "!="] = Field(..., description="Comparison operator")
+    threshold: float = Field(..., description="Value the feature is compared against")
+    weight: int = Field(..., ge=0, description="Risk score added when the rule matches")
+    factor: str = Field(..., description="Risk factor reported when the rule matches")
+
+    @field_validator("feature")
+    @classmethod
+    def validate_feature(cls, v):
+        if v not in SUPPORTED_FEATURES:
+            raise ValueError(f"Unsupported feature '{v}', expected one of {', '.join(SUPPORTED_FEATURES)}")
+        return v
+
+
+class RiskLevelBand(BaseModel):
+    """Risk level assigned to scores below max_score (the last band is open-ended)"""
+    name: str = Field(..., description="Risk level name")
+    recommendation: str = Field(..., description="Recommendation for this risk level")
+    max_score: Optional[int] = Field(None, description="Exclusive upper bound of the band")
+    probability_of_default: Optional[float] = Field(
+        None, ge=0, le=1, description="Calibrated one-year probability of default for the band"
+    )
+
+
+class RuleSet(BaseModel):
+    """Versioned set of scoring rules and risk level bands"""
+    version: str = Field(..., description="Rule set version")
+    description: Optional[str] = Field(None, description="Human readable description")
+    rules: List[ScoringRule] = Field(..., min_length=1, description="Scoring rules")
+    levels: List[RiskLevelBand] = Field(..., min_length=1, description="Risk level bands in ascending order")
+    max_score: int = Field(default=100, ge=0, description="Upper bound of the risk score")
+
+    @model_validator(mode="after")
+    def validate_levels(self):
+        bounds = [level.max_score for level in self.levels[:-1]]
+        if any(bound is None for bound in bounds) or self.levels[-1].max_score is not None:
+            raise ValueError("Only the last risk level band may be open-ended, and it must be")
+        if bounds != sorted(set(bounds)):
+            raise ValueError("Risk level bands must have strictly increasing max_score")
+        return self
+
+
+class Assessment(NamedTuple):
+    """Outcome of scoring a single applicant"""
+    risk_score: int
+    risk_level: str
+    recommendation: str
+    factors: List[str]
+
+
+class BatchAssessment(NamedTuple):
+    """Outcome of scoring many applicants at once"""
+    risk_scores: "np.ndarray"
+    risk_levels: "np.ndarray"
+    recommendations: "np.ndarray"
+    matched: "np.ndarray"  # (n_rules, n_applicants) boolean matrix of matching rules
+
+
+class CompiledRuleSet:
+    """Rule set compiled into a fast evaluator"""
+
+    def __init__(self, ruleset: RuleSet):
+        self.ruleset = ruleset
+        self.version = ruleset.version
+        self.features: Tuple[str, ...] = tuple(dict.fromkeys(rule.feature for rule in ruleset.rules))
+        self.factors: Tuple[str, ...] = tuple(rule.factor for rule in ruleset.rules)
+        self._max_score = ruleset.max_score
+
+        # Scalar path: rules pre-bound to their comparison functions
+        self._rules = tuple(
+            (rule.feature, OPERATORS[rule.operator], rule.threshold, rule.weight, rule.factor)
+            for rule in ruleset.rules
+        )
+        self._bands = tuple(
+            (level.max_score, level.name, level.recommendation) for level in ruleset.levels
+        )
+
+    @cached_property
+    def _vector_tables(self) -> Tuple["np.ndarray", ...]:
+        """Weights and band lookup tables for the vectorized path, built on first use"""
+        ruleset = self.ruleset
+        return (
+            np.array([rule.weight for rule in ruleset.rules], dtype=np.int64),
+            np.array([level.max_score for level in ruleset.levels[:-1]], dtype=np.int64),
+            np.array([level.name for level in ruleset.levels]),
+            np.array([level.recommendation for level in ruleset.levels]),
+        )
+
+    def score(self, record: Mapping[str, Any]) -> Assessment:
+        """Score a single applicant; missing features are treated as 0"""
+        risk_score = 0
+        factors = []
+        for feature, compare, threshold, weight, factor in self._rules:
+            if compare(record.get(feature, 0), threshold):
+                risk_score += weight
+                factors.append(factor)
+        if risk_score > self._max_score:
+            risk_score = self._max_score
+
+        for max_score, name, recommendation in self._bands:
+            if max_score is None or risk_score < max_score:
+                return Assessment(risk_score, name, recommendation, factors)
+        raise AssertionError("unreachable: the last band is open-ended")
+
+    def score_arrays(self, columns: Mapping[str, "np.ndarray"]) -> BatchAssessment:
+        """Score many applicants given one array per feature"""
+        weights, cutoffs, levels, recommendations = self._vector_tables
+        matched = np.array([
+            compare(columns[feature], threshold)
+            for feature, compare, threshold, _, _ in self._rules
+        ], dtype=bool).reshape(len(self._rules), -1)
+        risk_scores = np.minimum(weights @ matched, self._max_score)
+        band_index = np.searchsorted(cutoffs, risk_scores, side="right")
+        return BatchAssessment(
+            risk_scores,
+            levels[band_index],
+            recommendations[band_index],
+            matched
+        )
+
+    def probabilities_of_default(self, risk_scores: "np.ndarray") -> "np.ndarray":
+        """
+        Probability of default for each risk score, from its band
+        Raises ValueError if the rule set does not calibrate every band
+        """
+        missing = [level.name for level in self.ruleset.levels if level.probability_of_default is None]
+        if missing:
+            raise ValueError(
+                f"Rule set {self.version} has no probability_of_default for {', '.join(missing)}"
+            )
+        _, cutoffs, _, _ = self._vector_tables
+        table = np.array([level.probability_of_default for level in self.ruleset.levels], dtype=np.float64)
+        return table[np.searchsorted(cutoffs, risk_scores, side="right")]
+
+
+def matched_factors(factors: Sequence[str], matched_column: "np.ndarray") -> List[str]:
+    """Translate one column of a BatchAssessment's matched matrix into factor names"""
+    return [factor for factor, hit in zip(factors, matched_column) if hit]
+
+
+def load_ruleset(path: Optional[str] = None) -> RuleSet:
+    """Load a rule set from a JSON file, defaulting to the bundled rules"""
+    with open(path or DEFAULT_RULES_PATH) as f:
+        return RuleSet.model_validate(json.load(f))
+
+
+_engine: Optional[CompiledRuleSet] = None
+
+
+def load_scoring_engine(path: Optional[str] = None) -> CompiledRuleSet:
+    """Compile a rule set and make it the active scoring engine"""
+    global _engine
+    _engine = CompiledRuleSet(load_ruleset(path))
+    logger.info(
+        "Scoring engine loaded",
+        rules_version=_engine.version,
+        rules=len(_engine.ruleset.rules),
+        path=str(path or DEFAULT_RULES_PATH)
+    )
+    return _engine
+
+
+def get_scoring_engine() -> CompiledRuleSet:
+    """Return the active scoring engine, compiling the configured rules on first use"""
+    if _engine is None:
+        return load_scoring_engine(settings.SCORING_RULES_PATH)
+    return _engine
@@ -0,0 +1,228 @@
+"""
+Process pool for CPU-bound scoring in the API Gateway
+
+Batch and streaming assessments are scored in a pool of worker processes, so
+a large portfolio does not hold the event loop (and every other request on
+the worker) for the whole computation. The request side still validates
+records and builds responses. Only the packed float64 feature matrix goes to
+a worker, as one contiguous buffer, and the scores come back as NumPy arrays.
+
+Workers are spawned when the application starts. Each one loads the rules
+(SCORING_RULES_PATH) and the published model, then runs a warm-up scoring
+pass before taking work. Workers poll the model registry themselves, so a
+newly published model reaches them as it does the request workers. Rule
+changes need a restart.
+
+At most SCORING_POOL_WORKERS + SCORING_POOL_MAX_QUEUE scoring calls may be
+outstanding. New batch requests beyond that are rejected; chunks of a stream
+that is already running always wait their turn. Without a running pool
+(SCORING_POOL_WORKERS=0, or no lifespan), scoring happens inline.
+
+Other CPU-bound numerical work (e.g. portfolio simulation) shares the pool
+and its queue limit through ScoringPool.run.
+"""
+
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Sequence, TypeVar
+
+from prometheus_client import Counter, Gauge, Histogram
+import structlog
+
+from .config import settings
+from .lazy import lazy_import
+from .logging_config import configure_logging
+from .model_registry import model_registry
+from .models import CreditRiskBatchItem
+from .scoring import ScoredBatch, build_items, pack_features, prewarm, score_features, validate_records
+from .scoring_engine import load_scoring_engine
+
+np = lazy_import("numpy")
+
+logger = structlog.get_logger()
+
+ResultT = TypeVar("ResultT")
+
+# Prometheus metrics
+SCORING_POOL_IN_FLIGHT = Gauge(
+    'scoring_pool_in_flight',
+    'Scoring calls submitted to the process pool and not yet finished',
+    multiprocess_mode='livesum'
+)
+
+SCORING_POOL_DURATION = Histogram(
+    'scoring_pool_duration_seconds',
+    'Process pool scoring latency including queueing and transfer',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+
+SCORING_POOL_PAYLOAD_BYTES = Histogram(
+    'scoring_pool_payload_bytes',
+    'Size of feature matrices sent to the process pool',
+    buckets=(1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000)
+)
+
+SCORING_POOL_REJECTED = Counter(
+    'scoring_pool_rejected_total',
+    'Scoring calls rejected because the process pool queue was full'
+)
+
+SCORING_POOL_FAILURES = Counter(
+    'scoring_pool_failures_total',
+    'Scoring calls that fell back to running inline because the pool broke'
+)
+
+
+class ScoringPoolFull(Exception):
+    """Raised when the scoring pool queue is at capacity"""
+
+
+# State of a worker process
+_model_checked_at = 0.0
+
+
+def _init_worker(rules_path: Optional[str], model_root: str, mmap_mode: Optional[str]) -> None:
+    """Load rules and the published model, and run a warm-up pass, in a new worker"""
+    global _model_checked_at
+    configure_logging()
+    load_scoring_engine(rules_path)
+    model_registry.root = Path(model_root)
+    model_registry.mmap_mode = mmap_mode
+    model_registry.refresh()
+    _model_checked_at = time.monotonic()
+    prewarm()
+
+
+def _score_in_worker(matrix: "np.ndarray") -> ScoredBatch:
+    global _model_checked_at
+    if time.monotonic() - _model_checked_at >= settings.MODEL_REGISTRY_POLL_SECONDS:
+        _model_checked_at = time.monotonic()
+        model_registry.refresh()
+    return score_features(matrix)
+
+
+def _ready() -> bool:
+    return True
+
+
+class ScoringPool:
+    """Bounded process pool for batch scoring"""
+
+    def __init__(self, max_workers: int = 2, max_queue: int = 16):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._pending = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def running(self) -> bool:
+        return self._executor is not None
+
+    def start(self) -> None:
+        """Spawn and warm the worker processes (returns without waiting for them)"""
+        if self._executor is not None or self.max_workers < 1:
+            return
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            # Request workers run threads (audit, logging), which fork would not carry over safely
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(settings.SCORING_RULES_PATH, str(model_registry.root), model_registry.mmap_mode)
+        )
+        # One task per worker makes the pool start all of them now rather than on demand
+        for _ in range(self.max_workers):
+            self._executor.submit(_ready).add_done_callback(self._log_warmup)
+        logger.info("Scoring pool started", workers=self.max_workers)
+
+    def _log_warmup(self, future: Future) -> None:
+        if future.exception() is not None:
+            logger.error("Scoring worker failed to start", error=str(future.exception()))
+
+    def check_capacity(self) -> None:
+        """Raise ScoringPoolFull if a new call would exceed SCORING_POOL_MAX_QUEUE"""
+        if self._executor is not None and self._pending >= self.max_workers + self.max_queue:
+            SCORING_POOL_REJECTED.inc()
+            raise ScoringPoolFull("Scoring pool queue is full")
+
+    async def _in_worker(self, fn: Callable[..., ResultT], *args: Any, wait: bool) -> ResultT:
+        """Call fn in a worker process; raises BrokenProcessPool after restarting a broken pool"""
+        if not wait:
+            self.check_capacity()
+        self._pending += 1
+        SCORING_POOL_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        executor = self._executor
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, fn, *args)
+        except BrokenProcessPool as e:
+            # A worker died (e.g. killed for memory); replace the pool and let the caller run inline
+            SCORING_POOL_FAILURES.inc()
+            logger.error("Scoring pool broken, restarting it", error=str(e))
+            if self._executor is executor:
+                self._executor = None
+                executor.shutdown(wait=False, cancel_futures=True)
+                self.start()
+            raise
+        finally:
+            self._pending -= 1
+            SCORING_POOL_IN_FLIGHT.dec()
+            SCORING_POOL_DURATION.observe(time.perf_counter() - start)
+
+    async def score(self, matrix: "np.ndarray", wait: bool = False) -> ScoredBatch:
+        """
+        Score a packed feature matrix in a worker process
+        Raises ScoringPoolFull when the queue is full, unless wait is set
+        """
+        if self._executor is None or matrix.shape[1] == 0:
+            return score_features(matrix)
+        if not wait:
+            self.check_capacity()
+        SCORING_POOL_PAYLOAD_BYTES.observe(matrix.nbytes)
+        try:
+            return await self._in_worker(_score_in_worker, np.ascontiguousarray(matrix), wait=True)
+        except BrokenProcessPool:
+            return score_features(matrix)
+
+    async def run(self, fn: Callable[..., ResultT], *args: Any, wait: bool = False) -> ResultT:
+        """
+        Run other CPU-bound work, fn(*args), in a worker process; fn must be a
+        module-level function and args picklable. Without a running pool fn
+        runs in a thread, off the event loop.
+        Raises ScoringPoolFull when the queue is full, unless wait is set
+        """
+        if self._executor is not None:
+            try:
+                return await self._in_worker(fn, *args, wait=wait)
+            except BrokenProcessPool:
+                pass
+        return await asyncio.to_thread(fn, *args)
+
+    async def assess_records(
+        self,
+        records: Sequence[Any],
+        assessor: str,
+        start_index: int = 0,
+        wait: bool = False
+    ) -> List[CreditRiskBatchItem]:
+        """Like scoring.assess_records, with the scoring step run in the pool"""
+        items, valid_positions, valid_requests = validate_records(records, start_index)
+        scored = await self.score(pack_features(valid_requests), wait=wait)
+        return build_items(items, valid_positions, valid_requests, scored, assessor, start_index)
+
+    def shutdown(self) -> None:
+        """Stop the worker processes, waiting for running scoring calls"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+            logger.info("Scoring pool stopped")
+
+
+scoring_pool = ScoringPool(
+    max_workers=settings.SCORING_POOL_WORKERS,
+    max_queue=settings.SCORING_POOL_MAX_QUEUE
+)
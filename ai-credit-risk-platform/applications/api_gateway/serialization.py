@@ -0,0 +1,59 @@
+"""
+Request parsing and response serialization for the API Gateway
+
+FastAPI's default body handling decodes JSON into Python objects and then
+validates them, and its default response path walks the returned value with
+jsonable_encoder before encoding it. The helpers here let an endpoint validate
+the raw body bytes straight into a pydantic model, and return a model that
+pydantic-core serializes to JSON bytes directly.
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Type, TypeVar
+
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
+from pydantic_core import to_json
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+from .timing import stage
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+class ModelResponse(JSONResponse):
+    """JSON response rendered by pydantic-core, skipping jsonable_encoder"""
+
+    def render(self, content: Any) -> bytes:
+        with stage("serialize"):
+            return to_json(content)
+
+
+def body_parser(model: Type[ModelT]) -> Callable[[Request], Awaitable[ModelT]]:
+    """
+    Return a dependency that validates the request body bytes as model
+    Invalid bodies raise RequestValidationError, so they get FastAPI's usual
+    422 response with error locations under "body"
+    """
+
+    async def parse(request: Request) -> ModelT:
+        try:
+            with stage("parse"):
+                return model.model_validate_json(await request.body())
+        except ValidationError as e:
+            errors = e.errors(include_url=False, include_context=False)
+            for error in errors:
+                error["loc"] = ("body", *error["loc"])
+            raise RequestValidationError(errors)
+
+    return parse
+
+
+def request_body_schema(model: Type[BaseModel]) -> Dict[str, Any]:
+    """OpenAPI requestBody for an endpoint that parses its body with body_parser"""
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": model.model_json_schema()}},
+        }
+    }
@@ -0,0 +1,329 @@
+"""
+Session tracking and token revocation for the API Gateway
+
+Every access token carries a unique ID (its jti claim). Login records the
+session in Redis, under the token ID and in a per-user index, so users can
+list their sessions and end them before the token expires. Revoking a token
+writes its ID to Redis with a TTL matching the token's remaining lifetime
+(the authoritative revocation list) and publishes it on a pub/sub channel.
+
+Looking every request's token up in Redis would add a network round trip to
+each authenticated call. Instead, each worker keeps a Bloom filter of revoked
+token IDs, loaded from Redis at start-up and kept current by the pub/sub
+channel. A filter miss proves the token was not revoked, so almost every
+request is answered in process. Only filter hits (revoked tokens, plus
+TOKEN_REVOCATION_FILTER_ERROR_RATE of the rest) are confirmed in Redis. The
+filter is rebuilt every TOKEN_REVOCATION_REBUILD_SECONDS, which drops
+revocations whose tokens have expired.
+
+While the worker is not subscribed (at start-up, or after losing Redis)
+the filter may miss revocations, so every token is checked in Redis until it
+is back in sync. If Redis cannot be reached at all, filter hits are treated
+as revoked, and other tokens are accepted when TOKEN_REVOCATION_FAIL_OPEN is
+set and rejected otherwise.
+"""
+
+import asyncio
+import hashlib
+import math
+import time
+from datetime import datetime
+from typing import List, Optional
+
+import orjson
+from prometheus_client import Counter, Gauge
+from redis import asyncio as aioredis
+import structlog
+
+from .config import settings
+from .models import SessionInfo
+
+logger = structlog.get_logger()
+
+KEY_PREFIX = "credit-risk:auth"
+REVOCATION_CHANNEL = f"{KEY_PREFIX}:revocations"
+
+# Prometheus metrics
+TOKEN_REVOCATION_CHECKS = Counter(
+    'token_revocation_checks_total',
+    'Token revocation checks by how they were answered',
+    ['result']  # filter_miss, redis_valid, redis_revoked, unavailable
+)
+
+TOKEN_REVOCATION_FILTER_ENTRIES = Gauge(
+    'token_revocation_filter_entries',
+    'Revoked token IDs in the in-process Bloom filter',
+    multiprocess_mode='livemax'
+)
+
+SESSION_STORE_ERRORS = Counter(
+    'session_store_errors_total',
+    'Session store (Redis) errors',
+    ['operation']
+)
+
+
+class SessionStoreUnavailable(Exception):
+    """Raised when a session cannot be revoked because Redis is unreachable"""
+
+
+class BloomFilter:
+    """
+    Set of strings that may report false positives but never false negatives
+    Sized so that after capacity additions a string that was never added is
+    reported present with probability error_rate.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        if capacity <= 0 or not 0 < error_rate < 1:
+            raise ValueError("capacity must be positive and error_rate between 0 and 1")
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str) -> List[int]:
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        step = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * step) % self.size for i in range(self.hashes)]
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] >> (position & 7) & 1 for position in self._positions(key))
+
+
+def session_key(token_id: str) -> str:
+    return f"{KEY_PREFIX}:session:{token_id}"
+
+
+def user_sessions_key(username: str) -> str:
+    return f"{KEY_PREFIX}:sessions:{username}"
+
+
+def revoked_key(token_id: str) -> str:
+    return f"{KEY_PREFIX}:revoked:{token_id}"
+
+
+def _seconds_left(expires_at: datetime) -> int:
+    """Redis TTL for something that lasts until expires_at (at least a second)"""
+    return max(1, math.ceil(expires_at.timestamp() - time.time()))
+
+
+class SessionStore:
+    """Redis-backed sessions with an in-process Bloom filter of revoked token IDs"""
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        redis: Optional[aioredis.Redis] = None,
+        enabled: bool = True,
+        filter_capacity: int = 100000,
+        filter_error_rate: float = 0.001,
+        rebuild_interval: float = 600.0,
+        fail_open: bool = True,
+        redis_timeout: float = 0.1,
+        redis_retry_after: float = 5.0
+    ):
+        self.redis_url = redis_url
+        self.redis = redis
+        self.enabled = enabled
+        self.filter_capacity = filter_capacity
+        self.filter_error_rate = filter_error_rate
+        self.rebuild_interval = rebuild_interval
+        self.fail_open = fail_open
+        self.redis_timeout = redis_timeout
+        self.redis_retry_after = redis_retry_after
+        self.filter = BloomFilter(filter_capacity, filter_error_rate)
+        # True while subscribed to revocations, i.e. while filter misses can be trusted
+        self.synced = False
+        self._redis_down_until = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def _client(self) -> Optional[aioredis.Redis]:
+        if self.redis is None and self.redis_url:
+            self.redis = aioredis.Redis.from_url(
+                self.redis_url,
+                socket_timeout=self.redis_timeout,
+                socket_connect_timeout=self.redis_timeout
+            )
+        if self.redis is None or time.monotonic() < self._redis_down_until:
+            return None
+        return self.redis
+
+    def _redis_failed(self, operation: str, error: Exception) -> None:
+        SESSION_STORE_ERRORS.labels(operation=operation).inc()
+        self._redis_down_until = time.monotonic() + self.redis_retry_after
+        logger.warning("Session store unavailable", operation=operation, error=str(error))
+
+    async def open_session(self, username: str, token_id: str, issued_at: datetime, expires_at: datetime) -> None:
+        """Record a new token's session (best-effort: login works without Redis, untracked)"""
+        client = self._client()
+        if not self.enabled or client is None:
+            return
+        ttl = _seconds_left(expires_at)
+        record = orjson.dumps({
+            "session_id": token_id,
+            "username": username,
+            "issued_at": issued_at,
+            "expires_at": expires_at,
+        })
+        try:
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.set(session_key(token_id), record, ex=ttl)
+                pipe.sadd(user_sessions_key(username), token_id)
+                pipe.expire(user_sessions_key(username), ttl)
+                await pipe.execute()
+        except Exception as e:
+            self._redis_failed("open", e)
+
+    async def get_session(self, token_id: str) -> Optional[SessionInfo]:
+        """Return an active session by token ID"""
+        client = self._client()
+        if client is None:
+            raise SessionStoreUnavailable("Session store unavailable")
+        try:
+            raw = await client.get(session_key(token_id))
+        except Exception as e:
+            self._redis_failed("get", e)
+            raise SessionStoreUnavailable("Session store unavailable") from e
+        return None if raw is None else SessionInfo.model_validate_json(raw)
+
+    async def list_sessions(self, username: str) -> List[SessionInfo]:
+        """Return a user's active sessions, oldest first"""
+        client = self._client()
+        if client is None:
+            raise SessionStoreUnavailable("Session store unavailable")
+        try:
+            token_ids = sorted(member.decode() for member in await client.smembers(user_sessions_key(username)))
+            records = await client.mget([session_key(token_id) for token_id in token_ids]) if token_ids else []
+            # Expired and revoked sessions linger in the index until seen here
+            ended = [token_id for token_id, raw in zip(token_ids, records) if raw is None]
+            if ended:
+                await client.srem(user_sessions_key(username), *ended)
+        except Exception as e:
+            self._redis_failed("list", e)
+            raise SessionStoreUnavailable("Session store unavailable") from e
+        sessions = [SessionInfo.model_validate_json(raw) for raw in records if raw is not None]
+        return sorted(sessions, key=lambda session: session.issued_at)
+
+    async def revoke(self, token_id: str, username: str, expires_at: datetime) -> None:
+        """
+        Revoke a token until it expires and notify every worker
+        Raises SessionStoreUnavailable when Redis cannot be reached
+        """
+        client = self._client()
+        if client is None:
+            raise SessionStoreUnavailable("Session store unavailable")
+        try:
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.set(revoked_key(token_id), 1, ex=_seconds_left(expires_at))
+                pipe.delete(session_key(token_id))
+                pipe.srem(user_sessions_key(username), token_id)
+                pipe.publish(REVOCATION_CHANNEL, token_id)
+                await pipe.execute()
+        except Exception as e:
+            self._redis_failed("revoke", e)
+            raise SessionStoreUnavailable("Session store unavailable") from e
+        self._add_revoked(token_id)
+        logger.info("Token revoked", username=username, session_id=token_id, audit=True)
+
+    async def is_revoked(self, token_id: str) -> bool:
+        """Check a token ID, in process when the filter can answer and in Redis otherwise"""
+        if not self.enabled:
+            return False
+        if self.synced and token_id not in self.filter:
+            TOKEN_REVOCATION_CHECKS.labels(result="filter_miss").inc()
+            return False
+
+        client = self._client()
+        if client is not None:
+            try:
+                revoked = bool(await client.exists(revoked_key(token_id)))
+            except Exception as e:
+                self._redis_failed("check", e)
+            else:
+                TOKEN_REVOCATION_CHECKS.labels(result="redis_revoked" if revoked else "redis_valid").inc()
+                return revoked
+        TOKEN_REVOCATION_CHECKS.labels(result="unavailable").inc()
+        # Rather reject a rare false positive than accept a token revoked moments ago
+        if token_id in self.filter:
+            return True
+        return not self.fail_open
+
+    def _add_revoked(self, token_id: str) -> None:
+        self.filter.add(token_id)
+        TOKEN_REVOCATION_FILTER_ENTRIES.set(self.filter.count)
+
+    async def _load_revoked(self, client: aioredis.Redis) -> None:
+        """Replace the filter with one built from the revocation list in Redis"""
+        fresh = BloomFilter(self.filter_capacity, self.filter_error_rate)
+        prefix_length = len(revoked_key(""))
+        async for key in client.scan_iter(match=revoked_key("*"), count=1000):
+            fresh.add(key.decode()[prefix_length:])
+        self.filter = fresh
+        TOKEN_REVOCATION_FILTER_ENTRIES.set(fresh.count)
+
+    async def watch(self) -> None:
+        """Keep the filter in sync with Redis forever, resubscribing after errors"""
+        while True:
+            client = self._client()
+            if client is not None:
+                try:
+                    async with client.pubsub() as pubsub:
+                        # Subscribe before loading so no revocation falls in between
+                        await pubsub.subscribe(REVOCATION_CHANNEL)
+                        await self._load_revoked(client)
+                        self.synced = True
+                        logger.info("Token revocation filter synced", revoked=self.filter.count)
+                        rebuild_at = time.monotonic() + self.rebuild_interval
+                        while True:
+                            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                            if message is not None and message["type"] == "message":
+                                self._add_revoked(message["data"].decode())
+                            if time.monotonic() >= rebuild_at:
+                                await self._load_revoked(client)
+                                rebuild_at = time.monotonic() + self.rebuild_interval
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self._redis_failed("subscribe", e)
+                finally:
+                    self.synced = False
+            await asyncio.sleep(self.redis_retry_after)
+
+    def start(self) -> None:
+        """Start keeping the revocation filter in sync (call from a running event loop)"""
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self.watch())
+
+    async def close(self) -> None:
+        """Stop syncing and close the Redis connection pool"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.redis is not None:
+            await self.redis.aclose()
+            self.redis = None
+
+
+session_store = SessionStore(
+    redis_url=settings.REDIS_URL,
+    enabled=settings.TOKEN_REVOCATION_ENABLED,
+    filter_capacity=settings.TOKEN_REVOCATION_FILTER_CAPACITY,
+    filter_error_rate=settings.TOKEN_REVOCATION_FILTER_ERROR_RATE,
+    rebuild_interval=settings.TOKEN_REVOCATION_REBUILD_SECONDS,
+    fail_open=settings.TOKEN_REVOCATION_FAIL_OPEN,
+    redis_timeout=settings.SESSION_REDIS_TIMEOUT_SECONDS,
+    redis_retry_after=settings.SESSION_REDIS_RETRY_SECONDS
+)
@@ -0,0 +1,145 @@
+"""
+Streaming credit risk assessment pipeline for the API Gateway
+
+Request bodies are consumed incrementally and pushed through a chain of async
+generators (lines -> records -> fixed-size chunks -> scored NDJSON lines), so
+memory use is bounded by the chunk size rather than the size of the upload.
+"""
+
+import csv
+from typing import Any, AsyncIterator, List, Optional
+
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+import structlog
+
+from .scoring import InvalidRecord
+from .scoring_pool import scoring_pool
+
+logger = structlog.get_logger()
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+CSV_MEDIA_TYPE = "text/csv"
+
+
+def _line_too_long(max_line_bytes: int) -> InvalidRecord:
+    return InvalidRecord(errors=[{
+        "type": "line_too_long",
+        "loc": [],
+        "msg": f"Line exceeds the maximum length of {max_line_bytes} bytes"
+    }])
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[Any]:
+    """
+    Split a byte stream into lines without buffering more than one line
+    Blank lines are skipped; lines longer than max_line_bytes are discarded
+    and replaced by an InvalidRecord marker
+    """
+    buffer = bytearray()
+    oversized = False
+    async for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            if end == -1:
+                if not oversized:
+                    buffer += chunk[start:]
+                    if len(buffer) > max_line_bytes:
+                        oversized = True
+                        buffer.clear()
+                break
+            if oversized:
+                oversized = False
+                yield _line_too_long(max_line_bytes)
+            else:
+                buffer += chunk[start:end]
+                if len(buffer) > max_line_bytes:
+                    yield _line_too_long(max_line_bytes)
+                elif buffer.strip():
+                    yield bytes(buffer)
+                buffer.clear()
+            start = end + 1
+    if oversized:
+        yield _line_too_long(max_line_bytes)
+    elif buffer.strip():
+        yield bytes(buffer)
+
+
+async def iter_csv_records(lines: AsyncIterator[Any]) -> AsyncIterator[Any]:
+    """
+    Yield CSV rows as dicts keyed by the header row
+    Empty cells are omitted so that they surface as missing fields; quoted
+    fields must not contain line breaks
+    """
+    header: Optional[List[str]] = None
+    async for line in lines:
+        if isinstance(line, InvalidRecord):
+            yield line
+            continue
+        try:
+            row = next(csv.reader([line.decode("utf-8").rstrip("\r")]))
+        except (UnicodeDecodeError, csv.Error) as e:
+            yield InvalidRecord(errors=[{"type": "csv_invalid", "loc": [], "msg": str(e)}])
+            continue
+        if header is None:
+            header = [column.strip() for column in row]
+            continue
+        if len(row) != len(header):
+            yield InvalidRecord(errors=[{
+                "type": "csv_invalid",
+                "loc": [],
+                "msg": f"Expected {len(header)} columns, got {len(row)}"
+            }])
+            continue
+        yield {column: value for column, value in zip(header, row) if value != ""}
+
+
+async def iter_chunks(records: AsyncIterator[Any], chunk_size: int) -> AsyncIterator[List[Any]]:
+    """Group records into lists of at most chunk_size items"""
+    chunk: List[Any] = []
+    async for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def iter_assessments(
+    records: AsyncIterator[Any],
+    assessor: str,
+    chunk_size: int
+) -> AsyncIterator[bytes]:
+    """Score records chunk by chunk, yielding one NDJSON block per chunk"""
+    total = 0
+    failed = 0
+    async for chunk in iter_chunks(records, chunk_size):
+        # Streams already under way are not rejected when the pool is busy
+        items = await scoring_pool.assess_records(chunk, assessor=assessor, start_index=total, wait=True)
+        total += len(items)
+        failed += sum(1 for item in items if item.errors is not None)
+        yield b"".join(item.model_dump_json().encode() + b"\n" for item in items)
+
+    logger.info(
+        "Streaming credit risk assessment completed",
+        assessor=assessor,
+        total=total,
+        succeeded=total - failed,
+        failed=failed
+    )
+
+
+class RequestStreamingResponse(StreamingResponse):
+    """
+    Streaming response whose body is produced while the request body is still
+    being read. Starlette's StreamingResponse listens for disconnects on the
+    same receive channel, which would steal request body messages; here a
+    disconnect surfaces as ClientDisconnect from request.stream() instead.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
@@ -0,0 +1,42 @@
+"""
+Gunicorn configuration for the API Gateway
+
+Runs the ASGI app under uvicorn workers; the worker count and bind address
+come from Settings. Metrics are shared between workers through a
+Prometheus multiprocess directory that is reset on every start.
+
+    gunicorn applications.api_gateway.main:app -c gunicorn.conf.py
+"""
+
+import os
+import tempfile
+
+from applications.api_gateway.config import settings
+
+# prometheus_client decides between in-process and multiprocess metric values
+# when it is first imported, and workers inherit that decision from this
+# process. Export the directory before metrics.py (below) imports it.
+os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR",
+    settings.PROMETHEUS_MULTIPROC_DIR or tempfile.mkdtemp(prefix="prometheus-multiproc-")
+)
+
+from applications.api_gateway.metrics import mark_worker_dead, prepare_multiprocess_dir  # noqa: E402
+
+bind = f"{settings.HOST}:{settings.PORT}"
+workers = settings.WORKERS
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = settings.WORKER_TIMEOUT_SECONDS
+graceful_timeout = settings.WORKER_TIMEOUT_SECONDS
+keepalive = 5
+accesslog = None
+
+
+def on_starting(server):
+    """Reset the metrics directory before any worker is forked"""
+    prepare_multiprocess_dir(os.environ["PROMETHEUS_MULTIPROC_DIR"])
+
+
+def child_exit(server, worker):
+    """Forget the live gauges of a worker that has exited"""
+    mark_worker_dead(worker.pid)
@@ -0,0 +1,16 @@
+import os
+import tempfile
+
+# Keep files written by the app during tests out of the working tree
+_tmp_dir = tempfile.mkdtemp(prefix="api-gateway-tests-")
+os.environ.setdefault("AUDIT_LOG_SPILL_PATH", os.path.join(_tmp_dir, "audit-spill.ndjson"))
+
+# Tests run against SQLite unless DATABASE_URL points at a local Postgres
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmp_dir, 'api_gateway.db')}")
+os.environ.setdefault("DATABASE_CREATE_TABLES", "true")
+
+# No model is published unless a test publishes one
+os.environ.setdefault("MODEL_REGISTRY_PATH", os.path.join(_tmp_dir, "models"))
+
+# Nor is a feature store built
+os.environ.setdefault("FEATURE_STORE_PATH", os.path.join(_tmp_dir, "feature_store"))
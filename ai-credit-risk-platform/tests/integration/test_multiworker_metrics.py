@@ -0,0 +1,106 @@
+"""
+Multi-worker serving test for the API Gateway
+
+Launches gunicorn with several uvicorn workers using gunicorn.conf.py and
+checks that /metrics reports requests handled by every worker, not just the
+one that happened to answer the scrape, both with PROMETHEUS_MULTIPROC_DIR
+set and with the temporary directory gunicorn.conf.py falls back to.
+"""
+
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import httpx
+import pytest
+
+pytest.importorskip("gunicorn")
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+WORKERS = 2
+REQUESTS = 40
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def health_request_count(metrics_text: str) -> float:
+    pattern = r'^http_requests_total\{endpoint="/health",method="GET",status="200"\} (\S+)$'
+    match = re.search(pattern, metrics_text, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+
+@contextmanager
+def serve(**env_overrides):
+    port = free_port()
+    env = dict(os.environ, HOST="127.0.0.1", PORT=str(port), WORKERS=str(WORKERS))
+    env.pop("PROMETHEUS_MULTIPROC_DIR", None)
+    env.update(env_overrides)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "applications.api_gateway.main:app", "-c", "gunicorn.conf.py"],
+        cwd=PROJECT_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    try:
+        while True:
+            try:
+                if httpx.get(f"{base_url}/", headers={"Host": "localhost"}, timeout=1.0).status_code == 200:
+                    break
+            except httpx.TransportError:
+                pass
+            if time.monotonic() > deadline or process.poll() is not None:
+                raise AssertionError("gunicorn did not start")
+            time.sleep(0.05)
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait(timeout=15)
+
+
+@pytest.fixture
+def gunicorn_server(tmp_path):
+    with serve(PROMETHEUS_MULTIPROC_DIR=str(tmp_path / "metrics")) as base_url:
+        yield base_url, tmp_path / "metrics"
+
+
+def send_health_requests(base_url: str) -> None:
+    for _ in range(REQUESTS):
+        # A fresh connection per request lets the kernel spread them over workers
+        response = httpx.get(f"{base_url}/health", headers={"Host": "localhost"})
+        assert response.status_code == 200
+
+
+@pytest.mark.integration
+class TestMultiWorkerMetrics:
+    """Metrics aggregation across gunicorn workers."""
+
+    def test_metrics_are_aggregated_across_workers(self, gunicorn_server):
+        """Test that every scrape reports requests served by all workers."""
+        base_url, metrics_dir = gunicorn_server
+        send_health_requests(base_url)
+
+        worker_files = {path.name.rsplit("_", 1)[-1] for path in metrics_dir.glob("counter_*.db")}
+        assert len(worker_files) == WORKERS
+
+        for _ in range(5):
+            metrics = httpx.get(f"{base_url}/metrics", headers={"Host": "localhost"}).text
+            assert health_request_count(metrics) == REQUESTS
+
+    def test_metrics_directory_defaults_to_a_temporary_one(self, tmp_path):
+        """Test that aggregation also works when PROMETHEUS_MULTIPROC_DIR is not set."""
+        # The fallback directory is created with mkdtemp, under TMPDIR
+        with serve(TMPDIR=str(tmp_path)) as base_url:
+            send_health_requests(base_url)
+            for _ in range(5):
+                metrics = httpx.get(f"{base_url}/metrics", headers={"Host": "localhost"}).text
+                assert health_request_count(metrics) == REQUESTS
+        assert any(path.name.startswith("prometheus-multiproc-") for path in tmp_path.iterdir())
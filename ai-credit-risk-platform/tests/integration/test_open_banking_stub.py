@@ -0,0 +1,147 @@
+"""
+Open Banking client test against a local stub server
+
+Runs a small Open Banking stub with uvicorn on a local port and checks the
+client's network behaviour offline: connections are kept alive and reused,
+hedging cuts the latency tail when some upstream answers are slow, the
+timeout bounds a hung upstream, and an open circuit stops calls from
+reaching a failing one. Run with -s to see latency numbers.
+"""
+
+import asyncio
+import socket
+import threading
+import time
+
+import numpy as np
+import pytest
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from applications.api_gateway.open_banking import OpenBankingClient, OpenBankingUnavailable
+
+CALLS = 200
+SLOW_EVERY = 20  # one upstream answer in SLOW_EVERY is slow
+FAST_SECONDS = 0.002
+SLOW_SECONDS = 0.3
+
+
+class StubState:
+    """Behaviour of the stub, changed by tests between calls."""
+
+    def __init__(self):
+        self.requests = 0
+        self.connections = set()
+        self.status = 200
+        self.delay = lambda n: 0.0
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def stub_app(state: StubState) -> Starlette:
+    async def balances(request: Request) -> JSONResponse:
+        state.requests += 1
+        state.connections.add(request.client)
+        await asyncio.sleep(state.delay(state.requests))
+        account_id = request.path_params["account_id"]
+        return JSONResponse(
+            {"Data": {"Balance": [{"AccountId": account_id, "Amount": {"Amount": "100.00", "Currency": "GBP"}}]}},
+            status_code=state.status
+        )
+
+    return Starlette(routes=[Route("/accounts/{account_id}/balances", balances)])
+
+
+@pytest.fixture
+def stub_server():
+    state = StubState()
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(
+        stub_app(state), host="127.0.0.1", port=port, log_level="warning", lifespan="off"
+    ))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if time.monotonic() > deadline:
+            raise AssertionError("stub server did not start")
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}", state
+    finally:
+        server.should_exit = server.force_exit = True  # do not wait for requests left hanging
+        thread.join(timeout=10)
+
+
+def latencies(base_url: str, **options) -> "np.ndarray":
+    """Latency of CALLS sequential balance calls through one client."""
+    async def main():
+        results = []
+        async with OpenBankingClient(base_url, timeout=5, **options) as client:
+            for i in range(CALLS):
+                start = time.perf_counter()
+                await client.get_balances(f"acc{i}")
+                results.append(time.perf_counter() - start)
+        return np.array(results)
+
+    return asyncio.run(main())
+
+
+@pytest.mark.integration
+class TestOpenBankingStub:
+    """Open Banking client behaviour against a real local server."""
+
+    def test_connections_are_kept_alive(self, stub_server):
+        """Test that sequential calls reuse one pooled connection."""
+        base_url, state = stub_server
+        latencies(base_url, hedge_after=0)
+        assert state.requests == CALLS
+        assert len(state.connections) == 1
+
+    def test_hedging_cuts_tail_latency(self, stub_server):
+        """Test that hedging keeps slow upstream answers out of the p99."""
+        base_url, state = stub_server
+        state.delay = lambda n: SLOW_SECONDS if n % SLOW_EVERY == 0 else FAST_SECONDS
+
+        unhedged = latencies(base_url, hedge_after=0)
+        hedged = latencies(base_url, hedge_after=0.02)
+        for name, values in (("unhedged", unhedged), ("hedged at 20 ms", hedged)):
+            p50, p99 = np.percentile(values, [50, 99]) * 1000
+            print(f"\n{name:16s} p50 {p50:6.1f} ms, p99 {p99:6.1f} ms, max {values.max() * 1000:6.1f} ms", end="")
+
+        assert np.percentile(unhedged, 99) >= SLOW_SECONDS
+        assert np.percentile(hedged, 99) < SLOW_SECONDS / 3
+
+    def test_hung_upstream_times_out(self, stub_server):
+        """Test that a call is abandoned after the client timeout."""
+        base_url, state = stub_server
+        state.delay = lambda n: 5.0
+
+        async def main():
+            async with OpenBankingClient(base_url, timeout=0.2, hedge_after=0.05) as client:
+                start = time.perf_counter()
+                with pytest.raises(OpenBankingUnavailable):
+                    await client.get_balances("acc1")
+                return time.perf_counter() - start
+
+        assert asyncio.run(main()) < 1
+
+    def test_open_circuit_stops_calling_the_upstream(self, stub_server):
+        """Test that a failing upstream stops receiving calls once the circuit opens."""
+        base_url, state = stub_server
+        state.status = 503
+
+        async def main():
+            async with OpenBankingClient(base_url, hedge_after=0, circuit_failures=3, circuit_reset=60) as client:
+                for _ in range(20):
+                    with pytest.raises(OpenBankingUnavailable):
+                        await client.get_balances("acc1")
+
+        asyncio.run(main())
+        assert state.requests == 3
@@ -0,0 +1,311 @@
+"""
+Endpoint benchmark suite for the API Gateway
+
+Drives /health, /api/v1/me and the single and batch assessment endpoints at
+several concurrency levels, either in process (httpx's ASGI transport, no
+network) or against a locally launched uvicorn, and reports throughput and
+p50/p95/p99 latency per endpoint and concurrency.
+
+Each cell is measured --repeat times and the best round is kept, which
+filters out most scheduling noise. Results are compared with the JSON
+baselines in baselines/ and the run fails when throughput drops, or p95/p99
+latency rises, by more than --threshold:
+
+    python -m tests.performance.endpoint_suite --mode all                  # make benchmark
+    python -m tests.performance.endpoint_suite --mode all --save-baseline  # make benchmark-baseline
+
+Baselines are machine specific: record them on the machine that runs the
+gate, and re-record them when a change is expected to move the numbers.
+The gateway runs against a throwaway SQLite database, without Redis, so runs
+are self-contained and comparable.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+BASELINE_DIR = Path(__file__).parent / "baselines"
+MODES = ("in_process", "uvicorn")
+CONCURRENCY_LEVELS = (1, 8, 32)
+BATCH_SIZE = 100
+WARMUP_REQUESTS = 20
+# Latency changes smaller than this are noise, whatever their relative size
+NOISE_FLOOR_MS = 1.0
+
+_tmp_dir = tempfile.mkdtemp(prefix="api-gateway-benchmark-")
+BENCHMARK_ENV = {
+    "DATABASE_URL": f"sqlite:///{os.path.join(_tmp_dir, 'api_gateway.db')}",
+    "DATABASE_CREATE_TABLES": "true",
+    "REDIS_URL": "",
+    "MODEL_REGISTRY_PATH": os.path.join(_tmp_dir, "models"),
+    "FEATURE_STORE_PATH": os.path.join(_tmp_dir, "feature_store"),
+    "AUDIT_LOG_SPILL_PATH": os.path.join(_tmp_dir, "audit-spill.ndjson"),
+    "LOG_LEVEL": "WARNING",
+}
+
+
+def application(i: int) -> dict:
+    """A valid application, different for every i so results are not served from cache"""
+    return {
+        "applicant_id": f"BENCH{i}",
+        "income": 40000.0 + i,
+        "credit_score": 600 + i % 250,
+        "debt_ratio": 0.2 + (i % 50) / 100,
+        "employment_years": i % 20,
+        "loan_amount": 150000.0,
+        "loan_purpose": "MORTGAGE",
+    }
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    method: str
+    path: str
+    requests: int
+    body: Optional[Callable[[int], dict]] = None
+    authenticated: bool = False
+
+
+SCENARIOS = (
+    Scenario("health", "GET", "/health", requests=2000),
+    Scenario("me", "GET", "/api/v1/me", requests=1000, authenticated=True),
+    Scenario("assess", "POST", "/api/v1/credit-risk/assess", requests=1000, body=application, authenticated=True),
+    Scenario(
+        "assess_batch", "POST", "/api/v1/credit-risk/assess/batch", requests=100, authenticated=True,
+        body=lambda i: {"applications": [application(i * BATCH_SIZE + j) for j in range(BATCH_SIZE)]}
+    ),
+)
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of already sorted values"""
+    index = max(0, min(len(sorted_values) - 1, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, float]:
+    values = sorted(latencies)
+    return {
+        "requests": len(values) + errors,
+        "errors": errors,
+        "throughput_rps": round(len(values) / elapsed, 1),
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+    }
+
+
+async def run_scenario(client, scenario: Scenario, concurrency: int, headers: dict, scale: float) -> Dict[str, float]:
+    """Send scenario.requests (times scale) requests from concurrency concurrent clients"""
+    total = max(concurrency, int(scenario.requests * scale))
+    latencies: List[float] = []
+    errors = 0
+
+    async def send(i: int) -> bool:
+        body = scenario.body(i) if scenario.body else None
+        response = await client.request(
+            scenario.method, scenario.path, json=body, headers=headers if scenario.authenticated else None
+        )
+        return response.status_code == 200
+
+    for i in range(min(WARMUP_REQUESTS, total)):
+        await send(-1 - i)
+
+    async def worker(offset: int) -> None:
+        nonlocal errors
+        for i in range(offset, total, concurrency):
+            start = time.perf_counter()
+            if await send(i):
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(offset) for offset in range(concurrency)))
+    result = summarize(latencies, errors, time.perf_counter() - start)
+    return {"scenario": scenario.name, "concurrency": concurrency, **result}
+
+
+def best_of(rounds: List[Dict[str, float]]) -> Dict[str, float]:
+    """Best throughput and latencies across rounds, and the worst error count"""
+    best = dict(rounds[0])
+    best["errors"] = max(result["errors"] for result in rounds)
+    best["throughput_rps"] = max(result["throughput_rps"] for result in rounds)
+    for metric in ("p50_ms", "p95_ms", "p99_ms"):
+        best[metric] = min(result[metric] for result in rounds)
+    return best
+
+
+async def run_suite(client, scale: float, repeat: int) -> Dict[str, dict]:
+    response = await client.post("/api/v1/auth/login", json={"username": "testuser", "password": "testpassword"})
+    response.raise_for_status()
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    results = {}
+    for scenario in SCENARIOS:
+        for concurrency in CONCURRENCY_LEVELS:
+            results[f"{scenario.name}@{concurrency}"] = best_of([
+                await run_scenario(client, scenario, concurrency, headers, scale) for _ in range(repeat)
+            ])
+    return results
+
+
+async def run_in_process(scale: float = 1.0, repeat: int = 3) -> Dict[str, dict]:
+    """Run the suite against the ASGI app in this process, lifespan included"""
+    import httpx
+
+    for name, value in BENCHMARK_ENV.items():
+        os.environ.setdefault(name, value)
+    from applications.api_gateway.main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://localhost", timeout=60) as client:
+            return await run_suite(client, scale, repeat)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def run_uvicorn(scale: float = 1.0, repeat: int = 3, timeout: float = 60.0) -> Dict[str, dict]:
+    """Run the suite over HTTP against a uvicorn process launched for the purpose"""
+    import httpx
+
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "applications.api_gateway.main:app",
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=PROJECT_ROOT, env={**os.environ, **BENCHMARK_ENV},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        limits = httpx.Limits(max_connections=max(CONCURRENCY_LEVELS))
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}", headers={"Host": "localhost"}, limits=limits, timeout=60
+        ) as client:
+            deadline = time.monotonic() + timeout
+            while True:
+                try:
+                    if (await client.get("/health")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.monotonic() > deadline or process.poll() is not None:
+                    raise RuntimeError("uvicorn did not answer /health in time")
+                await asyncio.sleep(0.05)
+            return await run_suite(client, scale, repeat)
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def run(mode: str, scale: float = 1.0, repeat: int = 3) -> Dict[str, dict]:
+    runner = run_in_process if mode == "in_process" else run_uvicorn
+    return asyncio.run(runner(scale, repeat))
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    """Describe every result that regressed beyond threshold (a fraction) against its baseline"""
+    regressions = []
+    for key, base in baseline.items():
+        current = results.get(key)
+        if current is None:
+            continue
+        if current["errors"] > base["errors"]:
+            regressions.append(f"{key}: {current['errors']} errors (baseline {base['errors']})")
+        if current["throughput_rps"] < base["throughput_rps"] * (1 - threshold):
+            regressions.append(
+                f"{key}: throughput {current['throughput_rps']:.0f}/s (baseline {base['throughput_rps']:.0f}/s)"
+            )
+        for metric in ("p95_ms", "p99_ms"):
+            limit = max(base[metric] * (1 + threshold), base[metric] + NOISE_FLOOR_MS)
+            if current[metric] > limit:
+                regressions.append(f"{key}: {metric} {current[metric]:.2f} ms (baseline {base[metric]:.2f} ms)")
+    return regressions
+
+
+def format_results(mode: str, results: Dict[str, dict]) -> str:
+    lines = [
+        f"{mode}:",
+        f"  {'endpoint':<14}{'conc':>5}{'req/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}",
+    ]
+    for result in results.values():
+        lines.append(
+            f"  {result['scenario']:<14}{result['concurrency']:>5}{result['throughput_rps']:>10.0f}"
+            f"{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}{result['p99_ms']:>9.2f}{result['errors']:>8}"
+        )
+    return "\n".join(lines)
+
+
+def save_baseline(path: Path, mode: str, results: Dict[str, dict]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    document = {
+        "mode": mode,
+        "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "results": results,
+    }
+    path.write_text(json.dumps(document, indent=2) + "\n")
+
+
+def load_baseline(path: Path) -> Optional[Dict[str, dict]]:
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())["results"]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--mode", choices=MODES + ("all",), default="all")
+    parser.add_argument("--threshold", type=float, default=0.3,
+                        help="allowed regression as a fraction of the baseline (default 0.3)")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply the number of requests per run")
+    parser.add_argument("--repeat", type=int, default=3, help="rounds per endpoint and concurrency (best is kept)")
+    parser.add_argument("--save-baseline", action="store_true", help="record results as the new baselines")
+    parser.add_argument("--baseline-dir", type=Path, default=BASELINE_DIR)
+    args = parser.parse_args(argv)
+
+    failed = False
+    for mode in MODES if args.mode == "all" else (args.mode,):
+        results = run(mode, args.scale, args.repeat)
+        print(format_results(mode, results))
+        path = args.baseline_dir / f"{mode}.json"
+        if args.save_baseline:
+            save_baseline(path, mode, results)
+            print(f"  baseline written to {path}")
+            continue
+
+        baseline = load_baseline(path)
+        if baseline is None:
+            print(f"  no baseline for {mode}; record one with --save-baseline (make benchmark-baseline)")
+            failed = True
+            continue
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"  REGRESSION {regression}")
+        if not regressions:
+            print(f"  no regressions beyond {args.threshold:.0%} of the baseline")
+        failed = failed or bool(regressions)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""
+Audit write benchmark for the API Gateway
+
+Compares inserting one audit row per request against the batched AuditWriter,
+both against a SQLite file. Reports the time spent on the request path per
+entry and the total time until all rows are stored. Run with -s to see numbers.
+"""
+
+import time
+from datetime import datetime, timezone
+
+import pytest
+from applications.api_gateway.audit import AuditWriter, DatabaseAuditSink
+from applications.api_gateway.database import audit_logs, get_engine, metadata
+
+ENTRIES = 2000
+
+
+def make_entry(i: int) -> dict:
+    return {
+        "user_id": 1,
+        "action": "POST",
+        "resource": "/api/v1/credit-risk/assess",
+        "ip_address": "10.0.0.1",
+        "user_agent": "benchmark",
+        "timestamp": datetime.now(timezone.utc),
+        "details": {"status_code": 200, "i": i},
+    }
+
+
+@pytest.mark.performance
+def test_batched_audit_writes_vs_insert_per_request(tmp_path):
+    """Batching should cut both request-path cost and total write time."""
+    naive_url = f"sqlite:///{tmp_path / 'naive.db'}"
+    batched_url = f"sqlite:///{tmp_path / 'batched.db'}"
+    for url in (naive_url, batched_url):
+        metadata.create_all(get_engine(url))
+
+    engine = get_engine(naive_url)
+    start = time.perf_counter()
+    for i in range(ENTRIES):
+        with engine.begin() as connection:
+            connection.execute(audit_logs.insert(), [make_entry(i)])
+    naive_seconds = time.perf_counter() - start
+
+    writer = AuditWriter(DatabaseAuditSink(batched_url), str(tmp_path / "spill.ndjson"), flush_interval=0.05)
+    writer.start()
+    start = time.perf_counter()
+    for i in range(ENTRIES):
+        writer.record(make_entry(i))
+    record_seconds = time.perf_counter() - start
+    assert writer.flush()
+    batched_seconds = time.perf_counter() - start
+    writer.close()
+
+    print(f"\ninsert per request: {naive_seconds / ENTRIES * 1e6:.1f} µs/entry on the request path, "
+          f"{naive_seconds:.2f}s total")
+    print(f"batched writer: {record_seconds / ENTRIES * 1e6:.1f} µs/entry on the request path, "
+          f"{batched_seconds:.2f}s total")
+    assert record_seconds < naive_seconds
+    assert batched_seconds < naive_seconds
@@ -0,0 +1,76 @@
+"""
+Connection pool benchmark for the API Gateway
+
+Runs many concurrent user lookups through database.connect() with different
+pool sizes and reports throughput and checkout wait. Uses DATABASE_URL, so it
+runs against SQLite by default or a local Postgres when one is configured.
+SQLite answers in-process, so each lookup also holds its connection for a
+simulated network round trip. Run with -s to see numbers.
+"""
+
+import asyncio
+import time
+
+import pytest
+from applications.api_gateway import auth, database
+from applications.api_gateway.config import settings
+from applications.api_gateway.database import DB_POOL_CHECKOUT_WAIT
+
+CONCURRENCY = 50
+LOOKUPS = 2000
+ROUND_TRIP_SECONDS = 0.0 if settings.DATABASE_URL.startswith("postgresql") else 0.002
+
+
+def checkout_wait_totals():
+    count = total = 0.0
+    for family in DB_POOL_CHECKOUT_WAIT.collect():
+        for s in family.samples:
+            if s.name.endswith("_count"):
+                count = s.value
+            elif s.name.endswith("_sum"):
+                total = s.value
+    return count, total
+
+
+async def lookups_per_second(pool_size: int) -> tuple:
+    settings.DATABASE_POOL_SIZE = pool_size
+    engine = database.build_async_engine(settings.DATABASE_URL)
+    database._async_engine = engine
+    try:
+        await auth.seed_users()
+
+        query = database.select(database.users).where(database.users.c.username == "testuser")
+
+        async def worker(n: int):
+            for _ in range(n):
+                async with database.connect() as connection:
+                    assert (await connection.execute(query)).first() is not None
+                    await asyncio.sleep(ROUND_TRIP_SECONDS)
+
+        await worker(pool_size)  # warm the pool
+        count_before, sum_before = checkout_wait_totals()
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(LOOKUPS // CONCURRENCY) for _ in range(CONCURRENCY)))
+        elapsed = time.perf_counter() - start
+        count_after, sum_after = checkout_wait_totals()
+        return LOOKUPS / elapsed, (sum_after - sum_before) / (count_after - count_before)
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.performance
+def test_pool_size_under_concurrency(monkeypatch):
+    """A pool sized for the concurrency should cut checkout wait."""
+    monkeypatch.setattr(settings, "DATABASE_MAX_OVERFLOW", 0)
+    monkeypatch.setattr(settings, "DATABASE_POOL_TIMEOUT_SECONDS", 30.0)
+    monkeypatch.setattr(settings, "DATABASE_POOL_SIZE", settings.DATABASE_POOL_SIZE)
+    monkeypatch.setattr(database, "_async_engine", None)
+
+    results = {}
+    for pool_size in (1, 5, 20):
+        rate, mean_wait = asyncio.run(lookups_per_second(pool_size))
+        results[pool_size] = (rate, mean_wait)
+        print(f"\npool_size={pool_size:>2}: {rate:7.0f} lookups/s, mean checkout wait {mean_wait * 1e3:.2f} ms",
+              end="")
+    print()
+    assert results[20][1] < results[1][1]
@@ -0,0 +1,78 @@
+"""
+Endpoint benchmark suite checks
+
+Runs a scaled-down pass of the endpoint suite (endpoint_suite.py) through its
+command line, recording and then checking a baseline in a temporary
+directory, and checks how results are compared with baselines. The full
+suite and the committed baselines are run by `make benchmark`.
+"""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from tests.performance.endpoint_suite import CONCURRENCY_LEVELS, NOISE_FLOOR_MS, SCENARIOS, compare
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+def result(throughput: float = 1000.0, p95: float = 10.0, p99: float = 20.0, errors: int = 0) -> dict:
+    return {"errors": errors, "throughput_rps": throughput, "p50_ms": 5.0, "p95_ms": p95, "p99_ms": p99}
+
+
+def suite(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-m", "tests.performance.endpoint_suite", "--mode", "in_process",
+         "--scale", "0.02", "--repeat", "1", *args],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, timeout=300
+    )
+
+
+class TestBaselineComparison:
+    """Test cases for detecting regressions against a baseline."""
+
+    def test_changes_within_threshold_pass(self):
+        """Test that results up to the threshold away from the baseline are accepted."""
+        baseline = {"assess@8": result()}
+        assert compare({"assess@8": result(throughput=850, p95=11.5, p99=23)}, baseline, 0.2) == []
+
+    def test_regressions_are_reported(self):
+        """Test that lower throughput, higher tail latency and new errors are each reported."""
+        baseline = {"assess@8": result()}
+        regressions = compare({"assess@8": result(throughput=700, p95=15, p99=30, errors=2)}, baseline, 0.2)
+        assert len(regressions) == 4
+        assert all(regression.startswith("assess@8:") for regression in regressions)
+
+    def test_small_latency_changes_are_noise(self):
+        """Test that sub-millisecond latency changes never fail the gate."""
+        baseline = {"health@1": result(p95=0.4, p99=0.5)}
+        current = {"health@1": result(p95=0.4 + NOISE_FLOOR_MS * 0.9, p99=0.5 + NOISE_FLOOR_MS * 0.9)}
+        assert compare(current, baseline, 0.2) == []
+
+    def test_results_missing_from_the_baseline_are_ignored(self):
+        """Test that new endpoints do not fail the gate until a baseline is recorded."""
+        assert compare({"new@1": result(throughput=1)}, {}, 0.2) == []
+
+
+@pytest.mark.performance
+def test_suite_records_and_checks_baselines(tmp_path):
+    """The suite covers every endpoint and concurrency level and passes against its own baseline."""
+    recorded = suite("--save-baseline", "--baseline-dir", str(tmp_path))
+    assert recorded.returncode == 0, recorded.stdout + recorded.stderr
+    print("\n" + recorded.stdout)
+
+    document = json.loads((tmp_path / "in_process.json").read_text())
+    assert document["mode"] == "in_process"
+    results = document["results"]
+    assert set(results) == {f"{s.name}@{c}" for s in SCENARIOS for c in CONCURRENCY_LEVELS}
+    assert all(r["errors"] == 0 and r["throughput_rps"] > 0 for r in results.values())
+
+    checked = suite("--baseline-dir", str(tmp_path), "--threshold", "10")
+    assert checked.returncode == 0, checked.stdout + checked.stderr
+    assert "no regressions" in checked.stdout
+
+    missing = suite("--baseline-dir", str(tmp_path / "missing"))
+    assert missing.returncode == 1
+    assert "no baseline" in missing.stdout
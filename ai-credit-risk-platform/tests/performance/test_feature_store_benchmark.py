@@ -0,0 +1,93 @@
+"""
+Applicant feature store benchmark
+
+Builds a store of APPLICANTS applicants with FEATURES features each and
+measures: build time and size on disk; the time and resident memory to open
+it (the arrays are memory-mapped, so almost nothing is read up front);
+single lookup latency for hits and misses; the memory after LOOKUPS random
+lookups, split into private memory and file-backed pages (page cache shared
+by every worker on the host); and an incremental refresh of DELTA applicants
+compared with the full build. Run with -s to see numbers.
+"""
+
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+from applications.api_gateway.feature_store import FeatureStore, append_feature_delta, build_feature_store
+
+APPLICANTS = 2_000_000
+FEATURES = 8
+LOOKUPS = 20000
+DELTA = 10000
+
+
+def resident_bytes() -> "np.ndarray":
+    """(private, file-backed) resident bytes of this process"""
+    with open("/proc/self/status") as status:
+        fields = dict(line.split(":", 1) for line in status)
+    return np.array([int(fields[name].split()[0]) * 1024 for name in ("RssAnon", "RssFile")])
+
+
+def directory_bytes(path: Path) -> int:
+    return sum(file.stat().st_size for file in path.rglob("*") if file.is_file())
+
+
+def columns(n: int, seed: int) -> dict:
+    rng = np.random.default_rng(seed)
+    return {f"feature_{i}": rng.uniform(0, 100, n) for i in range(FEATURES)}
+
+
+def lookup_latencies(store: FeatureStore, applicant_ids: list) -> "np.ndarray":
+    latencies = np.empty(len(applicant_ids))
+    for i, applicant_id in enumerate(applicant_ids):
+        start = time.perf_counter()
+        store.lookup(applicant_id)
+        latencies[i] = time.perf_counter() - start
+    return latencies
+
+
+@pytest.mark.performance
+def test_feature_store_lookup_and_memory(tmp_path):
+    """Lookups should take microseconds and opening millions of applicants should cost almost no memory."""
+    applicant_ids = np.char.add("APP", np.arange(APPLICANTS).astype(str))
+    start = time.perf_counter()
+    build_feature_store(str(tmp_path), applicant_ids, columns(APPLICANTS, seed=0))
+    build_seconds = time.perf_counter() - start
+    size = directory_bytes(tmp_path)
+
+    before = resident_bytes()
+    start = time.perf_counter()
+    store = FeatureStore(str(tmp_path))
+    store.refresh()
+    open_seconds = time.perf_counter() - start
+    opened = resident_bytes() - before
+
+    rng = np.random.default_rng(1)
+    hits = [f"APP{i}" for i in rng.integers(0, APPLICANTS, LOOKUPS)]
+    misses = [f"MISSING{i}" for i in range(LOOKUPS)]
+    hit_latencies = lookup_latencies(store, hits)
+    miss_latencies = lookup_latencies(store, misses)
+    touched = resident_bytes() - before
+
+    delta_ids = [f"APP{i}" for i in rng.integers(0, APPLICANTS, DELTA)]
+    start = time.perf_counter()
+    append_feature_delta(str(tmp_path), list(dict.fromkeys(delta_ids)), columns(len(set(delta_ids)), seed=2))
+    store.refresh()
+    delta_seconds = time.perf_counter() - start
+    delta_latencies = lookup_latencies(store, hits)
+
+    print(f"\n{APPLICANTS:,} applicants x {FEATURES} features ({size / 1e6:.0f} MB on disk):")
+    print(f"  build            {build_seconds * 1000:8.0f} ms")
+    print(f"  open             {open_seconds * 1000:8.1f} ms, resident +{opened.sum() / 1e6:.1f} MB")
+    print(f"  after {LOOKUPS} lookups: private +{touched[0] / 1e6:.1f} MB, shared file pages +{touched[1] / 1e6:.1f} MB")
+    for name, latencies in (("hit", hit_latencies), ("miss", miss_latencies), ("hit, one delta", delta_latencies)):
+        p50, p99 = np.percentile(latencies, [50, 99]) * 1e6
+        print(f"  lookup {name:15s} p50 {p50:6.1f} us, p99 {p99:6.1f} us")
+    print(f"  delta of {DELTA} applicants {delta_seconds * 1000:6.0f} ms")
+
+    assert opened.sum() < size / 20
+    assert touched[0] < size / 10
+    assert np.percentile(hit_latencies, 50) < 100e-6
+    assert delta_seconds < build_seconds / 5
@@ -0,0 +1,58 @@
+"""
+Job queue benchmark
+
+Drains a backlog of no-op jobs of mixed priority with several workers
+competing for the queue (an in-process Redis stand-in, so before any network
+latency), and checks that every job ran exactly once despite the contention.
+Reports the queue's overhead per job and how long high priority jobs waited
+compared with low priority ones. Run with -s to see numbers.
+"""
+
+import asyncio
+import time
+from collections import Counter
+
+import fakeredis
+import pytest
+from applications.api_gateway.jobs import PRIORITIES, JobQueue, JobWorkers
+
+JOBS = 2000
+WORKERS = 8
+
+
+@pytest.mark.performance
+def test_workers_drain_the_queue_exactly_once():
+    """Competing workers should run every job once, high priority jobs first, at over 200 jobs/s."""
+    runs = Counter()
+    started = {}
+
+    async def handler(payload, owner):
+        runs[payload["n"]] += 1
+        started[payload["n"]] = time.perf_counter()
+
+    async def scenario():
+        queue = JobQueue(redis=fakeredis.aioredis.FakeRedis())
+        for n in range(JOBS):
+            await queue.submit("noop", {"n": n}, "bench", PRIORITIES[n % 3])
+        workers = [JobWorkers(queue, {"noop": handler}, concurrency=1) for _ in range(WORKERS)]
+
+        async def drain(worker):
+            while await worker.run_one():
+                pass
+
+        start = time.perf_counter()
+        await asyncio.gather(*(drain(worker) for worker in workers))
+        return start, time.perf_counter() - start
+
+    start, seconds = asyncio.run(scenario())
+    waits = {
+        priority: sorted(started[n] - start for n in range(rank, JOBS, 3))
+        for rank, priority in enumerate(PRIORITIES)
+    }
+    print(f"\njob queue: {JOBS} jobs, {WORKERS} workers in {seconds:.2f}s ({JOBS / seconds:.0f} jobs/s, "
+          f"{seconds / JOBS * 1e3:.2f} ms/job); wait p99 high {waits['high'][-len(waits['high']) // 100]:.2f}s, "
+          f"low {waits['low'][-len(waits['low']) // 100]:.2f}s")
+    assert set(runs) == set(range(JOBS)) and set(runs.values()) == {1}
+    # Workers claim strictly in order; their start times only interleave at the boundaries
+    assert waits["high"][-1] < waits["normal"][len(waits["normal"]) // 2] < waits["low"][0]
+    assert JOBS / seconds > 200
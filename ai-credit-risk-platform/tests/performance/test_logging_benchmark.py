@@ -0,0 +1,81 @@
+"""
+Logging cost benchmark for the API Gateway
+
+Measures the time a request thread spends per log call in the sync mode
+(JSON rendered and written through the stdlib logger) and in the async mode
+(event queued for the background writer). Run with -s to see numbers.
+"""
+
+import logging
+import os
+import time
+
+import pytest
+import structlog
+from applications.api_gateway.logging_config import AsyncLogWriter, QueueLogger, _enqueue
+
+CALLS = 20000
+EVENT_FIELDS = {"user_id": "12345", "risk_score": 55, "risk_level": "MEDIUM"}
+
+
+def per_call_seconds(logger) -> float:
+    start = time.perf_counter()
+    for _ in range(CALLS):
+        logger.info("Credit risk assessment completed", **EVENT_FIELDS)
+    return (time.perf_counter() - start) / CALLS
+
+
+@pytest.mark.performance
+def test_async_logging_is_cheaper_on_the_request_path():
+    """Queuing an event should cost less than rendering and writing it inline."""
+    devnull = open(os.devnull, "w")
+    stdlib_logger = logging.getLogger("benchmark.sync")
+    stdlib_logger.handlers = [logging.StreamHandler(devnull)]
+    stdlib_logger.setLevel(logging.INFO)
+    stdlib_logger.propagate = False
+    sync_logger = structlog.wrap_logger(
+        stdlib_logger,
+        processors=[
+            structlog.stdlib.filter_by_level,
+            structlog.stdlib.add_logger_name,
+            structlog.stdlib.add_log_level,
+            structlog.stdlib.PositionalArgumentsFormatter(),
+            structlog.processors.TimeStamper(fmt="iso"),
+            structlog.processors.StackInfoRenderer(),
+            structlog.processors.format_exc_info,
+            structlog.processors.UnicodeDecoder(),
+            structlog.processors.JSONRenderer()
+        ],
+        wrapper_class=structlog.stdlib.BoundLogger,
+    )
+
+    devnull_bytes = open(os.devnull, "wb")
+    writer = AsyncLogWriter(devnull_bytes, max_queue=CALLS, overflow_policy="block")
+    writer.start()
+    async_logger = structlog.wrap_logger(
+        QueueLogger(writer),
+        processors=[
+            structlog.processors.add_log_level,
+            structlog.stdlib.PositionalArgumentsFormatter(),
+            structlog.processors.TimeStamper(fmt="iso"),
+            structlog.processors.StackInfoRenderer(),
+            structlog.processors.format_exc_info,
+            _enqueue
+        ],
+        wrapper_class=structlog.make_filtering_bound_logger(logging.INFO),
+    )
+
+    try:
+        sync_cost = min(per_call_seconds(sync_logger) for _ in range(3))
+        async_cost = min(per_call_seconds(async_logger) for _ in range(3))
+        flush_start = time.perf_counter()
+        assert writer.flush(timeout=30)
+        flush_seconds = time.perf_counter() - flush_start
+    finally:
+        writer.close()
+        devnull.close()
+        devnull_bytes.close()
+
+    print(f"\nsync: {sync_cost * 1e6:.2f} µs/call, async: {async_cost * 1e6:.2f} µs/call "
+          f"({sync_cost / async_cost:.1f}x), final flush {flush_seconds * 1e3:.1f} ms")
+    assert async_cost < sync_cost
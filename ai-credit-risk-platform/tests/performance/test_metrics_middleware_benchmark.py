@@ -0,0 +1,75 @@
+"""
+Throughput benchmark for the metrics middleware
+
+Compares the ASGI MetricsMiddleware against the previous BaseHTTPMiddleware
+implementation (reproduced below as the baseline) on an otherwise empty app,
+driven in-process through httpx's ASGI transport. Run with -s to see numbers.
+"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from prometheus_client import CollectorRegistry, Counter, Histogram
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from applications.api_gateway.middleware import MetricsMiddleware
+
+REQUESTS = 2000
+CONCURRENCY = 20
+
+_registry = CollectorRegistry()
+_LEGACY_COUNT = Counter('legacy_http_requests_total', 'Total HTTP requests',
+                        ['method', 'endpoint', 'status'], registry=_registry)
+_LEGACY_LATENCY = Histogram('legacy_http_request_duration_seconds', 'HTTP request latency',
+                            ['method', 'endpoint'], registry=_registry)
+
+
+class LegacyMetricsMiddleware(BaseHTTPMiddleware):
+    """The BaseHTTPMiddleware implementation this middleware replaced"""
+
+    async def dispatch(self, request: Request, call_next):
+        start_time = time.time()
+        response = await call_next(request)
+        duration = time.time() - start_time
+        _LEGACY_COUNT.labels(method=request.method, endpoint=request.url.path,
+                             status=response.status_code).inc()
+        _LEGACY_LATENCY.labels(method=request.method, endpoint=request.url.path).observe(duration)
+        return response
+
+
+def build_app(middleware) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(middleware)
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        return {"item_id": item_id}
+
+    return app
+
+
+async def requests_per_second(app: FastAPI) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        async def worker(offset: int):
+            for i in range(offset, REQUESTS, CONCURRENCY):
+                response = await client.get(f"/items/{i}")
+                assert response.status_code == 200
+
+        await worker(0)  # warm up
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(offset) for offset in range(CONCURRENCY)))
+        return REQUESTS / (time.perf_counter() - start)
+
+
+@pytest.mark.performance
+def test_asgi_middleware_throughput_vs_base_http_middleware():
+    """The ASGI middleware should be at least as fast as the BaseHTTPMiddleware baseline."""
+    before = max(asyncio.run(requests_per_second(build_app(LegacyMetricsMiddleware))) for _ in range(3))
+    after = max(asyncio.run(requests_per_second(build_app(MetricsMiddleware))) for _ in range(3))
+    print(f"\nBaseHTTPMiddleware: {before:.0f} req/s, ASGI MetricsMiddleware: {after:.0f} req/s "
+          f"({after / before:.2f}x)")
+    assert after > before * 0.9
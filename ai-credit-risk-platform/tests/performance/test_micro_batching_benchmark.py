@@ -0,0 +1,93 @@
+"""
+Micro-batching benchmark for model inference
+
+Drives CONCURRENCY coroutines, each making single-applicant confidence
+predictions against a scikit-learn pipeline on one event loop, as concurrent
+requests to a worker would. It compares one predict_proba call per request
+with the MicroBatcher used by the assessment endpoints, for a few max_wait
+settings. Run with -s to see numbers.
+"""
+
+import asyncio
+import time
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from applications.api_gateway.micro_batching import MicroBatcher
+from applications.api_gateway.model_registry import LoadedModel, score_confidence_batch
+from applications.api_gateway.models import CreditRiskRequest
+from applications.api_gateway.scoring_engine import SUPPORTED_FEATURES
+
+REQUESTS = 4000
+CONCURRENCY = 64
+
+
+def build_model() -> LoadedModel:
+    rng = np.random.default_rng(0)
+    features = rng.uniform(0, 1, (2000, len(SUPPORTED_FEATURES)))
+    labels = np.where(features[:, 0] < 0.3, "HIGH", np.where(features[:, 1] < 0.5, "MEDIUM", "LOW"))
+    estimator = make_pipeline(StandardScaler(), LogisticRegression()).fit(features, labels)
+    return LoadedModel("benchmark", SUPPORTED_FEATURES, estimator, path=None)
+
+
+def build_requests() -> list:
+    rng = np.random.default_rng(1)
+    return [
+        CreditRiskRequest(
+            applicant_id=f"APP{i}",
+            income=float(rng.uniform(10000, 150000)),
+            credit_score=int(rng.integers(300, 851)),
+            debt_ratio=float(rng.uniform(0, 1)),
+            employment_years=int(rng.integers(0, 30)),
+            loan_amount=float(rng.uniform(1000, 1000000)),
+            loan_purpose="PERSONAL"
+        )
+        for i in range(REQUESTS)
+    ]
+
+
+async def requests_per_second(predict) -> float:
+    requests = build_requests()
+
+    async def worker(offset: int):
+        for i in range(offset, REQUESTS, CONCURRENCY):
+            await predict(requests[i])
+            await asyncio.sleep(0)  # let other requests interleave, as network I/O would
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(offset) for offset in range(CONCURRENCY)))
+    return REQUESTS / (time.perf_counter() - start)
+
+
+@pytest.mark.performance
+def test_micro_batching_throughput():
+    """Batched predictions should serve concurrent requests several times faster than per-request calls."""
+    model = build_model()
+
+    async def unbatched(request):
+        return model.confidence_score(request, "LOW")
+
+    results = {"per request": asyncio.run(requests_per_second(unbatched))}
+    for max_wait in (0.0005, 0.002, 0.01):
+        batch_sizes = []
+
+        def process(items):
+            batch_sizes.append(len(items))
+            return score_confidence_batch(items)
+
+        batcher = MicroBatcher("benchmark", process, max_batch_size=64, max_wait=max_wait)
+
+        async def batched(request, batcher=batcher):
+            return await batcher.submit((model, request, "LOW"))
+
+        rate = asyncio.run(requests_per_second(batched))
+        results[f"batched, max_wait={max_wait * 1000:g} ms"] = rate
+        print(f"\nmax_wait={max_wait * 1000:g} ms: mean batch size {sum(batch_sizes) / len(batch_sizes):.1f}", end="")
+
+    print(f"\n{REQUESTS} single predictions at concurrency {CONCURRENCY}:")
+    for name, rate in results.items():
+        print(f"  {name:28s} {rate:8.0f} req/s")
+    assert results["batched, max_wait=2 ms"] > results["per request"] * 2
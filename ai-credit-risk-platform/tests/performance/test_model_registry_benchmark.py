@@ -0,0 +1,137 @@
+"""
+Model registry benchmark
+
+Publishes a gradient boosted model (several MB of tree arrays) and measures:
+load time with and without memory-mapping; the memory of several worker
+processes that each load the same artifact, as PSS (proportional set size, so
+pages shared between workers are only counted once in the total); and
+prediction latency for one applicant and for a batch. Run with -s to see
+numbers.
+"""
+
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+from sklearn.ensemble import HistGradientBoostingClassifier
+from applications.api_gateway.model_registry import ARTIFACT_NAME, load_model, publish_model
+from applications.api_gateway.scoring_engine import SUPPORTED_FEATURES, get_scoring_engine
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+WORKERS = 4
+LATENCY_CALLS = 200
+
+WORKER_SNIPPET = """
+import sys
+from pathlib import Path
+import numpy as np
+from applications.api_gateway.model_registry import load_model
+
+model = load_model(Path(sys.argv[1]), mmap_mode=sys.argv[2] or None)
+rng = np.random.default_rng(0)
+columns = {feature: rng.uniform(0, 1e5, 5000) for feature in model.features}
+model.confidence_scores(columns, np.full(5000, "LOW"))  # touch every tree
+print("ready", flush=True)
+sys.stdin.readline()
+rollup = dict(
+    line.split(":")[0:2] for line in open("/proc/self/smaps_rollup").read().splitlines()[1:]
+)
+print(int(rollup["Pss"].split()[0]) * 1024, flush=True)
+sys.stdin.readline()
+"""
+
+
+def training_columns(n: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    return {
+        "income": rng.uniform(10000, 150000, n),
+        "credit_score": rng.uniform(300, 850, n),
+        "debt_ratio": rng.uniform(0, 1, n),
+        "employment_years": rng.integers(0, 30, n).astype(float),
+        "loan_amount": rng.uniform(1000, 1000000, n),
+    }
+
+
+@pytest.fixture(scope="module")
+def artifact(tmp_path_factory) -> Path:
+    columns = training_columns(20000)
+    labels = get_scoring_engine().score_arrays(columns).risk_levels
+    # Noisy labels keep the trees from stopping early, so the artifact is realistically large
+    flip = np.random.default_rng(1).random(len(labels)) < 0.2
+    labels[flip] = np.random.default_rng(2).choice(np.unique(labels), flip.sum())
+    estimator = HistGradientBoostingClassifier(
+        max_iter=100, max_leaf_nodes=255, min_samples_leaf=2, early_stopping=False
+    ).fit(np.column_stack([columns[f] for f in SUPPORTED_FEATURES]), labels)
+    root = tmp_path_factory.mktemp("models")
+    publish_model(str(root), "benchmark", estimator, SUPPORTED_FEATURES)
+    return root / "benchmark" / ARTIFACT_NAME
+
+
+def workers_pss(artifact: Path, mmap_mode: str) -> list:
+    """PSS of WORKERS processes that have all loaded the artifact at the same time"""
+    processes = [
+        subprocess.Popen(
+            [sys.executable, "-c", WORKER_SNIPPET, str(artifact), mmap_mode],
+            cwd=PROJECT_ROOT, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+        )
+        for _ in range(WORKERS)
+    ]
+    try:
+        for process in processes:
+            assert process.stdout.readline().strip() == "ready"
+        sizes = []
+        for process in processes:
+            process.stdin.write("\n")
+            process.stdin.flush()
+            sizes.append(int(process.stdout.readline()))
+        return sizes
+    finally:
+        for process in processes:
+            process.communicate("\n", timeout=30)
+
+
+@pytest.mark.performance
+def test_load_time(artifact):
+    """Report load time; mapping each array is a syscall, so memory-mapping is not free for many small arrays."""
+    copied = min(_timed(lambda: load_model(artifact, mmap_mode=None)) for _ in range(3))
+    mapped = min(_timed(lambda: load_model(artifact, mmap_mode="r")) for _ in range(3))
+    print(f"\nArtifact {artifact.stat().st_size / 1e6:.1f} MB: load {copied * 1000:.1f} ms copied, "
+          f"{mapped * 1000:.1f} ms memory-mapped")
+    assert mapped < copied * 5
+
+
+@pytest.mark.performance
+@pytest.mark.skipif(not Path("/proc/self/smaps_rollup").exists(), reason="needs Linux smaps_rollup")
+def test_worker_memory(artifact):
+    """Workers sharing a memory-mapped artifact should hold roughly one copy of it between them."""
+    copied = workers_pss(artifact, "")
+    mapped = workers_pss(artifact, "r")
+    print(f"\nPSS of {WORKERS} workers: {sum(copied) / 1e6:.1f} MB with private copies, "
+          f"{sum(mapped) / 1e6:.1f} MB memory-mapped "
+          f"(per worker {sum(copied) / WORKERS / 1e6:.1f} vs {sum(mapped) / WORKERS / 1e6:.1f} MB)")
+    shared_copies = (sum(copied) - sum(mapped)) / artifact.stat().st_size
+    assert shared_copies > (WORKERS - 1) / 2
+
+
+@pytest.mark.performance
+def test_prediction_latency(artifact):
+    """Report single and batch prediction latency for the memory-mapped model."""
+    model = load_model(artifact, mmap_mode="r")
+    single = {feature: np.array([50000.0]) for feature in model.features}
+    batch = training_columns(1000, seed=3)
+    levels = np.full(1000, "LOW")
+
+    single_seconds = min(_timed(lambda: model.confidence_scores(single, ["LOW"])) for _ in range(LATENCY_CALLS))
+    batch_seconds = min(_timed(lambda: model.confidence_scores(batch, levels)) for _ in range(20))
+    print(f"\nPrediction latency: {single_seconds * 1e3:.2f} ms for one applicant, "
+          f"{batch_seconds * 1e3:.2f} ms for 1000 ({batch_seconds / 1000 * 1e6:.1f} us each)")
+    assert batch_seconds / 1000 < single_seconds
+
+
+def _timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
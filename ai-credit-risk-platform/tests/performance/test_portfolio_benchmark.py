@@ -0,0 +1,131 @@
+"""
+Portfolio simulation benchmark
+
+Measures Monte Carlo throughput (scenarios and loan draws per second) as the
+portfolio grows from PORTFOLIO_SIZES[0] to PORTFOLIO_SIZES[-1] loans, with
+DRAWS loan draws per size. Also checks that memory stays bounded by the
+chunk size rather than the number of scenarios, compares the chunked
+uniform-draw simulation with drawing every latent variable as a normal in
+one block, and, on machines with more than one CPU, times the largest
+portfolio split across scoring pool workers. Run with -s to see numbers.
+"""
+
+import asyncio
+import os
+import time
+import tracemalloc
+
+import numpy as np
+import pytest
+from scipy.special import ndtri
+from applications.api_gateway.config import settings
+from applications.api_gateway.portfolio import Portfolio, portfolio_losses, simulate_portfolio
+from applications.api_gateway.scoring_pool import ScoringPool
+
+PORTFOLIO_SIZES = (100, 1_000, 10_000, 100_000)
+DRAWS = 100_000_000  # loans x scenarios per size
+CORRELATION = 0.15
+
+
+def build_portfolio(loans: int) -> Portfolio:
+    rng = np.random.default_rng(0)
+    return Portfolio(
+        probabilities_of_default=rng.choice([0.01, 0.05, 0.2], loans),
+        exposures=rng.uniform(10_000, 1_000_000, loans),
+        loss_given_default=np.full(loans, 0.45)
+    )
+
+
+def normal_draw_losses(portfolio: Portfolio, scenarios: int, correlation: float, seed: int) -> np.ndarray:
+    """Reference: every latent variable drawn as a float64 normal, all scenarios at once"""
+    rng = np.random.default_rng(seed)
+    factor = rng.standard_normal((scenarios, 1))
+    latent = np.sqrt(correlation) * factor + np.sqrt(1 - correlation) * rng.standard_normal(
+        (scenarios, len(portfolio.exposures))
+    )
+    defaults = latent < ndtri(portfolio.probabilities_of_default)
+    return defaults @ (portfolio.exposures * portfolio.loss_given_default)
+
+
+def timed(fn, *args, **kwargs) -> tuple:
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+@pytest.mark.performance
+def test_simulation_throughput_by_portfolio_size():
+    """Draw throughput should hold up from small to large portfolios."""
+    print(f"\n{'loans':>8}{'scenarios':>11}{'scenarios/s':>14}{'draws/s':>12}")
+    draw_rates = []
+    for loans in PORTFOLIO_SIZES:
+        portfolio = build_portfolio(loans)
+        scenarios = DRAWS // loans
+        portfolio_losses(portfolio, 1000, CORRELATION, seed=0)  # warm-up
+        losses, seconds = timed(portfolio_losses, portfolio, scenarios, CORRELATION, seed=1)
+        assert losses.shape == (scenarios,)
+        draw_rates.append(DRAWS / seconds)
+        print(f"{loans:>8}{scenarios:>11}{scenarios / seconds:>14,.0f}{DRAWS / seconds / 1e6:>10.0f} M")
+
+    # Per-chunk overhead (seeding, conditional PDs) must not dominate small portfolios
+    assert min(draw_rates) > max(draw_rates) / 3
+
+
+@pytest.mark.performance
+def test_memory_is_bounded_by_the_chunk_size():
+    """Peak memory should be the loss vector plus a few chunks, not scenarios x loans."""
+    portfolio = build_portfolio(100)
+    scenarios = 2_000_000
+    tracemalloc.start()
+    try:
+        losses = portfolio_losses(portfolio, scenarios, CORRELATION, seed=1)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    chunk_bytes = settings.PORTFOLIO_CHUNK_ELEMENTS * 4
+    full_bytes = scenarios * 100 * 4
+    print(f"\n{scenarios} scenarios x 100 loans: peak {peak / 1e6:.0f} MB "
+          f"(losses {losses.nbytes / 1e6:.0f} MB, one chunk {chunk_bytes / 1e6:.0f} MB, "
+          f"unchunked draws {full_bytes / 1e6:.0f} MB)")
+    assert peak < losses.nbytes + 3 * chunk_bytes
+    assert peak < full_bytes / 2
+
+
+@pytest.mark.performance
+def test_uniform_draws_beat_normal_draws():
+    """Comparing uniforms with conditional PDs should beat drawing every latent normal."""
+    portfolio = build_portfolio(1_000)
+    scenarios = 10_000
+    _, chunked = timed(portfolio_losses, portfolio, scenarios, CORRELATION, seed=1)
+    _, reference = timed(normal_draw_losses, portfolio, scenarios, CORRELATION, seed=1)
+    print(f"\n{scenarios} scenarios x 1000 loans: chunked uniform draws {chunked * 1000:.0f} ms, "
+          f"normal draws in one block {reference * 1000:.0f} ms")
+    assert chunked < reference / 2
+
+
+@pytest.mark.performance
+@pytest.mark.skipif((os.cpu_count() or 1) < 2, reason="needs more than one CPU")
+def test_large_portfolios_spread_across_cores():
+    """Splitting a large simulation across pool workers should beat one core."""
+    workers = min(4, os.cpu_count())
+    portfolio = build_portfolio(PORTFOLIO_SIZES[-1])
+    scenarios = 2 * DRAWS // PORTFOLIO_SIZES[-1]
+    single = ScoringPool(max_workers=0)
+    pool = ScoringPool(max_workers=workers, max_queue=0)
+    pool.start()
+    try:
+        asyncio.run(simulate_portfolio(portfolio, 1000, CORRELATION, [0.99], seed=0, pool=pool))  # warm-up
+        one_core, one_core_seconds = timed(
+            asyncio.run, simulate_portfolio(portfolio, scenarios, CORRELATION, [0.99], seed=1, pool=single)
+        )
+        pooled, pooled_seconds = timed(
+            asyncio.run, simulate_portfolio(portfolio, scenarios, CORRELATION, [0.99], seed=1, pool=pool)
+        )
+    finally:
+        pool.shutdown()
+
+    print(f"\n{scenarios} scenarios x {PORTFOLIO_SIZES[-1]} loans: one core {one_core_seconds:.2f} s, "
+          f"{workers} workers {pooled_seconds:.2f} s")
+    assert pooled == one_core
+    assert pooled_seconds < one_core_seconds / 1.3
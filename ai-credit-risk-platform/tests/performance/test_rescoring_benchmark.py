@@ -0,0 +1,45 @@
+"""
+Incremental rescoring benchmark
+
+Stores BOOK_SIZE assessments in SQLite and times rescoring them after a
+credit score threshold moves by 10 points, once reading only the affected
+applicants through the credit_score index and once rescoring the whole book.
+Both must report the same diff. Run with -s to see numbers.
+"""
+
+import time
+
+import pytest
+from applications.api_gateway import rescoring
+from applications.api_gateway.database import get_engine, metadata, upsert_assessments
+from applications.api_gateway.scoring_engine import load_ruleset
+from tests.unit.test_rescoring import build_book, changed_rules
+
+BOOK_SIZE = 100_000
+
+
+@pytest.mark.performance
+def test_incremental_rescore_beats_a_full_rescore(tmp_path, monkeypatch):
+    """Rescoring only the affected slice should be many times faster than the whole book."""
+    url = f"sqlite:///{tmp_path / 'assessments.db'}"
+    metadata.create_all(get_engine(url))
+    with get_engine(url).begin() as connection:
+        upsert_assessments(connection, build_book(BOOK_SIZE))
+    old, new = load_ruleset(), changed_rules(credit_score={"threshold": 640})
+
+    start = time.perf_counter()
+    incremental = rescoring.rescore(old, new, url=url)
+    incremental_seconds = time.perf_counter() - start
+
+    monkeypatch.setattr(rescoring, "affected_condition", lambda old, new: None)
+    start = time.perf_counter()
+    full = rescoring.rescore(old, new, url=url)
+    full_seconds = time.perf_counter() - start
+
+    print(f"\n{BOOK_SIZE} stored assessments, credit_score threshold 650 -> 640: "
+          f"incremental {incremental.examined} rows in {incremental_seconds * 1000:.0f} ms, "
+          f"full {full.examined} rows in {full_seconds * 1000:.0f} ms, {len(full.changes)} changes")
+    assert full.full and full.examined == BOOK_SIZE
+    assert sorted(incremental.changes) == sorted(full.changes)
+    assert incremental.examined < BOOK_SIZE / 20
+    assert incremental_seconds < full_seconds / 5
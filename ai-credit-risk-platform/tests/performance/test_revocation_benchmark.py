@@ -0,0 +1,56 @@
+"""
+Token revocation benchmark
+
+Times the revocation check on every authenticated request, answered by the
+in-process Bloom filter once a worker is synced, against asking Redis every
+time (an in-process Redis stand-in, so before any network latency). Also
+measures the filter's false positive rate when it holds
+TOKEN_REVOCATION_FILTER_CAPACITY revoked tokens, since each false positive
+costs a Redis round trip. Run with -s to see numbers.
+"""
+
+import asyncio
+import time
+import uuid
+
+import fakeredis
+import pytest
+from applications.api_gateway.config import settings
+from applications.api_gateway.sessions import SessionStore
+
+CHECKS = 20_000
+
+
+async def check_all(store: SessionStore, token_ids: list) -> float:
+    start = time.perf_counter()
+    for token_id in token_ids:
+        assert not await store.is_revoked(token_id)
+    return (time.perf_counter() - start) / len(token_ids)
+
+
+@pytest.mark.performance
+def test_filter_check_beats_a_redis_lookup():
+    """A synced worker should check tokens at least 4x faster than a Redis lookup per request."""
+    token_ids = [uuid.uuid4().hex for _ in range(CHECKS)]
+    store = SessionStore(
+        redis=fakeredis.aioredis.FakeRedis(),
+        filter_capacity=settings.TOKEN_REVOCATION_FILTER_CAPACITY,
+        filter_error_rate=settings.TOKEN_REVOCATION_FILTER_ERROR_RATE
+    )
+    for _ in range(settings.TOKEN_REVOCATION_FILTER_CAPACITY):
+        store.filter.add(uuid.uuid4().hex)
+
+    async def run():
+        store.synced = False
+        redis_seconds = await check_all(store, token_ids[:2000])
+        store.synced = True
+        filter_seconds = await check_all(store, token_ids)
+        return redis_seconds, filter_seconds
+
+    redis_seconds, filter_seconds = asyncio.run(run())
+    false_positives = sum(token_id in store.filter for token_id in token_ids) / CHECKS
+    print(f"\nrevocation check: filter {filter_seconds * 1e6:.1f} us, Redis lookup {redis_seconds * 1e6:.1f} us "
+          f"(in process); {false_positives:.3%} false positives with "
+          f"{settings.TOKEN_REVOCATION_FILTER_CAPACITY} revoked tokens")
+    assert filter_seconds < redis_seconds / 4
+    assert false_positives < 3 * settings.TOKEN_REVOCATION_FILTER_ERROR_RATE
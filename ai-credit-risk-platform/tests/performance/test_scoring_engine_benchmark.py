@@ -0,0 +1,57 @@
+"""
+Microbenchmark for the compiled scoring engine
+
+Run with `pytest tests/performance/test_scoring_engine_benchmark.py -s` to see
+the measured per-record cost. Budgets are deliberately generous so the test
+only fails on order-of-magnitude regressions, not on noisy CI machines.
+"""
+
+import timeit
+
+import numpy as np
+import pytest
+from applications.api_gateway.scoring_engine import CompiledRuleSet, load_ruleset
+
+SCALAR_BUDGET_US = 20.0
+VECTORIZED_BUDGET_US = 1.0
+BATCH_SIZE = 100_000
+
+
+def per_record_us(func, records: int, repeat: int = 5) -> float:
+    """Best-of-N wall time per record in microseconds."""
+    return min(timeit.repeat(func, number=1, repeat=repeat)) / records * 1e6
+
+
+@pytest.mark.performance
+class TestScoringEngineBenchmark:
+    """Per-record cost of the compiled evaluator."""
+
+    @pytest.fixture(scope="class")
+    def engine(self):
+        return CompiledRuleSet(load_ruleset())
+
+    @pytest.fixture(scope="class")
+    def columns(self):
+        rng = np.random.default_rng(0)
+        return {
+            "income": rng.uniform(10000, 150000, BATCH_SIZE),
+            "credit_score": rng.integers(300, 851, BATCH_SIZE).astype(np.float64),
+            "debt_ratio": rng.uniform(0, 1, BATCH_SIZE),
+        }
+
+    def test_scalar_per_record_cost(self, engine, columns):
+        """Scalar path cost per applicant."""
+        records = [
+            {feature: float(values[i]) for feature, values in columns.items()}
+            for i in range(10_000)
+        ]
+        score = engine.score
+        cost = per_record_us(lambda: [score(record) for record in records], len(records))
+        print(f"\nscalar: {cost:.2f} us/record")
+        assert cost < SCALAR_BUDGET_US
+
+    def test_vectorized_per_record_cost(self, engine, columns):
+        """Vectorized path cost per applicant for a large batch."""
+        cost = per_record_us(lambda: engine.score_arrays(columns), BATCH_SIZE)
+        print(f"\nvectorized: {cost:.3f} us/record ({BATCH_SIZE} records)")
+        assert cost < VECTORIZED_BUDGET_US
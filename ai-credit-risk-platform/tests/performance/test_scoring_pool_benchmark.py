@@ -0,0 +1,119 @@
+"""
+Process pool benchmark for batch scoring
+
+Publishes a gradient boosted model, then scores BATCHES large batches
+concurrently while a ticker coroutine on the same event loop measures how late
+it wakes up, standing in for the other requests a worker is serving. With
+inline scoring the loop is blocked for each whole batch (rules and model
+prediction); with the scoring pool only the hand-off runs on it.
+Also compares the payload sent to a worker (the packed matrix) with the
+validated requests as dicts, by size and pickle round-trip time. Run with -s
+to see numbers.
+"""
+
+import asyncio
+import os
+import pickle
+import time
+
+import numpy as np
+import pytest
+from sklearn.ensemble import HistGradientBoostingClassifier
+from applications.api_gateway.model_registry import model_registry, publish_model
+from applications.api_gateway.models import CreditRiskRequest
+from applications.api_gateway.scoring import pack_features, score_features
+from applications.api_gateway.scoring_engine import SUPPORTED_FEATURES
+from applications.api_gateway.scoring_pool import ScoringPool
+
+RECORDS = 50000
+BATCHES = 4
+TICK = 0.001
+
+
+def build_matrix():
+    requests = [
+        CreditRiskRequest(
+            applicant_id=f"APP{i}",
+            income=20000.0 + i % 1000 * 100,
+            credit_score=300 + i % 551,
+            debt_ratio=(i % 100) / 100,
+            employment_years=i % 30,
+            loan_amount=250000.0,
+            loan_purpose="MORTGAGE"
+        )
+        for i in range(RECORDS)
+    ]
+    return requests, pack_features(requests)
+
+
+@pytest.fixture
+def published_model(tmp_path):
+    rng = np.random.default_rng(0)
+    features = rng.uniform(0, 1, (20000, len(SUPPORTED_FEATURES))) * [150000, 850, 1, 30, 1000000]
+    labels = np.where(features[:, 1] < 600, "HIGH", np.where(features[:, 2] > 0.5, "MEDIUM", "LOW"))
+    estimator = HistGradientBoostingClassifier(max_iter=200, random_state=0).fit(features, labels)
+    previous_root = model_registry.root
+    publish_model(str(tmp_path), "benchmark", estimator, SUPPORTED_FEATURES)
+    model_registry.root = tmp_path
+    model_registry.refresh()
+    yield
+    model_registry.activate(None)
+    model_registry.root = previous_root
+
+
+def pickle_round_trip(payload) -> tuple:
+    """Return (pickled bytes, seconds to pickle and unpickle)"""
+    start = time.perf_counter()
+    pickle.loads(data := pickle.dumps(payload))
+    return len(data), time.perf_counter() - start
+
+
+async def worst_loop_lag(score, matrix) -> tuple:
+    """Run BATCHES scoring calls, returning (worst ticker lag, elapsed seconds)"""
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(TICK)
+            lags.append(time.perf_counter() - start - TICK)
+
+    ticking = asyncio.create_task(ticker())
+    await asyncio.sleep(TICK * 5)
+    start = time.perf_counter()
+    await asyncio.gather(*(score(matrix) for _ in range(BATCHES)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await ticking
+    return max(lags), elapsed
+
+
+@pytest.mark.performance
+@pytest.mark.skipif((os.cpu_count() or 1) < 2, reason="needs more than one CPU")
+def test_scoring_pool_keeps_the_event_loop_responsive(published_model):
+    """Scoring in the pool should stall the event loop far less than scoring inline."""
+    requests, matrix = build_matrix()
+
+    async def inline(matrix):
+        return score_features(matrix)
+
+    pool = ScoringPool(max_workers=2, max_queue=BATCHES)
+    pool.start()
+    try:
+        asyncio.run(pool.score(matrix[:, :10]))  # wait for the workers to be ready
+        inline_lag, inline_elapsed = asyncio.run(worst_loop_lag(inline, matrix))
+        pool_lag, pool_elapsed = asyncio.run(worst_loop_lag(pool.score, matrix))
+    finally:
+        pool.shutdown()
+
+    matrix_bytes, matrix_seconds = pickle_round_trip(matrix)
+    dict_bytes, dict_seconds = pickle_round_trip([request.model_dump() for request in requests])
+    print(f"\n{BATCHES} batches of {RECORDS} records:")
+    print(f"  inline: worst loop lag {inline_lag * 1000:7.1f} ms, total {inline_elapsed * 1000:7.1f} ms")
+    print(f"  pool:   worst loop lag {pool_lag * 1000:7.1f} ms, total {pool_elapsed * 1000:7.1f} ms")
+    print(f"  payload: packed matrix {matrix_bytes / 1e6:.1f} MB in {matrix_seconds * 1000:.1f} ms, "
+          f"dicts {dict_bytes / 1e6:.1f} MB in {dict_seconds * 1000:.1f} ms")
+    assert pool_lag < inline_lag / 10
+    assert matrix_bytes < dict_bytes
+    assert matrix_seconds < dict_seconds / 10
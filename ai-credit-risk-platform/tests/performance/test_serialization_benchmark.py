@@ -0,0 +1,150 @@
+"""
+Request/response overhead benchmark for the assessment endpoints
+
+Compares three ways of handling an assessment body and response, with scoring
+replaced by a fixed result so only parsing and serialization are measured:
+the previous untyped handler (request.json() and a dict), FastAPI's default
+typed handling (a body parameter and a returned model, which goes through
+jsonable_encoder), and body_parser with ModelResponse. Each is measured
+in-process, and end to end through httpx's ASGI transport. Run with -s to see
+numbers.
+"""
+
+import asyncio
+import json
+import time
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.encoders import jsonable_encoder
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from applications.api_gateway.models import CreditRiskRequest, CreditRiskResponse
+from applications.api_gateway.serialization import ModelResponse, body_parser
+
+ITERATIONS = 20000
+REQUESTS = 2000
+CONCURRENCY = 20
+
+BODY = json.dumps({
+    "applicant_id": "APP123456",
+    "income": 75000.0,
+    "credit_score": 720,
+    "debt_ratio": 0.35,
+    "employment_years": 5,
+    "loan_amount": 250000.0,
+    "loan_purpose": "MORTGAGE",
+}).encode()
+
+RESULT = {
+    "risk_score": 30,
+    "risk_level": "MEDIUM",
+    "recommendation": "REVIEW",
+    "factors": ["Low income", "Short employment history"],
+}
+
+
+def build_response(applicant_id: str) -> CreditRiskResponse:
+    return CreditRiskResponse(
+        applicant_id=applicant_id,
+        assessment_date=datetime.now(timezone.utc),
+        assessor="benchmark",
+        **RESULT
+    )
+
+
+def untyped_roundtrip() -> bytes:
+    data = json.loads(BODY)
+    content = {**RESULT, "assessment_date": datetime.now(timezone.utc).isoformat(), "assessor": "benchmark"}
+    content["applicant_id"] = data.get("applicant_id")
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def default_typed_roundtrip() -> bytes:
+    application = CreditRiskRequest.model_validate(json.loads(BODY))
+    model = build_response(application.applicant_id)
+    return JSONResponse(jsonable_encoder(model)).body
+
+
+def fast_typed_roundtrip() -> bytes:
+    application = CreditRiskRequest.model_validate_json(BODY)
+    return ModelResponse(build_response(application.applicant_id)).body
+
+
+def microseconds_per_call(roundtrip) -> float:
+    for _ in range(1000):
+        roundtrip()
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        roundtrip()
+    return (time.perf_counter() - start) / ITERATIONS * 1e6
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/untyped")
+    async def untyped(request: Request):
+        data = await request.json()
+        return {
+            **RESULT,
+            "applicant_id": data.get("applicant_id"),
+            "assessment_date": datetime.now(timezone.utc).isoformat(),
+            "assessor": "benchmark",
+        }
+
+    @app.post("/default", response_model=CreditRiskResponse)
+    async def default_typed(application: CreditRiskRequest) -> CreditRiskResponse:
+        return build_response(application.applicant_id)
+
+    @app.post("/fast", response_model=CreditRiskResponse, response_class=ModelResponse)
+    async def fast_typed(
+        application: CreditRiskRequest = Depends(body_parser(CreditRiskRequest))
+    ) -> ModelResponse:
+        return ModelResponse(build_response(application.applicant_id))
+
+    return app
+
+
+async def requests_per_second(app: FastAPI, path: str) -> float:
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Content-Type": "application/json"}
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        async def worker(offset: int):
+            for _ in range(offset, REQUESTS, CONCURRENCY):
+                response = await client.post(path, content=BODY, headers=headers)
+                assert response.status_code == 200
+
+        await worker(0)  # warm up
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(offset) for offset in range(CONCURRENCY)))
+        return REQUESTS / (time.perf_counter() - start)
+
+
+@pytest.mark.performance
+def test_parse_and_render_overhead():
+    """Validating bytes and rendering with pydantic-core should beat FastAPI's default path."""
+    untyped = min(microseconds_per_call(untyped_roundtrip) for _ in range(3))
+    default = min(microseconds_per_call(default_typed_roundtrip) for _ in range(3))
+    fast = min(microseconds_per_call(fast_typed_roundtrip) for _ in range(3))
+    print(f"\nParse + render per request: untyped {untyped:.1f} us, "
+          f"FastAPI default typed {default:.1f} us, body_parser + ModelResponse {fast:.1f} us "
+          f"({default / fast:.2f}x faster than default typed)")
+    assert fast < default
+
+
+@pytest.mark.performance
+def test_endpoint_throughput():
+    """Typed endpoints using body_parser and ModelResponse should keep pace with the untyped handler."""
+    app = build_app()
+    results = {"/untyped": 0.0, "/default": 0.0, "/fast": 0.0}
+    # Rounds are interleaved so a burst of machine noise cannot hit every round of one path
+    for _ in range(3):
+        for path in results:
+            results[path] = max(results[path], asyncio.run(requests_per_second(app, path)))
+    print(f"\nEndpoint throughput: untyped {results['/untyped']:.0f} req/s, "
+          f"FastAPI default typed {results['/default']:.0f} req/s, "
+          f"body_parser + ModelResponse {results['/fast']:.0f} req/s")
+    assert results["/fast"] > results["/default"] * 0.9
@@ -0,0 +1,87 @@
+"""
+Start-up time benchmark for the API Gateway
+
+Measures, in fresh interpreter processes, how long it takes to import
+applications.api_gateway.main and how long a freshly launched uvicorn takes to
+answer its first 200 on /health. Budgets live in startup_budget.json; tighten
+them when start-up gets faster so regressions are caught.
+"""
+
+import json
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+BUDGET = json.loads((Path(__file__).parent / "startup_budget.json").read_text())
+RUNS = 3
+
+IMPORT_SNIPPET = """
+import sys, time
+start = time.perf_counter()
+import applications.api_gateway.main
+elapsed = time.perf_counter() - start
+heavy = [name for name in ("numpy.core", "pandas", "sklearn") if name in sys.modules]
+print(elapsed, ",".join(heavy))
+"""
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_import() -> tuple:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+    ).stdout.split()
+    return float(output[0]), output[1:]
+
+
+def measure_first_health(timeout: float = 30.0) -> float:
+    port = free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "applications.api_gateway.main:app",
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=PROJECT_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                response = httpx.get(f"http://127.0.0.1:{port}/health", headers={"Host": "localhost"}, timeout=1.0)
+                if response.status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.TransportError:
+                pass
+            time.sleep(0.01)
+        raise AssertionError("uvicorn did not answer /health in time")
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+@pytest.mark.performance
+class TestStartupBenchmark:
+    """Cold start cost of a gateway process."""
+
+    def test_import_time(self):
+        """Importing the app stays within budget and defers heavy libraries."""
+        results = [measure_import() for _ in range(RUNS)]
+        best = min(elapsed for elapsed, _ in results)
+        print(f"\nimport: {best:.3f}s (budget {BUDGET['import_seconds']}s)")
+        assert results[0][1] == [], f"heavy modules imported eagerly: {results[0][1]}"
+        assert best < BUDGET["import_seconds"]
+
+    def test_time_to_first_health_200(self):
+        """A fresh uvicorn process answers /health within budget."""
+        best = min(measure_first_health() for _ in range(RUNS))
+        print(f"\nfirst /health 200: {best:.3f}s (budget {BUDGET['first_health_seconds']}s)")
+        assert best < BUDGET["first_health_seconds"]
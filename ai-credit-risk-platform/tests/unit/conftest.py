@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline, make_pipeline
+from sklearn.preprocessing import StandardScaler
+from applications.api_gateway.model_registry import model_registry, publish_model
+from applications.api_gateway.scoring_engine import SUPPORTED_FEATURES, get_scoring_engine
+
+
+def train_model(seed: int = 0) -> Pipeline:
+    """Fit a small classifier to the risk levels the default rules assign."""
+    rng = np.random.default_rng(seed)
+    n = 2000
+    columns = {
+        "income": rng.uniform(10000, 150000, n),
+        "credit_score": rng.uniform(300, 850, n),
+        "debt_ratio": rng.uniform(0, 1, n),
+        "employment_years": rng.integers(0, 30, n).astype(float),
+        "loan_amount": rng.uniform(1000, 1000000, n),
+    }
+    labels = get_scoring_engine().score_arrays(columns).risk_levels
+    features = np.column_stack([columns[feature] for feature in SUPPORTED_FEATURES])
+    return make_pipeline(StandardScaler(), LogisticRegression(max_iter=1000)).fit(features, labels)
+
+
+@pytest.fixture(scope="session")
+def estimator():
+    return train_model()
+
+
+@pytest.fixture
+def active_model(tmp_path, estimator):
+    """Serve a published model from the application's registry for one test."""
+    previous_root = model_registry.root
+    publish_model(str(tmp_path), "v1", estimator, SUPPORTED_FEATURES)
+    model_registry.root = tmp_path
+    model_registry.refresh()
+    yield model_registry.active
+    model_registry.activate(None)
+    model_registry.root = previous_root
@@ -0,0 +1,238 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from applications.api_gateway.middleware import (
+    ADMISSION_IN_FLIGHT,
+    ADMISSION_SHED,
+    PRIORITY_CRITICAL,
+    PRIORITY_LOW,
+    PRIORITY_NORMAL,
+    AdmissionControlMiddleware,
+    GradientLimit,
+    is_long_poll,
+    request_priority,
+)
+
+AUTH = {"Authorization": "Bearer token"}
+FORGED = {"Authorization": "Bearer forged"}
+
+
+async def verify_token(token: str):
+    """Accept only the test token, standing in for auth.verify_access_token."""
+    return {"sub": "testuser"} if token == "token" else None
+
+
+def priority(path: str, headers: dict = None) -> str:
+    return asyncio.run(request_priority(http_scope(path, headers), verify_token))
+
+
+def per_request_limit(**kwargs) -> GradientLimit:
+    """A limit that adapts on every sample instead of once per window."""
+    return GradientLimit(window_seconds=0, min_window_samples=1, **kwargs)
+
+
+def build_app(limit: int, delay: float = 0.05, limiter: GradientLimit = None) -> FastAPI:
+    """An app with slow endpoints behind a fixed concurrency limit."""
+    app = FastAPI()
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        limiter=limiter or GradientLimit(initial_limit=limit, min_limit=limit, max_limit=limit),
+        verify_token=verify_token
+    )
+
+    @app.post("/api/v1/credit-risk/assess")
+    async def assess():
+        await asyncio.sleep(delay)
+        return {"ok": True}
+
+    @app.post("/api/v1/credit-risk/test")
+    async def test():
+        await asyncio.sleep(delay)
+        return {"ok": True}
+
+    @app.get("/api/v1/jobs/{job_id}")
+    async def poll_job(job_id: str):
+        await asyncio.sleep(delay)
+        return {"job_id": job_id}
+
+    @app.get("/health")
+    async def health():
+        await asyncio.sleep(delay)
+        return {"status": "healthy"}
+
+    return app
+
+
+async def concurrent(app: FastAPI, requests: list) -> list:
+    """Send (method, path, headers) requests concurrently and return their responses."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://localhost") as client:
+        return await asyncio.gather(*(
+            client.request(method, path, headers=headers) for method, path, headers in requests
+        ))
+
+
+def http_scope(path: str, headers: dict = None, method: str = "GET") -> dict:
+    return {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+    }
+
+
+class TestRequestPriority:
+    """Test cases for ranking requests."""
+
+    def test_authenticated_scoring_is_critical(self):
+        """Test that credit risk calls with a valid bearer token get the highest priority."""
+        assert priority("/api/v1/credit-risk/assess", AUTH) == PRIORITY_CRITICAL
+        assert priority("/api/v1/credit-risk/assess/batch", AUTH) == PRIORITY_CRITICAL
+        assert priority("/api/v1/credit-risk/assess") == PRIORITY_NORMAL
+
+    def test_unverified_tokens_are_not_critical(self):
+        """Test that a bearer header alone, or a failing verifier, does not raise a request's priority."""
+        async def unreachable(token):
+            raise ConnectionError("revocation store down")
+
+        assert priority("/api/v1/credit-risk/assess", FORGED) == PRIORITY_NORMAL
+        scope = http_scope("/api/v1/credit-risk/assess", AUTH)
+        assert asyncio.run(request_priority(scope)) == PRIORITY_NORMAL
+        assert asyncio.run(request_priority(scope, unreachable)) == PRIORITY_NORMAL
+
+    def test_test_and_docs_endpoints_are_low(self):
+        """Test that the unauthenticated test endpoint and docs are shed first."""
+        for path in ("/api/v1/credit-risk/test", "/docs", "/openapi.json", "/"):
+            assert priority(path, AUTH) == PRIORITY_LOW
+
+    def test_probes_are_exempt(self):
+        """Test that health checks and scrapes are never shed."""
+        assert priority("/health") is None
+        assert priority("/metrics") is None
+        assert priority("/api/v1/auth/login") == PRIORITY_NORMAL
+
+    def test_job_polls_are_long_polls(self):
+        """Test that only job status polls are treated as long polls."""
+        assert is_long_poll(http_scope("/api/v1/jobs/abc123"))
+        assert not is_long_poll(http_scope("/api/v1/jobs/credit-risk/assess", method="POST"))
+        assert not is_long_poll(http_scope("/api/v1/credit-risk/assess/stream", method="POST"))
+
+
+class TestGradientLimit:
+    """Test cases for the adaptive concurrency limit."""
+
+    def test_steady_latency_under_load_raises_the_limit(self):
+        """Test that the limit grows while latency holds and the limit is in use."""
+        limit = per_request_limit(initial_limit=20, min_limit=5, max_limit=100)
+        for _ in range(200):
+            limit.update(0.01, in_flight=int(limit.limit))
+        assert limit.limit == 100
+
+    def test_rising_latency_lowers_the_limit(self):
+        """Test that queueing (latency well above the baseline) shrinks the limit."""
+        limit = per_request_limit(initial_limit=100, min_limit=5, max_limit=200)
+        for _ in range(50):
+            limit.update(0.01, in_flight=100)
+        before = limit.limit
+        for _ in range(100):
+            limit.update(0.2, in_flight=100)
+        assert limit.limit < before / 2
+
+    def test_idle_worker_does_not_grow_the_limit(self):
+        """Test that the limit is left alone while less than half of it is used."""
+        limit = per_request_limit(initial_limit=20, min_limit=5, max_limit=100)
+        for _ in range(100):
+            limit.update(0.01, in_flight=1)
+        assert limit.limit == 20
+
+    def test_limit_stays_within_bounds(self):
+        """Test that the limit never drops below min_limit."""
+        limit = per_request_limit(initial_limit=20, min_limit=5, max_limit=100)
+        limit.update(0.01, in_flight=20)
+        limits = [limit.update(10.0, in_flight=int(limit.limit)) for _ in range(100)]
+        assert min(limits) == 5
+
+    def test_latency_is_averaged_per_window(self):
+        """Test that the limit changes at most once per window, from the window's average."""
+        now = [0.0]
+        limit = GradientLimit(initial_limit=20, min_limit=5, max_limit=100, window_seconds=1, clock=lambda: now[0])
+        for second in range(1, 3):
+            for _ in range(50):
+                limit.update(0.01, in_flight=20)
+            now[0] = second
+            limit.update(0.01, in_flight=20)
+        assert limit.limit == pytest.approx(20 + 0.2 * 20 ** 0.5)
+
+    def test_invalid_limits_are_rejected(self):
+        """Test that inconsistent bounds are refused."""
+        with pytest.raises(ValueError):
+            GradientLimit(initial_limit=5, min_limit=10, max_limit=100)
+
+
+class TestAdmissionControlMiddleware:
+    """Test cases for shedding requests beyond the limit."""
+
+    def test_excess_requests_are_rejected_with_retry_after(self):
+        """Test that requests over the limit get an immediate 503."""
+        shed = ADMISSION_SHED.labels(priority=PRIORITY_CRITICAL)._value.get()
+        responses = asyncio.run(concurrent(
+            build_app(limit=2), [("POST", "/api/v1/credit-risk/assess", AUTH)] * 3
+        ))
+        assert sorted(response.status_code for response in responses) == [200, 200, 503]
+        rejected = next(response for response in responses if response.status_code == 503)
+        assert rejected.headers["Retry-After"] == "1"
+        assert rejected.json() == {"error": "Service overloaded, retry later"}
+        assert ADMISSION_SHED.labels(priority=PRIORITY_CRITICAL)._value.get() - shed == 1
+
+    def test_low_priority_requests_are_shed_first(self):
+        """Test that test endpoint traffic cannot fill the capacity kept for scoring."""
+        responses = asyncio.run(concurrent(build_app(limit=4), [
+            ("POST", "/api/v1/credit-risk/test", {}),
+            ("POST", "/api/v1/credit-risk/test", {}),
+            ("POST", "/api/v1/credit-risk/test", {}),
+            ("POST", "/api/v1/credit-risk/assess", AUTH),
+            ("POST", "/api/v1/credit-risk/assess", AUTH),
+        ]))
+        assert [response.status_code for response in responses] == [200, 200, 503, 200, 200]
+
+    def test_forged_tokens_are_shed_with_normal_traffic(self):
+        """Test that an unverified bearer token cannot use the capacity kept for scoring."""
+        responses = asyncio.run(concurrent(build_app(limit=5), [
+            ("POST", "/api/v1/credit-risk/assess", FORGED),
+            ("POST", "/api/v1/credit-risk/assess", FORGED),
+            ("POST", "/api/v1/credit-risk/assess", FORGED),
+            ("POST", "/api/v1/credit-risk/assess", FORGED),
+            ("POST", "/api/v1/credit-risk/assess", FORGED),
+        ]))
+        assert [response.status_code for response in responses] == [200, 200, 200, 200, 503]
+
+    def test_health_checks_are_never_shed(self):
+        """Test that exempt paths are admitted regardless of load."""
+        responses = asyncio.run(concurrent(build_app(limit=1), [("GET", "/health", {})] * 5))
+        assert all(response.status_code == 200 for response in responses)
+
+    def test_in_flight_gauge_returns_to_zero(self):
+        """Test that admitted requests are released when they finish."""
+        app = build_app(limit=2)
+        asyncio.run(concurrent(app, [("POST", "/api/v1/credit-risk/assess", AUTH)] * 4))
+        assert ADMISSION_IN_FLIGHT._value.get() == 0
+        responses = asyncio.run(concurrent(app, [("POST", "/api/v1/credit-risk/assess", AUTH)] * 2))
+        assert all(response.status_code == 200 for response in responses)
+
+    def test_job_polls_hold_no_slot_and_give_no_sample(self):
+        """Test that waiting job polls neither crowd out scoring nor feed the latency gradient."""
+        samples = []
+        limiter = GradientLimit(initial_limit=2, min_limit=2, max_limit=2)
+        update = limiter.update
+        limiter.update = lambda rtt, in_flight: samples.append(rtt) or update(rtt, in_flight)
+        responses = asyncio.run(concurrent(build_app(limit=2, limiter=limiter), [
+            ("GET", "/api/v1/jobs/job-1", {}),
+            ("GET", "/api/v1/jobs/job-2", {}),
+            ("GET", "/api/v1/jobs/job-3", {}),
+            ("POST", "/api/v1/credit-risk/assess", AUTH),
+            ("POST", "/api/v1/credit-risk/assess", AUTH),
+        ]))
+        assert all(response.status_code == 200 for response in responses)
+        assert len(samples) == 2
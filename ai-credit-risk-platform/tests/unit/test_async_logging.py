@@ -0,0 +1,159 @@
+import io
+import json
+import threading
+
+import pytest
+import structlog
+from fastapi.testclient import TestClient
+from applications.api_gateway import main
+from applications.api_gateway.logging_config import (
+    LOG_RECORDS_DROPPED,
+    AsyncLogWriter,
+    QueueLogger,
+    _enqueue,
+)
+
+
+class RecordingStream(io.BytesIO):
+    """BytesIO that remembers how many writes it received."""
+
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, data):
+        self.writes += 1
+        return super().write(data)
+
+    def lines(self):
+        return [json.loads(line) for line in self.getvalue().splitlines()]
+
+
+client = TestClient(main.app, headers={"Host": "localhost"})
+
+
+def queue_logger(writer: AsyncLogWriter):
+    return structlog.wrap_logger(
+        QueueLogger(writer),
+        processors=[structlog.processors.add_log_level, _enqueue],
+        wrapper_class=structlog.make_filtering_bound_logger(20),
+    )
+
+
+def dropped(policy: str) -> float:
+    return LOG_RECORDS_DROPPED.labels(policy=policy)._value.get()
+
+
+@pytest.fixture
+def stream():
+    return RecordingStream()
+
+
+class TestAsyncLogWriter:
+    """Test cases for the batched background log writer."""
+
+    def test_records_are_written_in_order_on_flush(self, stream):
+        """Test that flush waits for every queued record to be written."""
+        writer = AsyncLogWriter(stream, batch_size=64)
+        writer.start()
+        for i in range(500):
+            writer.submit({"event": "assessment", "i": i, "level": "info"})
+        assert writer.flush(timeout=5)
+        writer.close()
+
+        assert [line["i"] for line in stream.lines()] == list(range(500))
+        assert stream.writes <= 500
+
+    def test_records_are_batched(self, stream):
+        """Test that queued records are written with one write per batch."""
+        writer = AsyncLogWriter(stream, batch_size=100)
+        for i in range(300):
+            writer.submit({"event": "assessment", "i": i, "level": "info"})
+        writer.start()
+        writer.close()
+
+        assert len(stream.lines()) == 300
+        assert stream.writes == 3
+
+    def test_drop_new_discards_incoming_records(self, stream):
+        """Test that the drop_new policy keeps the queued records."""
+        before = dropped("drop_new")
+        writer = AsyncLogWriter(stream, max_queue=3, overflow_policy="drop_new")
+        for i in range(5):
+            writer.submit({"event": "e", "i": i, "level": "info"})
+        writer.start()
+        writer.close()
+
+        assert [line["i"] for line in stream.lines()] == [0, 1, 2]
+        assert dropped("drop_new") - before == 2
+
+    def test_drop_oldest_keeps_newest_records(self, stream):
+        """Test that the drop_oldest policy discards from the head of the queue."""
+        before = dropped("drop_oldest")
+        writer = AsyncLogWriter(stream, max_queue=3, overflow_policy="drop_oldest")
+        for i in range(5):
+            writer.submit({"event": "e", "i": i, "level": "info"})
+        writer.start()
+        writer.close()
+
+        assert [line["i"] for line in stream.lines()] == [2, 3, 4]
+        assert dropped("drop_oldest") - before == 2
+
+    def test_audit_records_are_never_dropped(self, stream):
+        """Test that audit and warning records wait for space instead of being dropped."""
+        writer = AsyncLogWriter(stream, max_queue=2, batch_size=1, overflow_policy="drop_new")
+        for i in range(2):
+            writer.submit({"event": "e", "i": i, "level": "info"})
+
+        submitter = threading.Thread(target=lambda: [
+            writer.submit({"event": "audit", "i": 2, "level": "info", "audit": True}),
+            writer.submit({"event": "warn", "i": 3, "level": "warning"}),
+        ])
+        submitter.start()
+        writer.start()
+        submitter.join(timeout=5)
+        writer.close()
+
+        assert [line["i"] for line in stream.lines()] == [0, 1, 2, 3]
+
+    def test_records_after_close_are_written_inline(self, stream):
+        """Test that shutdown does not lose late records."""
+        writer = AsyncLogWriter(stream)
+        writer.start()
+        writer.close()
+        writer.submit({"event": "late", "level": "info"})
+        assert stream.lines() == [{"event": "late", "level": "info"}]
+
+    def test_unknown_overflow_policy_is_rejected(self, stream):
+        """Test that a misconfigured policy fails fast."""
+        with pytest.raises(ValueError):
+            AsyncLogWriter(stream, overflow_policy="drop_everything")
+
+    def test_structlog_events_are_serialized_as_json(self, stream):
+        """Test that structlog events reach the stream as JSON lines."""
+        writer = AsyncLogWriter(stream)
+        writer.start()
+        logger = queue_logger(writer)
+        logger.debug("filtered out")
+        logger.info("Credit risk assessment completed", risk_score=55, risk_level="MEDIUM")
+        writer.close()
+
+        assert stream.lines() == [{
+            "event": "Credit risk assessment completed",
+            "risk_score": 55,
+            "risk_level": "MEDIUM",
+            "level": "info",
+        }]
+
+    def test_login_outcomes_are_audit_events(self, stream, monkeypatch):
+        """Test that logins are logged with audit=True, so overflow never drops them."""
+        writer = AsyncLogWriter(stream)
+        writer.start()
+        monkeypatch.setattr(main, "logger", queue_logger(writer))
+        client.post("/api/v1/auth/login", json={"username": "testuser", "password": "testpassword"})
+        client.post("/api/v1/auth/login", json={"username": "testuser", "password": "wrong-password"})
+        writer.close()
+
+        events = {line["event"]: line for line in stream.lines()}
+        assert events["User logged in"]["audit"] is True
+        assert events["Login failed"]["audit"] is True
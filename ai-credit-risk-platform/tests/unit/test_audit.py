@@ -0,0 +1,275 @@
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+from applications.api_gateway.audit import (
+    AUDIT_RECORDS_QUARANTINED,
+    AUDIT_RECORDS_SPILLED,
+    AuditWriter,
+    DatabaseAuditSink,
+    audit_writer,
+    build_entry,
+)
+from applications.api_gateway.auth import generate_test_token
+from applications.api_gateway.database import audit_logs, get_engine, metadata
+from applications.api_gateway.main import app
+
+
+def make_entry(i: int) -> dict:
+    return {
+        "user_id": 1,
+        "action": "POST",
+        "resource": f"/api/v1/credit-risk/assess/{i}",
+        "ip_address": "10.0.0.1",
+        "user_agent": "pytest",
+        "timestamp": datetime.now(timezone.utc),
+        "details": {"status_code": 200},
+    }
+
+
+def spilled(reason: str) -> float:
+    return AUDIT_RECORDS_SPILLED.labels(reason=reason)._value.get()
+
+
+class CountingSink:
+    """Sink wrapper recording batch sizes, optionally failing or stalling."""
+
+    def __init__(self, inner=None, failures: int = 0):
+        self.inner = inner
+        self.failures = failures
+        self.batches = []
+        self.entries = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def write(self, entries):
+        self.gate.wait(10)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("database unavailable")
+        if self.inner is not None:
+            self.inner.write(entries)
+        self.batches.append(len(entries))
+        self.entries.extend(entries)
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'audit.db'}"
+    metadata.create_all(get_engine(url))
+    return url
+
+
+@pytest.fixture
+def spill_path(tmp_path):
+    return str(tmp_path / "spill" / "audit.ndjson")
+
+
+class PickySink(CountingSink):
+    """Sink that refuses any batch containing a poisoned entry, like a database constraint."""
+
+    def write(self, entries):
+        if any(entry["resource"].endswith("/poison") for entry in entries):
+            raise ValueError("value too long for type character varying(512)")
+        super().write(entries)
+
+
+def row_count(url: str) -> int:
+    with get_engine(url).connect() as connection:
+        return connection.execute(select(func.count()).select_from(audit_logs)).scalar_one()
+
+
+class TestAuditWriter:
+    """Test cases for the batched audit writer."""
+
+    def test_entries_are_inserted_in_bulk(self, database_url, spill_path):
+        """Test that buffered entries reach the database in full batches."""
+        sink = CountingSink(DatabaseAuditSink(database_url))
+        writer = AuditWriter(sink, spill_path, batch_size=500, flush_interval=60)
+        writer.start()
+        for i in range(1200):
+            writer.record(make_entry(i))
+        assert writer.flush()
+        writer.close()
+
+        assert row_count(database_url) == 1200
+        assert sink.batches[:2] == [500, 500]
+        assert sum(sink.batches) == 1200
+
+    def test_partial_batches_are_flushed_on_interval(self, spill_path):
+        """Test that entries are written within the flush interval without a full batch."""
+        sink = CountingSink()
+        writer = AuditWriter(sink, spill_path, batch_size=500, flush_interval=0.05)
+        writer.start()
+        for i in range(3):
+            writer.record(make_entry(i))
+        deadline = time.monotonic() + 5
+        while not sink.entries and time.monotonic() < deadline:
+            time.sleep(0.01)
+        writer.close()
+        assert len(sink.entries) == 3
+
+    def test_entries_are_ignored_until_started(self, spill_path):
+        """Test that recording is a no-op when auditing has not been started."""
+        sink = CountingSink()
+        writer = AuditWriter(sink, spill_path)
+        writer.record(make_entry(0))
+        writer.start()
+        writer.close()
+        assert sink.entries == []
+
+    def test_sink_failures_are_spilled_and_replayed(self, spill_path):
+        """Test that a failed bulk write is spilled to disk and later replayed exactly once."""
+        sink = CountingSink(failures=1)
+        writer = AuditWriter(sink, spill_path, batch_size=10, flush_interval=0.05, retry_interval=0)
+        before = spilled("sink_error")
+        writer.start()
+        for i in range(10):
+            writer.record(make_entry(i))
+        writer.flush()
+        assert spilled("sink_error") - before == 10
+
+        writer.record(make_entry(10))
+        writer.flush()
+        writer.close()
+
+        resources = sorted(entry["resource"] for entry in sink.entries)
+        assert resources == sorted(f"/api/v1/credit-risk/assess/{i}" for i in range(11))
+        assert isinstance(sink.entries[0]["timestamp"], datetime)
+        assert not (os.path.exists(spill_path) or os.path.exists(spill_path + ".replay"))
+
+    def test_full_buffer_spills_instead_of_blocking(self, spill_path):
+        """Test that a stalled sink makes record() spill rather than block the caller."""
+        sink = CountingSink()
+        sink.gate.clear()
+        writer = AuditWriter(sink, spill_path, batch_size=2, flush_interval=0.01, max_buffer=4)
+        before = spilled("buffer_full")
+        writer.start()
+
+        start = time.perf_counter()
+        for i in range(20):
+            writer.record(make_entry(i))
+        assert time.perf_counter() - start < 1
+        assert spilled("buffer_full") - before >= 14
+
+        sink.gate.set()
+        writer.flush()
+        writer.record(make_entry(20))
+        writer.flush()
+        writer.close()
+        assert sorted(e["resource"] for e in sink.entries) == sorted(
+            f"/api/v1/credit-risk/assess/{i}" for i in range(21)
+        )
+
+    def test_spill_file_from_a_crash_is_replayed_on_start(self, database_url, spill_path, tmp_path):
+        """Test that entries spilled by a previous process are written on start-up."""
+        (tmp_path / "spill").mkdir()
+        with open(spill_path, "wb") as f:
+            for i in range(5):
+                f.write(orjson.dumps(make_entry(i), option=orjson.OPT_APPEND_NEWLINE))
+
+        writer = AuditWriter(DatabaseAuditSink(database_url), spill_path)
+        writer.start()
+        writer.close()
+        assert row_count(database_url) == 5
+
+
+    def test_batch_the_sink_keeps_refusing_is_quarantined(self, spill_path):
+        """Test that a spilled batch refused after every recovery is set aside instead of blocking replay."""
+        sink = PickySink()
+        writer = AuditWriter(sink, spill_path, batch_size=2, flush_interval=0.05, retry_interval=0,
+                             quarantine_after=3)
+        before = AUDIT_RECORDS_QUARANTINED._value.get()
+        writer.start()
+        poisoned = {**make_entry(0), "resource": "/api/v1/credit-risk/assess/poison"}
+        writer.record(poisoned)
+        writer.record(make_entry(1))
+        writer.flush()  # refused and spilled
+
+        for i in range(2, 8, 2):
+            writer.record(make_entry(i))
+            writer.record(make_entry(i + 1))
+            writer.flush()  # accepted, then the spilled batch is retried
+        writer.close()
+
+        assert AUDIT_RECORDS_QUARANTINED._value.get() - before == 2
+        quarantined = [orjson.loads(line) for line in open(writer.quarantine_path, "rb")]
+        assert [entry["resource"] for entry in quarantined] == [poisoned["resource"], make_entry(1)["resource"]]
+        assert sorted(entry["resource"] for entry in sink.entries) == sorted(
+            f"/api/v1/credit-risk/assess/{i}" for i in range(2, 8)
+        )
+        assert not (os.path.exists(spill_path) or os.path.exists(spill_path + ".replay"))
+
+    def test_outage_does_not_quarantine(self, spill_path):
+        """Test that replays failing while the sink is down are kept, however often they fail."""
+        sink = CountingSink(failures=10)
+        writer = AuditWriter(sink, spill_path, batch_size=2, flush_interval=0.05, retry_interval=0,
+                             quarantine_after=2)
+        writer.start()
+        for i in range(10):
+            writer.record(make_entry(i))
+            writer.flush()
+        sink.failures = 0
+        writer.record(make_entry(10))
+        writer.flush()
+        writer.close()
+
+        assert not writer.quarantine_path.exists()
+        assert sorted(entry["resource"] for entry in sink.entries) == sorted(
+            f"/api/v1/credit-risk/assess/{i}" for i in range(11)
+        )
+
+
+class TestBuildEntry:
+    """Test cases for describing requests as audit rows."""
+
+    def test_long_values_are_cut_to_the_column_widths(self):
+        """Test that an oversized path or User-Agent cannot make the database refuse a batch."""
+        scope = {
+            "method": "GET",
+            "path": "/api/v1/" + "a" * 1000,
+            "headers": [(b"user-agent", b"x" * 2000)],
+            "client": ("10.0.0.1", 1234),
+        }
+        entry = build_entry(scope, 200, None)
+        assert len(entry["resource"]) == 512
+        assert len(entry["user_agent"]) == 512
+        assert entry["resource"].startswith("/api/v1/aaa")
+
+
+class TestAuditMiddleware:
+    """Test cases for auditing protected endpoints."""
+
+    @pytest.fixture
+    def sink(self):
+        original = audit_writer.sink
+        audit_writer.sink = CountingSink()
+        yield audit_writer.sink
+        audit_writer.sink = original
+
+    def test_protected_calls_are_audited(self, sink):
+        """Test that authenticated, rejected and public requests are handled correctly."""
+        with TestClient(app, headers={"Host": "localhost"}) as client:
+            client.get("/api/v1/me", headers={
+                "Authorization": f"Bearer {generate_test_token()}",
+                "User-Agent": "origination-system/2.1",
+            })
+            client.get("/api/v1/me", headers={"Authorization": "Bearer not-a-token"})
+            client.get("/health")
+        # Shutdown flushes the writer
+
+        assert len(sink.entries) == 2
+        ok, rejected = sink.entries
+        assert ok["user_id"] == 1
+        assert ok["action"] == "GET"
+        assert ok["resource"] == "/api/v1/me"
+        assert ok["user_agent"] == "origination-system/2.1"
+        assert ok["ip_address"] == "testclient"
+        assert ok["details"] == {"username": "testuser", "endpoint": "/api/v1/me", "status_code": 200}
+        assert rejected["user_id"] is None
+        assert rejected["details"]["status_code"] == 401
@@ -0,0 +1,145 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from applications.api_gateway import auth
+from applications.api_gateway.auth import create_access_token, create_user, generate_test_token
+from applications.api_gateway.cache import CACHE_EVICTIONS, CACHE_HITS, CACHE_MISSES, TTLCache
+from applications.api_gateway.config import settings
+from applications.api_gateway.database import get_engine, users
+from applications.api_gateway.main import app
+
+client = TestClient(app, headers={"Host": "localhost"})
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def counter_value(counter, **labels) -> float:
+    return counter.labels(**labels)._value.get()
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture(autouse=True)
+def clear_auth_caches():
+    auth.token_cache.clear()
+    auth.user_cache.clear()
+    yield
+    auth.token_cache.clear()
+    auth.user_cache.clear()
+
+
+class TestTTLCache:
+    """Test cases for the bounded TTL/LRU cache."""
+
+    def test_hit_and_miss_are_counted(self, clock):
+        """Test that lookups update the hit and miss counters."""
+        cache = TTLCache("test_counts", maxsize=2, clock=clock)
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert counter_value(CACHE_HITS, cache="test_counts") == 1
+        assert counter_value(CACHE_MISSES, cache="test_counts") == 1
+
+    def test_entries_expire(self, clock):
+        """Test that entries are not returned after their TTL."""
+        cache = TTLCache("test_expiry", maxsize=2, default_ttl=10, clock=clock)
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=30)
+        clock.now += 11
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+        assert counter_value(CACHE_EVICTIONS, cache="test_expiry", reason="expired") == 1
+
+    def test_least_recently_used_entry_is_evicted(self, clock):
+        """Test that the cache stays bounded by evicting the LRU entry."""
+        cache = TTLCache("test_lru", maxsize=2, clock=clock)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert len(cache) == 2
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert counter_value(CACHE_EVICTIONS, cache="test_lru", reason="capacity") == 1
+
+    def test_non_positive_ttl_is_not_cached(self, clock):
+        """Test that already-expired values are never stored."""
+        cache = TTLCache("test_negative", maxsize=2, clock=clock)
+        cache.set("a", 1, ttl=-5)
+        assert len(cache) == 0
+
+    def test_invalidate(self, clock):
+        """Test explicit invalidation."""
+        cache = TTLCache("test_invalidate", maxsize=2, clock=clock)
+        cache.set("a", 1)
+        assert cache.invalidate("a") is True
+        assert cache.invalidate("a") is False
+        assert cache.get("a") is None
+
+
+class TestAuthCaching:
+    """Test cases for token and user caching in get_current_user."""
+
+    def test_repeated_requests_skip_jwt_decode_and_user_lookup(self, monkeypatch):
+        """Test that a cached token is not decoded or looked up again."""
+        calls = {"decode": 0, "get_user": 0}
+        real_decode, real_get_user = auth.jwt.decode, auth.get_user
+
+        def counting_decode(*args, **kwargs):
+            calls["decode"] += 1
+            return real_decode(*args, **kwargs)
+
+        def counting_get_user(*args, **kwargs):
+            calls["get_user"] += 1
+            return real_get_user(*args, **kwargs)
+
+        monkeypatch.setattr(auth.jwt, "decode", counting_decode)
+        monkeypatch.setattr(auth, "get_user", counting_get_user)
+
+        headers = {"Authorization": f"Bearer {generate_test_token()}"}
+        for _ in range(3):
+            assert client.get("/api/v1/me", headers=headers).status_code == 200
+        assert calls == {"decode": 1, "get_user": 1}
+
+    def test_token_cache_expires_with_exp_claim(self):
+        """Test that the token cache TTL never outlives the token."""
+        token = create_access_token({"sub": "testuser"}, expires_delta=timedelta(seconds=5))
+        assert client.get("/api/v1/me", headers={"Authorization": f"Bearer {token}"}).status_code == 200
+        _, expires_at = auth.token_cache._entries[token]
+        assert expires_at - auth.token_cache._clock() <= 5
+
+    def test_invalid_tokens_are_not_cached(self):
+        """Test that rejected tokens do not populate the cache."""
+        response = client.get("/api/v1/me", headers={"Authorization": "Bearer not-a-token"})
+        assert response.status_code == 401
+        assert len(auth.token_cache) == 0
+
+    def test_create_user_invalidates_cached_user(self):
+        """Test that user changes are visible through the cache."""
+        auth.user_cache.set("cacheuser", "stale")
+        try:
+            asyncio.run(create_user("cacheuser", "cache@example.com", "password123"))
+            assert auth.user_cache.get("cacheuser") is None
+        finally:
+            with get_engine(settings.DATABASE_URL).begin() as connection:
+                connection.execute(users.delete().where(users.c.username == "cacheuser"))
+
+    def test_cache_metrics_are_exported(self):
+        """Test that cache counters appear on the metrics endpoint."""
+        headers = {"Authorization": f"Bearer {generate_test_token()}"}
+        client.get("/api/v1/me", headers=headers)
+        client.get("/api/v1/me", headers=headers)
+        body = client.get("/metrics").text
+        assert 'cache_misses_total{cache="auth_token"}' in body
+        assert 'cache_hits_total{cache="auth_user"}' in body
@@ -0,0 +1,112 @@
+import pytest
+from fastapi.testclient import TestClient
+from applications.api_gateway.auth import generate_test_token
+from applications.api_gateway.main import app
+
+client = TestClient(app, headers={"Host": "localhost"})
+
+BATCH_URL = "/api/v1/credit-risk/assess/batch"
+
+
+def make_application(applicant_id: str, **overrides) -> dict:
+    """Build a valid credit risk application payload."""
+    application = {
+        "applicant_id": applicant_id,
+        "income": 75000.0,
+        "credit_score": 720,
+        "debt_ratio": 0.35,
+        "employment_years": 5,
+        "loan_amount": 250000.0,
+        "loan_purpose": "MORTGAGE",
+    }
+    application.update(overrides)
+    return application
+
+
+@pytest.fixture
+def auth_headers():
+    return {"Authorization": f"Bearer {generate_test_token()}"}
+
+
+class TestBatchAssessmentEndpoint:
+    """Test cases for the batch credit risk assessment endpoint."""
+
+    def test_requires_authentication(self):
+        """Test that the batch endpoint rejects unauthenticated requests."""
+        response = client.post(BATCH_URL, json={"applications": [make_application("APP1")]})
+        assert response.status_code == 403
+
+    def test_results_are_returned_in_input_order(self, auth_headers):
+        """Test that results line up with the submitted applications."""
+        applications = [
+            make_application("APP1"),
+            make_application("APP2", income=20000.0, credit_score=600, debt_ratio=0.5),
+            make_application("APP3", credit_score=600),
+        ]
+        response = client.post(BATCH_URL, json={"applications": applications}, headers=auth_headers)
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["total"] == 3
+        assert data["succeeded"] == 3
+        assert data["failed"] == 0
+        assert [item["index"] for item in data["results"]] == [0, 1, 2]
+        assert [item["result"]["applicant_id"] for item in data["results"]] == ["APP1", "APP2", "APP3"]
+        assert [item["result"]["risk_level"] for item in data["results"]] == ["LOW", "HIGH", "LOW"]
+        assert data["results"][0]["result"]["assessor"] == "testuser"
+        assert data["results"][1]["result"]["factors"] == [
+            "Low income", "Low credit score", "High debt-to-income ratio"
+        ]
+
+    def test_invalid_records_are_reported_inline(self, auth_headers):
+        """Test that validation errors do not fail the rest of the batch."""
+        applications = [
+            make_application("APP1"),
+            make_application("APP2", credit_score=900),
+            {"applicant_id": "APP3"},
+        ]
+        response = client.post(BATCH_URL, json={"applications": applications}, headers=auth_headers)
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["succeeded"] == 1
+        assert data["failed"] == 2
+        assert data["results"][0]["result"]["risk_level"] == "LOW"
+        assert data["results"][0]["errors"] is None
+        assert data["results"][1]["result"] is None
+        assert data["results"][1]["applicant_id"] == "APP2"
+        assert data["results"][1]["errors"][0]["loc"] == ["credit_score"]
+        assert data["results"][2]["result"] is None
+        assert len(data["results"][2]["errors"]) == 6
+
+    def test_non_object_records_are_reported_inline(self, auth_headers):
+        """Test that null, string and number items fail individually rather than the whole batch."""
+        applications = [None, make_application("APP1"), "APP2", 42, [make_application("APP3")]]
+        response = client.post(BATCH_URL, json={"applications": applications}, headers=auth_headers)
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["succeeded"] == 1
+        assert data["failed"] == 4
+        assert data["results"][1]["result"]["applicant_id"] == "APP1"
+        for index in (0, 2, 3, 4):
+            assert data["results"][index]["result"] is None
+            assert data["results"][index]["errors"][0]["type"] == "model_type"
+        assert data["results"][2]["errors"][0]["input"] == "APP2"
+
+    def test_overlong_applicant_id_is_reported_inline(self, auth_headers):
+        """Test that an applicant ID wider than the assessments column fails on its own."""
+        applications = [make_application("A" * 65), make_application("A" * 64)]
+        response = client.post(BATCH_URL, json={"applications": applications}, headers=auth_headers)
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["succeeded"] == 1
+        assert data["results"][0]["result"] is None
+        assert data["results"][0]["errors"][0]["loc"] == ["applicant_id"]
+        assert data["results"][1]["result"]["applicant_id"] == "A" * 64
+
+    def test_empty_batch_is_rejected(self, auth_headers):
+        """Test that an empty batch fails request validation."""
+        response = client.post(BATCH_URL, json={"applications": []}, headers=auth_headers)
+        assert response.status_code == 422
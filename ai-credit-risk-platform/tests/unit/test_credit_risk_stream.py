@@ -0,0 +1,125 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from applications.api_gateway.auth import generate_test_token
+from applications.api_gateway.main import app
+from applications.api_gateway.scoring import InvalidRecord
+from applications.api_gateway.streaming import iter_chunks, iter_csv_records, iter_lines
+
+client = TestClient(app, headers={"Host": "localhost"})
+
+STREAM_URL = "/api/v1/credit-risk/assess/stream"
+
+CSV_HEADER = "applicant_id,income,credit_score,debt_ratio,employment_years,loan_amount,loan_purpose"
+
+
+def make_ndjson_line(applicant_id: str, income: float = 75000.0, credit_score: int = 720) -> bytes:
+    """Build one NDJSON application line."""
+    return json.dumps({
+        "applicant_id": applicant_id,
+        "income": income,
+        "credit_score": credit_score,
+        "debt_ratio": 0.35,
+        "employment_years": 5,
+        "loan_amount": 250000.0,
+        "loan_purpose": "MORTGAGE",
+    }).encode() + b"\n"
+
+
+async def aiter(items):
+    for item in items:
+        yield item
+
+
+async def collect(iterator):
+    return [item async for item in iterator]
+
+
+def run(coro):
+    return asyncio.new_event_loop().run_until_complete(coro)
+
+
+@pytest.fixture
+def auth_headers():
+    return {"Authorization": f"Bearer {generate_test_token()}"}
+
+
+class TestStreamingPipeline:
+    """Test cases for the streaming generator pipeline."""
+
+    def test_lines_are_split_across_chunk_boundaries(self):
+        """Test that lines spanning several body chunks are reassembled."""
+        lines = run(collect(iter_lines(aiter([b'{"a"', b': 1}\n\n{"b": 2}', b"\n{\"c\": 3}"]), 1024)))
+        assert lines == [b'{"a": 1}', b'{"b": 2}', b'{"c": 3}']
+
+    def test_oversized_lines_are_replaced_by_errors(self):
+        """Test that overlong lines are dropped without buffering them."""
+        lines = run(collect(iter_lines(aiter([b"x" * 10, b"x" * 10, b"\nok\n"]), 16)))
+        assert isinstance(lines[0], InvalidRecord)
+        assert lines[0].errors[0]["type"] == "line_too_long"
+        assert lines[1] == b"ok"
+
+    def test_csv_rows_are_keyed_by_header(self):
+        """Test that CSV rows become dicts and empty cells are omitted."""
+        rows = run(collect(iter_csv_records(aiter([b"a,b,c", b"1,,3", b"1,2"]))))
+        assert rows[0] == {"a": "1", "c": "3"}
+        assert isinstance(rows[1], InvalidRecord)
+
+    def test_chunks_are_bounded(self):
+        """Test that records are grouped into fixed-size chunks."""
+        chunks = run(collect(iter_chunks(aiter(range(7)), 3)))
+        assert chunks == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+class TestStreamingAssessmentEndpoint:
+    """Test cases for the streaming credit risk assessment endpoint."""
+
+    def test_requires_authentication(self):
+        """Test that the streaming endpoint rejects unauthenticated requests."""
+        response = client.post(STREAM_URL, content=make_ndjson_line("APP1"))
+        assert response.status_code == 403
+
+    def test_ndjson_results_are_streamed_in_order(self, auth_headers):
+        """Test that NDJSON records are scored and returned in input order."""
+        def body():
+            for i in range(2500):
+                yield make_ndjson_line(f"APP{i}", income=20000.0 if i % 2 else 75000.0)
+
+        response = client.post(
+            STREAM_URL,
+            content=body(),
+            headers={**auth_headers, "Content-Type": "application/x-ndjson"}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+
+        items = [json.loads(line) for line in response.text.splitlines()]
+        assert len(items) == 2500
+        assert [item["index"] for item in items] == list(range(2500))
+        assert items[0]["result"]["risk_level"] == "LOW"
+        assert items[1]["result"]["risk_level"] == "MEDIUM"
+        assert items[2499]["applicant_id"] == "APP2499"
+
+    def test_invalid_lines_are_reported_inline(self, auth_headers):
+        """Test that malformed and invalid records do not stop the stream."""
+        body = make_ndjson_line("APP1") + b"not json\n" + make_ndjson_line("APP3", credit_score=900)
+        response = client.post(STREAM_URL, content=body, headers=auth_headers)
+        items = [json.loads(line) for line in response.text.splitlines()]
+
+        assert items[0]["result"]["applicant_id"] == "APP1"
+        assert items[1]["errors"][0]["type"] == "json_invalid"
+        assert items[2]["errors"][0]["loc"] == ["credit_score"]
+
+    def test_csv_body_is_supported(self, auth_headers):
+        """Test that CSV bodies are parsed using the header row."""
+        body = "\n".join([
+            CSV_HEADER,
+            "APP1,75000,720,0.35,5,250000,MORTGAGE",
+            "APP2,20000,600,0.5,1,10000,AUTO",
+        ]).encode()
+        response = client.post(STREAM_URL, content=body, headers={**auth_headers, "Content-Type": "text/csv"})
+        items = [json.loads(line) for line in response.text.splitlines()]
+
+        assert [item["result"]["risk_level"] for item in items] == ["LOW", "HIGH"]
@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from applications.api_gateway import auth, database
+from applications.api_gateway.config import settings
+from applications.api_gateway.database import (
+    DB_POOL_CHECKOUT_WAIT,
+    DB_POOL_CONNECTIONS_IN_USE,
+    DB_POOL_TIMEOUTS,
+    DB_QUERY_DURATION,
+    async_url,
+    build_async_engine,
+    get_engine,
+    sync_url,
+    users,
+)
+
+
+def sample(metric, suffix: str, **labels) -> float:
+    for family in metric.collect():
+        for s in family.samples:
+            if s.name.endswith(suffix) and all(s.labels.get(k) == v for k, v in labels.items()):
+                return s.value
+    return 0.0
+
+
+@pytest.fixture
+def run():
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
+
+
+@pytest.fixture
+def cleanup_users():
+    created = []
+    yield created
+    with get_engine(settings.DATABASE_URL).begin() as connection:
+        connection.execute(users.delete().where(users.c.username.in_(created)))
+    for username in created:
+        auth.invalidate_user(username)
+
+
+class TestDatabaseUrls:
+    """Test cases for driver selection from DATABASE_URL."""
+
+    def test_drivers_are_swapped_per_engine(self):
+        """Test that one DATABASE_URL serves both the async and sync engines."""
+        url = "postgresql://user:secret@db:5432/fintech_db"
+        assert async_url(url).drivername == "postgresql+asyncpg"
+        assert sync_url("postgresql+asyncpg://user:secret@db:5432/fintech_db").drivername == "postgresql+psycopg2"
+        assert async_url("sqlite:///app.db").drivername == "sqlite+aiosqlite"
+        assert sync_url("sqlite+aiosqlite:///app.db").drivername == "sqlite"
+
+
+class TestUserStorage:
+    """Test cases for users stored in the database."""
+
+    def test_created_users_are_persisted(self, run, cleanup_users):
+        """Test that a created user can be read back with its password hash."""
+        cleanup_users.append("dbuser")
+        created = run(auth.create_user("dbuser", "db@example.com", "password123", full_name="Db User"))
+        loaded = run(auth.get_user_in_db("dbuser"))
+
+        assert loaded.id == created.id
+        assert loaded.full_name == "Db User"
+        assert auth.verify_password("password123", loaded.hashed_password)
+        assert run(auth.authenticate_user_async("dbuser", "password123")).username == "dbuser"
+
+    def test_duplicate_usernames_are_rejected(self, run, cleanup_users):
+        """Test that the unique constraint surfaces as a 400."""
+        cleanup_users.append("dupuser")
+        run(auth.create_user("dupuser", "dup@example.com", "password123"))
+        with pytest.raises(HTTPException) as exc_info:
+            run(auth.create_user("dupuser", "other@example.com", "password123"))
+        assert exc_info.value.status_code == 400
+
+    def test_unknown_user_returns_none(self, run):
+        """Test that lookups for missing users return None."""
+        assert run(auth.get_user("nobody")) is None
+
+
+class TestPoolMetrics:
+    """Test cases for connection pool and query metrics."""
+
+    def test_queries_and_checkouts_are_measured(self, run):
+        """Test that statement latency and checkout wait are recorded."""
+        selects = sample(DB_QUERY_DURATION, "_count", operation="SELECT")
+        checkouts = sample(DB_POOL_CHECKOUT_WAIT, "_count")
+
+        run(database.fetch_user("testuser"))
+
+        assert sample(DB_QUERY_DURATION, "_count", operation="SELECT") - selects >= 1
+        assert sample(DB_POOL_CHECKOUT_WAIT, "_count") - checkouts == 1
+
+    def test_saturated_pool_times_out(self, run, monkeypatch):
+        """Test that checkouts beyond pool capacity wait, then time out and are counted."""
+        monkeypatch.setattr(settings, "DATABASE_POOL_SIZE", 1)
+        monkeypatch.setattr(settings, "DATABASE_MAX_OVERFLOW", 0)
+        monkeypatch.setattr(settings, "DATABASE_POOL_TIMEOUT_SECONDS", 0.1)
+        engine = build_async_engine(settings.DATABASE_URL)
+        monkeypatch.setattr(database, "_async_engine", engine)
+        timeouts = sample(DB_POOL_TIMEOUTS, "_total")
+        in_use = DB_POOL_CONNECTIONS_IN_USE._value.get()
+
+        async def scenario():
+            async with database.connect():
+                assert DB_POOL_CONNECTIONS_IN_USE._value.get() - in_use == 1
+                with pytest.raises(PoolTimeoutError):
+                    async with database.connect():
+                        pass
+            await engine.dispose()
+
+        run(scenario())
+        assert sample(DB_POOL_TIMEOUTS, "_total") - timeouts == 1
+        assert DB_POOL_CONNECTIONS_IN_USE._value.get() == in_use
@@ -0,0 +1,187 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from applications.api_gateway.feature_store import (
+    FEATURE_STORE_LOOKUPS,
+    FeatureStore,
+    Segment,
+    _hash_ids,
+    append_feature_delta,
+    applicant_hash,
+    build_feature_store,
+    compact_feature_store,
+    feature_store,
+    read_manifest,
+)
+from applications.api_gateway.main import app
+
+client = TestClient(app, headers={"Host": "localhost"})
+
+TEST_URL = "/api/v1/credit-risk/test"
+
+APPLICATION = {
+    "applicant_id": "APP7",
+    "income": 75000.0,
+    "credit_score": 720,
+    "debt_ratio": 0.35,
+    "employment_years": 5,
+    "loan_amount": 250000.0,
+    "loan_purpose": "MORTGAGE",
+}
+
+
+def history(n: int, offset: int = 0) -> tuple:
+    """Applicant ids APP0..APPn-1 with features derived from their number."""
+    numbers = np.arange(n) + offset
+    ids = [f"APP{i}" for i in range(n)]
+    return ids, {
+        "previous_assessments": numbers.astype(float),
+        "missed_payments_12m": (numbers % 4).astype(float),
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    ids, columns = history(1000)
+    build_feature_store(str(tmp_path), ids, columns)
+    store = FeatureStore(str(tmp_path))
+    assert store.refresh()
+    return store
+
+
+class TestFeatureStore:
+    """Test cases for building and reading the applicant feature store."""
+
+    def test_every_applicant_is_found(self, store):
+        """Test that lookups return each applicant's own features."""
+        for i in range(1000):
+            assert store.lookup(f"APP{i}") == {"previous_assessments": i, "missed_payments_12m": i % 4}
+
+    def test_unknown_applicant_is_a_miss(self, store):
+        """Test that applicants not in the store return None."""
+        misses = FEATURE_STORE_LOOKUPS.labels(result="miss")._value.get()
+        assert store.lookup("APP1000") is None
+        assert store.lookup("") is None
+        assert FEATURE_STORE_LOOKUPS.labels(result="miss")._value.get() - misses == 2
+
+    def test_arrays_are_memory_mapped(self, store):
+        """Test that segments are read through memory maps, not loaded."""
+        segment = store._segments[0]
+        assert isinstance(segment.hashes.base, np.memmap)
+        assert all(isinstance(column.base, np.memmap) for column in segment.columns.values())
+
+    def test_vectorized_hash_matches_lookup_hash(self):
+        """Test that the build-time and lookup-time hashes agree, including non-ASCII ids."""
+        ids = ["A", "APP123456", "émile-42", "x" * 40]
+        encoded = np.char.encode(np.asarray(ids), "utf-8")
+        assert _hash_ids(encoded).tolist() == [applicant_hash(i) for i in ids]
+
+    def test_buckets_hold_few_rows(self, store):
+        """Test that the index keeps buckets small, so lookups stay O(1)."""
+        bucket_sizes = np.diff(store._segments[0].buckets)
+        assert len(bucket_sizes) >= 1000
+        assert bucket_sizes.max() <= 8
+
+    def test_missing_values_are_none(self, tmp_path):
+        """Test that NaN features are returned as None."""
+        build_feature_store(str(tmp_path), ["APP1"], {"previous_assessments": [np.nan]})
+        store = FeatureStore(str(tmp_path))
+        store.refresh()
+        assert store.lookup("APP1") == {"previous_assessments": None}
+
+    def test_invalid_builds_are_rejected(self, tmp_path):
+        """Test that duplicate ids and mismatched columns are refused."""
+        with pytest.raises(ValueError):
+            build_feature_store(str(tmp_path), ["APP1", "APP1"], {"score": [1.0, 2.0]})
+        with pytest.raises(ValueError):
+            build_feature_store(str(tmp_path), ["APP1", "APP2"], {"score": [1.0]})
+        with pytest.raises(ValueError):
+            append_feature_delta(str(tmp_path), ["APP1"], {"score": [1.0]})
+
+
+class TestIncrementalRefresh:
+    """Test cases for delta segments and compaction."""
+
+    def test_delta_overrides_and_adds_applicants(self, store):
+        """Test that a delta replaces changed applicants and adds new ones without a rebuild."""
+        base = read_manifest(store.root)["segments"][0]
+        append_feature_delta(
+            str(store.root), ["APP5", "NEW1"],
+            {"previous_assessments": [50.0, 1.0], "missed_payments_12m": [3.0, 0.0]}
+        )
+        assert store.lookup("NEW1") is None
+        assert store.refresh()
+        assert read_manifest(store.root)["segments"][0] == base
+        assert store.lookup("APP5") == {"previous_assessments": 50, "missed_payments_12m": 3}
+        assert store.lookup("NEW1") == {"previous_assessments": 1, "missed_payments_12m": 0}
+        assert store.lookup("APP6") == {"previous_assessments": 6, "missed_payments_12m": 2}
+
+    def test_refresh_reuses_opened_segments(self, store):
+        """Test that a delta only maps the new segment."""
+        base = store._segments[0]
+        append_feature_delta(str(store.root), ["APP1"], {"previous_assessments": [0.0], "missed_payments_12m": [0.0]})
+        store.refresh()
+        assert store._segments[-1] is base
+        assert not store.refresh()
+
+    def test_delta_must_match_the_store_features(self, store):
+        """Test that a delta with different columns is refused."""
+        with pytest.raises(ValueError):
+            append_feature_delta(str(store.root), ["APP1"], {"previous_assessments": [0.0]})
+
+    def test_too_many_deltas_are_compacted(self, store):
+        """Test that deltas beyond max_deltas are merged into a new base, newest values winning."""
+        for version in range(3):
+            append_feature_delta(
+                str(store.root), ["APP1", f"NEW{version}"],
+                {"previous_assessments": [100.0 + version, 1.0], "missed_payments_12m": [0.0, 0.0]},
+                max_deltas=2
+            )
+        manifest = read_manifest(store.root)
+        assert len(manifest["segments"]) == 1
+        assert sorted(path.name for path in store.root.iterdir() if path.is_dir()) == manifest["segments"]
+
+        store.refresh()
+        assert len(Segment(store.root / manifest["segments"][0], manifest["features"])) == 1003
+        assert store.lookup("APP1")["previous_assessments"] == 102
+        assert all(store.lookup(f"NEW{version}") is not None for version in range(3))
+        assert store.lookup("APP999")["previous_assessments"] == 999
+
+    def test_compaction_keeps_serving_mapped_segments(self, store):
+        """Test that a worker that has not refreshed yet still reads removed segments."""
+        other = FeatureStore(str(store.root))
+        other.refresh()
+        compact_feature_store(str(store.root))
+        assert other.lookup("APP3") == {"previous_assessments": 3, "missed_payments_12m": 3}
+
+    def test_broken_manifest_keeps_current_segments(self, store):
+        """Test that a manifest naming a missing segment is ignored."""
+        manifest = read_manifest(store.root)
+        (store.root / "MANIFEST").write_text(
+            '{"generation": 99, "features": %s, "segments": ["missing"]}' % str(manifest["features"]).replace("'", '"')
+        )
+        assert not store.refresh()
+        assert store.lookup("APP2") is not None
+
+
+class TestAssessmentFeatures:
+    """Test cases for applicant features in assessment responses."""
+
+    def test_known_applicant_gets_features(self, tmp_path, monkeypatch):
+        """Test that assessments include the applicant's stored features."""
+        ids, columns = history(10)
+        build_feature_store(str(tmp_path), ids, columns)
+        monkeypatch.setattr(feature_store, "root", tmp_path)
+        monkeypatch.setattr(feature_store, "_segments", ())
+        feature_store.refresh()
+
+        data = client.post(TEST_URL, json=APPLICATION).json()
+        assert data["applicant_features"] == {"previous_assessments": 7.0, "missed_payments_12m": 3.0}
+        unknown = client.post(TEST_URL, json={**APPLICATION, "applicant_id": "APP99"}).json()
+        assert unknown["applicant_features"] is None
+
+    def test_no_store_means_no_features(self):
+        """Test that assessments work without a feature store."""
+        response = client.post(TEST_URL, json=APPLICATION)
+        assert response.status_code == 200
+        assert response.json()["applicant_features"] is None
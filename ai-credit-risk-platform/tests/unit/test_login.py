@@ -0,0 +1,124 @@
+import asyncio
+import time
+
+from fastapi.testclient import TestClient
+from applications.api_gateway import auth
+from applications.api_gateway.main import app
+from applications.api_gateway.password_hashing import PasswordHashPool, PasswordHashPoolFull, pwd_context
+
+client = TestClient(app, headers={"Host": "localhost"})
+
+LOGIN_URL = "/api/v1/auth/login"
+
+
+class TestLoginEndpoint:
+    """Test cases for the token-issuing login endpoint."""
+
+    def test_login_returns_usable_token(self):
+        """Test that valid credentials return a bearer token for protected endpoints."""
+        response = client.post(LOGIN_URL, json={"username": "testuser", "password": "testpassword"})
+        assert response.status_code == 200
+        token = response.json()
+        assert token["token_type"] == "bearer"
+
+        me = client.get("/api/v1/me", headers={"Authorization": f"Bearer {token['access_token']}"})
+        assert me.status_code == 200
+        assert me.json()["username"] == "testuser"
+        assert "hashed_password" not in me.json()
+
+    def test_wrong_password_is_rejected(self):
+        """Test that an invalid password returns 401."""
+        response = client.post(LOGIN_URL, json={"username": "testuser", "password": "wrong"})
+        assert response.status_code == 401
+        assert response.headers["www-authenticate"] == "Bearer"
+
+    def test_unknown_user_is_rejected(self):
+        """Test that an unknown user returns 401."""
+        response = client.post(LOGIN_URL, json={"username": "nobody", "password": "testpassword"})
+        assert response.status_code == 401
+
+    def test_unknown_user_costs_a_password_check(self, monkeypatch):
+        """Test that an unknown user is checked against the dummy hash, so it takes as long as a known one."""
+        checked = []
+        verify = auth.password_hash_pool.verify
+
+        async def recording_verify(password, hashed_password):
+            checked.append(hashed_password)
+            return await verify(password, hashed_password)
+
+        monkeypatch.setattr(auth.password_hash_pool, "verify", recording_verify)
+        # The dummy hash's own password, which must still not log anyone in
+        response = client.post(LOGIN_URL, json={"username": "nobody", "password": "not-a-password"})
+        assert response.status_code == 401
+        assert checked == [auth.DUMMY_PASSWORD_HASH]
+        # Same scheme and cost as real hashes
+        assert auth.DUMMY_PASSWORD_HASH[:7] == pwd_context.hash("testpassword")[:7]
+
+    def test_saturated_pool_returns_503(self, monkeypatch):
+        """Test that logins are shed with Retry-After when the hash queue is full."""
+        async def full(*args, **kwargs):
+            raise PasswordHashPoolFull()
+
+        monkeypatch.setattr(auth.password_hash_pool, "verify", full)
+        response = client.post(LOGIN_URL, json={"username": "testuser", "password": "testpassword"})
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
+
+
+class TestPasswordHashPool:
+    """Test cases for the bounded password hash pool."""
+
+    def test_hashing_does_not_block_the_event_loop(self):
+        """Test that the loop keeps ticking while bcrypt runs in the pool."""
+        pool = PasswordHashPool(max_workers=2, max_queue=4)
+        hashed = pwd_context.hash("secret")
+
+        async def scenario():
+            max_gap = 0.0
+            verification = asyncio.gather(*(pool.verify("secret", hashed) for _ in range(3)))
+            task = asyncio.ensure_future(verification)
+            last = time.perf_counter()
+            while not task.done():
+                await asyncio.sleep(0.005)
+                now = time.perf_counter()
+                max_gap = max(max_gap, now - last)
+                last = now
+            return await task, max_gap
+
+        try:
+            results, max_gap = asyncio.run(scenario())
+        finally:
+            pool.shutdown()
+        assert results == [True, True, True]
+        assert max_gap < 0.1
+
+    def test_queue_limit_rejects_excess_work(self):
+        """Test that work beyond workers plus queue is rejected immediately."""
+        pool = PasswordHashPool(max_workers=1, max_queue=1)
+        hashed = pwd_context.hash("secret")
+
+        async def scenario():
+            return await asyncio.gather(
+                *(pool.verify("secret", hashed) for _ in range(3)),
+                return_exceptions=True
+            )
+
+        try:
+            results = asyncio.run(scenario())
+        finally:
+            pool.shutdown()
+        assert results[:2] == [True, True]
+        assert isinstance(results[2], PasswordHashPoolFull)
+
+    def test_async_hash_round_trips(self):
+        """Test that async hashing produces verifiable hashes."""
+        pool = PasswordHashPool(max_workers=1, max_queue=0)
+
+        async def scenario():
+            hashed = await pool.hash("secret")
+            return await pool.verify("secret", hashed), await pool.verify("other", hashed)
+
+        try:
+            assert asyncio.run(scenario()) == (True, False)
+        finally:
+            pool.shutdown()
@@ -0,0 +1,62 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from applications.api_gateway.middleware import (
+    REQUEST_COUNT,
+    REQUEST_LATENCY,
+    REQUESTS_IN_PROGRESS,
+    RESPONSE_SIZE,
+    MetricsMiddleware,
+)
+
+items_app = FastAPI()
+items_app.add_middleware(MetricsMiddleware)
+
+
+@items_app.get("/items/{item_id}")
+async def read_item(item_id: int):
+    return {"item_id": item_id, "padding": "x" * 100}
+
+
+client = TestClient(items_app)
+
+
+def sample(metric, suffix: str, **labels) -> float:
+    for family in metric.collect():
+        for s in family.samples:
+            if s.name.endswith(suffix) and all(s.labels.get(k) == v for k, v in labels.items()):
+                return s.value
+    return 0.0
+
+
+class TestMetricsMiddleware:
+    """Test cases for the ASGI metrics middleware."""
+
+    def test_requests_are_labelled_by_route_template(self):
+        """Test that path parameters do not create new label values."""
+        before = sample(REQUEST_COUNT, "_total", endpoint="/items/{item_id}", status="200")
+        for item_id in range(5):
+            assert client.get(f"/items/{item_id}").status_code == 200
+        after = sample(REQUEST_COUNT, "_total", endpoint="/items/{item_id}", status="200")
+
+        assert after - before == 5
+        assert sample(REQUEST_COUNT, "_total", endpoint="/items/3") == 0
+        assert sample(REQUEST_LATENCY, "_count", method="GET", endpoint="/items/{item_id}") >= 5
+
+    def test_unmatched_requests_share_one_label(self):
+        """Test that 404s are not labelled with arbitrary paths."""
+        before = sample(REQUEST_COUNT, "_total", endpoint="<unmatched>", status="404")
+        client.get("/does-not-exist/12345")
+        client.get("/does-not-exist/67890")
+        assert sample(REQUEST_COUNT, "_total", endpoint="<unmatched>", status="404") - before == 2
+
+    def test_response_size_is_recorded(self):
+        """Test that response body bytes are observed."""
+        before = sample(RESPONSE_SIZE, "_sum", method="GET", endpoint="/items/{item_id}")
+        response = client.get("/items/1")
+        after = sample(RESPONSE_SIZE, "_sum", method="GET", endpoint="/items/{item_id}")
+        assert after - before == len(response.content)
+
+    def test_in_progress_gauge_returns_to_zero(self):
+        """Test that the in-flight gauge is decremented after each request."""
+        client.get("/items/1")
+        assert sample(REQUESTS_IN_PROGRESS, "", method="GET") == 0
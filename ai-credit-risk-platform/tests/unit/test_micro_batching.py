@@ -0,0 +1,180 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from applications.api_gateway.config import settings
+from applications.api_gateway.main import app
+from applications.api_gateway.micro_batching import MICRO_BATCH_SIZE, MicroBatcher
+from applications.api_gateway.models import CreditRiskRequest
+
+TEST_URL = "/api/v1/credit-risk/test"
+
+APPLICATION = {
+    "applicant_id": "APP1",
+    "income": 25000.0,
+    "credit_score": 720,
+    "debt_ratio": 0.35,
+    "employment_years": 5,
+    "loan_amount": 250000.0,
+    "loan_purpose": "MORTGAGE",
+}
+
+
+def doubling_batcher(calls: list, **kwargs) -> MicroBatcher:
+    def process(items):
+        calls.append(list(items))
+        return [item * 2 for item in items]
+
+    return MicroBatcher("test", process, **kwargs)
+
+
+def histogram_totals(histogram, **labels) -> tuple:
+    """Return (sum, count) of a labelled histogram."""
+    samples = {
+        sample.name: sample.value for sample in histogram.collect()[0].samples
+        if sample.labels == labels and sample.name.endswith(("_sum", "_count"))
+    }
+    return samples.get(f"{histogram._name}_sum", 0), samples.get(f"{histogram._name}_count", 0)
+
+
+class TestMicroBatcher:
+    """Test cases for coalescing concurrent submissions."""
+
+    def test_concurrent_items_share_a_batch(self):
+        """Test that concurrent submissions are processed together, in order."""
+        calls = []
+        batcher = doubling_batcher(calls, max_batch_size=64, max_wait=0.01)
+
+        async def main():
+            return await asyncio.gather(*(batcher.submit(i) for i in range(10)))
+
+        assert asyncio.run(main()) == [i * 2 for i in range(10)]
+        assert calls == [list(range(10))]
+
+    def test_full_batches_are_processed_without_waiting(self):
+        """Test that max_batch_size splits a burst and flushes immediately."""
+        calls = []
+        batcher = doubling_batcher(calls, max_batch_size=4, max_wait=10)
+
+        async def main():
+            start = time.perf_counter()
+            results = await asyncio.gather(*(batcher.submit(i) for i in range(8)))
+            return results, time.perf_counter() - start
+
+        results, elapsed = asyncio.run(main())
+        assert results == [i * 2 for i in range(8)]
+        assert calls == [[0, 1, 2, 3], [4, 5, 6, 7]]
+        assert elapsed < 1
+
+    def test_lone_item_waits_at_most_max_wait(self):
+        """Test that a partial batch is flushed after max_wait."""
+        calls = []
+        batcher = doubling_batcher(calls, max_batch_size=64, max_wait=0.02)
+
+        async def main():
+            start = time.perf_counter()
+            result = await batcher.submit(21)
+            return result, time.perf_counter() - start
+
+        result, elapsed = asyncio.run(main())
+        assert result == 42
+        assert 0.015 <= elapsed < 0.5
+
+    def test_errors_reach_every_waiter(self):
+        """Test that a failing batch fails each of its requests."""
+        def process(items):
+            raise ValueError("model exploded")
+
+        batcher = MicroBatcher("test", process, max_batch_size=8, max_wait=0.001)
+
+        async def main():
+            return await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+
+        results = asyncio.run(main())
+        assert all(isinstance(result, ValueError) for result in results)
+
+    def test_wrong_result_count_is_an_error(self):
+        """Test that process must return one result per item."""
+        batcher = MicroBatcher("test", lambda items: items[:1], max_batch_size=8, max_wait=0.001)
+
+        async def main():
+            return await asyncio.gather(*(batcher.submit(i) for i in range(2)), return_exceptions=True)
+
+        assert all(isinstance(result, RuntimeError) for result in asyncio.run(main()))
+
+    def test_cancelled_requests_are_skipped(self):
+        """Test that items whose request went away are not processed."""
+        calls = []
+        batcher = doubling_batcher(calls, max_batch_size=64, max_wait=0.01)
+
+        async def main():
+            abandoned = asyncio.ensure_future(batcher.submit(1))
+            kept = asyncio.ensure_future(batcher.submit(2))
+            await asyncio.sleep(0)
+            abandoned.cancel()
+            return await kept
+
+        assert asyncio.run(main()) == 4
+        assert calls == [[2]]
+
+    def test_batcher_survives_event_loop_changes(self):
+        """Test that the batcher can be reused from a new event loop."""
+        calls = []
+        batcher = doubling_batcher(calls, max_batch_size=64, max_wait=0.001)
+        assert asyncio.run(batcher.submit(1)) == 2
+        assert asyncio.run(batcher.submit(2)) == 4
+
+    def test_batch_sizes_are_observed(self):
+        """Test that each batch's size is recorded."""
+        batcher = doubling_batcher([], max_batch_size=64, max_wait=0.001)
+        before_sum, before_count = histogram_totals(MICRO_BATCH_SIZE, batcher="test")
+
+        async def main():
+            await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+
+        asyncio.run(main())
+        after_sum, after_count = histogram_totals(MICRO_BATCH_SIZE, batcher="test")
+        assert (after_sum - before_sum, after_count - before_count) == (5, 1)
+
+    def test_invalid_batch_size_is_rejected(self):
+        """Test that max_batch_size must be positive."""
+        with pytest.raises(ValueError):
+            MicroBatcher("test", list, max_batch_size=0)
+
+
+class TestBatchedConfidence:
+    """Test cases for micro-batched model confidence in the assessment endpoints."""
+
+    def test_concurrent_requests_are_scored_in_one_batch(self, active_model):
+        """Test that concurrent assessments share a model call and get their own results."""
+        payloads = [{**APPLICATION, "applicant_id": f"APP{i}", "credit_score": 500 + i * 30} for i in range(8)]
+        before_sum, before_count = histogram_totals(MICRO_BATCH_SIZE, batcher="model_confidence")
+
+        async def main():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://localhost") as client:
+                return await asyncio.gather(*(
+                    client.post(TEST_URL, json=payload) for payload in payloads
+                ))
+
+        responses = asyncio.run(main())
+        after_sum, after_count = histogram_totals(MICRO_BATCH_SIZE, batcher="model_confidence")
+        assert after_sum - before_sum == 8
+        assert after_count - before_count < 8
+
+        for payload, response in zip(payloads, responses):
+            data = response.json()
+            expected = active_model.confidence_score(CreditRiskRequest(**payload), data["risk_level"])
+            assert data["applicant_id"] == payload["applicant_id"]
+            assert data["confidence_score"] == pytest.approx(expected)
+
+    def test_batching_can_be_disabled(self, active_model, monkeypatch):
+        """Test that MODEL_BATCHING_ENABLED=false predicts per request."""
+        monkeypatch.setattr(settings, "MODEL_BATCHING_ENABLED", False)
+        before_sum, _ = histogram_totals(MICRO_BATCH_SIZE, batcher="model_confidence")
+        data = TestClient(app, headers={"Host": "localhost"}).post(TEST_URL, json=APPLICATION).json()
+        expected = active_model.confidence_score(CreditRiskRequest(**APPLICATION), data["risk_level"])
+        assert data["confidence_score"] == pytest.approx(expected)
+        assert histogram_totals(MICRO_BATCH_SIZE, batcher="model_confidence")[0] == before_sum
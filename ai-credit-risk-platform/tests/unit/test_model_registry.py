@@ -0,0 +1,166 @@
+import threading
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from applications.api_gateway.main import app
+from applications.api_gateway.model_registry import (
+    ARTIFACT_NAME,
+    CURRENT_NAME,
+    MODEL_LOAD_ERRORS,
+    ModelRegistry,
+    publish_model,
+)
+from applications.api_gateway.models import CreditRiskRequest
+from applications.api_gateway.scoring import assess_records
+from applications.api_gateway.scoring_engine import SUPPORTED_FEATURES
+
+client = TestClient(app, headers={"Host": "localhost"})
+
+TEST_URL = "/api/v1/credit-risk/test"
+
+APPLICATION = {
+    "applicant_id": "APP1",
+    "income": 25000.0,
+    "credit_score": 720,
+    "debt_ratio": 0.35,
+    "employment_years": 5,
+    "loan_amount": 250000.0,
+    "loan_purpose": "MORTGAGE",
+}
+REQUEST = CreditRiskRequest.model_validate(APPLICATION)
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return ModelRegistry(str(tmp_path))
+
+
+def error_count() -> float:
+    return MODEL_LOAD_ERRORS._value.get()
+
+
+class TestModelRegistry:
+    """Test cases for loading and swapping model versions."""
+
+    def test_nothing_is_served_before_a_model_is_published(self, registry):
+        """Test that an empty registry has no active model."""
+        assert registry.refresh() is False
+        assert registry.active is None
+
+    def test_published_model_is_memory_mapped(self, tmp_path, registry, estimator):
+        """Test that the estimator's arrays are mapped from the artifact file."""
+        publish_model(str(tmp_path), "v1", estimator, SUPPORTED_FEATURES)
+        assert registry.refresh() is True
+
+        model = registry.active
+        assert model.version == "v1"
+        assert model.features == SUPPORTED_FEATURES
+        coef = model.estimator[-1].coef_
+        assert isinstance(coef, np.memmap)
+        assert coef.filename == str(tmp_path / "v1" / ARTIFACT_NAME)
+        assert registry.refresh() is False
+
+    def test_mmap_can_be_disabled(self, tmp_path, estimator):
+        """Test that MODEL_MMAP=false loads arrays into process memory."""
+        publish_model(str(tmp_path), "v1", estimator, SUPPORTED_FEATURES)
+        registry = ModelRegistry(str(tmp_path), mmap_mode=None)
+        registry.refresh()
+        assert not isinstance(registry.active.estimator[-1].coef_, np.memmap)
+
+    def test_new_version_is_swapped_in(self, tmp_path, registry, estimator):
+        """Test that publishing a version replaces the active model on refresh."""
+        publish_model(str(tmp_path), "v1", estimator, SUPPORTED_FEATURES)
+        registry.refresh()
+        old = registry.active
+
+        publish_model(str(tmp_path), "v2", estimator, SUPPORTED_FEATURES)
+        assert registry.refresh() is True
+        assert registry.active.version == "v2"
+        # A request still holding the old model can finish with it
+        assert old.version == "v1"
+        assert old.confidence_score(REQUEST, "LOW") is not None
+
+    def test_broken_version_keeps_the_active_model(self, tmp_path, registry, estimator):
+        """Test that a version that fails to load is not activated or retried."""
+        publish_model(str(tmp_path), "v1", estimator, SUPPORTED_FEATURES)
+        registry.refresh()
+        (tmp_path / "v2").mkdir()
+        (tmp_path / "v2" / ARTIFACT_NAME).write_bytes(b"not a joblib file")
+        (tmp_path / CURRENT_NAME).write_text("v2\n")
+
+        errors = error_count()
+        assert registry.refresh() is False
+        assert registry.refresh() is False
+        assert registry.active.version == "v1"
+        assert error_count() - errors == 1
+
+    def test_unsafe_versions_are_rejected(self, tmp_path, estimator):
+        """Test that versions cannot escape the registry directory."""
+        with pytest.raises(ValueError):
+            publish_model(str(tmp_path), "../v1", estimator, SUPPORTED_FEATURES)
+
+    def test_unsupported_features_are_rejected(self, tmp_path, registry, estimator):
+        """Test that artifacts must use CreditRiskRequest features."""
+        publish_model(str(tmp_path), "v1", estimator, ("income", "age", "debt_ratio", "x", "y"))
+        assert registry.refresh() is False
+        assert registry.active is None
+
+    def test_swaps_do_not_disturb_concurrent_predictions(self, tmp_path, registry, estimator):
+        """Test that predictions keep succeeding while versions are swapped."""
+        publish_model(str(tmp_path), "v1", estimator, SUPPORTED_FEATURES)
+        registry.refresh()
+        errors = []
+        stop = threading.Event()
+
+        def predict():
+            while not stop.is_set():
+                try:
+                    assert registry.active.confidence_score(REQUEST, "LOW") is not None
+                except Exception as e:  # pragma: no cover - reported below
+                    errors.append(e)
+
+        threads = [threading.Thread(target=predict) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for i in range(2, 6):
+            publish_model(str(tmp_path), f"v{i}", estimator, SUPPORTED_FEATURES)
+            assert registry.refresh() is True
+        stop.set()
+        for thread in threads:
+            thread.join()
+        assert errors == []
+        assert registry.active.version == "v5"
+
+
+class TestModelConfidence:
+    """Test cases for model output in assessment responses."""
+
+    def test_responses_omit_model_fields_without_a_model(self):
+        """Test that confidence_score and model_version are null with no model."""
+        data = client.post(TEST_URL, json=APPLICATION).json()
+        assert data["model_version"] is None
+        assert data["confidence_score"] is None
+
+    def test_single_assessment_includes_model_output(self, active_model):
+        """Test that the active model's version and confidence are returned."""
+        data = client.post(TEST_URL, json=APPLICATION).json()
+        assert data["model_version"] == "v1"
+        assert 0 <= data["confidence_score"] <= 1
+        assert data["confidence_score"] == pytest.approx(
+            active_model.confidence_score(REQUEST, data["risk_level"])
+        )
+
+    def test_batch_matches_single_assessments(self, active_model):
+        """Test that the vectorized path yields the same confidence as the scalar path."""
+        records = [APPLICATION, {**APPLICATION, "applicant_id": "APP2", "credit_score": 500}]
+        items = assess_records(records, assessor="test")
+        for record, item in zip(records, items):
+            single = client.post(TEST_URL, json=record).json()
+            assert item.result.model_version == "v1"
+            assert item.result.confidence_score == pytest.approx(single["confidence_score"])
+
+    def test_unknown_risk_level_has_no_confidence(self, active_model):
+        """Test that levels the model was not trained on give no confidence."""
+        assert active_model.confidence_score(REQUEST, "UNKNOWN") is None
+
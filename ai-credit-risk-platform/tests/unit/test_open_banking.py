@@ -0,0 +1,255 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from applications.api_gateway.open_banking import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    OPEN_BANKING_HEDGES,
+    OPEN_BANKING_REQUESTS,
+    CircuitBreaker,
+    OpenBankingClient,
+    OpenBankingError,
+    OpenBankingUnavailable,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def mock_client(handler, **kwargs) -> OpenBankingClient:
+    """A client whose requests are answered in process by handler."""
+    options = {"hedge_after": 0, "timeout": 1.0, **kwargs}
+    return OpenBankingClient("https://bank.test", api_key="key", transport=httpx.MockTransport(handler), **options)
+
+
+def ok(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, json={"path": request.url.path, "params": dict(request.url.params)})
+
+
+class TestCircuitBreaker:
+    """Test cases for the circuit breaker state machine."""
+
+    def test_opens_after_consecutive_failures(self):
+        """Test that the circuit opens at the failure threshold and fails fast."""
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10, clock=FakeClock())
+        for _ in range(2):
+            breaker.record_failure()
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        assert not breaker.allow()
+
+    def test_success_resets_the_failure_count(self):
+        """Test that only consecutive failures count."""
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=FakeClock())
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state == CLOSED
+
+    def test_half_open_trial_closes_or_reopens(self):
+        """Test that after reset_timeout one trial call decides the state."""
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+        breaker.record_failure()
+        clock.now = 10
+        assert breaker.allow()
+        assert breaker.state == HALF_OPEN
+        assert not breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == OPEN
+
+        clock.now = 20
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.state == CLOSED
+        assert breaker.allow()
+
+    def test_abandoned_trial_is_retried(self):
+        """Test that a trial that never reports back does not wedge the circuit half-open."""
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+        breaker.record_failure()
+        clock.now = 10
+        assert breaker.allow()
+        clock.now = 20
+        assert breaker.allow()
+
+
+class TestOpenBankingClient:
+    """Test cases for the Open Banking client."""
+
+    def test_requests_are_authenticated_and_quoted(self):
+        """Test that calls carry the API key and escape account ids."""
+        seen = []
+
+        def handler(request):
+            seen.append(request)
+            return ok(request)
+
+        async def main():
+            async with mock_client(handler) as client:
+                return await client.get_transactions("acc/1", from_booking_date="2024-01-01")
+
+        data = asyncio.run(main())
+        assert seen[0].headers["Authorization"] == "Bearer key"
+        assert seen[0].url.raw_path == b"/accounts/acc%2F1/transactions?fromBookingDateTime=2024-01-01"
+        assert data["params"] == {"fromBookingDateTime": "2024-01-01"}
+
+    def test_account_details_are_cached_but_balances_are_not(self):
+        """Test that rarely changing account data is served from the cache."""
+        paths = []
+
+        def handler(request):
+            paths.append(request.url.path)
+            return ok(request)
+
+        async def main():
+            async with mock_client(handler) as client:
+                for _ in range(3):
+                    await client.get_account("acc1")
+                    await client.get_balances("acc1")
+
+        asyncio.run(main())
+        assert paths.count("/accounts/acc1") == 1
+        assert paths.count("/accounts/acc1/balances") == 3
+
+    def test_client_errors_do_not_trip_the_circuit(self):
+        """Test that 4xx answers raise OpenBankingError and count as the upstream working."""
+        client = mock_client(lambda request: httpx.Response(404), circuit_failures=1)
+
+        async def main():
+            async with client:
+                for _ in range(3):
+                    with pytest.raises(OpenBankingError) as error:
+                        await client.get_account("missing")
+                    assert not isinstance(error.value, OpenBankingUnavailable)
+                    assert error.value.status_code == 404
+
+        asyncio.run(main())
+        assert client.breaker.state == CLOSED
+
+    def test_invalid_json_is_an_error_that_counts_against_the_circuit(self):
+        """Test that a 2xx with a truncated body raises OpenBankingError and records a failure."""
+        client = mock_client(lambda request: httpx.Response(200, content=b'{"balance": 12'), circuit_failures=2)
+        errors = OPEN_BANKING_REQUESTS.labels(outcome="error")._value.get()
+
+        async def main():
+            async with client:
+                for _ in range(2):
+                    with pytest.raises(OpenBankingError) as error:
+                        await client.get_balances("acc1")
+                    assert not isinstance(error.value, OpenBankingUnavailable)
+                    assert error.value.status_code == 200
+
+        asyncio.run(main())
+        assert OPEN_BANKING_REQUESTS.labels(outcome="error")._value.get() - errors == 2
+        assert client.breaker.state == OPEN
+
+    def test_server_errors_open_the_circuit(self):
+        """Test that repeated 5xx answers open the circuit, after which calls fail fast."""
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(503)
+
+        client = mock_client(handler, circuit_failures=2, circuit_reset=60)
+
+        async def main():
+            async with client:
+                for _ in range(5):
+                    with pytest.raises(OpenBankingUnavailable):
+                        await client.get_balances("acc1")
+
+        asyncio.run(main())
+        assert len(calls) == 2
+        assert client.breaker.state == OPEN
+
+    def test_slow_upstream_times_out(self):
+        """Test that a call is bounded by the client timeout."""
+        async def handler(request):
+            await asyncio.sleep(5)
+            return ok(request)
+
+        async def main():
+            async with mock_client(handler, timeout=0.1) as client:
+                start = time.perf_counter()
+                with pytest.raises(OpenBankingUnavailable):
+                    await client.get_balances("acc1")
+                return time.perf_counter() - start
+
+        assert asyncio.run(main()) < 1
+
+    def test_slow_attempt_is_hedged(self):
+        """Test that a second attempt is sent after hedge_after and the first answer wins."""
+        calls = []
+
+        async def handler(request):
+            calls.append(request)
+            await asyncio.sleep(2 if len(calls) == 1 else 0)
+            return ok(request)
+
+        hedges = OPEN_BANKING_HEDGES._value.get()
+
+        async def main():
+            async with mock_client(handler, hedge_after=0.05, timeout=5) as client:
+                start = time.perf_counter()
+                data = await client.get_balances("acc1")
+                return data, time.perf_counter() - start
+
+        data, elapsed = asyncio.run(main())
+        assert data["path"] == "/accounts/acc1/balances"
+        assert len(calls) == 2
+        assert elapsed < 1
+        assert OPEN_BANKING_HEDGES._value.get() - hedges == 1
+
+    def test_failed_first_attempt_waits_for_the_hedge(self):
+        """Test that an error from one attempt does not discard a pending hedged attempt."""
+        calls = []
+
+        async def handler(request):
+            calls.append(request)
+            if len(calls) == 1:
+                await asyncio.sleep(0.1)
+                return httpx.Response(502)
+            await asyncio.sleep(0.2)
+            return ok(request)
+
+        async def main():
+            async with mock_client(handler, hedge_after=0.05, timeout=5) as client:
+                return await client.get_balances("acc1")
+
+        assert asyncio.run(main())["path"] == "/accounts/acc1/balances"
+
+    def test_concurrency_per_host_is_limited(self):
+        """Test that no more than max_concurrency_per_host requests run at once."""
+        running = []
+        peak = []
+
+        async def handler(request):
+            running.append(request)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.remove(request)
+            return ok(request)
+
+        async def main():
+            async with mock_client(handler, max_concurrency_per_host=3) as client:
+                await asyncio.gather(*(client.get_balances(f"acc{i}") for i in range(12)))
+
+        asyncio.run(main())
+        assert max(peak) == 3
+
+    def test_client_must_be_started(self):
+        """Test that calls before start() are refused."""
+        with pytest.raises(RuntimeError):
+            asyncio.run(mock_client(ok).get_accounts())
@@ -0,0 +1,175 @@
+import asyncio
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from applications.api_gateway.auth import generate_test_token
+from applications.api_gateway.config import settings
+from applications.api_gateway.main import app
+from applications.api_gateway.models import PortfolioLoan
+from applications.api_gateway.portfolio import (
+    Portfolio,
+    build_portfolio,
+    loss_model,
+    plan_chunks,
+    portfolio_losses,
+    simulate_losses,
+    simulate_portfolio,
+    summarize_losses,
+)
+from applications.api_gateway.scoring_engine import CompiledRuleSet, get_scoring_engine, load_ruleset
+from applications.api_gateway.scoring_pool import ScoringPool
+
+client = TestClient(app, headers={"Host": "localhost"})
+
+PORTFOLIO_URL = "/api/v1/portfolio/risk"
+
+
+def make_loan(i: int, **overrides) -> dict:
+    loan = {
+        "applicant_id": f"LOAN{i}",
+        "income": 20000.0 + (i % 7) * 10000,
+        "credit_score": 550 + (i % 5) * 50,
+        "debt_ratio": (i % 6) / 10,
+        "employment_years": i % 10,
+        "loan_amount": 10000.0 + i * 100,
+        "loan_purpose": "MORTGAGE",
+    }
+    loan.update(overrides)
+    return loan
+
+
+def homogeneous(loans: int, pd: float) -> Portfolio:
+    """loans identical loans of exposure 1000 and LGD 0.5."""
+    return Portfolio(np.full(loans, pd), np.full(loans, 1000.0), np.full(loans, 0.5))
+
+
+@pytest.fixture
+def auth_headers():
+    return {"Authorization": f"Bearer {generate_test_token()}"}
+
+
+class TestBuildPortfolio:
+    """Test cases for deriving simulation inputs from loans."""
+
+    def test_pd_comes_from_the_risk_band(self):
+        """Test that each loan gets its band's PD, its loan_amount as EAD and its LGD."""
+        loans = [
+            PortfolioLoan(**make_loan(1, income=75000.0, credit_score=720, debt_ratio=0.1)),
+            PortfolioLoan(**make_loan(2, income=20000.0, credit_score=600, debt_ratio=0.5, loss_given_default=0.2)),
+        ]
+        portfolio = build_portfolio(loans, get_scoring_engine())
+        assert portfolio.probabilities_of_default.tolist() == [0.01, 0.2]
+        assert portfolio.exposures.tolist() == [10100.0, 10200.0]
+        assert portfolio.loss_given_default.tolist() == [settings.PORTFOLIO_DEFAULT_LGD, 0.2]
+        assert portfolio.expected_loss == pytest.approx(0.01 * 10100 * 0.45 + 0.2 * 10200 * 0.2)
+
+    def test_rules_without_pd_are_rejected(self):
+        """Test that a rule set must calibrate every band before PDs can be derived."""
+        ruleset = load_ruleset().model_copy(deep=True)
+        ruleset.levels[1].probability_of_default = None
+        with pytest.raises(ValueError, match="MEDIUM"):
+            CompiledRuleSet(ruleset).probabilities_of_default(np.array([0, 50]))
+
+
+class TestSimulation:
+    """Test cases for the Monte Carlo loss simulation."""
+
+    def test_simulated_expected_loss_matches_analytic(self):
+        """Test that the mean simulated loss converges on sum(PD x EAD x LGD)."""
+        rng = np.random.default_rng(7)
+        portfolio = Portfolio(
+            rng.choice([0.01, 0.05, 0.2], 300), rng.uniform(1e4, 1e6, 300), rng.uniform(0.2, 0.6, 300)
+        )
+        risk = summarize_losses(portfolio, portfolio_losses(portfolio, 50000, 0.15, seed=1), [0.99])
+        assert risk.simulated_expected_loss == pytest.approx(risk.expected_loss, rel=0.02)
+        assert risk.total_exposure == pytest.approx(portfolio.exposures.sum())
+
+    def test_independent_defaults_are_binomial(self):
+        """Test that without correlation the number of defaults has binomial spread."""
+        losses = portfolio_losses(homogeneous(1000, 0.02), 50000, 0.0, seed=1)
+        defaults = losses * 1000
+        assert np.allclose(defaults, np.round(defaults), atol=1e-3)
+        assert defaults.std() == pytest.approx(np.sqrt(1000 * 0.02 * 0.98), rel=0.03)
+
+    def test_correlation_fattens_the_tail(self):
+        """Test that correlated defaults raise VaR and shortfall but not expected loss."""
+        portfolio = homogeneous(1000, 0.02)
+        independent, correlated = (
+            summarize_losses(portfolio, portfolio_losses(portfolio, 50000, rho, seed=1), [0.999])
+            for rho in (0.0, 0.15)
+        )
+        assert correlated.simulated_expected_loss == pytest.approx(independent.simulated_expected_loss, rel=0.05)
+        assert correlated.tail_risk[0].value_at_risk > 3 * independent.tail_risk[0].value_at_risk
+        # Vasicek large-portfolio limit of the 99.9% loss quantile: 0.176 of the exposure x LGD
+        assert correlated.tail_risk[0].value_at_risk / 500000 == pytest.approx(0.176, rel=0.1)
+        assert correlated.tail_risk[0].expected_shortfall >= correlated.tail_risk[0].value_at_risk
+
+    def test_results_depend_only_on_the_seed(self):
+        """Test that a seed reproduces its losses however chunks are grouped, and other seeds differ."""
+        portfolio = homogeneous(100, 0.05)
+        model = loss_model(portfolio, 0.15)
+        chunks = plan_chunks(10000, 100, seed=3, chunk_elements=50000)
+        assert len(chunks) == 20 and sum(count for count, _ in chunks) == 10000
+
+        whole = simulate_losses(model, chunks)
+        split = np.concatenate([simulate_losses(model, chunks[:7]), simulate_losses(model, chunks[7:])])
+        assert np.array_equal(whole, split)
+        assert np.array_equal(whole, portfolio_losses(portfolio, 10000, 0.15, seed=3, chunk_elements=50000))
+        assert not np.array_equal(whole, portfolio_losses(portfolio, 10000, 0.15, seed=4, chunk_elements=50000))
+
+    def test_pool_workers_reproduce_inline_results(self, monkeypatch):
+        """Test that a simulation split across pool workers equals the inline one."""
+        monkeypatch.setattr(settings, "PORTFOLIO_CHUNK_ELEMENTS", 20000)
+        monkeypatch.setattr(settings, "PORTFOLIO_PARALLEL_MIN_ELEMENTS", 0)
+        portfolio = homogeneous(200, 0.05)
+        inline = asyncio.run(simulate_portfolio(portfolio, 5000, 0.2, [0.99], seed=5, pool=ScoringPool(max_workers=0)))
+
+        pool = ScoringPool(max_workers=2, max_queue=0)
+        pool.start()
+        try:
+            pooled = asyncio.run(simulate_portfolio(portfolio, 5000, 0.2, [0.99], seed=5, pool=pool))
+        finally:
+            pool.shutdown()
+        assert pooled == inline
+
+
+class TestPortfolioEndpoint:
+    """Test cases for the portfolio risk endpoint."""
+
+    def test_requires_authentication(self):
+        """Test that the portfolio endpoint rejects unauthenticated requests."""
+        response = client.post(PORTFOLIO_URL, json={"loans": [make_loan(1)]})
+        assert response.status_code == 403
+
+    def test_simulation_is_summarized_and_reproducible(self, auth_headers):
+        """Test that the response reports loss statistics and repeats for the same seed."""
+        body = {"loans": [make_loan(i) for i in range(50)], "scenarios": 20000, "seed": 42}
+        response = client.post(PORTFOLIO_URL, json=body, headers=auth_headers)
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["loans"] == 50 and data["scenarios"] == 20000 and data["seed"] == 42
+        assert data["correlation"] == 0.15
+        assert data["rules_version"] == get_scoring_engine().version
+        assert data["total_exposure"] == pytest.approx(sum(10000.0 + i * 100 for i in range(50)))
+        assert data["simulated_expected_loss"] == pytest.approx(data["expected_loss"], rel=0.05)
+        assert [tail["confidence_level"] for tail in data["tail_risk"]] == [0.95, 0.99, 0.999]
+        value_at_risk = [tail["value_at_risk"] for tail in data["tail_risk"]]
+        assert value_at_risk == sorted(value_at_risk)
+        assert client.post(PORTFOLIO_URL, json=body, headers=auth_headers).json() == data
+
+    def test_invalid_requests_are_rejected(self, auth_headers):
+        """Test that bad parameters are 422s."""
+        for overrides in ({"confidence_levels": [1.0]}, {"correlation": 1.0}, {"scenarios": 10}, {"loans": []}):
+            body = {"loans": [make_loan(1)], **overrides}
+            assert client.post(PORTFOLIO_URL, json=body, headers=auth_headers).status_code == 422
+
+    def test_oversized_simulations_are_rejected(self, auth_headers, monkeypatch):
+        """Test that portfolios or simulations beyond the configured limits get 413."""
+        body = {"loans": [make_loan(1), make_loan(2)], "scenarios": 1000}
+        monkeypatch.setattr(settings, "PORTFOLIO_MAX_LOANS", 1)
+        assert client.post(PORTFOLIO_URL, json=body, headers=auth_headers).status_code == 413
+        monkeypatch.setattr(settings, "PORTFOLIO_MAX_LOANS", 10)
+        monkeypatch.setattr(settings, "PORTFOLIO_MAX_SIMULATION_ELEMENTS", 1999)
+        assert client.post(PORTFOLIO_URL, json=body, headers=auth_headers).status_code == 413
@@ -0,0 +1,199 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from starlette.requests import Request
+from applications.api_gateway import main
+from applications.api_gateway.auth import generate_test_token
+from applications.api_gateway.config import settings
+from applications.api_gateway.middleware import ProfilingMiddleware
+from applications.api_gateway.profiler import ProfilerBusy, SamplingProfiler
+
+
+def busy_loop(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def parse_folded(text: str) -> dict:
+    """Folded stacks as {stack: count}."""
+    stacks = {}
+    for line in text.splitlines():
+        stack, count = line.rsplit(" ", 1)
+        stacks[stack] = int(count)
+    return stacks
+
+
+async def verify_token(token: str):
+    """Accept "<username>-token" as a valid token for username."""
+    username, _, suffix = token.rpartition("-")
+    return SimpleNamespace(username=username) if suffix == "token" else None
+
+
+def as_user(username: str, **headers) -> dict:
+    return {"Authorization": f"Bearer {username}-token", **headers}
+
+
+def build_app(profiler: SamplingProfiler) -> FastAPI:
+    """An app whose endpoint authenticates the user named by the bearer token."""
+    app = FastAPI()
+    app.add_middleware(
+        ProfilingMiddleware, profiler=profiler, admins=["admin"], enabled=True, verify_token=verify_token
+    )
+
+    @app.get("/work")
+    async def work(request: Request):
+        token = request.headers.get("authorization", "").removeprefix("Bearer ")
+        request.state.user = await verify_token(token)
+        await asyncio.sleep(0.05)
+        return {"ok": True}
+
+    return app
+
+
+async def get(app: FastAPI, path: str, headers: dict) -> httpx.Response:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://localhost") as client:
+        return await client.get(path, headers=headers)
+
+
+class TestSamplingProfiler:
+    """Test cases for sampling sessions."""
+
+    def test_session_counts_folded_stacks(self, tmp_path):
+        """Test that a session samples running threads and writes folded stacks."""
+        profiler = SamplingProfiler(str(tmp_path), interval=0.001)
+        stop = threading.Event()
+        worker = threading.Thread(target=busy_loop, args=(stop,), name="busy-worker")
+        worker.start()
+        try:
+            session = profiler.start()
+            time.sleep(0.2)
+            path = profiler.stop(session, tmp_path / "busy.folded")
+        finally:
+            stop.set()
+            worker.join()
+
+        stacks = parse_folded(path.read_text())
+        busy = {stack: count for stack, count in stacks.items() if stack.startswith("busy-worker;")}
+        assert session.samples > 10
+        assert sum(busy.values()) > 10
+        assert all("busy_loop (unit/test_profiler.py:17)" in stack for stack in busy)
+        assert not any("sampling-profiler" in stack for stack in stacks)
+
+    def test_one_session_at_a_time(self, tmp_path):
+        """Test that a second session is refused while one runs, and discarded sessions write nothing."""
+        profiler = SamplingProfiler(str(tmp_path), interval=0.001)
+        session = profiler.start()
+        with pytest.raises(ProfilerBusy):
+            profiler.start()
+        assert profiler.stop(session) is None
+        assert not profiler.running
+        profiler.stop(profiler.start())
+        assert list(tmp_path.iterdir()) == []
+
+    def test_sessions_end_after_max_seconds(self, tmp_path):
+        """Test that a forgotten session stops sampling on its own."""
+        profiler = SamplingProfiler(str(tmp_path), interval=0.001, max_seconds=0.05)
+        session = profiler.start()
+        time.sleep(0.2)
+        samples = session.samples
+        time.sleep(0.05)
+        assert session.samples == samples
+        profiler.stop(session)
+
+    def test_window_is_written_when_it_ends(self, tmp_path):
+        """Test that a time window profile appears once the window has passed."""
+        profiler = SamplingProfiler(str(tmp_path), interval=0.001)
+
+        async def main():
+            path = profiler.start_window(0.1)
+            assert not path.exists()
+            await asyncio.sleep(0.3)
+            return path
+
+        path = asyncio.run(main())
+        assert path.parent == tmp_path
+        assert path.read_text()
+        assert not profiler.running
+
+
+class TestProfilingMiddleware:
+    """Test cases for per-request profiling."""
+
+    def test_admin_request_is_profiled(self, tmp_path):
+        """Test that an admin's X-Profile request writes a profile named in the response."""
+        profiler = SamplingProfiler(str(tmp_path), interval=0.001)
+        response = asyncio.run(get(build_app(profiler), "/work", as_user("admin", **{"X-Profile": "true"})))
+        assert response.status_code == 200
+        assert (tmp_path / response.headers["X-Profile"]).read_text()
+
+    def test_other_requests_are_not_kept(self, tmp_path):
+        """Test that profiles are not written for non-admins or without the header."""
+        profiler = SamplingProfiler(str(tmp_path), interval=0.001)
+        app = build_app(profiler)
+        for headers in (as_user("someone", **{"X-Profile": "true"}), as_user("admin")):
+            response = asyncio.run(get(app, "/work", headers))
+            assert response.status_code == 200
+            assert "x-profile" not in response.headers
+        assert list(tmp_path.iterdir()) == []
+        assert not profiler.running
+
+    def test_non_admin_requests_never_start_the_profiler(self, tmp_path, monkeypatch):
+        """Test that X-Profile from anyone but a verified admin does not sample or hold the profiler."""
+        profiler = SamplingProfiler(str(tmp_path), interval=0.001)
+        starts = []
+        monkeypatch.setattr(profiler, "start", lambda: starts.append(1))
+        app = build_app(profiler)
+        for headers in (
+            {"X-Profile": "true"},
+            {"X-Profile": "true", "Authorization": "Bearer admin-forged"},
+            {"X-Profile": "true", "Authorization": "Basic admin-token"},
+            as_user("someone", **{"X-Profile": "true"}),
+        ):
+            assert asyncio.run(get(app, "/work", headers)).status_code == 200
+        assert starts == []
+
+
+class TestProfileEndpoint:
+    """Test cases for starting a profiling window over the API."""
+
+    @pytest.fixture
+    def profiling(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "PROFILER_ENABLED", True)
+        monkeypatch.setattr(settings, "PROFILER_ADMINS", ["testuser"])
+        monkeypatch.setattr(main.sampling_profiler, "output_dir", tmp_path)
+        return tmp_path
+
+    def post(self, token: str, seconds: float, wait: float = 0.0) -> httpx.Response:
+        async def run():
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=main.app), base_url="http://localhost"
+            ) as client:
+                response = await client.post(
+                    f"/api/v1/admin/profile?seconds={seconds}", headers={"Authorization": f"Bearer {token}"}
+                )
+            await asyncio.sleep(wait)
+            return response
+
+        return asyncio.run(run())
+
+    def test_admin_starts_a_window(self, profiling):
+        """Test that an admin gets 202 and the profile is written when the window ends."""
+        response = self.post(generate_test_token(), seconds=0.1, wait=0.3)
+        assert response.status_code == 202
+        path = response.json()["profile"]
+        assert path.startswith(str(profiling))
+        assert open(path).read()
+
+    def test_non_admins_are_refused(self, profiling, monkeypatch):
+        """Test that users outside PROFILER_ADMINS, or a disabled profiler, get 403."""
+        monkeypatch.setattr(settings, "PROFILER_ADMINS", [])
+        assert self.post(generate_test_token(), seconds=0.1).status_code == 403
+        monkeypatch.setattr(settings, "PROFILER_ADMINS", ["testuser"])
+        monkeypatch.setattr(settings, "PROFILER_ENABLED", False)
+        assert self.post(generate_test_token(), seconds=0.1).status_code == 403
+        assert list(profiling.iterdir()) == []
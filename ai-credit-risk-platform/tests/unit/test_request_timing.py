@@ -0,0 +1,100 @@
+import asyncio
+import re
+
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from applications.api_gateway.auth import generate_test_token
+from applications.api_gateway.main import app
+from applications.api_gateway.middleware import ServerTimingMiddleware
+from applications.api_gateway.timing import STAGE_DURATION, collect_stages, record_stage, server_timing, stage
+
+client = TestClient(app, headers={"Host": "localhost"})
+
+APPLICATION = {
+    "applicant_id": "TIMING1",
+    "income": 75000.0,
+    "credit_score": 720,
+    "debt_ratio": 0.35,
+    "employment_years": 5,
+    "loan_amount": 250000.0,
+    "loan_purpose": "MORTGAGE",
+}
+
+
+def parse_server_timing(value: str) -> dict:
+    """Server-Timing header as {name: milliseconds}."""
+    return {name: float(dur) for name, dur in re.findall(r"(\w+);dur=([\d.]+)", value)}
+
+
+class TestStageTiming:
+    """Test cases for recording request stages."""
+
+    def test_stages_are_collected_per_context(self):
+        """Test that stages are collected while a request is active and observed regardless."""
+        before = STAGE_DURATION.labels(stage="unit")._sum.get()
+        record_stage("unit", 0.5)
+        with collect_stages() as stages:
+            record_stage("unit", 0.25)
+            with stage("other"):
+                pass
+        record_stage("unit", 0.125)
+        assert [name for name, _ in stages] == ["unit", "other"]
+        assert STAGE_DURATION.labels(stage="unit")._sum.get() - before == 0.875
+
+    def test_concurrent_requests_do_not_share_stages(self):
+        """Test that each task collects only its own stages."""
+        async def request(name: str) -> list:
+            with collect_stages() as stages:
+                await asyncio.sleep(0)
+                record_stage(name, 0.001)
+                await asyncio.sleep(0)
+            return [recorded for recorded, _ in stages]
+
+        async def main():
+            return await asyncio.gather(request("a"), request("b"))
+
+        assert asyncio.run(main()) == [["a"], ["b"]]
+
+    def test_header_sums_repeated_stages(self):
+        """Test that the header lists each stage once, in milliseconds, then the total."""
+        value = server_timing([("auth", 0.001), ("score", 0.002), ("auth", 0.0005)], total=0.004)
+        assert value == "auth;dur=1.500, score;dur=2.000, total;dur=4.000"
+
+
+class TestServerTimingHeader:
+    """Test cases for the Server-Timing response header."""
+
+    def test_assessment_reports_each_stage(self):
+        """Test that an assessment response breaks its time down by stage."""
+        response = client.post(
+            "/api/v1/credit-risk/assess",
+            json=APPLICATION,
+            headers={"Authorization": f"Bearer {generate_test_token()}"}
+        )
+        assert response.status_code == 200
+        timings = parse_server_timing(response.headers["Server-Timing"])
+        assert list(timings) == ["auth", "parse", "score", "model", "features", "serialize", "total"]
+        assert sum(duration for name, duration in timings.items() if name != "total") <= timings["total"]
+
+    def test_failed_authentication_is_still_timed(self):
+        """Test that a rejected request reports the auth stage."""
+        response = client.get("/api/v1/me", headers={"Authorization": "Bearer not-a-token"})
+        assert response.status_code == 401
+        assert list(parse_server_timing(response.headers["Server-Timing"])) == ["auth", "total"]
+
+    def test_header_can_be_disabled(self):
+        """Test that the header is omitted when the middleware is disabled."""
+        bare = FastAPI()
+        bare.add_middleware(ServerTimingMiddleware, enabled=False)
+
+        @bare.get("/ping")
+        async def ping():
+            with stage("ping"):
+                return {"ok": True}
+
+        async def main():
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=bare), base_url="http://test") as c:
+                return await c.get("/ping")
+
+        assert "server-timing" not in asyncio.run(main()).headers
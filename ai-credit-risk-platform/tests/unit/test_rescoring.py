@@ -0,0 +1,252 @@
+import os
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+import numpy as np
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, select
+from applications.api_gateway.audit import DatabaseAuditSink, audit_writer
+from applications.api_gateway.auth import generate_test_token
+from applications.api_gateway.config import Settings
+from applications.api_gateway.database import assessments, get_engine, metadata, upsert_assessments
+from applications.api_gateway.main import app
+from applications.api_gateway.rescoring import affected_condition, rescore
+from applications.api_gateway.scoring_engine import SUPPORTED_FEATURES, CompiledRuleSet, RuleSet, load_ruleset
+
+
+def build_book(size: int, seed: int = 0) -> list:
+    """Assessments of size random applicants under the default rules."""
+    rng = np.random.default_rng(seed)
+    columns = {
+        "income": rng.integers(10, 150, size) * 1000.0,
+        "credit_score": rng.integers(300, 850, size).astype(float),
+        "debt_ratio": rng.integers(0, 100, size) / 100,
+        "employment_years": rng.integers(0, 30, size).astype(float),
+        "loan_amount": rng.integers(1, 1000, size) * 1000.0,
+    }
+    assessment = CompiledRuleSet(load_ruleset()).score_arrays(columns)
+    assessed_at = datetime.now(timezone.utc)
+    return [
+        {
+            "applicant_id": f"APP{i:06d}",
+            **{feature: float(columns[feature][i]) for feature in SUPPORTED_FEATURES},
+            "risk_score": int(assessment.risk_scores[i]),
+            "risk_level": str(assessment.risk_levels[i]),
+            "recommendation": str(assessment.recommendations[i]),
+            "assessed_at": assessed_at,
+        }
+        for i in range(size)
+    ]
+
+
+def changed_rules(**changes) -> RuleSet:
+    """The default rules with rule attributes changed, e.g. credit_score={"threshold": 640}."""
+    ruleset = load_ruleset().model_copy(deep=True)
+    for rule in ruleset.rules:
+        for attribute, value in changes.get(rule.feature, {}).items():
+            setattr(rule, attribute, value)
+    return ruleset
+
+
+def stored(url: str) -> dict:
+    with get_engine(url).connect() as connection:
+        return {row.applicant_id: row._asdict() for row in connection.execute(select(assessments))}
+
+
+def brute_force_changes(book: list, ruleset: RuleSet) -> set:
+    """(applicant_id, risk_level, recommendation) of every outcome that differs under ruleset."""
+    engine = CompiledRuleSet(ruleset)
+    changes = set()
+    for row in book:
+        assessment = engine.score(row)
+        if (assessment.risk_level, assessment.recommendation) != (row["risk_level"], row["recommendation"]):
+            changes.add((row["applicant_id"], assessment.risk_level, assessment.recommendation))
+    return changes
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'assessments.db'}"
+    metadata.create_all(get_engine(url))
+    return url
+
+
+@pytest.fixture
+def book(database_url):
+    rows = build_book(5000)
+    with get_engine(database_url).begin() as connection:
+        upsert_assessments(connection, rows)
+    return rows
+
+
+class TestAffectedCondition:
+    """Test cases for finding the assessments a rule change can affect."""
+
+    def test_threshold_move_selects_the_window(self, database_url, book):
+        """Test that moving a threshold selects only the applicants between the old and new values."""
+        result = rescore(load_ruleset(), changed_rules(credit_score={"threshold": 640}), url=database_url)
+        assert not result.full
+        assert result.examined == sum(1 for row in book if 640 <= row["credit_score"] < 650)
+        assert 0 < result.examined < len(book) / 10
+
+    def test_band_change_selects_its_scores(self, database_url, book):
+        """Test that renaming a band selects only the stored scores in it."""
+        ruleset = load_ruleset().model_copy(deep=True)
+        ruleset.levels[1].recommendation = "MANUAL_REVIEW"
+        result = rescore(load_ruleset(), ruleset, url=database_url)
+        assert result.examined == sum(1 for row in book if row["risk_level"] == "MEDIUM")
+        assert len(result.changes) == result.examined
+
+    def test_structural_changes_rescore_everything(self):
+        """Test that added rules or a new max_score mean a full rescore, and no change means none."""
+        ruleset = load_ruleset()
+        extended = ruleset.model_copy(deep=True)
+        extended.rules.append(extended.rules[0].model_copy(update={"threshold": 10000}))
+        assert affected_condition(ruleset, extended) is None
+        assert affected_condition(ruleset, ruleset.model_copy(update={"max_score": 80})) is None
+        assert str(affected_condition(ruleset, ruleset)) == "false"
+
+
+class TestRescore:
+    """Test cases for rescoring stored assessments."""
+
+    @pytest.mark.parametrize("changes", [
+        {"credit_score": {"threshold": 680}},
+        {"income": {"threshold": 25000}, "debt_ratio": {"threshold": 0.45}},
+        {"debt_ratio": {"operator": ">=", "threshold": 0.4}},
+        {"income": {"weight": 40}},
+    ])
+    def test_diff_matches_a_full_rescore(self, database_url, book, changes):
+        """Test that the incremental diff lists exactly the outcomes a full rescore changes."""
+        ruleset = changed_rules(**changes)
+        result = rescore(load_ruleset(), ruleset, url=database_url, chunk_size=500)
+        assert not result.full
+        assert result.examined < len(book)
+        expected = brute_force_changes(book, ruleset)
+        assert expected
+        assert {(change.applicant_id, change.risk_level, change.recommendation) for change in result.changes} == expected
+
+    def test_apply_stores_the_new_outcomes(self, database_url, book):
+        """Test that apply writes changed outcomes back, so a second run finds nothing to change."""
+        ruleset = changed_rules(credit_score={"threshold": 700})
+        before = stored(database_url)
+        dry_run = rescore(load_ruleset(), ruleset, url=database_url)
+        assert dry_run.changes
+        assert stored(database_url) == before
+
+        applied = rescore(load_ruleset(), ruleset, apply=True, url=database_url)
+        assert applied.changes == dry_run.changes
+        rows = stored(database_url)
+        for change in applied.changes:
+            assert rows[change.applicant_id]["risk_level"] == change.risk_level
+            assert rows[change.applicant_id]["risk_score"] == change.risk_score
+        assert rescore(ruleset, ruleset, url=database_url).examined == 0
+        assert rescore(load_ruleset(), ruleset, url=database_url).changes == []
+
+    def test_apply_writes_each_chunk_in_its_own_transaction(self, database_url, book):
+        """Test that applied chunks are committed as they go, and rows already rescored are not read again."""
+        ruleset = load_ruleset().model_copy(deep=True)
+        ruleset.levels[1].recommendation = "MANUAL_REVIEW"
+        commits = []
+
+        def on_commit(connection):
+            commits.append(connection)
+
+        event.listen(get_engine(database_url), "commit", on_commit)
+        try:
+            result = rescore(load_ruleset(), ruleset, apply=True, url=database_url, chunk_size=200)
+        finally:
+            event.remove(get_engine(database_url), "commit", on_commit)
+
+        medium = sum(1 for row in book if row["risk_level"] == "MEDIUM")
+        assert result.examined == len(result.changes) == medium
+        assert len(commits) >= medium // 200
+        assert all(row["recommendation"] == "MANUAL_REVIEW"
+                   for row in stored(database_url).values() if row["risk_level"] == "MEDIUM")
+
+    def test_command_line_prints_the_diff(self, database_url, book, tmp_path):
+        """Test that the command prints one JSON line per change on stdout, and nothing else."""
+        path = tmp_path / "rules.json"
+        path.write_text(changed_rules(credit_score={"threshold": 660}).model_dump_json())
+        completed = subprocess.run(
+            [sys.executable, "-m", "applications.api_gateway.rescoring", str(path)],
+            capture_output=True,
+            env={**os.environ, "DATABASE_URL": database_url},
+            check=True
+        )
+
+        assert b"incremental rescore" in completed.stderr
+        lines = [orjson.loads(line) for line in completed.stdout.splitlines()]
+        expected = brute_force_changes(book, changed_rules(credit_score={"threshold": 660}))
+        assert {(line["applicant_id"], line["risk_level"], line["recommendation"]) for line in lines} == expected
+
+
+class TestAssessmentStore:
+    """Test cases for storing assessments alongside the audit log."""
+
+    def test_sink_upserts_assessments(self, database_url):
+        """Test that the audit sink stores each applicant's latest assessment."""
+        first, second = build_book(2)
+        entry = {
+            "user_id": 1,
+            "action": "POST",
+            "resource": "/api/v1/credit-risk/assess",
+            "ip_address": "10.0.0.1",
+            "user_agent": "pytest",
+            "timestamp": datetime.now(timezone.utc),
+            "details": {"status_code": 200},
+        }
+        sink = DatabaseAuditSink(database_url)
+        sink.write([{**entry, "assessments": [first]}, {**entry, "assessments": [second]}])
+        sink.write([{**entry, "assessments": [{**first, "risk_level": "HIGH"}]}, entry])
+
+        rows = stored(database_url)
+        assert set(rows) == {first["applicant_id"], second["applicant_id"]}
+        assert rows[first["applicant_id"]]["risk_level"] == "HIGH"
+        assert rows[second["applicant_id"]]["credit_score"] == second["credit_score"]
+
+    def test_assessments_ride_on_audit_entries(self):
+        """Test that single and batch assessments reach the audit writer with their inputs."""
+        entries = []
+        original = audit_writer.sink
+        audit_writer.sink = type("ListSink", (), {"write": staticmethod(entries.extend)})()
+        headers = {"Authorization": f"Bearer {generate_test_token()}"}
+        application = {
+            "applicant_id": "STORE1",
+            "income": 25000.0,
+            "credit_score": 700,
+            "debt_ratio": 0.2,
+            "employment_years": 3,
+            "loan_amount": 20000.0,
+            "loan_purpose": "AUTO",
+        }
+        try:
+            with TestClient(app, headers={"Host": "localhost"}) as client:
+                client.post("/api/v1/credit-risk/assess", json=application, headers=headers)
+                client.post("/api/v1/credit-risk/assess/batch", json={"applications": [
+                    {**application, "applicant_id": "STORE2"}, {"applicant_id": "BROKEN"},
+                ]}, headers=headers)
+        finally:
+            audit_writer.sink = original
+
+        single, batch = (entry["assessments"] for entry in entries)
+        assert single == [{
+            "applicant_id": "STORE1", "income": 25000.0, "credit_score": 700.0, "debt_ratio": 0.2,
+            "employment_years": 3.0, "loan_amount": 20000.0,
+            "risk_score": 30, "risk_level": "MEDIUM", "recommendation": "REVIEW",
+        }]
+        assert [row["applicant_id"] for row in batch] == ["STORE2"]
+
+    def test_store_follows_the_audit_log_by_default(self):
+        """Test that the store is on with the audit log, and off without it unless asked for."""
+        assert Settings().ASSESSMENT_STORE_ENABLED is True
+        assert Settings(AUDIT_LOG_ENABLED=False).ASSESSMENT_STORE_ENABLED is False
+        assert Settings(ASSESSMENT_STORE_ENABLED=False).ASSESSMENT_STORE_ENABLED is False
+
+    def test_store_without_the_audit_log_is_rejected(self):
+        """Test that the store cannot be enabled explicitly while the audit writer that fills it is off."""
+        with pytest.raises(ValueError, match="ASSESSMENT_STORE_ENABLED requires AUDIT_LOG_ENABLED"):
+            Settings(AUDIT_LOG_ENABLED=False, ASSESSMENT_STORE_ENABLED=True)
@@ -0,0 +1,188 @@
+import asyncio
+
+import fakeredis
+import pytest
+from fastapi.testclient import TestClient
+from redis.exceptions import ConnectionError as RedisConnectionError
+from applications.api_gateway.auth import generate_test_token
+from applications.api_gateway.cache import CACHE_HITS
+from applications.api_gateway.main import app
+from applications.api_gateway.models import CreditRiskRequest
+from applications.api_gateway.result_cache import (
+    KEY_PREFIX,
+    RESULT_CACHE_ERRORS,
+    AssessmentCache,
+    cache_key,
+    result_cache,
+)
+from applications.api_gateway.scoring_engine import DEFAULT_RULES_PATH, load_scoring_engine
+
+ASSESS_URL = "/api/v1/credit-risk/assess"
+EXTENDED_RULES = str(DEFAULT_RULES_PATH.with_name("extended.json"))
+
+APPLICATION = {
+    "applicant_id": "APP1",
+    "income": 25000.0,
+    "credit_score": 720,
+    "debt_ratio": 0.35,
+    "employment_years": 1,
+    "loan_amount": 250000.0,
+    "loan_purpose": "MORTGAGE",
+}
+REQUEST = CreditRiskRequest.model_validate(APPLICATION)
+
+
+@pytest.fixture
+def run():
+    # Redis connections are bound to the loop that opened them
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
+
+
+def counter_value(counter, **labels) -> float:
+    return counter.labels(**labels)._value.get()
+
+
+class FailingRedis:
+    """Redis stand-in whose every call fails as if the server were down."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def get(self, key):
+        self.calls += 1
+        raise RedisConnectionError("Connection refused")
+
+    async def set(self, key, value, ex=None):
+        self.calls += 1
+        raise RedisConnectionError("Connection refused")
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def cache(server):
+    return AssessmentCache(redis=fakeredis.aioredis.FakeRedis(server=server))
+
+
+@pytest.fixture(autouse=True)
+def restore_scoring_engine():
+    yield
+    load_scoring_engine()
+
+
+@pytest.fixture
+def shared_redis(server):
+    original = result_cache.redis
+    result_cache.redis = fakeredis.aioredis.FakeRedis(server=server)
+    result_cache._redis_down_until = 0.0  # an earlier test may have found no real Redis
+    result_cache.l1.clear()
+    yield fakeredis.FakeRedis(server=server)
+    result_cache.redis = original
+    result_cache.l1.clear()
+
+
+class TestCacheKey:
+    """Test cases for canonical request hashing."""
+
+    def test_equivalent_payloads_share_a_key(self):
+        """Test that key order and int/float spelling do not change the key."""
+        reordered = dict(reversed(list(APPLICATION.items())))
+        reordered["income"] = 25000
+        first = cache_key(CreditRiskRequest.model_validate(APPLICATION), "1.0.0")
+        second = cache_key(CreditRiskRequest.model_validate(reordered), "1.0.0")
+        assert first == second
+        assert first.startswith(f"{KEY_PREFIX}:1.0.0:")
+
+    def test_key_depends_on_fields_and_rule_version(self):
+        """Test that any field or rule version change produces a new key."""
+        request = CreditRiskRequest.model_validate(APPLICATION)
+        changed = CreditRiskRequest.model_validate({**APPLICATION, "credit_score": 721})
+        assert cache_key(request, "1.0.0") != cache_key(changed, "1.0.0")
+        assert cache_key(request, "1.0.0") != cache_key(request, "1.1.0")
+
+
+class TestAssessmentCache:
+    """Test cases for the two-tier assessment cache."""
+
+    def test_repeated_application_is_served_from_l1(self, run, cache):
+        """Test that the second identical assessment is an L1 hit."""
+        hits = counter_value(CACHE_HITS, cache="assessment")
+        first = run(cache.assess(REQUEST))
+        second = run(cache.assess(CreditRiskRequest.model_validate(dict(APPLICATION))))
+        assert first == second
+        assert first.factors == ["Low income"]
+        assert counter_value(CACHE_HITS, cache="assessment") - hits == 1
+
+    def test_redis_tier_is_shared_between_workers(self, run, server):
+        """Test that a result cached by one worker is reused by another."""
+        worker_a = AssessmentCache(redis=fakeredis.aioredis.FakeRedis(server=server))
+        worker_b = AssessmentCache(redis=fakeredis.aioredis.FakeRedis(server=server))
+        hits = counter_value(CACHE_HITS, cache="assessment_redis")
+
+        expected = run(worker_a.assess(REQUEST))
+        assert run(worker_b.assess(REQUEST)) == expected
+        assert counter_value(CACHE_HITS, cache="assessment_redis") - hits == 1
+        assert len(worker_b.l1) == 1
+
+    def test_entries_expire_in_redis(self, run, server, cache):
+        """Test that Redis entries carry the configured TTL."""
+        run(cache.assess(REQUEST))
+        redis = fakeredis.FakeRedis(server=server)
+        [key] = redis.keys(f"{KEY_PREFIX}:*")
+        assert 0 < redis.ttl(key) <= cache.ttl
+
+    def test_rule_version_change_invalidates_results(self, run, server, cache):
+        """Test that results scored under old rules are not reused."""
+        assert run(cache.assess(REQUEST)).risk_score == 30
+
+        load_scoring_engine(EXTENDED_RULES)
+        assessment = run(cache.assess(REQUEST))
+        assert assessment.risk_score == 40
+        assert assessment.factors == ["Low income", "Short employment history"]
+        assert len(cache.l1) == 1
+
+        versions = {key.split(b":")[2] for key in fakeredis.FakeRedis(server=server).keys(f"{KEY_PREFIX}:*")}
+        assert versions == {b"1.0.0", b"1.1.0"}
+
+    def test_redis_outage_falls_back_to_scoring(self, run):
+        """Test that Redis errors are counted and Redis is skipped for a while."""
+        redis = FailingRedis()
+        cache = AssessmentCache(redis=redis, redis_retry_after=60)
+        errors = counter_value(RESULT_CACHE_ERRORS, operation="get")
+
+        assert run(cache.assess(REQUEST)).risk_score == 30
+        assert run(cache.assess(REQUEST.model_copy(update={"applicant_id": "APP2"}))).risk_score == 30
+        assert counter_value(RESULT_CACHE_ERRORS, operation="get") - errors == 1
+        assert redis.calls == 1
+
+    def test_disabled_cache_always_scores(self, run, cache):
+        """Test that RESULT_CACHE_ENABLED=false skips both tiers."""
+        cache.enabled = False
+        run(cache.assess(REQUEST))
+        assert len(cache.l1) == 0
+
+
+class TestAssessEndpointCaching:
+    """Test cases for caching in the credit risk assessment endpoint."""
+
+    def test_endpoint_caches_results_in_redis(self, shared_redis):
+        """Test that the endpoint stores and reuses results via Redis."""
+        headers = {"Authorization": f"Bearer {generate_test_token()}"}
+        # One event loop for the whole exchange, as in a running worker
+        with TestClient(app, headers={"Host": "localhost"}) as client:
+            first = client.post(ASSESS_URL, json=APPLICATION, headers=headers)
+            assert first.status_code == 200
+            assert len(shared_redis.keys(f"{KEY_PREFIX}:*")) == 1
+
+            result_cache.l1.clear()
+            hits = counter_value(CACHE_HITS, cache="assessment_redis")
+            second = client.post(ASSESS_URL, json=APPLICATION, headers=headers)
+            assert second.status_code == 200
+            assert counter_value(CACHE_HITS, cache="assessment_redis") - hits == 1
+        for field in ("risk_score", "risk_level", "recommendation", "factors"):
+            assert second.json()[field] == first.json()[field]
@@ -0,0 +1,144 @@
+import json
+
+import numpy as np
+import pytest
+from pydantic import ValidationError
+from fastapi.testclient import TestClient
+from applications.api_gateway.main import app
+from applications.api_gateway.scoring_engine import (
+    DEFAULT_RULES_PATH,
+    CompiledRuleSet,
+    RuleSet,
+    get_scoring_engine,
+    load_ruleset,
+    load_scoring_engine,
+    matched_factors,
+)
+
+client = TestClient(app, headers={"Host": "localhost"})
+
+EXTENDED_RULES = str(DEFAULT_RULES_PATH.parent / "extended.json")
+
+
+@pytest.fixture
+def engine():
+    return CompiledRuleSet(load_ruleset())
+
+
+class TestRuleSetLoading:
+    """Test cases for rule set declaration and validation."""
+
+    def test_default_rules_match_mvp_thresholds(self):
+        """Test that the bundled rules reproduce the original MVP rules."""
+        ruleset = load_ruleset()
+        assert [(r.feature, r.operator, r.threshold, r.weight) for r in ruleset.rules] == [
+            ("income", "<", 30000, 30),
+            ("credit_score", "<", 650, 25),
+            ("debt_ratio", ">", 0.4, 20),
+        ]
+        assert [level.max_score for level in ruleset.levels] == [30, 60, None]
+
+    def test_unknown_feature_is_rejected(self):
+        """Test that rules may only reference supported applicant features."""
+        with pytest.raises(ValidationError):
+            RuleSet.model_validate({
+                "version": "x",
+                "rules": [{"feature": "shoe_size", "operator": ">", "threshold": 1, "weight": 1, "factor": "f"}],
+                "levels": [{"name": "LOW", "recommendation": "APPROVE"}],
+            })
+
+    def test_levels_must_be_increasing_and_open_ended(self):
+        """Test that risk level bands are validated."""
+        with pytest.raises(ValidationError):
+            RuleSet.model_validate({
+                "version": "x",
+                "rules": [{"feature": "income", "operator": "<", "threshold": 1, "weight": 1, "factor": "f"}],
+                "levels": [
+                    {"name": "LOW", "recommendation": "APPROVE", "max_score": 60},
+                    {"name": "MEDIUM", "recommendation": "REVIEW", "max_score": 30},
+                    {"name": "HIGH", "recommendation": "DECLINE"},
+                ],
+            })
+
+    def test_rule_sets_load_from_any_path(self, tmp_path):
+        """Test that new rule sets can be loaded without code changes."""
+        path = tmp_path / "rules.json"
+        path.write_text(json.dumps({
+            "version": "test-1",
+            "rules": [{"feature": "loan_amount", "operator": ">=", "threshold": 100, "weight": 70, "factor": "Big"}],
+            "levels": [
+                {"name": "LOW", "recommendation": "APPROVE", "max_score": 50},
+                {"name": "HIGH", "recommendation": "DECLINE"},
+            ],
+        }))
+        engine = CompiledRuleSet(load_ruleset(str(path)))
+        assert engine.version == "test-1"
+        assert engine.score({"loan_amount": 100}).risk_level == "HIGH"
+
+
+class TestCompiledRuleSet:
+    """Test cases for the scalar and vectorized evaluators."""
+
+    def test_scalar_scoring(self, engine):
+        """Test that each rule and level cutoff is applied."""
+        assert engine.score({"income": 75000, "credit_score": 720, "debt_ratio": 0.35}).risk_level == "LOW"
+        assessment = engine.score({"income": 25000, "credit_score": 600, "debt_ratio": 0.5})
+        assert assessment.risk_score == 75
+        assert assessment.risk_level == "HIGH"
+        assert assessment.recommendation == "DECLINE"
+        assert assessment.factors == ["Low income", "Low credit score", "High debt-to-income ratio"]
+
+    def test_boundaries_are_exclusive(self, engine):
+        """Test that values exactly on a threshold do not trigger the rule."""
+        assert engine.score({"income": 30000, "credit_score": 650, "debt_ratio": 0.4}).risk_score == 0
+
+    def test_vectorized_path_matches_scalar_path(self):
+        """Test that both evaluators agree on random applicants."""
+        engine = CompiledRuleSet(load_ruleset(EXTENDED_RULES))
+        rng = np.random.default_rng(7)
+        columns = {
+            "income": rng.uniform(10000, 100000, 500),
+            "credit_score": rng.integers(300, 851, 500).astype(np.float64),
+            "debt_ratio": rng.uniform(0, 1, 500),
+            "employment_years": rng.integers(0, 10, 500).astype(np.float64),
+            "loan_amount": rng.uniform(1000, 1000000, 500),
+        }
+        batch = engine.score_arrays(columns)
+        for i in range(500):
+            scalar = engine.score({feature: values[i] for feature, values in columns.items()})
+            assert batch.risk_scores[i] == scalar.risk_score
+            assert batch.risk_levels[i] == scalar.risk_level
+            assert matched_factors(engine.factors, batch.matched[:, i]) == scalar.factors
+
+    def test_scores_are_capped_at_max_score(self):
+        """Test that heavy rule sets cannot exceed the response score range."""
+        ruleset = load_ruleset(EXTENDED_RULES).model_copy(update={"max_score": 80})
+        engine = CompiledRuleSet(ruleset)
+        record = {"income": 1, "credit_score": 300, "debt_ratio": 1, "employment_years": 0, "loan_amount": 1e6}
+        assert engine.score(record).risk_score == 80
+        assert engine.score_arrays({k: np.array([v]) for k, v in record.items()}).risk_scores.tolist() == [80]
+
+
+class TestActiveEngine:
+    """Test cases for swapping the active rule set."""
+
+    def test_endpoints_use_the_loaded_rule_set(self):
+        """Test that loading a rule set changes endpoint results."""
+        payload = {
+            "applicant_id": "APP1",
+            "income": 75000,
+            "credit_score": 720,
+            "debt_ratio": 0.35,
+            "employment_years": 1,
+            "loan_amount": 250000,
+            "loan_purpose": "MORTGAGE",
+        }
+        try:
+            load_scoring_engine(EXTENDED_RULES)
+            assert get_scoring_engine().version == "1.1.0"
+            data = client.post("/api/v1/credit-risk/test", json=payload).json()
+            assert data["risk_score"] == 10
+            assert data["factors"] == ["Short employment history"]
+        finally:
+            load_scoring_engine()
+        assert client.post("/api/v1/credit-risk/test", json=payload).json()["risk_score"] == 0
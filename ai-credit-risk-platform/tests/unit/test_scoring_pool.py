@@ -0,0 +1,121 @@
+import asyncio
+import os
+import signal
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from applications.api_gateway import scoring_pool as scoring_pool_module
+from applications.api_gateway.auth import generate_test_token
+from applications.api_gateway.main import app
+from applications.api_gateway.models import CreditRiskRequest
+from applications.api_gateway.scoring import assess_records, pack_features, score_features
+from applications.api_gateway.scoring_engine import SUPPORTED_FEATURES
+from applications.api_gateway.scoring_pool import SCORING_POOL_FAILURES, ScoringPool, ScoringPoolFull
+
+client = TestClient(app, headers={"Host": "localhost"})
+
+BATCH_URL = "/api/v1/credit-risk/assess/batch"
+
+
+def make_application(i: int) -> dict:
+    return {
+        "applicant_id": f"APP{i}",
+        "income": 20000.0 + i * 1000,
+        "credit_score": 500 + i % 300,
+        "debt_ratio": (i % 10) / 10,
+        "employment_years": i % 8,
+        "loan_amount": 250000.0,
+        "loan_purpose": "MORTGAGE",
+    }
+
+
+def results_without_dates(items) -> list:
+    return [item.model_dump(exclude={"result": {"assessment_date"}}) for item in items]
+
+
+@pytest.fixture
+def pool(active_model):
+    """A started one-worker pool serving the test model."""
+    pool = ScoringPool(max_workers=1, max_queue=0)
+    pool.start()
+    yield pool
+    pool.shutdown()
+
+
+class TestPackFeatures:
+    """Test cases for the matrix sent to scoring workers."""
+
+    def test_requests_are_packed_feature_major(self):
+        """Test that each feature becomes one contiguous float64 row."""
+        requests = [CreditRiskRequest(**make_application(i)) for i in range(3)]
+        matrix = pack_features(requests)
+        assert matrix.shape == (len(SUPPORTED_FEATURES), 3)
+        assert matrix.dtype == np.float64 and matrix.flags.c_contiguous
+        assert matrix[SUPPORTED_FEATURES.index("credit_score")].tolist() == [500, 501, 502]
+
+
+class TestScoringPool:
+    """Test cases for scoring in worker processes."""
+
+    def test_pool_scores_like_the_inline_path(self, pool, active_model):
+        """Test that workers load the same rules and model as the request worker."""
+        records = [make_application(i) for i in range(50)] + [{"income": -1}]
+        pooled = asyncio.run(pool.assess_records(records, assessor="test"))
+        inline = assess_records(records, assessor="test")
+        assert results_without_dates(pooled) == results_without_dates(inline)
+        assert pooled[0].result.model_version == active_model.version
+        assert pooled[-1].errors is not None
+
+    def test_unstarted_pool_scores_inline(self):
+        """Test that without a running pool scoring happens in this process."""
+        pool = ScoringPool(max_workers=1)
+        matrix = pack_features([CreditRiskRequest(**make_application(1))])
+        assert not pool.running
+        scored = asyncio.run(pool.score(matrix))
+        assert scored.risk_scores.tolist() == score_features(matrix).risk_scores.tolist()
+
+    def test_full_queue_rejects_new_work(self, pool):
+        """Test that calls beyond workers + max_queue are rejected unless they wait."""
+        matrix = pack_features([CreditRiskRequest(**make_application(i)) for i in range(20000)])
+
+        async def main(wait):
+            return await asyncio.gather(
+                pool.score(matrix), pool.score(matrix, wait=wait), return_exceptions=True
+            )
+
+        first, second = asyncio.run(main(wait=False))
+        assert first.risk_scores.shape == (20000,)
+        assert isinstance(second, ScoringPoolFull)
+        assert not any(isinstance(result, Exception) for result in asyncio.run(main(wait=True)))
+
+    def test_dead_worker_falls_back_and_restarts(self, pool):
+        """Test that a killed worker costs one inline call, not an error."""
+        matrix = pack_features([CreditRiskRequest(**make_application(1))])
+        asyncio.run(pool.score(matrix))
+        failures = SCORING_POOL_FAILURES._value.get()
+        for pid in list(pool._executor._processes):
+            os.kill(pid, signal.SIGKILL)
+
+        assert asyncio.run(pool.score(matrix)).risk_scores.tolist() == score_features(matrix).risk_scores.tolist()
+        assert SCORING_POOL_FAILURES._value.get() - failures == 1
+        assert pool.running
+        assert asyncio.run(pool.score(matrix)).risk_scores.shape == (1,)
+
+
+class TestBatchEndpointPool:
+    """Test cases for the batch endpoint's use of the scoring pool."""
+
+    def test_saturated_pool_returns_503(self, monkeypatch):
+        """Test that a full scoring queue is reported as temporarily unavailable."""
+        async def full(*args, **kwargs):
+            raise ScoringPoolFull("Scoring pool queue is full")
+
+        monkeypatch.setattr(scoring_pool_module.scoring_pool, "score", full)
+        response = client.post(
+            BATCH_URL,
+            json={"applications": [make_application(1)]},
+            headers={"Authorization": f"Bearer {generate_test_token()}"}
+        )
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
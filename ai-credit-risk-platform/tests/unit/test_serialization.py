@@ -0,0 +1,105 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from applications.api_gateway.auth import generate_test_token
+from applications.api_gateway.main import app
+from applications.api_gateway.models import CreditRiskResponse
+from applications.api_gateway.serialization import ModelResponse
+
+client = TestClient(app, headers={"Host": "localhost"})
+
+ASSESS_URL = "/api/v1/credit-risk/assess"
+TEST_URL = "/api/v1/credit-risk/test"
+
+APPLICATION = {
+    "applicant_id": "APP1",
+    "income": 25000.0,
+    "credit_score": 720,
+    "debt_ratio": 0.35,
+    "employment_years": 5,
+    "loan_amount": 250000.0,
+    "loan_purpose": "MORTGAGE",
+}
+
+
+@pytest.fixture
+def auth_headers():
+    return {"Authorization": f"Bearer {generate_test_token()}"}
+
+
+class TestModelResponse:
+    """Test cases for the pydantic-core JSON response class."""
+
+    def test_renders_models_like_model_dump_json(self):
+        """Test that a model is rendered as its own JSON serialization."""
+        model = CreditRiskResponse(
+            applicant_id="APP1",
+            risk_score=30,
+            risk_level="MEDIUM",
+            recommendation="REVIEW",
+            assessment_date=datetime(2024, 1, 15, 10, 30, tzinfo=timezone.utc),
+            assessor="system",
+            factors=["Low income"]
+        )
+        response = ModelResponse(model)
+        assert response.body == model.model_dump_json().encode()
+        assert response.headers["content-type"] == "application/json"
+
+    def test_renders_plain_values(self):
+        """Test that non-model content is still valid JSON."""
+        assert json.loads(ModelResponse({"ok": [1, 2]}).body) == {"ok": [1, 2]}
+
+
+class TestTypedAssessmentEndpoints:
+    """Test cases for typed request parsing and responses on assessment endpoints."""
+
+    def test_response_matches_credit_risk_response(self):
+        """Test that the test endpoint returns a complete CreditRiskResponse."""
+        response = client.post(TEST_URL, json=APPLICATION)
+        assert response.status_code == 200
+        data = CreditRiskResponse.model_validate_json(response.content)
+        assert data.applicant_id == "APP1"
+        assert data.risk_score == 30
+        assert data.factors == ["Low income"]
+        assert data.assessor == "test-system"
+
+    def test_assess_returns_credit_risk_response(self, auth_headers):
+        """Test that the authenticated endpoint returns a complete CreditRiskResponse."""
+        response = client.post(ASSESS_URL, json=APPLICATION, headers=auth_headers)
+        assert response.status_code == 200
+        data = CreditRiskResponse.model_validate_json(response.content)
+        assert data.applicant_id == "APP1"
+        assert data.assessor == "testuser"
+
+    def test_invalid_fields_are_rejected(self):
+        """Test that out-of-range and missing fields fail with 422."""
+        payload = {**APPLICATION, "credit_score": 900}
+        del payload["loan_purpose"]
+        response = client.post(TEST_URL, json=payload)
+        assert response.status_code == 422
+        locations = sorted(error["loc"] for error in response.json()["detail"])
+        assert locations == [["body", "credit_score"], ["body", "loan_purpose"]]
+
+    def test_malformed_json_is_rejected(self):
+        """Test that a body that is not JSON fails with 422 rather than 500."""
+        response = client.post(TEST_URL, content=b"{not json", headers={"Content-Type": "application/json"})
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["type"] == "json_invalid"
+
+    def test_authentication_is_checked_before_the_body(self):
+        """Test that unauthenticated requests are rejected before validation."""
+        assert client.post(ASSESS_URL, content=b"{not json").status_code == 403
+
+    def test_invalid_application_is_rejected_by_assess(self, auth_headers):
+        """Test that the authenticated endpoint validates its body too."""
+        response = client.post(ASSESS_URL, json={"income": 20000}, headers=auth_headers)
+        assert response.status_code == 422
+
+    def test_request_body_is_documented(self):
+        """Test that the OpenAPI schema still describes the request body."""
+        operation = app.openapi()["paths"][ASSESS_URL]["post"]
+        schema = operation["requestBody"]["content"]["application/json"]["schema"]
+        assert schema["title"] == "CreditRiskRequest"
+        assert "credit_score" in schema["required"]
@@ -0,0 +1,217 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import fakeredis
+import pytest
+from fastapi.testclient import TestClient
+from redis.exceptions import ConnectionError as RedisConnectionError
+from applications.api_gateway import auth
+from applications.api_gateway.auth import generate_test_token
+from applications.api_gateway.main import app
+from applications.api_gateway.sessions import (
+    TOKEN_REVOCATION_CHECKS,
+    BloomFilter,
+    SessionStore,
+    revoked_key,
+    session_store,
+    user_sessions_key,
+)
+
+client = TestClient(app, headers={"Host": "localhost"})
+
+
+def counter_value(counter, **labels) -> float:
+    return counter.labels(**labels)._value.get()
+
+
+def expires_in(seconds: float) -> datetime:
+    return datetime.now(timezone.utc) + timedelta(seconds=seconds)
+
+
+def bearer(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+class FailingRedis:
+    """Redis stand-in whose every call fails as if the server were down."""
+
+    async def exists(self, key):
+        raise RedisConnectionError("Connection refused")
+
+
+@pytest.fixture
+def run():
+    # Redis connections are bound to the loop that opened them
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def store(server):
+    return SessionStore(redis=fakeredis.aioredis.FakeRedis(server=server))
+
+
+@pytest.fixture
+def shared_redis(server):
+    original = session_store.redis
+    session_store.redis = fakeredis.aioredis.FakeRedis(server=server)
+    session_store._redis_down_until = 0.0  # an earlier test may have found no real Redis
+    auth.token_cache.clear()
+    yield fakeredis.FakeRedis(server=server)
+    session_store.redis = original
+    auth.token_cache.clear()
+
+
+async def wait_for(condition, timeout: float = 5.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+class TestBloomFilter:
+    """Test cases for the revoked token ID filter."""
+
+    def test_added_keys_are_always_found(self):
+        """Test that the filter has no false negatives."""
+        keys = [uuid.uuid4().hex for _ in range(5000)]
+        bloom = BloomFilter(capacity=5000, error_rate=0.01)
+        for key in keys:
+            bloom.add(key)
+        assert all(key in bloom for key in keys)
+        assert bloom.count == 5000
+
+    def test_false_positive_rate_matches_the_target(self):
+        """Test that a full filter reports about error_rate of unknown keys."""
+        bloom = BloomFilter(capacity=10000, error_rate=0.01)
+        for _ in range(10000):
+            bloom.add(uuid.uuid4().hex)
+        false_positives = sum(uuid.uuid4().hex in bloom for _ in range(20000))
+        assert false_positives / 20000 < 0.02
+
+
+class TestSessionStore:
+    """Test cases for sessions and revocation in Redis."""
+
+    def test_sessions_are_listed_until_revoked(self, run, store, server):
+        """Test that a user's sessions are listed, and revoking one ends it everywhere."""
+        first, second = uuid.uuid4().hex, uuid.uuid4().hex
+        issued_at = datetime.now(timezone.utc)
+        run(store.open_session("alice", first, issued_at, expires_in(60)))
+        run(store.open_session("alice", second, issued_at + timedelta(seconds=1), expires_in(60)))
+        assert [session.session_id for session in run(store.list_sessions("alice"))] == [first, second]
+
+        run(store.revoke(first, "alice", expires_in(60)))
+        assert [session.session_id for session in run(store.list_sessions("alice"))] == [second]
+        assert run(store.is_revoked(first)) and not run(store.is_revoked(second))
+        redis = fakeredis.FakeRedis(server=server)
+        assert 0 < redis.ttl(revoked_key(first)) <= 60
+        assert 0 < redis.ttl(user_sessions_key("alice")) <= 60
+
+    def test_synced_filter_answers_without_redis(self, run, store):
+        """Test that once synced, tokens the filter has not seen are accepted in process."""
+        store.synced = True
+        store.redis = FailingRedis()
+        misses = counter_value(TOKEN_REVOCATION_CHECKS, result="filter_miss")
+        assert not run(store.is_revoked(uuid.uuid4().hex))
+        assert counter_value(TOKEN_REVOCATION_CHECKS, result="filter_miss") - misses == 1
+
+    def test_filter_hits_are_confirmed_in_redis(self, run, store):
+        """Test that a filter hit for a token that was not revoked still passes."""
+        store.synced = True
+        token_id = uuid.uuid4().hex
+        store.filter.add(token_id)  # as if a false positive
+        assert not run(store.is_revoked(token_id))
+
+    def test_revocations_reach_other_workers(self, run, server):
+        """Test that a worker learns of earlier and new revocations from Redis."""
+        earlier, later = uuid.uuid4().hex, uuid.uuid4().hex
+        revoking = SessionStore(redis=fakeredis.aioredis.FakeRedis(server=server))
+        watching = SessionStore(redis=fakeredis.aioredis.FakeRedis(server=server))
+
+        async def scenario():
+            await revoking.revoke(earlier, "alice", expires_in(60))
+            watching.start()
+            await wait_for(lambda: watching.synced)
+            assert earlier in watching.filter
+            await revoking.revoke(later, "alice", expires_in(60))
+            await wait_for(lambda: later in watching.filter)
+            await watching.close()
+
+        run(scenario())
+        assert not watching.synced
+
+    def test_unreachable_redis_fails_open_or_closed(self, run):
+        """Test that an unsynced worker without Redis follows fail_open."""
+        token_id = uuid.uuid4().hex
+        assert not run(SessionStore(redis=FailingRedis()).is_revoked(token_id))
+        assert run(SessionStore(redis=FailingRedis(), fail_open=False).is_revoked(token_id))
+
+
+    def test_filter_hits_stay_revoked_without_redis(self, run, store):
+        """Test that failing open never accepts a token the filter reports as revoked."""
+        token_id = uuid.uuid4().hex
+        run(store.revoke(token_id, "alice", expires_in(60)))
+        store.redis = FailingRedis()
+        assert run(store.is_revoked(token_id))
+        store.synced = True
+        assert run(store.is_revoked(token_id))
+        assert not run(store.is_revoked(uuid.uuid4().hex))
+
+
+class TestSessionEndpoints:
+    """Test cases for logout and session management."""
+
+    def login(self, client: TestClient) -> str:
+        response = client.post("/api/v1/auth/login", json={"username": "testuser", "password": "testpassword"})
+        assert response.status_code == 200
+        return response.json()["access_token"]
+
+    def test_logout_revokes_the_token(self, shared_redis):
+        """Test that a token stops working once its session is logged out."""
+        # One event loop for the whole exchange, as in a running worker
+        with TestClient(app, headers={"Host": "localhost"}) as client:
+            token = self.login(client)
+            assert client.get("/api/v1/me", headers=bearer(token)).status_code == 200
+
+            assert client.post("/api/v1/auth/logout", headers=bearer(token)).status_code == 204
+            assert client.get("/api/v1/me", headers=bearer(token)).status_code == 401
+            assert client.get("/api/v1/me", headers=bearer(generate_test_token())).status_code == 200
+
+    def test_sessions_can_be_listed_and_ended(self, shared_redis):
+        """Test that users see their sessions and can end another one, but not someone else's."""
+        with TestClient(app, headers={"Host": "localhost"}) as client:
+            lost_device = self.login(client)
+            token = self.login(client)
+            response = client.get("/api/v1/auth/sessions", headers=bearer(token))
+            assert response.status_code == 200
+            sessions = response.json()
+            assert len(sessions) == 2
+            assert [session["current"] for session in sessions] == [False, True]
+
+            lost_id = sessions[0]["session_id"]
+            assert client.delete(f"/api/v1/auth/sessions/{lost_id}", headers=bearer(token)).status_code == 204
+            assert client.get("/api/v1/me", headers=bearer(lost_device)).status_code == 401
+            assert client.get("/api/v1/me", headers=bearer(token)).status_code == 200
+
+            other_user = uuid.uuid4().hex
+            shared_redis.sadd(user_sessions_key("someone-else"), other_user)
+            assert client.delete(f"/api/v1/auth/sessions/{other_user}", headers=bearer(token)).status_code == 404
+            assert not shared_redis.exists(revoked_key(other_user))
+
+    def test_unreachable_store_is_a_503(self, shared_redis):
+        """Test that logout reports the session store being down rather than pretending."""
+        session_store._redis_down_until = float("inf")
+        try:
+            response = client.post("/api/v1/auth/logout", headers=bearer(generate_test_token()))
+        finally:
+            session_store._redis_down_until = 0.0
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"